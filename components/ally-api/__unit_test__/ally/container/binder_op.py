@@ -17,6 +17,7 @@ if True:
 # --------------------------------------------------------------------
 
 from ally.api.config import model, service, call
+from ally.api.type import Iter
 from ally.container.binder_op import validateAutoId, validateMaxLength, \
     validateManaged, bindValidations, validateRequired
 from ally.container.proxy import proxyWrapFor
@@ -46,6 +47,11 @@ class IServiceEntity:
         '''
         '''
 
+    @call
+    def insertAll(self, entities:Iter(Entity)) -> str:
+        '''
+        '''
+
 class DummyServiceEntity(IServiceEntity):
 
     def update(self, entity):
@@ -58,6 +64,12 @@ class DummyServiceEntity(IServiceEntity):
         '''
         return 'inserted'
 
+    def insertAll(self, entities):
+        '''
+        '''
+        self.inserted = list(entities)
+        return 'inserted all'
+
     def _hidden(self):
         return 'Hidden'
 
@@ -116,6 +128,20 @@ class TestBinderOp(unittest.TestCase):
 
         self.assertRaises(AttributeError, getattr, proxySrv, '_hidden')
 
+        valid, invalid = Entity(), Entity()
+        valid.Required = invalid.Required = 'required'
+        invalid.WithLength = 'This is a longer text then 5'
+        invalid.Managed = 'should not have value'
+        try: proxySrv.insertAll([valid, Entity(), invalid])
+        except InputError as e: self.assertEqual(3, len(e.message))
+        else: self.fail('Expected an input error')
+        self.assertTrue(proxySrv.insertAll([valid]) == 'inserted all')
+
+        other = Entity()
+        other.Required = 'other'
+        self.assertTrue(proxySrv.insertAll(entity for entity in (valid, other)) == 'inserted all')
+        self.assertEqual([valid, other], dummyService.inserted)
+
 # --------------------------------------------------------------------
 
 if __name__ == '__main__': unittest.main()
@@ -19,27 +19,44 @@ class IterPart(Iterable):
     '''
     Provides a wrapping for iterable objects that represent a part of a bigger collection. Basically beside the actual
     items this class objects also contain a total count of the big item collection that this iterable is part of.
+    For keyset pagination the part also contains the cursor to fetch the items after this part, the part can also
+    contain the mode that provided the total.
     '''
     total = int
     offset = int
     limit = int
+    after = str
+    totalMode = str
 
-    def __init__(self, wrapped, total, offset=None, limit=None):
+    def __init__(self, wrapped, total, offset=None, limit=None, after=None, totalMode=None):
         '''
         Construct the partial iterable.
         
         @param wrapped: Iterable
             The iterable that provides the actual data.
+        @param total: integer|None
+            The total count of the collection, None if the total is not known.
+        @param after: string|None
+            The cursor for fetching the part after this part, None if there are no more items or the part is not
+            fetched with keyset pagination.
+        @param totalMode: string|None
+            The mode that provided the total, like 'query' for a total counted with a separate query, 'window' for a
+            total counted in the same statement as the items, 'approximate' for a total that can be stale or 'more'
+            for a total that is None if there are more items after this part.
         '''
         assert isinstance(wrapped, Iterable), 'Invalid iterable %s' % wrapped
+        assert after is None or isinstance(after, str), 'Invalid after cursor %s' % after
+        assert totalMode is None or isinstance(totalMode, str), 'Invalid total mode %s' % totalMode
 
         self.wrapped = wrapped
         self.total = total
         if offset is None: self.offset = 0
         else: self.offset = offset
         if limit is None: self.limit = total
-        elif limit > total: self.limit = total
+        elif total is not None and limit > total: self.limit = total
         else: self.limit = limit
+        self.after = after
+        self.totalMode = totalMode
 
     def __iter__(self): return self.wrapped.__iter__()
 
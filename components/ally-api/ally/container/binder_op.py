@@ -12,7 +12,7 @@ Provides binding listener function to handle API operators validation.
 from ..api.config import INSERT, UPDATE
 from ..api.operator.container import Call
 from ..api.operator.type import TypeModel, TypeModelProperty, TypeService
-from ..api.type import typeFor
+from ..api.type import typeFor, Iter
 from ..exception import InputError, Ref
 from ..internationalization import _
 from .binder import bindListener, callListeners, registerProxyBinder, \
@@ -163,12 +163,14 @@ def bindValidations(proxy, mappings=None):
             for k, inp in enumerate(call.inputs):
                 assert isinstance(inp, Input)
                 typ = inp.type
+                isCollection = isinstance(typ, Iter)
+                if isCollection: typ = typ.itemType
                 if isinstance(typ, TypeModel):
                     if typ.clazz in mappings:
                         typ = typeFor(mappings[typ.clazz])
                         assert isinstance(typ, TypeModel), 'Invalid model mapping class %s' % mappings[typ.clazz]
                     if isinstance(typ.clazz, BindableSupport):
-                        positions[k] = typ
+                        positions[k] = Iter(typ) if isCollection else typ
             if positions:
                 bindBeforeListener(getattr(proxy, call.name),
                                    partial(onCallValidateModel, call.method == INSERT, positions))
@@ -275,9 +277,10 @@ def onCallValidateModel(onInsert, positions, args, keyargs):
     
     @param onInsert: boolean
         Flag indicating that the validation should be performed for insert if True, False for update.
-    @param positions: dictionary{integer:TypeModel}
+    @param positions: dictionary{integer:TypeModel|Iter}
         As a key the indexes in the arguments (args) where to find the model(s) entity(s) to perform validations on and
-        as a value the TypeModel for that position.
+        as a value the TypeModel for that position, for a collection of entities the value is the Iter of the TypeModel
+        and the errors of all the entities are collected in the same input error.
     @param args: arguments
         The arguments of the call invocation.
     @param keyargs: key arguments
@@ -291,15 +294,23 @@ def onCallValidateModel(onInsert, positions, args, keyargs):
         typ = positions.get(k)
         if typ is None: continue
 
+        if isinstance(typ, Iter):
+            assert isinstance(typ, Iter)
+            # The collection is provided as a list to the call since the validation iterates it.
+            typ, objs = typ.itemType, list(obj)
+            args[k] = objs
+        else: objs = (obj,)
+
         assert isinstance(typ, TypeModel), 'Invalid model type %s for index %s' % (typ, k)
-        assert typ.isValid(obj), 'Invalid object %s for %s' % (obj, typ)
-        if onInsert:
-            if callListeners(typ.clazz, EVENT_MODEL_INSERT, obj, errors):
-                for prop in typ.container.properties:
-                    callListeners(typ.clazz, EVENT_PROP_INSERT % prop, prop, obj, errors)
-        else:
-            if callListeners(typ.clazz, EVENT_MODEL_UPDATE, obj, errors):
-                for prop in typ.container.properties:
-                    callListeners(typ.clazz, EVENT_PROP_UPDATE % prop, prop, obj, errors)
+        for obj in objs:
+            assert typ.isValid(obj), 'Invalid object %s for %s' % (obj, typ)
+            if onInsert:
+                if callListeners(typ.clazz, EVENT_MODEL_INSERT, obj, errors):
+                    for prop in typ.container.properties:
+                        callListeners(typ.clazz, EVENT_PROP_INSERT % prop, prop, obj, errors)
+            else:
+                if callListeners(typ.clazz, EVENT_MODEL_UPDATE, obj, errors):
+                    for prop in typ.container.properties:
+                        callListeners(typ.clazz, EVENT_PROP_UPDATE % prop, prop, obj, errors)
 
     if errors: raise InputError(*errors)
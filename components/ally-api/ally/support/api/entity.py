@@ -55,7 +55,7 @@ class IEntityFindService:
     '''
 
     @call
-    def getAll(self, offset:int=None, limit:int=LIMIT_DEFAULT, detailed:bool=True) -> Iter(Entity):
+    def getAll(self, offset:int=None, limit:int=LIMIT_DEFAULT, detailed:bool=True, after:str=None) -> Iter(Entity):
         '''
         Provides the entities.
         
@@ -65,13 +65,17 @@ class IEntityFindService:
             The limit of entities to retrieve.
         @param detailed: boolean
             If true will present the total count, limit and offset for the partially returned collection.
+        @param after: string
+            The cursor to retrieve the entities after, provided as after by the previous collection, use an empty
+            cursor to start the keyset pagination.
         '''
 
 @service
 class IEntityQueryService:
 
     @call
-    def getAll(self, offset:int=None, limit:int=LIMIT_DEFAULT, detailed:bool=True, q:QEntity=None) -> Iter(Entity):
+    def getAll(self, offset:int=None, limit:int=LIMIT_DEFAULT, detailed:bool=True, q:QEntity=None,
+               after:str=None) -> Iter(Entity):
         '''
         Provides the entities searched by the provided query.
         
@@ -83,6 +87,9 @@ class IEntityQueryService:
             If true will present the total count, limit and offset for the partially returned collection.
         @param q: QEntity
             The query to search by.
+        @param after: string
+            The cursor to retrieve the entities after, provided as after by the previous collection, use an empty
+            cursor to start the keyset pagination. The entities are positioned by the query ordering and the id.
         '''
 
 @service
@@ -140,3 +147,45 @@ class IEntityService(IEntityGetService, IEntityQueryService, IEntityCRUDService)
     '''
     Provides the find, CRUD and query entity services.
     '''
+
+@service
+class IEntityBulkService:
+    '''
+    Provides the entity bulk services, the services that need the bulk insert, update and delete need to extend this
+    service next to the CRUD service.
+    '''
+
+    @call(webName='Bulk')
+    def insertAll(self, entities:Iter(Entity)) -> Iter(Entity.Id):
+        '''
+        Insert all the entities in one batch, also the entities will have automatically assigned the Id to them. Either
+        all the entities are inserted or none.
+        
+        @param entities: Iterable(Entity)
+            The entities to be inserted.
+        
+        @return: The ids assigned to the entities, in the order of the provided entities.
+        @raise InputError: If any of the entities is not valid, the error contains the problems of all the entities.
+        '''
+
+    @call(webName='Bulk')
+    def updateAll(self, entities:Iter(Entity)):
+        '''
+        Update all the entities in one batch, either all the entities are updated or none.
+        
+        @param entities: Iterable(Entity)
+            The entities to be updated.
+        
+        @raise InputError: If any of the entities is not valid, the error contains the problems of all the entities.
+        '''
+
+    @call(webName='Bulk')
+    def deleteAll(self, entities:Iter(Entity)) -> bool:
+        '''
+        Delete in one batch the entities for the ids of the provided entities.
+        
+        @param entities: Iterable(Entity)
+            The entities to be deleted, only the entities ids are used.
+            
+        @return: True if all the entities have been deleted, false otherwise.
+        '''
@@ -12,10 +12,12 @@ Provides the configurations for the processors used in handling the request.
 from ..ally_core.encoder_decoder import parsingAssembly
 from ..ally_core.processor import argumentsBuild, argumentsPrepare, \
     assemblyResources, updateAssemblyResources, createEncoder, renderEncoder, \
-    explainError, methodInvoker, invoking, parser, default_characterset
+    explainError, methodInvoker, invoking, parser, default_characterset, \
+    encoder_stream_size
 from ..ally_core.resources import resourcesRoot
 from ..ally_http.processor import header, contentTypeDecode, contentLengthDecode, \
-    contentTypeEncode, contentLengthEncode
+    contentTypeEncode, contentLengthEncode, contentEncodingEncode, compress_content, \
+    etagEncode, etag_content
 from ..ally_http.server import pathAssemblies
 from ally.container import ioc
 from ally.core.http.impl.processor.encoder import CreateEncoderPathHandler
@@ -26,6 +28,7 @@ from ally.core.http.impl.processor.headers.content_disposition import \
     ContentDispositionDecodeHandler
 from ally.core.http.impl.processor.headers.content_language import \
     ContentLanguageDecodeHandler, ContentLanguageEncodeHandler
+from ally.core.http.impl.processor.headers.etag import ETagValidatorHandler
 from ally.core.http.impl.processor.internal_error import \
     InternalDevelErrorHandler
 from ally.core.http.impl.processor.method import MethodHandler
@@ -33,6 +36,7 @@ from ally.core.http.impl.processor.parameter import ParameterHandler
 from ally.core.http.impl.processor.parsing_multipart import \
     ParsingMultiPartHandler
 from ally.core.http.impl.processor.redirect import RedirectHandler
+from ally.core.http.impl.processor.response_cache import ResponseCacheHandler
 from ally.core.http.impl.processor.uri import URIHandler
 from ally.core.spec.resources import ConverterPath
 from ally.design.processor import Handler, Assembly
@@ -58,6 +62,40 @@ def allow_method_override():
     '''
     return True
 
+@ioc.config
+def fetch_batch_size() -> int:
+    '''
+    The number of collection items for which the models requested by X-Filter are fetched at once, this is used only
+    if the service implementation that provides the model also has a 'getByIds' method
+    '''
+    return 100
+
+@ioc.config
+def response_cache() -> bool:
+    '''
+    If true will cache in memory the rendered GET responses, the requests that have the 'Authorization' or 'Cookie'
+    headers are not cached. The cached responses are invalidated when an insert, update or delete is made through the
+    REST resources of this application process on the models used by the cached response, the data changes made
+    directly in the database, by other applications or by other processes of this application are only reflected after
+    the cached responses expire, so enable this only for a single process server.
+    '''
+    return False
+
+@ioc.config
+def response_cache_entries() -> int:
+    '''The maximum number of cached responses, the least recently used responses are removed first'''
+    return 1000
+
+@ioc.config
+def response_cache_size() -> int:
+    '''The maximum size in bytes of a cached response, larger responses are not cached'''
+    return 131072
+
+@ioc.config
+def response_cache_time_to_live() -> int:
+    '''The number of seconds that a response is cached'''
+    return 300
+
 # --------------------------------------------------------------------
 
 @ioc.entity
@@ -90,6 +128,9 @@ def contentLanguageEncode() -> Handler: return ContentLanguageEncodeHandler()
 @ioc.entity
 def allowEncode() -> Handler: return AllowEncodeHandler()
 
+@ioc.entity
+def etagValidator() -> Handler: return ETagValidatorHandler()
+
 # --------------------------------------------------------------------
 
 @ioc.entity
@@ -106,7 +147,11 @@ def parameter() -> Handler: return ParameterHandler()
 def fetcher() -> Handler: return FetcherHandler()
 
 @ioc.replace(createEncoder)
-def createEncoderPath() -> Handler: return CreateEncoderPathHandler()
+def createEncoderPath() -> Handler:
+    b = CreateEncoderPathHandler()
+    b.streamSize = encoder_stream_size()
+    b.fetchSize = fetch_batch_size()
+    return b
 
 @ioc.replace(parser)
 def parserMultiPart() -> Handler:
@@ -122,6 +167,15 @@ def redirect() -> Handler:
     b.redirectAssembly = assemblyRedirect()
     return b
 
+@ioc.entity
+def responseCache() -> Handler:
+    b = ResponseCacheHandler()
+    b.cacheAssembly = assemblyResponseCache()
+    b.maximumEntries = response_cache_entries()
+    b.maximumSize = response_cache_size()
+    b.timeToLive = response_cache_time_to_live()
+    return b
+
 # --------------------------------------------------------------------
 
 @ioc.entity
@@ -138,6 +192,13 @@ def assemblyRedirect() -> Assembly:
     '''
     return Assembly()
 
+@ioc.entity
+def assemblyResponseCache() -> Assembly:
+    '''
+    The assembly containing the handlers that provide the response content that is cached.
+    '''
+    return Assembly()
+
 # --------------------------------------------------------------------
 
 @ioc.before(pathAssemblies)
@@ -156,9 +217,18 @@ def updateAssemblyResourcesForHTTP():
 
     assemblyResources().add(contentTypeEncode(), contentLanguageEncode(), allowEncode(), after=renderEncoder())
     assemblyResources().add(contentLengthEncode(), after=explainError())
+    if compress_content(): assemblyResources().add(contentEncodingEncode(), before=contentLengthEncode())
+    if etag_content():
+        assemblyResources().add(etagValidator(), before=renderEncoder())
+        assemblyResources().add(etagEncode(), before=contentLengthEncode())
 
     if allow_method_override(): assemblyResources().add(method(), before=uri())
 
+    if response_cache():
+        assemblyResources().replace(invoking(), responseCache())
+        assemblyResources().remove(renderEncoder())
+        if etag_content(): assemblyResources().remove(etagValidator())
+
 @ioc.before(assemblyMultiPartPopulate)
 def updateAssemblyMultiPartPopulate():
     assemblyMultiPartPopulate().add(header(), contentTypeDecode(), contentDispositionDecode())
@@ -166,3 +236,8 @@ def updateAssemblyMultiPartPopulate():
 @ioc.before(assemblyRedirect)
 def updateAssemblyRedirect():
     assemblyRedirect().add(argumentsBuild(), invoking())
+
+@ioc.before(assemblyResponseCache)
+def updateAssemblyResponseCache():
+    assemblyResponseCache().add(invoking(), renderEncoder())
+    if etag_content(): assemblyResponseCache().add(etagValidator(), before=renderEncoder())
@@ -0,0 +1,119 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Models fetching testing.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.config import model, service, call, GET
+from ally.api.type import typeFor, Input, Iter
+from ally.container import ioc
+from ally.core.http.impl.processor.fetcher import FetcherInvoker, Fetcher, \
+    FetcherHandler
+from ally.core.impl.invoker import InvokerFunction, InvokerCall
+import unittest
+
+# --------------------------------------------------------------------
+
+@model(id='Id')
+class Article:
+    Id = int
+    Name = str
+
+def article(id):
+    model = Article()
+    model.Id = id
+    return model
+
+@service
+class IArticleService:
+
+    @call
+    def getById(self, id:Article.Id) -> Article:
+        '''
+        Nothing.
+        '''
+
+    @call
+    def getOriginal(self, id:Article.Id) -> Article:
+        '''
+        Nothing.
+        '''
+
+class ArticleService(IArticleService):
+
+    def getById(self, id): return article(id)
+
+    def getOriginal(self, id): return article(id)
+
+    def getByIds(self, ids): return [article(id) for id in ids]
+
+class ArticleServiceOverride(ArticleService):
+
+    def getById(self, id): return article(-id)
+
+# --------------------------------------------------------------------
+
+class TestFetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.calls, self.callsAll = [], []
+
+        def getById(id):
+            self.calls.append(id)
+            return article(id)
+
+        def getByIds(ids):
+            self.callsAll.append(sorted(ids))
+            return [article(id) for id in ids if id < 10]
+
+        main = InvokerFunction(GET, lambda: None, Iter(typeFor(Article.Id)), [], {})
+        get = InvokerFunction(GET, getById, typeFor(Article), [Input('id', typeFor(Article.Id))], {})
+
+        self.fetcherInvoker = FetcherInvoker(main)
+        self.fetcherInvoker.addFetch(Article, get, [None], (getByIds, 'Id'))
+        self.fetcherInvokerOne = FetcherInvoker(main)
+        self.fetcherInvokerOne.addFetch(Article, get, [None])
+
+    def testFetchAll(self):
+        fetcher = Fetcher(self.fetcherInvoker, ())
+        fetcher.fetchAll(Article, [1, 2, 2, None, 11])
+        fetcher.fetchAll(Article, [1, 2])
+        self.assertEqual([[1, 2, 11]], self.callsAll)
+
+        for id in (1, 2, 11): self.assertEqual(id, fetcher.fetch(Article, id).Id)
+        self.assertEqual([11], self.calls)
+
+    def testFetchOneByOne(self):
+        fetcher = Fetcher(self.fetcherInvokerOne, ())
+        fetcher.fetchAll(Article, [1, 2])
+        for id in (1, 2, 1): self.assertEqual(id, fetcher.fetch(Article, id).Id)
+        self.assertEqual([1, 2], self.calls)
+        self.assertEqual([], self.callsAll)
+
+    def testFetchAllFor(self):
+        handler = FetcherHandler()
+        ioc.initialize(handler)
+        calls = typeFor(IArticleService).service.calls
+
+        implementation = ArticleService()
+        fetchAll = handler.fetchAllFor(InvokerCall(implementation, calls['getById']), [None])
+        self.assertEqual((implementation.getByIds, 'Id'), fetchAll)
+        self.assertIsNone(handler.fetchAllFor(InvokerCall(implementation, calls['getById']), [None, 0]))
+        self.assertIsNone(handler.fetchAllFor(InvokerCall(implementation, calls['getOriginal']), [None]))
+        self.assertIsNone(handler.fetchAllFor(InvokerCall(ArticleServiceOverride(), calls['getById']), [None]))
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,205 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Response cache testing.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.config import model, GET, UPDATE
+from ally.api.type import typeFor, Input, Iter
+from ally.container import ioc
+from ally.core.http.impl.processor.response_cache import ResponseCacheHandler, \
+    normalize
+from ally.core.impl.invoker import InvokerFunction
+from ally.core.spec.resources import Invoker
+from ally.design.context import Context, defines, requires
+from ally.design.processor import Assembly, Chain, HandlerProcessorProceed
+from ally.http.impl.processor.header import HeaderHandler
+from collections import Iterable
+import unittest
+
+# --------------------------------------------------------------------
+
+@model(id='Id')
+class Article:
+    Id = int
+    Name = str
+
+@model(id='Id')
+class Author:
+    Id = int
+    Name = str
+
+# --------------------------------------------------------------------
+
+class Request(Context):
+    headers = defines(dict)
+    method = defines(int)
+    invoker = defines(Invoker)
+    arguments = defines(dict)
+
+class Response(Context):
+    pass
+
+class ResponseContent(Context):
+    source = defines(Iterable)
+    length = defines(int)
+
+class RequestRender(Context):
+    arguments = requires(dict)
+
+class ResponseContentRender(Context):
+    source = defines(Iterable)
+
+class RenderHandler(HandlerProcessorProceed):
+
+    def __init__(self):
+        super().__init__()
+        self.renders = 0
+        self.streamed = False
+        self.rendering = None
+
+    def process(self, request:RequestRender, responseCnt:ResponseContentRender, **keyargs):
+        self.renders += 1
+        content = ('%s' % request.arguments).encode()
+        if self.streamed: responseCnt.source = self.stream(content)
+        else:
+            self.interleave()
+            responseCnt.source = (content,)
+
+    def stream(self, content):
+        yield content
+        self.interleave()
+        yield b'.'
+
+    def interleave(self):
+        rendering, self.rendering = self.rendering, None
+        if rendering: rendering()
+
+# --------------------------------------------------------------------
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        header = HeaderHandler()
+        ioc.initialize(header)
+
+        self.render = RenderHandler()
+        assemblyCache = Assembly()
+        assemblyCache.add(self.render)
+
+        self.cache = ResponseCacheHandler()
+        self.cache.cacheAssembly = assemblyCache
+        self.cache.maximumEntries = 2
+        ioc.initialize(self.cache)
+
+        assembly = Assembly()
+        assembly.add(header, self.cache)
+        self.processing = assembly.create(request=Request, response=Response, responseCnt=ResponseContent)
+
+        self.getArticle = InvokerFunction(GET, lambda id: None, typeFor(Article), [Input('id', typeFor(int))], {})
+        self.getArticles = InvokerFunction(GET, lambda: None, Iter(typeFor(Article)), [], {})
+        self.updateArticle = InvokerFunction(UPDATE, lambda article: None, typeFor(bool),
+                                             [Input('article', typeFor(Article))], {})
+        self.updateAuthor = InvokerFunction(UPDATE, lambda author: None, typeFor(bool),
+                                            [Input('author', typeFor(Author))], {})
+
+    def process(self, invoker, headers=None, **arguments):
+        source = self.processSource(invoker, headers, **arguments)
+        return b''.join(source) if source is not None else None
+
+    def processSource(self, invoker, headers=None, **arguments):
+        contexts = self.processing.contexts
+        request, response, responseCnt = contexts['request'](), contexts['response'](), contexts['responseCnt']()
+        request.headers = headers or {}
+        request.method = invoker.method
+        request.invoker = invoker
+        request.arguments = arguments
+        Chain(self.processing).process(request=request, response=response, responseCnt=responseCnt).doAll()
+        return responseCnt.source
+
+    def testCache(self):
+        content = self.process(self.getArticle, id=1)
+        self.assertEqual(content, self.process(self.getArticle, id=1))
+        self.assertEqual(1, self.render.renders)
+
+        self.process(self.getArticle, id=2)
+        self.process(self.getArticle, {'X-Filter': 'Name'}, id=1)
+        self.assertEqual(3, self.render.renders)
+        self.assertEqual(dict(entries=2, hits=1, misses=3, invalidations=0), self.cache.statistics())
+
+        self.process(self.getArticle, id=2)
+        self.assertEqual(3, self.render.renders)
+
+    def testCredentials(self):
+        self.process(self.getArticle, {'Authorization': 'session'}, id=1)
+        self.process(self.getArticle, {'Authorization': 'session'}, id=1)
+        self.process(self.getArticle, {'Cookie': 'session=1'}, id=1)
+        self.assertEqual(3, self.render.renders)
+        self.assertEqual(0, self.cache.statistics()['entries'])
+
+        self.process(self.getArticle, id=1)
+        self.process(self.getArticle, id=1)
+        self.assertEqual(4, self.render.renders)
+
+    def testInvalidate(self):
+        self.process(self.getArticle, id=1)
+        self.process(self.getArticles)
+
+        self.process(self.updateAuthor, author=None)
+        self.process(self.getArticle, id=1)
+        self.process(self.getArticles)
+        self.assertEqual(3, self.render.renders)
+
+        self.process(self.updateArticle, article=None)
+        self.assertEqual(0, self.cache.statistics()['entries'])
+        self.process(self.getArticle, id=1)
+        self.process(self.getArticles)
+        self.assertEqual(6, self.render.renders)
+        self.assertEqual(1, self.cache.statistics()['invalidations'])
+
+    def testInvalidateWhileRendering(self):
+        self.render.rendering = lambda: self.process(self.updateArticle, article=None)
+        self.process(self.getArticle, id=1)
+        self.assertEqual(0, self.cache.statistics()['entries'])
+
+        self.process(self.getArticle, id=1)
+        self.process(self.getArticle, id=1)
+        self.assertEqual(3, self.render.renders)
+
+    def testInvalidateWhileStreaming(self):
+        self.render.streamed = True
+        source = self.processSource(self.getArticle, id=1)
+        content = next(source)
+        self.process(self.updateArticle, article=None)
+        self.assertEqual(content + b'.', content + b''.join(source))
+        self.assertEqual(0, self.cache.statistics()['entries'])
+
+        self.render.rendering = lambda: self.process(self.updateAuthor, author=None)
+        self.process(self.getArticle, id=1)
+        self.assertEqual(1, self.cache.statistics()['entries'])
+
+        self.process(self.getArticle, id=1)
+        self.assertEqual(4, self.render.renders)
+
+    def testNormalize(self):
+        article = Article()
+        article.Id, article.Name = 1, 'Name'
+        self.assertEqual((Article, (('Id', 1), ('Name', 'Name'))), normalize(article))
+        self.assertEqual((1, ('a', 'b')), normalize([1, ('a', 'b')]))
+        self.assertRaises(ValueError, normalize, object())
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -9,6 +9,7 @@ Created on Jun 22, 2012
 Provides the meta creation for encoding the response.
 '''
 
+from ally.api.extension import IterPart
 from ally.api.operator.container import Model
 from ally.api.operator.type import TypeModel, TypeModelProperty
 from ally.api.type import Type, TypeReference
@@ -18,7 +19,7 @@ from ally.core.http.spec.transform.support_model import DataModel, NO_MODEL_PATH
     IFetcher
 from ally.core.impl.processor import encoder
 from ally.core.impl.processor.encoder import CreateEncoderHandler, EncodeObject, \
-    EncodeCollection
+    EncodeCollection, isFlat
 from ally.core.spec.resources import Path, Normalizer, Invoker
 from ally.core.spec.transform.exploit import handleExploitError
 from ally.core.spec.transform.render import IRender
@@ -29,6 +30,7 @@ from ally.support.core.util_resources import pathLongName, findGetModel, \
     findGetAllAccessible
 from ally.support.util import lastCheck
 from collections import deque, OrderedDict
+from itertools import islice
 
 # --------------------------------------------------------------------
 
@@ -38,6 +40,7 @@ class Request(encoder.Request):
     '''
     # ---------------------------------------------------------------- Required
     path = requires(Path)
+    parameters = requires(list)
 
 class Response(encoder.Response):
     '''
@@ -72,6 +75,14 @@ class CreateEncoderPathHandler(CreateEncoderHandler):
     # Separator used for filter names.
     valueDenied = 'denied'
     # Values used to set on the x filter attribute when the fetching is denied
+    fetchSize = 100
+    # The number of collection items for which the filtered models are fetched at once.
+    nameNext = 'next'
+    # The attribute name for the reference of the next collection part when using keyset pagination.
+    parameterAfter = 'after'
+    # The parameter name for the keyset pagination cursor.
+    parameterOffset = 'offset'
+    # The parameter name for the offset, the offset is not used in the next collection part reference.
 
     def __init__(self):
         '''
@@ -83,6 +94,10 @@ class CreateEncoderPathHandler(CreateEncoderHandler):
         assert isinstance(self.nameAll, str), 'Invalid filter name all %s' % self.nameAll
         assert isinstance(self.separatorNames, str), 'Invalid names separator %s' % self.separatorNames
         assert isinstance(self.valueDenied, str), 'Invalid value denied %s' % self.valueDenied
+        assert isinstance(self.fetchSize, int), 'Invalid fetch size %s' % self.fetchSize
+        assert isinstance(self.nameNext, str), 'Invalid next name %s' % self.nameNext
+        assert isinstance(self.parameterAfter, str), 'Invalid after parameter name %s' % self.parameterAfter
+        assert isinstance(self.parameterOffset, str), 'Invalid offset parameter name %s' % self.parameterOffset
         super().__init__()
 
     def process(self, request:Request, response:Response, **keyargs):
@@ -121,6 +136,7 @@ class CreateEncoderPathHandler(CreateEncoderHandler):
         else:
             response.encoderData.update(encoderPath=response.encoderPath)
             data = None
+        response.encoderData.update(requestPath=request.path, requestParameters=request.parameters)
         assert isinstance(request.decoderHeader, IDecoderHeader), 'Invalid decoder header %s' % request.decoderHeader
 
         value = request.decoderHeader.decode(self.nameXFilter)
@@ -328,6 +344,15 @@ class CreateEncoderPathHandler(CreateEncoderHandler):
             return self.namePaths, EncodePath(self.nameRef)
         return super().encoderItem(ofType)
 
+    def encoderCollection(self, name, exploitItem):
+        '''
+        @see: CreateEncoderHandler.encoderCollection
+        '''
+        if isinstance(exploitItem, EncodeModel):
+            if isFlat(exploitItem): return EncodeModelCollection(name, exploitItem, self.streamSize, self.fetchSize)
+            return EncodeModelCollection(name, exploitItem, fetchSize=self.fetchSize)
+        return super().encoderCollection(name, exploitItem)
+
     def encoderPrimitive(self, typeValue, getter=None):
         '''
         @see: CreateEncoderHandler.encoderPrimitive
@@ -440,6 +465,91 @@ class EncodeModel(EncodeObject):
                 assert isinstance(path, Path), 'Invalid path %s' % path
                 path.update(value, modelType)
 
+class EncodeModelCollection(EncodeCollection):
+    '''
+    Exploit for models collection encoding that fetches at once the filtered models for the collection items.
+    '''
+    __slots__ = ('fetchSize',)
+
+    def __init__(self, name, exploitItem, streamSize=None, fetchSize=None):
+        '''
+        Create a encode exploit for a models collection.
+        @see: EncodeCollection.__init__
+
+        @param fetchSize: integer|None
+            The number of items for which the filtered models are fetched at once, if None the models are fetched one
+            by one.
+        '''
+        assert isinstance(exploitItem, EncodeModel), 'Invalid encode model %s' % exploitItem
+        assert fetchSize is None or isinstance(fetchSize, int) and fetchSize > 0, 'Invalid fetch size %s' % fetchSize
+        super().__init__(name, exploitItem, streamSize=streamSize)
+
+        self.fetchSize = fetchSize
+
+    def attributesFrom(self, value, data):
+        '''
+        @see: EncodeCollection.attributesFrom
+        
+        Adds the reference to the next collection part when using keyset pagination.
+        '''
+        attrs = super().attributesFrom(value, data)
+        if not isinstance(value, IterPart) or not value.after: return attrs
+
+        encoderPath, path = data.get('encoderPath'), data.get('requestPath')
+        if encoderPath is None or path is None: return attrs
+        assert isinstance(encoderPath, IEncoderPath), 'Invalid encoder path %s' % encoderPath
+        encoder, normalizer = self.exploitItem.encoder, data['normalizer']
+        assert isinstance(encoder, CreateEncoderPathHandler)
+        assert isinstance(normalizer, Normalizer), 'Invalid normalizer %s' % normalizer
+
+        parameters = [(name, paramValue) for name, paramValue in data.get('requestParameters') or ()
+                      if name not in (encoder.parameterAfter, encoder.parameterOffset)]
+        parameters.append((encoder.parameterAfter, value.after))
+        attrs[normalizer.normalize(encoder.nameNext)] = encoderPath.encode(path, parameters)
+        return attrs
+
+    def itemsFrom(self, value, data):
+        '''
+        @see: EncodeCollection.itemsFrom
+        '''
+        items = super().itemsFrom(value, data)
+        if not self.fetchSize: return items
+
+        fetcher, dataModel = data.get('fetcher'), data.get('dataModel')
+        if not fetcher or dataModel is None: return items
+        assert isinstance(fetcher, IFetcher), 'Invalid fetcher %s' % fetcher
+        assert isinstance(dataModel, DataModel), 'Invalid data model %s' % dataModel
+
+        exploitItem = self.exploitItem
+        assert isinstance(exploitItem, EncodeModel)
+
+        fetches = []
+        if dataModel.fetchEncode and dataModel.fetchReference:
+            fetches.append((dataModel.fetchReference, exploitItem.getter))
+        elif DataModel.datas in dataModel:
+            for nameProp, encodeProp in exploitItem.properties.items():
+                if DataModel.filter in dataModel and nameProp not in dataModel.filter: continue
+                if not isinstance(encodeProp, EncodeModel) or not encodeProp.getter: continue
+                pdata = dataModel.datas.get(nameProp)
+                if pdata and pdata.fetchEncode and pdata.fetchReference:
+                    fetches.append((pdata.fetchReference, encodeProp.getter))
+
+        if not fetches: return items
+        return self.fetchAll(items, fetcher, fetches)
+
+    def fetchAll(self, items, fetcher, fetches):
+        '''
+        Generator that fetches at once the filtered models for chunks of fetch size items.
+        '''
+        assert isinstance(fetcher, IFetcher), 'Invalid fetcher %s' % fetcher
+        while True:
+            chunk = list(islice(items, self.fetchSize))
+            if not chunk: break
+            for reference, getter in fetches:
+                if getter: fetcher.fetchAll(reference, (getter(item) for item in chunk))
+                else: fetcher.fetchAll(reference, chunk)
+            for item in chunk: yield item
+
 class EncodeModelProperty(EncodeModel):
     '''
     Exploit for model encoding that represents only a property.
@@ -12,10 +12,13 @@ Provides the standard headers handling.
 from ally.api.operator.type import TypeModelProperty, TypeModel
 from ally.api.type import Input, typeFor, TypeClass, Type
 from ally.container.ioc import injected
+from ally.container.proxy import proxiedClass
 from ally.core.http.spec.transform.support_model import DataModel, IFetcher
+from ally.core.impl.invoker import InvokerCall
 from ally.core.spec.resources import Path, Node, Invoker, INodeInvokerListener
 from ally.design.context import Context, requires, optional
 from ally.design.processor import HandlerProcessorProceed
+from threading import Lock
 from weakref import WeakKeyDictionary
 import logging
 
@@ -49,18 +52,29 @@ class Response(Context):
 @injected
 class FetcherHandler(HandlerProcessorProceed, INodeInvokerListener):
     '''
-    Implementation for a handler that provides the fetcher used in getting the filtered models.
+    Implementation for a handler that provides the fetcher used in getting the filtered models. If the service
+    implementation that provides the model by id also has a method for getting the models for a list of ids then the
+    models are fetched at once for the collection items, this is used only if the fetch all method is defined along
+    (or after) the get by id method, otherwise the implementation has overridden the get by id and the models are
+    fetched one by one.
     '''
     typeResponse = TypeClass(Response)
+    nameFetch = 'getById'
+    # The name of the service call that provides the model by id, only the invokers for this call are fetched at once.
+    nameFetchAll = 'getByIds'
+    # The name of the service implementation method that provides the models for a list of ids.
 
     def __init__(self):
         '''
         Construct the encoder.
         '''
         assert isinstance(self.typeResponse, Type), 'Invalid type response %s' % self.typeResponse
+        assert isinstance(self.nameFetch, str), 'Invalid fetch name %s' % self.nameFetch
+        assert isinstance(self.nameFetchAll, str), 'Invalid fetch all name %s' % self.nameFetchAll
         super().__init__()
 
         self._cache = WeakKeyDictionary()
+        self._lock = Lock()
 
     def process(self, request:Request, response:Response, **keyargs):
         '''
@@ -93,7 +107,6 @@ class FetcherHandler(HandlerProcessorProceed, INodeInvokerListener):
                 node.addStructureListener(self)
 
                 fetcher = FetcherInvoker(invokerMain)
-                self._cache[invokerMain] = (fetcher, references)
                 for reference, invoker in fetch.items():
                     assert isinstance(invoker, Invoker)
 
@@ -121,9 +134,11 @@ class FetcherHandler(HandlerProcessorProceed, INodeInvokerListener):
                                 log.warning('Cannot locate any input main invoker %s input for invoker %s and input %s',
                                             invokerMain, invoker, inp)
                                 break
-                    else: fetcher.addFetch(reference, invoker, indexes)
+                    else: fetcher.addFetch(reference, invoker, indexes, self.fetchAllFor(invoker, indexes))
 
                 fetcher.inputs.append(Input('$response', self.typeResponse, True, None))
+                # The fetcher is cached only after is completely build since the cache is shared between threads.
+                with self._lock: self._cache[invokerMain] = (fetcher, references)
 
             request.invoker = fetcher
             if Request.arguments not in request: request.arguments = {}
@@ -154,13 +169,60 @@ class FetcherHandler(HandlerProcessorProceed, INodeInvokerListener):
 
         return fetch
 
+    def fetchAllFor(self, invoker, indexes):
+        '''
+        Provides the fetch all for the invoker, this is available only for the get by id call invokers that have as
+        arguments only the model id and whose service implementation has the fetch all method defined in the same class
+        or in a sub class of the class that defines the get by id method.
+        
+        @return: tuple(callable, string)|None
+            A tuple containing the callable that provides the models for a list of ids and the model id property name,
+            None if there is no fetch all available.
+        '''
+        assert isinstance(invoker, Invoker), 'Invalid invoker %s' % invoker
+        assert isinstance(indexes, list), 'Invalid indexes list %s' % indexes
+
+        if indexes != [None] or not isinstance(invoker, InvokerCall): return
+        if not isinstance(invoker.output, TypeModel): return
+        assert isinstance(invoker, InvokerCall)
+        assert isinstance(invoker.output, TypeModel)
+        if invoker.call.name != self.nameFetch: return
+
+        fetchAll = getattr(invoker.implementation, self.nameFetchAll, None)
+        if not callable(fetchAll): return
+
+        clazz = proxiedClass(invoker.implementation.__class__)
+        clazzFetch, clazzFetchAll = definerOf(clazz, self.nameFetch), definerOf(clazz, self.nameFetchAll)
+        if clazzFetch is None or clazzFetchAll is None or not issubclass(clazzFetchAll, clazzFetch):
+            log.info('The %s method of %s is not defined along the %s method, the models are fetched one by one',
+                     self.nameFetchAll, clazz, self.nameFetch)
+            return
+
+        return fetchAll, invoker.output.container.propertyId
+
     # ----------------------------------------------------------------
 
     def onInvokerChange(self, node, old, new):
         '''
         @see: INodeInvokerListener.onInvokerChange
         '''
-        self._cache.clear()
+        with self._lock: self._cache.clear()
+
+# --------------------------------------------------------------------
+
+def definerOf(clazz, name):
+    '''
+    Provides the class that defines the attribute.
+
+    @param clazz: class
+        The class to search the attribute definer in.
+    @param name: string
+        The attribute name.
+    @return: class|None
+        The first class in the method resolution order that defines the attribute, None if there is no such class.
+    '''
+    for base in clazz.__mro__:
+        if name in base.__dict__: return base
 
 # --------------------------------------------------------------------
 
@@ -198,7 +260,7 @@ class FetcherInvoker(Invoker):
 
         return len(self.inputs) - 1
 
-    def addFetch(self, reference, invoker, indexes):
+    def addFetch(self, reference, invoker, indexes, fetchAll=None):
         '''
         Add a new reference entry in the fetcher.
         
@@ -209,12 +271,16 @@ class FetcherInvoker(Invoker):
         @param indexes: list[integer]
             The indexes in the invoker arguments to be used for the invoker at fetching, basically all the indexes of
             the arguments (beside of the model id one which is None in the indexes) to be used for call the invoker.
+        @param fetchAll: tuple(callable, string)|None
+            The callable that provides the models for a list of ids and the model id property name, None if the models
+            can only be fetched one by one.
         '''
         assert isinstance(invoker, Invoker), 'Invalid invoker %s' % invoker
         assert isinstance(indexes, list), 'Invalid indexes list %s' % indexes
+        assert fetchAll is None or isinstance(fetchAll, tuple), 'Invalid fetch all %s' % fetchAll
 
         self.references[reference] = len(self.invokers)
-        self.invokers.append((invoker, indexes))
+        self.invokers.append((invoker, indexes, fetchAll))
 
     def invoke(self, *args):
         '''
@@ -257,7 +323,7 @@ class Fetcher(IFetcher):
             index = fetcher.references.get(reference)
             if index is None: value = None
             else:
-                invoker, indexes = fetcher.invokers[index]
+                invoker, indexes, _fetchAll = fetcher.invokers[index]
                 assert isinstance(invoker, Invoker)
 
                 value = invoker.invoke(*(valueId if k is None else self.args[k] for k in indexes))
@@ -265,3 +331,24 @@ class Fetcher(IFetcher):
 
         return value
 
+    def fetchAll(self, reference, valuesIds):
+        '''
+        @see: IFetcher.fetchAll
+        '''
+        fetcher = self.fetcher
+        assert isinstance(fetcher, FetcherInvoker)
+
+        index = fetcher.references.get(reference)
+        if index is None: return
+        _invoker, _indexes, fetchAll = fetcher.invokers[index]
+        if fetchAll is None: return
+
+        values = self._cache.get(reference)
+        if values is None: values = self._cache[reference] = {}
+        valuesIds = [valueId for valueId in set(valuesIds) if valueId is not None and valueId not in values]
+        if not valuesIds: return
+
+        # The ids that are not found are left to be fetched one by one in order to get the same behavior as the invoker.
+        getByIds, nameId = fetchAll
+        for value in getByIds(valuesIds): values[getattr(value, nameId)] = value
+
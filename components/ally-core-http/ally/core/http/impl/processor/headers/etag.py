@@ -0,0 +1,119 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides the entity tag based on the model validator, this allows for a conditional GET without rendering the model.
+'''
+
+from ally.api.operator.container import Model
+from ally.api.operator.type import TypeModel
+from ally.container.ioc import injected
+from ally.core.spec.resources import Invoker
+from ally.design.context import Context, requires, optional, defines
+from ally.design.processor import HandlerProcessorProceed
+from ally.http.impl.processor.headers.etag import isNoneMatch
+from ally.http.spec.codes import NOT_MODIFIED
+from ally.http.spec.server import IEncoderHeader, IDecoderHeader, METHOD_GET
+from collections import Callable
+from hashlib import sha1
+
+# --------------------------------------------------------------------
+
+class Request(Context):
+    '''
+    The request context.
+    '''
+    # ---------------------------------------------------------------- Required
+    methodName = requires(str)
+    invoker = requires(Invoker)
+    decoderHeader = requires(IDecoderHeader)
+
+class Response(Context):
+    '''
+    The response context.
+    '''
+    # ---------------------------------------------------------------- Defined
+    code = defines(int)
+    isSuccess = defines(bool)
+    text = defines(str)
+    # ---------------------------------------------------------------- Required
+    encoderHeader = requires(IEncoderHeader)
+    # ---------------------------------------------------------------- Optional
+    obj = optional(object)
+    encoder = optional(Callable)
+
+class ResponseContent(Context):
+    '''
+    The response content context.
+    '''
+    # ---------------------------------------------------------------- Optional
+    type = optional(str)
+    charSet = optional(str)
+
+# --------------------------------------------------------------------
+
+@injected
+class ETagValidatorHandler(HandlerProcessorProceed):
+    '''
+    Implementation for a processor that provides the weak entity tag HTTP response header for models that have a
+    validator property and responds with not modified, skipping the rendering, if the entity tag matches the if none
+    match HTTP request header.
+    '''
+
+    hintModelValidator = 'validator'
+    # The model hint that provides the name of the validator property.
+    nameETag = 'ETag'
+    # The header name for the entity tag.
+    nameIfNoneMatch = 'If-None-Match'
+    # The header name for the entity tags that the client already has.
+    namesVary = ['X-Filter']
+    # The request headers names that change the rendered model besides the content type and character set.
+
+    def __init__(self):
+        assert isinstance(self.hintModelValidator, str), \
+        'Invalid hint name for model validator %s' % self.hintModelValidator
+        assert isinstance(self.nameETag, str), 'Invalid entity tag name %s' % self.nameETag
+        assert isinstance(self.nameIfNoneMatch, str), 'Invalid if none match name %s' % self.nameIfNoneMatch
+        assert isinstance(self.namesVary, list), 'Invalid vary names %s' % self.namesVary
+        super().__init__()
+
+    def process(self, request:Request, response:Response, responseCnt:ResponseContent, **keyargs):
+        '''
+        @see: HandlerProcessorProceed.process
+
+        Encodes the validator entity tag and checks the conditional GET.
+        '''
+        assert isinstance(request, Request), 'Invalid request %s' % request
+        assert isinstance(response, Response), 'Invalid response %s' % response
+        assert isinstance(responseCnt, ResponseContent), 'Invalid response content %s' % responseCnt
+        assert isinstance(request.invoker, Invoker), 'Invalid request invoker %s' % request.invoker
+        assert isinstance(request.decoderHeader, IDecoderHeader), \
+        'Invalid header decoder %s' % request.decoderHeader
+        assert isinstance(response.encoderHeader, IEncoderHeader), \
+        'Invalid header encoder %s' % response.encoderHeader
+
+        if request.methodName != METHOD_GET or response.isSuccess is False: return
+        if Response.obj not in response or Response.encoder not in response: return
+        if not isinstance(request.invoker.output, TypeModel): return
+        model = request.invoker.output.container
+        assert isinstance(model, Model), 'Invalid model %s' % model
+
+        nameValidator = model.hints.get(self.hintModelValidator)
+        if nameValidator is None: return
+        assert nameValidator in model.properties, 'Invalid validator property %s for %s' % (nameValidator, model)
+        validator = getattr(response.obj, nameValidator)
+        if validator is None: return
+
+        variant = [model.name, str(validator), responseCnt.type or '', responseCnt.charSet or '']
+        for name in self.namesVary: variant.append(request.decoderHeader.retrieve(name) or '')
+        etag = 'W/"%s"' % sha1('\n'.join(variant).encode()).hexdigest()
+
+        response.encoderHeader.encode(self.nameETag, etag)
+        if isNoneMatch(etag, request.decoderHeader.retrieve(self.nameIfNoneMatch)):
+            response.code, response.isSuccess = NOT_MODIFIED
+            response.text = 'Not modified'
+            response.encoder = None  # No need to render anything
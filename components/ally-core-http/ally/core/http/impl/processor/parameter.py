@@ -24,6 +24,7 @@ from ally.core.spec.transform.support import obtainOnDict, setterOnDict, \
 from ally.design.context import Context, requires, defines
 from ally.design.processor import HandlerProcessorProceed
 from collections import deque, Iterable, OrderedDict
+from threading import Lock
 from weakref import WeakKeyDictionary
 import logging
 import random
@@ -97,6 +98,7 @@ class ParameterHandler(HandlerProcessorProceed, INodeInvokerListener):
         self._reNormalizeValue = re.compile(self.regexNormalizeValue)
         self._cacheDecode = WeakKeyDictionary()
         self._cacheEncode = WeakKeyDictionary()
+        self._lock = Lock()
 
     def process(self, request:Request, response:Response, **keyargs):
         '''
@@ -118,7 +120,7 @@ class ParameterHandler(HandlerProcessorProceed, INodeInvokerListener):
             if decode is None:
                 decode = self.decodeInvoker(invoker)
                 request.path.node.addNodeListener(self)
-                self._cacheDecode[invoker] = decode
+                with self._lock: decode = self._cacheDecode.setdefault(invoker, decode)
 
             illegal = []
             context = dict(target=request.arguments,
@@ -131,7 +133,7 @@ class ParameterHandler(HandlerProcessorProceed, INodeInvokerListener):
                 if encode is None:
                     encode = self.encodeInvoker(invoker)
                     request.path.node.addNodeListener(self)
-                    self._cacheEncode[invoker] = encode
+                    with self._lock: encode = self._cacheEncode.setdefault(invoker, encode)
 
                 response.code, response.isSuccess = ILLEGAL_PARAM
                 response.text = 'Illegal parameter'
@@ -156,8 +158,9 @@ class ParameterHandler(HandlerProcessorProceed, INodeInvokerListener):
         '''
         @see: INodeInvokerListener.onInvokerChange
         '''
-        self._cacheDecode.pop(old, None)
-        self._cacheEncode.pop(old, None)
+        with self._lock:
+            self._cacheDecode.pop(old, None)
+            self._cacheEncode.pop(old, None)
 
     # ----------------------------------------------------------------
 
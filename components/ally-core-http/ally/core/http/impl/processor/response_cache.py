@@ -0,0 +1,331 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides the rendered GET responses caching, the cached responses are invalidated by the invokers that change models.
+'''
+
+from ally.api.config import GET, INSERT, UPDATE, DELETE
+from ally.api.operator.descriptor import ContainerSupport, QuerySupport
+from ally.api.operator.type import TypeModel, TypeModelProperty
+from ally.api.type import Type, Iter, Input
+from ally.container.ioc import injected
+from ally.core.spec.resources import Invoker
+from ally.design.context import Context, requires, optional
+from ally.design.processor import Handler, Assembly, NO_VALIDATION, Processing, \
+    Chain, Function
+from ally.http.spec.server import IDecoderHeader
+from collections import Iterable, OrderedDict
+from datetime import date, time as timeOfDay
+from threading import Lock
+from time import time
+
+# --------------------------------------------------------------------
+
+METHODS_CHANGE = frozenset((INSERT, UPDATE, DELETE))
+# The methods of the invokers that change models.
+
+# --------------------------------------------------------------------
+
+class Request(Context):
+    '''
+    The request context.
+    '''
+    # ---------------------------------------------------------------- Required
+    method = requires(int)
+    invoker = requires(Invoker)
+    arguments = requires(dict)
+    decoderHeader = requires(IDecoderHeader)
+    # ---------------------------------------------------------------- Optional
+    scheme = optional(str)
+
+class Response(Context):
+    '''
+    The response context.
+    '''
+    # ---------------------------------------------------------------- Optional
+    isSuccess = optional(bool)
+
+class ResponseContent(Context):
+    '''
+    The response content context.
+    '''
+    # ---------------------------------------------------------------- Optional
+    source = optional(Iterable)
+    length = optional(int)
+    type = optional(str)
+    charSet = optional(str)
+
+# --------------------------------------------------------------------
+
+@injected
+class ResponseCacheHandler(Handler):
+    '''
+    Implementation for a processor that caches the rendered GET responses. The response is cached based on the invoker,
+    the arguments, the response content type and character set and the request headers that change the rendered
+    response. The requests that provide credentials are not cached since the rendered response might be specific to
+    the authenticated user. The cached responses are invalidated whenever an insert, update or delete invoker is
+    successfully invoked on a model used by the cached response, the changes made outside the REST invokers are only
+    reflected after the cached responses expire.
+    '''
+
+    cacheAssembly = Assembly
+    # The processors that provide the response content, the content provided by this processors is cached.
+    namesVary = ['Host', 'X-Filter', 'Accept-Language', 'X-TimeZone', 'X-Content-TimeZone']
+    # The request headers names that change the rendered response.
+    namesCredential = ['Authorization', 'Cookie']
+    # The request headers names that provide credentials, the requests that have any of this headers are not cached.
+    maximumEntries = 1000
+    # The maximum number of cached responses.
+    maximumSize = 131072
+    # The maximum size in bytes of a cached response.
+    timeToLive = 300
+    # The number of seconds that a response is cached.
+
+    def __init__(self):
+        assert isinstance(self.cacheAssembly, Assembly), 'Invalid cache assembly %s' % self.cacheAssembly
+        assert isinstance(self.namesVary, list), 'Invalid vary names %s' % self.namesVary
+        assert isinstance(self.namesCredential, list), 'Invalid credential names %s' % self.namesCredential
+        assert isinstance(self.maximumEntries, int), 'Invalid maximum entries %s' % self.maximumEntries
+        assert isinstance(self.maximumSize, int), 'Invalid maximum size %s' % self.maximumSize
+        assert isinstance(self.timeToLive, (int, float)), 'Invalid time to live %s' % self.timeToLive
+
+        cacheProcessing = self.cacheAssembly.create(NO_VALIDATION, request=Request, response=Response,
+                                                    responseCnt=ResponseContent)
+        assert isinstance(cacheProcessing, Processing), 'Invalid processing %s' % cacheProcessing
+        super().__init__(Function(cacheProcessing.contexts, self.process))
+
+        self._cacheProcessing = cacheProcessing
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self._keysByModel = {}
+        self._models = {}
+        self._generation = 0
+        self._generationAll = 0
+        self._generations = {}
+
+        self.hits = self.misses = self.invalidations = 0
+
+    def process(self, chain, request, response, responseCnt, **keyargs):
+        '''
+        Provides the cached response content or processes and caches the response content.
+
+        The rest of the parameters are contexts.
+        '''
+        assert isinstance(chain, Chain), 'Invalid processors chain %s' % chain
+        assert isinstance(request, Request), 'Invalid request %s' % request
+        assert isinstance(response, Response), 'Invalid response %s' % response
+        assert isinstance(responseCnt, ResponseContent), 'Invalid response content %s' % responseCnt
+        assert isinstance(request.invoker, Invoker), 'Invalid request invoker %s' % request.invoker
+
+        key = None
+        if response.isSuccess is not False and request.method == GET:
+            key = self.keyFor(request, responseCnt)
+            if key is not None:
+                content = self.get(key)
+                if content is not None:
+                    responseCnt.source = (content,)
+                    responseCnt.length = len(content)
+                    chain.proceed()
+                    return
+                # The generation is taken before rendering so that an invalidation made while rendering is not lost.
+                generation = self._generation
+
+        Chain(self._cacheProcessing).process(request=request, response=response, responseCnt=responseCnt,
+                                             **keyargs).doAll()
+
+        if response.isSuccess is not False:
+            if key is not None and ResponseContent.source in responseCnt:
+                models = self.modelsFor(request.invoker)
+                if isinstance(responseCnt.source, tuple):
+                    content = b''.join(responseCnt.source)
+                    if len(content) <= self.maximumSize: self.put(key, content, models, generation)
+                else: responseCnt.source = self.capture(responseCnt.source, key, models, generation)
+
+            elif request.method in METHODS_CHANGE: self.invalidate(self.modelsFor(request.invoker))
+
+        chain.proceed()
+
+    # ----------------------------------------------------------------
+
+    def statistics(self):
+        '''
+        Provides the cache statistics.
+
+        @return: dictionary{string, integer}
+            The cache statistics.
+        '''
+        return dict(entries=len(self._entries), hits=self.hits, misses=self.misses, invalidations=self.invalidations)
+
+    def get(self, key):
+        '''
+        Provides the cached content for the key.
+
+        @param key: tuple
+            The cache key.
+        @return: bytes|None
+            The cached content or None if there is no valid cached content.
+        '''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                content, expires = entry
+                if expires > time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return content
+                self._remove(key)
+            self.misses += 1
+
+    def put(self, key, content, models, generation):
+        '''
+        Caches the content for the key.
+
+        @param key: tuple
+            The cache key.
+        @param content: bytes
+            The content to cache.
+        @param models: frozenset(TypeModel)
+            The model types that are used by the cached content.
+        @param generation: integer
+            The cache generation taken before the content has been rendered, if any of the models has been invalidated
+            since then the content is not cached since it might be stale.
+        '''
+        assert isinstance(generation, int), 'Invalid generation %s' % generation
+        with self._lock:
+            if self._generationAll > generation: return
+            for model in models:
+                if self._generations.get(model, 0) > generation: return
+
+            if key in self._entries: self._remove(key)
+            while len(self._entries) >= self.maximumEntries: self._remove(next(iter(self._entries)))
+
+            self._entries[key] = (content, time() + self.timeToLive)
+            self._models[key] = models
+            for model in models:
+                keys = self._keysByModel.get(model)
+                if keys is None: keys = self._keysByModel[model] = set()
+                keys.add(key)
+
+    def invalidate(self, models):
+        '''
+        Invalidates the cached contents that use any of the provided model types.
+
+        @param models: frozenset(TypeModel)
+            The model types that have been changed, if empty all the cached contents are invalidated.
+        '''
+        with self._lock:
+            self._generation += 1
+            if models:
+                keys = set()
+                for model in models:
+                    keys.update(self._keysByModel.get(model, ()))
+                    self._generations[model] = self._generation
+            else:
+                keys = set(self._entries)
+                self._generationAll = self._generation
+
+            for key in keys: self._remove(key)
+            if keys: self.invalidations += 1
+
+    def keyFor(self, request, responseCnt):
+        '''
+        Provides the cache key for the request.
+
+        @return: tuple|None
+            The cache key or None if the request provides credentials or the request arguments cannot be used as a key.
+        '''
+        assert isinstance(request, Request), 'Invalid request %s' % request
+        assert isinstance(responseCnt, ResponseContent), 'Invalid response content %s' % responseCnt
+        assert isinstance(request.decoderHeader, IDecoderHeader), \
+        'Invalid header decoder %s' % request.decoderHeader
+
+        for name in self.namesCredential:
+            if request.decoderHeader.retrieve(name) is not None: return
+
+        key = [request.invoker, request.scheme, responseCnt.type, responseCnt.charSet]
+        for name in self.namesVary: key.append(request.decoderHeader.retrieve(name))
+        try:
+            for inp in request.invoker.inputs:
+                assert isinstance(inp, Input), 'Invalid input %s' % inp
+                key.append(normalize(request.arguments.get(inp.name)))
+        except ValueError: return
+        return tuple(key)
+
+    def modelsFor(self, invoker):
+        '''
+        Provides the model types used by the invoker.
+
+        @return: frozenset(TypeModel)
+            The model types.
+        '''
+        assert isinstance(invoker, Invoker), 'Invalid invoker %s' % invoker
+
+        models = set()
+        for typ in [invoker.output] + [inp.type for inp in invoker.inputs]:
+            assert isinstance(typ, Type), 'Invalid type %s' % typ
+            if isinstance(typ, Iter): typ = typ.itemType
+            if isinstance(typ, TypeModelProperty):
+                if isinstance(typ.type, TypeModel): models.add(typ.type)
+                typ = typ.parent
+            if isinstance(typ, TypeModel):
+                assert isinstance(typ, TypeModel)
+                models.add(typ)
+                models.update(typ.parents())
+                for typeProp in typ.childTypes():
+                    assert isinstance(typeProp, TypeModelProperty), 'Invalid property type %s' % typeProp
+                    if isinstance(typeProp.type, TypeModel): models.add(typeProp.type)
+                    elif isinstance(typeProp.type, TypeModelProperty): models.add(typeProp.type.parent)
+        return frozenset(models)
+
+    def capture(self, source, key, models, generation):
+        '''
+        Generator that captures the streamed content in order to cache it.
+        '''
+        chunks, size = [], 0
+        for bytes in source:
+            if chunks is not None:
+                size += len(bytes)
+                if size <= self.maximumSize: chunks.append(bytes)
+                else: chunks = None
+            yield bytes
+        if chunks is not None: self.put(key, b''.join(chunks), models, generation)
+
+    # ----------------------------------------------------------------
+
+    def _remove(self, key):
+        '''
+        Removes the cached content for the key, needs to be called while having the lock.
+        '''
+        self._entries.pop(key, None)
+        for model in self._models.pop(key, ()):
+            keys = self._keysByModel.get(model)
+            if keys is not None:
+                keys.discard(key)
+                if not keys: del self._keysByModel[model]
+
+# --------------------------------------------------------------------
+
+def normalize(value):
+    '''
+    Normalizes the provided argument value into a hashable value.
+
+    @param value: object
+        The argument value to normalize.
+    @return: object
+        The hashable value.
+    @raise ValueError: If the value cannot be normalized.
+    '''
+    if value is None or isinstance(value, (str, int, float, bool, date, timeOfDay)): return value
+    if isinstance(value, (list, tuple)): return tuple(normalize(item) for item in value)
+    if isinstance(value, dict): return tuple(sorted((key, normalize(item)) for key, item in value.items()))
+
+    if isinstance(value, ContainerSupport): names = value._ally_type.container.properties
+    elif isinstance(value, QuerySupport): names = value._ally_type.query.criterias
+    else: raise ValueError('Cannot normalize value %s' % value)
+    return (value.__class__, tuple((name, normalize(value._ally_values[name]))
+                                   for name in names if name in value._ally_values))
@@ -19,7 +19,7 @@ from ally.core.spec.resources import ConverterPath, Path, Converter, Normalizer,
 from ally.design.context import Context, requires, defines, optional
 from ally.design.processor import HandlerProcessorProceed
 from ally.http.spec.server import IDecoderHeader
-from ally.support.core.util_resources import findPath
+from ally.support.core.util_resources import IndexPath
 from collections import deque
 from urllib.parse import urlencode, urlunsplit, urlsplit, quote, unquote
 import logging
@@ -108,6 +108,8 @@ class URIHandler(HandlerProcessorProceed):
         assert isinstance(self.headerHost, str), 'Invalid string %s' % self.headerHost
         super().__init__()
 
+        self._index = IndexPath(self.resourcesRoot, self.converterPath)
+
     def process(self, request:Request, response:Response, responseCnt:ResponseContent, **keyargs):
         '''
         @see: HandlerProcessorProceed.process
@@ -129,7 +131,7 @@ class URIHandler(HandlerProcessorProceed):
             paths[-1] = paths[-1][0:i]
         paths = [unquote(p) for p in paths if p]
 
-        request.path = findPath(self.resourcesRoot, paths, self.converterPath)
+        request.path = self._index.findPath(paths)
         assert isinstance(request.path, Path), 'Invalid path %s' % request.path
         if not request.path.node:
             # we stop the chain processing
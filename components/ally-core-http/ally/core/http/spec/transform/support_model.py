@@ -91,3 +91,16 @@ class IFetcher(metaclass=abc.ABCMeta):
         @return: object|None
             The model object corresponding to the reference and value id, None if the object cannot be provided.
         '''
+
+    @abc.abstractclassmethod
+    def fetchAll(self, reference, valuesIds):
+        '''
+        Fetch at once the model objects that are specific for the provided reference, the fetched model objects are
+        then provided by the fetch method. If fetching multiple model objects is not supported by the reference nothing
+        happens and the model objects are fetched one by one.
+        
+        @param reference: Reference
+            The reference of the model objects to fetch.
+        @param valuesIds: Iterable(object)
+            The values ids for the model objects to fetch.
+        '''
@@ -0,0 +1,154 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally core sql alchemy
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides unit testing for the sql alchemy entity cache.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.config import model
+from ally.support.sqlalchemy.cache import cacheFor, statistics
+from ally.support.sqlalchemy.mapper import validate, DeclarativeMetaModel
+from sqlalchemy.engine import create_engine
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm.session import sessionmaker
+from sqlalchemy.schema import Column, MetaData
+from sqlalchemy.types import String, Integer
+import unittest
+
+# --------------------------------------------------------------------
+
+meta = MetaData()
+
+Base = declarative_base(metadata=meta, metaclass=DeclarativeMetaModel)
+
+@model(id='Id')
+class Language:
+    '''
+    Provides the language model.
+    '''
+    Id = int
+    Code = str
+    Name = str
+
+@validate
+class LanguageMapped(Base, Language):
+    '''
+    Provides the mapping for Language entity.
+    '''
+    __tablename__ = 'language'
+
+    Id = Column('id', Integer, primary_key=True)
+    Code = Column('code', String(20), nullable=False, unique=True)
+    Name = Column('name', String(255))
+
+# --------------------------------------------------------------------
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine('sqlite:///:memory:')
+        self.sessionCreate = sessionmaker(bind=engine)
+        meta.create_all(engine)
+
+    def testCache(self):
+        cache = cacheFor(LanguageMapped, 'Id', 2, 300)
+        self.assertIs(cache, cacheFor(LanguageMapped, 'Id'))
+
+        session = self.sessionCreate()
+        for code in ('en', 'ro', 'de'):
+            language = LanguageMapped()
+            language.Code = code
+            session.add(language)
+        session.commit()
+
+        language = session.query(LanguageMapped).get(1)
+        cache.put(1, language, session)
+        cached = cache.get(1)
+        self.assertIsNot(language, cached)
+        self.assertEqual((1, 'en'), (cached.Id, cached.Code))
+        self.assertNotIn(LanguageMapped.Name, cached)
+
+        cache.put(2, session.query(LanguageMapped).get(2), session)
+        cache.put(3, session.query(LanguageMapped).get(3), session)
+        self.assertIsNone(cache.get(1))
+        self.assertEqual('de', cache.get(3).Code)
+
+        language = session.query(LanguageMapped).get(3)
+        language.Name = 'German'
+        cache.put(3, language, session)  # The changed entities are not cached.
+        session.flush()
+        self.assertIsNone(cache.get(3))
+
+        cache.put(3, language, session)  # The entities changed in the session transaction are not cached.
+        self.assertIsNone(cache.get(3))
+        session.commit()
+        cache.put(3, session.query(LanguageMapped).get(3), session)
+        self.assertEqual('German', cache.get(3).Name)
+        session.close()
+
+        self.assertEqual({'entries': 2, 'hits': 3, 'misses': 3, 'invalidations': 1},
+                         statistics()['LanguageMapped.Id'])
+
+    def testStaleRead(self):
+        cache = cacheFor(LanguageMapped, 'Name', 10, 300)
+
+        session = self.sessionCreate()
+        for code in ('en', 'ro'):
+            language = LanguageMapped()
+            language.Code, language.Name = code, code.upper()
+            session.add(language)
+        session.commit()
+        session.close()
+
+        reader = self.sessionCreate()
+        read = reader.query(LanguageMapped).get(1)  # The reader transaction begins before the change.
+
+        writer = self.sessionCreate()
+        writer.query(LanguageMapped).get(1).Name = 'English'
+        writer.commit()
+        writer.close()
+
+        cache.put('EN', read, reader)  # The entity read before the invalidation is not cached.
+        self.assertIsNone(cache.get('EN'))
+        cache.put('RO', reader.query(LanguageMapped).get(2), reader)  # Other identifiers are still cached.
+        self.assertEqual('ro', cache.get('RO').Code)
+        reader.commit()
+
+        cache.put('English', reader.query(LanguageMapped).get(1), reader)  # A new transaction is cached.
+        self.assertEqual('en', cache.get('English').Code)
+        reader.close()
+
+        generation = cache.generation()
+        cache.invalidate('RO')
+        cache.put('RO', read, generation=generation)
+        self.assertIsNone(cache.get('RO'))
+        cache.put('RO', read, generation=cache.generation())
+        self.assertIsNotNone(cache.get('RO'))
+
+    def testExpired(self):
+        cache = cacheFor(LanguageMapped, 'Code', 10, 0)
+
+        session = self.sessionCreate()
+        language = LanguageMapped()
+        language.Code = 'en'
+        session.add(language)
+        session.commit()
+
+        cache.put('en', session.query(LanguageMapped).get(1), session)
+        self.assertIsNone(cache.get('en'))
+        session.close()
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,388 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally core sql alchemy
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides unit testing for the sql alchemy service utilities.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.config import model, query
+from ally.api.criteria import AsLikeOrdered, AsRangeOrdered, AsDateTimeOrdered, \
+    AsBoolean, AsLike, AsEqual, AsDate, AsTime, AsDateTime, AsRange, AsOrdered, \
+    AsEqualOrdered, AsBooleanOrdered, AsDateOrdered, AsTimeOrdered
+from ally.exception import InputError
+from ally.support.api.util_service import namesForModel, namesForQuery
+from ally.support.sqlalchemy.descriptor import PropertyAttribute
+from ally.support.sqlalchemy.mapper import validate, DeclarativeMetaModel
+from ally.support.sqlalchemy import util_service
+from ally.support.sqlalchemy.util_service import buildQuery, buildLimits, Keyset, \
+    buildCount, COUNT_QUERY, COUNT_WINDOW, COUNT_APPROXIMATE, COUNT_MORE
+from datetime import datetime, timedelta, date, time
+from itertools import chain
+from sqlalchemy.engine import create_engine
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm.session import sessionmaker
+from sqlalchemy.schema import Column, MetaData
+from sqlalchemy.sql.expression import _Case, func
+from sqlalchemy.types import String, Integer, DateTime, Boolean, Date, Time
+import unittest
+
+# --------------------------------------------------------------------
+
+meta = MetaData()
+
+Base = declarative_base(metadata=meta, metaclass=DeclarativeMetaModel)
+
+@model(id='Id')
+class Article:
+    '''
+    Provides the article model.
+    '''
+    Id = int
+    Name = str
+    Rank = int
+    Published = datetime
+
+@query(Article)
+class QArticle:
+    '''
+    Provides the article query.
+    '''
+    name = AsLikeOrdered
+    rank = AsRangeOrdered
+    published = AsDateTimeOrdered
+
+@validate
+class ArticleMapped(Base, Article):
+    '''
+    Provides the mapping for Article entity.
+    '''
+    __tablename__ = 'article'
+
+    Id = Column('id', Integer, primary_key=True)
+    Name = Column('name', String(255), nullable=False)
+    Rank = Column('rank', Integer, nullable=False)
+    Published = Column('published', DateTime, nullable=False)
+
+@query(Article)
+class QArticleExtended(QArticle):
+    '''
+    Provides the article query with criteria that are not mapped.
+    '''
+    id = AsRangeOrdered
+    other = AsLike
+
+@model(id='Id')
+class Event:
+    '''
+    Provides the event model.
+    '''
+    Id = int
+    Title = str
+    Active = bool
+    Day = date
+    Hour = time
+
+@query(Event)
+class QEvent:
+    '''
+    Provides the event query.
+    '''
+    title = AsEqualOrdered
+    active = AsBooleanOrdered
+    day = AsDateOrdered
+    hour = AsTimeOrdered
+
+@validate
+class EventMapped(Base, Event):
+    '''
+    Provides the mapping for Event entity.
+    '''
+    __tablename__ = 'event'
+
+    Id = Column('id', Integer, primary_key=True)
+    Title = Column('title', String(255), nullable=False)
+    Active = Column('active', Boolean, nullable=False)
+    Day = Column('day', Date, nullable=False)
+    Hour = Column('hour', Time, nullable=False)
+
+# --------------------------------------------------------------------
+
+def buildQueryInterpreted(sqlQuery, query, mapped, only=None, exclude=None):
+    '''
+    Builds the query the way it was made before the compiled plans, the columns and criteria are resolved on each call.
+    '''
+    clazz = query.__class__
+
+    columns, ordered, unordered = {}, [], []
+    for name in namesForModel(mapped):
+        cp, name = getattr(mapped, name), name.lower()
+        if name not in columns and isinstance(cp, (PropertyAttribute, _Case)): columns[name] = cp
+    columns = {criteria:columns.get(criteria.lower()) for criteria in namesForQuery(clazz)}
+    if only: columns = {criteria: columns[criteria] for criteria in only}
+    elif exclude:
+        for criteria in exclude: columns.pop(criteria)
+
+    for criteria, column in columns.items():
+        if column is None or getattr(clazz, criteria) not in query: continue
+
+        crt = getattr(query, criteria)
+        if isinstance(crt, AsBoolean):
+            if AsBoolean.value in crt: sqlQuery = sqlQuery.filter(column == crt.value)
+        elif isinstance(crt, AsLike):
+            if AsLike.like in crt: sqlQuery = sqlQuery.filter(column.like(crt.like))
+            elif AsLike.ilike in crt: sqlQuery = sqlQuery.filter(column.ilike(crt.ilike))
+        elif isinstance(crt, AsEqual):
+            if AsEqual.equal in crt: sqlQuery = sqlQuery.filter(column == crt.equal)
+        elif isinstance(crt, (AsDate, AsTime, AsDateTime, AsRange)):
+            if crt.__class__.start in crt: sqlQuery = sqlQuery.filter(column >= crt.start)
+            elif crt.__class__.until in crt: sqlQuery = sqlQuery.filter(column < crt.until)
+            if crt.__class__.end in crt: sqlQuery = sqlQuery.filter(column <= crt.end)
+            elif crt.__class__.since in crt: sqlQuery = sqlQuery.filter(column > crt.since)
+
+        if isinstance(crt, AsOrdered) and AsOrdered.ascending in crt:
+            if AsOrdered.priority in crt and crt.priority: ordered.append((column, crt.ascending, crt.priority))
+            else: unordered.append((column, crt.ascending, None))
+
+    ordered.sort(key=lambda pack: pack[2])
+    for column, asc, __ in chain(ordered, unordered):
+        if asc: sqlQuery = sqlQuery.order_by(column)
+        else: sqlQuery = sqlQuery.order_by(column.desc())
+    return sqlQuery
+
+# --------------------------------------------------------------------
+
+class TestUtilService(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine('sqlite:///:memory:')
+        meta.create_all(engine)
+        self.session = sessionmaker(bind=engine)()
+
+        start = datetime(2013, 4, 15, 10, 30, 0, 500)
+        for k in range(30):
+            article = ArticleMapped()
+            article.Name = ('alpha', 'beta', 'gamma', 'delta')[k % 4]
+            article.Rank = k % 7
+            article.Published = start + timedelta(hours=k % 5)
+            self.session.add(article)
+        self.session.commit()
+        self.articles = self.session.query(ArticleMapped).all()
+
+    def tearDown(self):
+        self.session.close()
+
+    def assertWalk(self, expected, q, limit):
+        ids, after, pages = [], '', 0
+        while after is not None:
+            keyset = Keyset(after)
+            sql = buildQuery(self.session.query(ArticleMapped), q, ArticleMapped, keyset=keyset)
+            rows, after = keyset.page(buildLimits(sql, None, keyset.limitFor(limit)).all(), limit)
+            self.assertTrue(rows, 'Empty page')
+            self.assertTrue(len(rows) <= limit)
+            ids.extend(row.Id for row in rows)
+            pages += 1
+        self.assertEqual(expected, ids)
+        # No empty page is provided when the last page is full.
+        self.assertEqual((len(expected) + limit - 1) // limit, pages)
+
+    def expected(self, *orderings, filter=lambda article: True):
+        articles = sorted((article for article in self.articles if filter(article)), key=lambda article: article.Id)
+        for name, asc in reversed(orderings):
+            articles.sort(key=lambda article: getattr(article, name), reverse=not asc)
+        return [article.Id for article in articles]
+
+    def testKeysetAscending(self):
+        q = QArticle()
+        q.name.orderAsc()
+        self.assertWalk(self.expected(('Name', True)), q, 10)
+        self.assertWalk(self.expected(('Name', True)), q, 7)
+
+    def testKeysetDescending(self):
+        q = QArticle()
+        q.name.orderDesc()
+        q.name.priority = 1
+        q.rank.orderDesc()
+        q.rank.priority = 2
+        self.assertWalk(self.expected(('Name', False), ('Rank', False)), q, 8)
+
+    def testKeysetMixed(self):
+        q = QArticle()
+        q.rank.orderAsc()
+        q.rank.priority = 1
+        q.name.orderDesc()
+        q.name.priority = 2
+        self.assertWalk(self.expected(('Rank', True), ('Name', False)), q, 5)
+
+    def testKeysetDateTime(self):
+        q = QArticle()
+        q.published.orderDesc()
+        self.assertWalk(self.expected(('Published', False)), q, 5)
+
+    def testKeysetFiltered(self):
+        q = QArticle()
+        q.name.like = '%a'
+        q.published.orderAsc()
+        expected = self.expected(('Published', True), filter=lambda article: article.Name.endswith('a'))
+        self.assertWalk(expected, q, 4)
+
+    def testKeysetInvalid(self):
+        q = QArticle()
+        q.name.orderAsc()
+        keyset = Keyset('')
+        sql = buildQuery(self.session.query(ArticleMapped), q, ArticleMapped, keyset=keyset)
+        after = keyset.page(buildLimits(sql, None, keyset.limitFor(2)).all(), 2)[1]
+
+        q = QArticle()
+        q.rank.orderAsc()
+        self.assertRaises(InputError, buildQuery, self.session.query(ArticleMapped), q, ArticleMapped,
+                          keyset=Keyset(after))
+        self.assertRaises(InputError, buildQuery, self.session.query(ArticleMapped), q, ArticleMapped,
+                          keyset=Keyset('invalid'))
+
+    def assertCount(self, expected, sql, offset, limit, mode, sqlCount=None, staleness=60):
+        rows, total, modeCount = buildCount(sql, offset, limit, mode, sqlCount, staleness)
+        self.assertEqual(expected, (len(rows), total, modeCount))
+        return rows
+
+    def testCountQuery(self):
+        sql = self.session.query(ArticleMapped).order_by(ArticleMapped.Id)
+        rows = self.assertCount((10, 30, COUNT_QUERY), sql, 5, 10, COUNT_QUERY)
+        self.assertEqual(list(range(6, 16)), [row.Id for row in rows])
+        self.assertCount((0, 30, COUNT_QUERY), sql, 40, 10, COUNT_QUERY)
+        self.assertCount((0, 30, COUNT_QUERY), sql, None, 0, COUNT_QUERY)
+
+    def testCountWindow(self):
+        sql = self.session.query(ArticleMapped).order_by(ArticleMapped.Id)
+        rows = self.assertCount((10, 30, COUNT_WINDOW), sql, 5, 10, COUNT_WINDOW)
+        self.assertEqual(list(range(6, 16)), [row.Id for row in rows])
+        self.assertCount((30, 30, COUNT_WINDOW), sql, None, None, COUNT_WINDOW)
+
+        sqlFiltered = sql.filter(ArticleMapped.Rank == 0)
+        self.assertCount((2, 5, COUNT_WINDOW), sqlFiltered, 3, 10, COUNT_WINDOW)
+        # The offset is past the rows so the window function provides no total.
+        self.assertCount((0, 30, COUNT_QUERY), sql, 40, 10, COUNT_WINDOW)
+        # The window function cannot count a different query.
+        self.assertCount((10, 5, COUNT_QUERY), sql, None, 10, COUNT_WINDOW, sqlFiltered)
+
+        sqlColumns = self.session.query(ArticleMapped.Id, ArticleMapped.Name).order_by(ArticleMapped.Id)
+        rows = self.assertCount((3, 30, COUNT_WINDOW), sqlColumns, 4, 3, COUNT_WINDOW)
+        self.assertEqual([(5, 'alpha'), (6, 'beta'), (7, 'gamma')], [(row.Id, row.Name) for row in rows])
+        self.assertEqual([(5, 'alpha'), (6, 'beta'), (7, 'gamma')], [tuple(row) for row in rows])
+
+    def testCountApproximate(self):
+        util_service._approximates.clear()
+        sql = self.session.query(ArticleMapped).order_by(ArticleMapped.Id)
+        self.assertCount((10, 30, COUNT_APPROXIMATE), sql, None, 10, COUNT_APPROXIMATE)
+
+        article = ArticleMapped()
+        article.Name, article.Rank, article.Published = 'epsilon', 0, datetime(2013, 4, 15)
+        self.session.add(article)
+        self.session.commit()
+        self.assertCount((10, 30, COUNT_APPROXIMATE), sql, None, 10, COUNT_APPROXIMATE)
+        self.assertCount((10, 31, COUNT_APPROXIMATE), sql, None, 10, COUNT_APPROXIMATE, staleness=-1)
+        # The filtered queries are always counted.
+        self.assertCount((6, 6, COUNT_QUERY), sql.filter(ArticleMapped.Rank == 0), None, 10, COUNT_APPROXIMATE)
+
+        # The statements that differ only by parameters have separate counts.
+        sqlRanks = lambda count: self.session.query(ArticleMapped.Rank).group_by(ArticleMapped.Rank).\
+        having(func.count() > count)
+        self.assertCount((2, 2, COUNT_APPROXIMATE), sqlRanks(4), None, 10, COUNT_APPROXIMATE)
+        self.assertCount((7, 7, COUNT_APPROXIMATE), sqlRanks(0), None, 10, COUNT_APPROXIMATE)
+
+    def testCountMore(self):
+        sql = self.session.query(ArticleMapped).order_by(ArticleMapped.Id)
+        self.assertCount((10, None, COUNT_MORE), sql, None, 10, COUNT_MORE)
+        self.assertCount((10, 30, COUNT_MORE), sql, 20, 10, COUNT_MORE)
+        self.assertCount((5, 30, COUNT_MORE), sql, 25, 10, COUNT_MORE)
+        self.assertCount((30, 30, COUNT_MORE), sql, None, None, COUNT_MORE)
+        # The offset is past the rows so the total is counted.
+        self.assertCount((0, 30, COUNT_QUERY), sql, 40, 10, COUNT_MORE)
+        self.assertCount((0, 30, COUNT_QUERY), sql, None, 0, COUNT_MORE)
+        # The rows are not the counted rows so the total is not known.
+        sqlFiltered = sql.filter(ArticleMapped.Id > 25)
+        self.assertCount((5, None, None), sqlFiltered, None, 10, COUNT_MORE, sql)
+        self.assertCount((3, None, COUNT_MORE), sqlFiltered, None, 3, COUNT_MORE, sql)
+
+    def assertParity(self, mapped, q, only=None, exclude=None, onlyNames=None, excludeNames=None):
+        sql = buildQuery(self.session.query(mapped), q, mapped, only, exclude)
+        sqlInterpreted = buildQueryInterpreted(self.session.query(mapped), q, mapped, onlyNames or only,
+                                               excludeNames or exclude)
+        self.assertEqual(str(sqlInterpreted.statement), str(sql.statement))
+        self.assertEqual(sqlInterpreted.statement.compile().params, sql.statement.compile().params)
+        self.assertEqual([row.Id for row in sqlInterpreted.all()], [row.Id for row in sql.all()])
+
+    def testPlanParity(self):
+        for k in range(10):
+            event = EventMapped()
+            event.Title, event.Active = 'event %s' % (k % 3), k % 2 == 0
+            event.Day, event.Hour = date(2013, 4, 1 + k % 4), time(k % 6, 30)
+            self.session.add(event)
+        self.session.commit()
+
+        q = QArticle()
+        q.name.like = '%a'
+        q.rank.orderDesc()
+        q.published.orderAsc()
+        q.published.priority = 1
+        self.assertParity(ArticleMapped, q)
+        self.assertParity(ArticleMapped, q, only=(QArticle.name, 'rank'), onlyNames=('name', 'rank'))
+        self.assertParity(ArticleMapped, q, exclude=QArticle.published, excludeNames=('published',))
+
+        q = QArticle()
+        q.name.ilike = 'BETA'
+        q.published.since = datetime(2013, 4, 15, 11)
+        q.published.until = datetime(2013, 4, 15, 13)
+        self.assertParity(ArticleMapped, q)
+
+        q = QArticleExtended()
+        q.other.like = 'x%'
+        q.id.orderDesc()
+        q.name.orderAsc()
+        q.name.priority = 2
+        q.rank.orderAsc()
+        q.rank.priority = 1
+        self.assertParity(ArticleMapped, q)
+
+        q = QEvent()
+        q.title.equal = 'event 1'
+        q.title.orderAsc()
+        q.active.value = False
+        q.day.start = date(2013, 4, 2)
+        q.day.orderDesc()
+        q.hour.end = time(4, 0)
+        self.assertParity(EventMapped, q)
+
+        q = QEvent()
+        q.active.orderDesc()
+        q.hour.since = time(1, 0)
+        q.hour.orderAsc()
+        self.assertParity(EventMapped, q)
+
+    def testPlanReuse(self):
+        first, second = QArticle(), QArticle()
+        first.name.like = 'alpha'
+        first.rank.orderAsc()
+        second.published.start = datetime(2013, 4, 15, 12)
+        second.name.orderDesc()
+
+        self.assertParity(ArticleMapped, first)
+        plan = util_service.planFor(ArticleMapped, QArticle)
+        self.assertParity(ArticleMapped, second)
+        self.assertParity(ArticleMapped, first)
+        self.assertIs(plan, util_service.planFor(ArticleMapped, QArticle))
+        self.assertIsNot(plan, util_service.planFor(ArticleMapped, QArticleExtended))
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
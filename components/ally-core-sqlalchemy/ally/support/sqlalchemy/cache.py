@@ -0,0 +1,302 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally core sql alchemy
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides the process wide cache for the mapped entities.
+'''
+
+from ally.support.api.util_service import namesForModel
+from ally.support.sqlalchemy.mapper import MappedSupport, addInsertListener, \
+    addUpdateListener, addDeleteListener
+from collections import OrderedDict
+from inspect import isclass
+from itertools import count
+from sqlalchemy import event
+from sqlalchemy.orm.attributes import get_history
+from sqlalchemy.orm.session import Session, object_session
+from threading import Lock
+from time import time
+
+# --------------------------------------------------------------------
+
+_caches = {}
+# The entity caches indexed by the mapped class, as a dictionary{class: dictionary{string: EntityCache}} where the
+# caches are indexed by the identity attribute name.
+_cachesLock = Lock()
+# The lock for the entity caches.
+_generations = count(1)
+# The generations counter, provides the ordered stamps for the transactions begin and for the entities invalidations.
+_listened = set()
+# The session classes that have the transaction listeners.
+
+# --------------------------------------------------------------------
+
+class EntityCache:
+    '''
+    Bounded cache (least recently used and time to live) for the entities of a mapped class, the entities are cached as
+    snapshots of the model properties and are provided as new detached entities, so changing a provided entity has no
+    effect on the cache or on the database. The cache is shared by all the requests of the process, it is invalidated
+    by the entities inserts, updates and deletes made through the session and again when the transaction that made
+    the change ends, the bulk changes made with queries need to be invalidated explicitly.
+    The generation of the last invalidation is kept for each identifier, an entity read in a transaction that has
+    begun before the last invalidation of its identifier is not cached since it might hold the state before the change.
+    '''
+    __slots__ = ('mapped', 'attribute', 'maximumEntries', 'timeToLive', '_names', '_lock', '_entries',
+                 '_invalidated', '_invalidatedFloor', 'hits', 'misses', 'invalidations')
+
+    def __init__(self, mapped, attribute, maximumEntries=1000, timeToLive=300):
+        '''
+        Construct the entity cache.
+
+        @param mapped: class
+            The mapped class of the cached entities.
+        @param attribute: string
+            The name of the attribute that identifies the cached entities, like 'Id' or 'Key'.
+        @param maximumEntries: integer
+            The maximum number of cached entities.
+        @param timeToLive: integer|float
+            The number of seconds that an entity is cached.
+        '''
+        assert isclass(mapped), 'Invalid class %s' % mapped
+        assert isinstance(mapped, MappedSupport), 'Invalid mapped class %s' % mapped
+        assert isinstance(attribute, str), 'Invalid attribute %s' % attribute
+        assert isinstance(maximumEntries, int) and maximumEntries > 0, 'Invalid maximum entries %s' % maximumEntries
+        assert isinstance(timeToLive, (int, float)), 'Invalid time to live %s' % timeToLive
+
+        self.mapped = mapped
+        self.attribute = attribute
+        self.maximumEntries = maximumEntries
+        self.timeToLive = timeToLive
+
+        self._names = tuple(namesForModel(mapped))
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self._invalidated = OrderedDict()
+        self._invalidatedFloor = 0
+        self.hits = self.misses = self.invalidations = 0
+
+    def get(self, identifier):
+        '''
+        Provides the cached entity.
+
+        @param identifier: object
+            The identifier of the entity.
+        @return: object|None
+            A new detached entity or None if the entity is not cached.
+        '''
+        with self._lock:
+            entry = self._entries.get(identifier)
+            if entry is not None:
+                snapshot, expires = entry
+                if expires > time():
+                    self._entries.move_to_end(identifier)
+                    self.hits += 1
+                else:
+                    del self._entries[identifier]
+                    snapshot = None
+            else: snapshot = None
+            if snapshot is None:
+                self.misses += 1
+                return
+
+        entity = self.mapped()
+        for name, value in snapshot: setattr(entity, name, value)
+        return entity
+
+    def put(self, identifier, entity, session=None, generation=None):
+        '''
+        Caches the entity, the entity is not cached if it has been changed in the provided session or if it has been
+        invalidated after the entity was read.
+
+        @param identifier: object
+            The identifier of the entity.
+        @param entity: object
+            The entity to cache.
+        @param session: Session|None
+            The session of the entity, the generation of the session transaction begin is used if no generation is
+            provided.
+        @param generation: integer|None
+            The generation taken with 'generation' before the entity was read.
+        '''
+        assert isinstance(entity, self.mapped), 'Invalid entity %s' % entity
+        if session is not None:
+            assert isinstance(session, Session), 'Invalid session %s' % session
+            listenTo(session)
+            if (self, identifier) in session.__dict__.get('_ally_cache_pending', ()): return
+            if session.is_modified(entity): return
+            if generation is None: generation = session.__dict__.get('_ally_cache_begin', 0)
+        assert generation is None or isinstance(generation, int), 'Invalid generation %s' % generation
+
+        snapshot = tuple((name, getattr(entity, name)) for name in self._names if getattr(entity, name) is not None)
+        with self._lock:
+            if generation is not None:
+                if generation < self._invalidatedFloor: return
+                if generation < self._invalidated.get(identifier, 0): return
+            self._entries.pop(identifier, None)
+            while len(self._entries) >= self.maximumEntries: self._entries.popitem(last=False)
+            self._entries[identifier] = (snapshot, time() + self.timeToLive)
+
+    def invalidate(self, identifier, session=None):
+        '''
+        Invalidates the cached entity.
+
+        @param identifier: object
+            The identifier of the entity.
+        @param session: Session|None
+            The session that changes the entity, if provided the entity is invalidated again when the session
+            transaction ends.
+        '''
+        if session is not None:
+            assert isinstance(session, Session), 'Invalid session %s' % session
+            listenTo(session)
+            pending = session.__dict__.get('_ally_cache_pending')
+            if pending is None: pending = session.__dict__['_ally_cache_pending'] = set()
+            pending.add((self, identifier))
+        with self._lock:
+            self._invalidated.pop(identifier, None)
+            while len(self._invalidated) >= self.maximumEntries:
+                self._invalidatedFloor = self._invalidated.popitem(last=False)[1]
+            self._invalidated[identifier] = next(_generations)
+            if self._entries.pop(identifier, None) is not None: self.invalidations += 1
+
+    def clear(self):
+        '''
+        Removes all the cached entities.
+        '''
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._invalidated.clear()
+            self._invalidatedFloor = next(_generations)
+
+    def generation(self):
+        '''
+        Provides the current generation, used for the entities that are not read through a session.
+
+        @return: integer
+            The generation to provide to 'put' for the entity read after this call.
+        '''
+        return next(_generations)
+
+    def statistics(self):
+        '''
+        Provides the cache statistics.
+
+        @return: dictionary{string, integer}
+            The cache statistics.
+        '''
+        with self._lock:
+            return dict(entries=len(self._entries), hits=self.hits, misses=self.misses,
+                        invalidations=self.invalidations)
+
+# --------------------------------------------------------------------
+
+def cacheFor(mapped, attribute, maximumEntries=1000, timeToLive=300):
+    '''
+    Provides the process wide entity cache for the mapped class and identity attribute, the cache is created and
+    bound to the mapped class changes only once, the first provided limits are used.
+
+    @param mapped: class
+        The mapped class of the cached entities.
+    @param attribute: string
+        The name of the attribute that identifies the cached entities.
+    @see: EntityCache.__init__
+    @return: EntityCache
+        The entity cache.
+    '''
+    with _cachesLock:
+        caches = _caches.get(mapped)
+        if caches is None:
+            caches = _caches[mapped] = {}
+            listener = lambda target: invalidateEntity(mapped, target)
+            addInsertListener(mapped, listener, False)
+            addUpdateListener(mapped, listener, False)
+            addDeleteListener(mapped, listener, False)
+
+        cache = caches.get(attribute)
+        if cache is None: cache = caches[attribute] = EntityCache(mapped, attribute, maximumEntries, timeToLive)
+        return cache
+
+def invalidate(mapped, attribute, identifier, session=None):
+    '''
+    Invalidates the cached entity of the mapped class, used for the changes that are not made through the session.
+
+    @param mapped: class
+        The mapped class of the entity.
+    @param attribute: string
+        The name of the attribute that identifies the entity.
+    @param identifier: object
+        The identifier of the entity.
+    @param session: Session|None
+        The session that changes the entity.
+    '''
+    cache = _caches.get(mapped, {}).get(attribute)
+    if cache is None: return
+    assert isinstance(cache, EntityCache)
+    cache.invalidate(identifier, session)
+
+def invalidateEntity(mapped, entity):
+    '''
+    Invalidates the cached entity for all the caches of the mapped class, the previous identifiers of the entity are
+    also invalidated.
+
+    @param mapped: class
+        The mapped class of the entity.
+    @param entity: object
+        The changed entity.
+    '''
+    session = object_session(entity)
+    for cache in _caches.get(mapped, {}).values():
+        assert isinstance(cache, EntityCache)
+        cache.invalidate(getattr(entity, cache.attribute), session)
+        for identifier in get_history(entity, cache.attribute).deleted or (): cache.invalidate(identifier, session)
+
+def listenTo(session):
+    '''
+    Adds the transaction listeners to the session class, the listeners are added for each session class since the
+    session classes created by the session makers after the listeners are added to the Session class do not receive
+    the events. The first transaction of a session class begins before the listeners are added, so it has no begin
+    generation and caches only the entities that have never been invalidated.
+
+    @param session: Session
+        The session to add the listeners for.
+    '''
+    assert isinstance(session, Session), 'Invalid session %s' % session
+    clazz = session.__class__
+    if clazz in _listened: return
+    with _cachesLock:
+        if clazz in _listened: return
+        event.listen(clazz, 'after_begin', onTransactionBegin)
+        event.listen(clazz, 'after_commit', onTransactionEnd)
+        event.listen(clazz, 'after_rollback', onTransactionEnd)
+        _listened.add(clazz)
+
+def onTransactionBegin(session, transaction, connection):
+    '''
+    Stamps the session with the generation of the transaction begin, the entities invalidated after this are not
+    cached from this session.
+    '''
+    session.__dict__['_ally_cache_begin'] = next(_generations)
+
+def onTransactionEnd(session):
+    '''
+    Invalidates again the entities that have been changed in the ended session transaction, this removes the entities
+    that other sessions have cached before the changes have been committed.
+    '''
+    pending = session.__dict__.pop('_ally_cache_pending', None)
+    if pending:
+        for cache, identifier in pending: cache.invalidate(identifier)
+
+def statistics():
+    '''
+    Provides the statistics for all the entity caches.
+
+    @return: dictionary{string, dictionary{string, integer}}
+        The cache statistics indexed by the mapped class name and identity attribute name.
+    '''
+    with _cachesLock: caches = [cache for caches in _caches.values() for cache in caches.values()]
+    return {'%s.%s' % (cache.mapped.__name__, cache.attribute): cache.statistics() for cache in caches}
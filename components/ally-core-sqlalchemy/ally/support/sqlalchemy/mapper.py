@@ -424,6 +424,26 @@ def addUpdateListener(mapped, listener, before=True):
     if before: event.listen(mapped.__mapper__, 'before_update', onUpdate)
     else: event.listen(mapped.__mapper__, 'after_update', onUpdate)
 
+def addDeleteListener(mapped, listener, before=True):
+    '''
+    Adds a delete listener that will get notified every time the mapped class entity is deleted through the session,
+    the bulk deletes made with queries are not notified.
+    
+    @param mapped: class
+        The model mapped class to add the listener to.
+    @param listener: callable(object)
+        A function that has to take as parameter the model instance that will be or has been deleted.
+    @param before: boolean
+        If True the listener will be notified before the delete occurs, if False will be notified after.
+    '''
+    assert isclass(mapped), 'Invalid class %s' % mapped
+    assert isinstance(mapped, MappedSupport), 'Invalid mapped class %s' % mapped
+    assert callable(listener), 'Invalid listener %s' % listener
+    assert isinstance(before, bool), 'Invalid before flag %s' % before
+    def onDelete(mapper, conn, target): listener(target)
+    if before: event.listen(mapped.__mapper__, 'before_delete', onDelete)
+    else: event.listen(mapped.__mapper__, 'after_delete', onDelete)
+
 # --------------------------------------------------------------------
 
 class TypeModelMapped(TypeModel):
@@ -11,15 +11,49 @@ Provides utility methods for SQL alchemy service implementations.
 
 from ally.api.criteria import AsLike, AsOrdered, AsBoolean, AsEqual, AsDate, \
     AsTime, AsDateTime, AsRange
-from ally.api.operator.type import TypeCriteriaEntry
+from ally.api.operator.type import TypeCriteriaEntry, TypeModel, TypeQuery
 from ally.api.type import typeFor
 from ally.exception import InputError, Ref
 from ally.internationalization import _
 from ally.support.api.util_service import namesForQuery, namesForModel
 from ally.support.sqlalchemy.descriptor import PropertyAttribute
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime, date, time
+from decimal import Decimal
 from itertools import chain
 from sqlalchemy.exc import IntegrityError, OperationalError
-from sqlalchemy.sql.expression import _Case
+from sqlalchemy.sql.expression import _Case, tuple_, and_, or_, func
+from sqlalchemy.util import NamedTuple
+from threading import Lock
+import json
+import time as clock
+
+# --------------------------------------------------------------------
+
+FORMATS = ((datetime, 'datetime', '%Y-%m-%dT%H:%M:%S.%f'), (date, 'date', '%Y-%m-%d'), (time, 'time', '%H:%M:%S.%f'))
+# The formats used for the cursor values that have no JSON representation, the datetime is before date because is a
+# subclass of date.
+
+COUNT_QUERY = 'query'
+# The total is counted with a separate count query.
+COUNT_WINDOW = 'window'
+# The total is counted with a COUNT(*) OVER() window function in the same statement as the rows, if the database does
+# not support window functions the total is counted with a separate count query.
+COUNT_APPROXIMATE = 'approximate'
+# The total of the unfiltered queries is provided from a cache that can be stale, the filtered queries are counted with
+# a separate count query.
+COUNT_MORE = 'more'
+# The total is not counted, one more row than the limit is fetched in order to know if there are more rows.
+COUNT_MODES = frozenset((COUNT_QUERY, COUNT_WINDOW, COUNT_APPROXIMATE, COUNT_MORE))
+# The total count modes.
+
+_approximates = {}
+# The approximate counts cache, as a dictionary{tuple(string, tuple): tuple(integer, float)} containing the count and
+# the time of the counting indexed by the compiled count statement and its parameters.
+_approximatesLock = Lock()
+# The lock for the approximate counts cache.
+_plans = {}
+# The compiled query plans indexed by (mapped class, query class).
 
 # --------------------------------------------------------------------
 
@@ -48,7 +82,83 @@ def buildLimits(sqlQuery, offset=None, limit=None):
     if limit is not None: sqlQuery = sqlQuery.limit(limit)
     return sqlQuery
 
-def buildQuery(sqlQuery, query, mapped, only=None, exclude=None):
+def buildCount(sqlQuery, offset=None, limit=None, mode=COUNT_QUERY, sqlCount=None, staleness=60):
+    '''
+    Provides the rows for the SQL alchemy query together with the total count, the total is counted using the provided
+    mode.
+
+    @param sqlQuery: SQL alchemy
+        The sql alchemy query to fetch the rows for.
+    @param offset: integer|None
+        The offset to fetch elements from.
+    @param limit: integer|None
+        The limit of elements to get.
+    @param mode: string
+        The count mode, one of the COUNT_* modes.
+    @param sqlCount: SQL alchemy|None
+        The sql alchemy query to count, if None the rows query is counted, a different count query is counted only
+        with a separate count query or from the approximate counts. In the 'more' mode a different count query is
+        never counted.
+    @param staleness: integer|float
+        The number of seconds an approximate count is used before it is counted again.
+    @return: tuple(list, integer|None, string|None)
+        The rows, the total count and the count mode that provided the total, in the 'more' mode the total is None if
+        there are more rows after the fetched rows. If the 'more' mode is used with a different count query and there
+        are no more rows after the fetched rows the total and the count mode are None since the total is not known.
+    '''
+    assert mode in COUNT_MODES, 'Invalid count mode %s' % mode
+    assert isinstance(staleness, (int, float)), 'Invalid staleness %s' % staleness
+
+    rows = None
+    if mode == COUNT_MORE and limit != 0:
+        rows = buildLimits(sqlQuery, offset, None if limit is None else limit + 1).all()
+        if limit is not None and len(rows) > limit: return rows[:limit], None, COUNT_MORE
+        # The rows are not the counted rows (like for keyset pages) so the total is not known, but since there are no
+        # more rows after the fetched rows the total is not counted either.
+        if sqlCount is not None: return rows, None, None
+        if rows or not offset: return rows, (offset or 0) + len(rows), COUNT_MORE
+        # The offset is past the rows so the total is not known.
+    elif mode == COUNT_WINDOW and sqlCount is None and limit != 0 and isWindowSupported(sqlQuery):
+        rows = buildLimits(sqlQuery.add_columns(func.count().over()), offset, limit).all()
+        if rows: return [row[0] if len(row) == 2 else NamedTuple(row[:-1], row._labels[:-1]) for row in rows], \
+            rows[0][-1], COUNT_WINDOW
+        # The offset is past the rows so the total is not provided by the window function.
+
+    if rows is None: rows = [] if limit == 0 else buildLimits(sqlQuery, offset, limit).all()
+    if sqlCount is None: sqlCount = sqlQuery
+
+    if mode == COUNT_APPROXIMATE and sqlCount.whereclause is None:
+        compiled, now = sqlCount.order_by(None).statement.compile(), clock.time()
+        key = (str(compiled), tuple(sorted(compiled.params.items())))
+        with _approximatesLock: count = _approximates.get(key)
+        if count is not None and now - count[1] <= staleness: return rows, count[0], COUNT_APPROXIMATE
+        total = sqlCount.count()
+        with _approximatesLock: _approximates[key] = (total, now)
+        return rows, total, COUNT_APPROXIMATE
+
+    return rows, sqlCount.count(), COUNT_QUERY
+
+def isWindowSupported(sqlQuery):
+    '''
+    Checks if the database of the SQL alchemy query supports the window functions.
+
+    @param sqlQuery: SQL alchemy
+        The sql alchemy query to check.
+    @return: boolean
+        True if the window functions are supported, False otherwise.
+    '''
+    bind = sqlQuery.session.bind
+    if bind is None: return False
+    dialect = bind.dialect
+    if dialect.name in ('postgresql', 'oracle', 'mssql'): return True
+    if dialect.name == 'sqlite':
+        return getattr(dialect.dbapi, 'sqlite_version_info', (0,)) >= (3, 25)
+    if dialect.name == 'mysql':
+        # The MySQL supports window functions starting with version 8.
+        return (getattr(dialect, 'server_version_info', None) or (0,)) >= (8,)
+    return False
+
+def buildQuery(sqlQuery, query, mapped, only=None, exclude=None, keyset=None):
     '''
     Builds the query on the SQL alchemy query.
 
@@ -64,79 +174,294 @@ def buildQuery(sqlQuery, query, mapped, only=None, exclude=None):
     @param exclude: tuple(string|TypeCriteriaEntry)|string|TypeCriteriaEntry|None
         The criteria names or references to be excluded when processing the query. If you provided a only parameter you cannot
         provide an exclude.
+    @param keyset: Keyset|None
+        The keyset to paginate the query with, the keyset uses the ordering of the query.
     '''
     assert query is not None, 'A query object is required'
     clazz = query.__class__
-
-    columns, ordered, unordered = {}, [], []
-    for name in namesForModel(mapped):
-        cp, name = getattr(mapped, name), name.lower()
-        if name not in columns and isinstance(cp, (PropertyAttribute, _Case)): columns[name] = cp
-    columns = {criteria:columns.get(criteria.lower()) for criteria in namesForQuery(clazz)}
+    plan = planFor(mapped, clazz)
 
     if only:
         if not isinstance(only, tuple): only = (only,)
         assert not exclude, 'Cannot have only \'%s\' and exclude \'%s\' criteria at the same time' % (only, exclude)
-        onlyColumns = {}
-        for criteria in only:
-            if isinstance(criteria, str):
-                column = columns.get(criteria)
-                assert column is not None, 'Invalid only criteria name \'%s\' for query class %s' % (criteria, clazz)
-                onlyColumns[criteria] = column
-            else:
-                typ = typeFor(criteria)
-                assert isinstance(typ, TypeCriteriaEntry), 'Invalid only criteria %s' % criteria
-                column = columns.get(criteria)
-                assert column is not None, 'Invalid only criteria \'%s\' for query class %s' % (criteria, clazz)
-                onlyColumns[criteria] = column
-        columns = onlyColumns
+        names = {criteriaNameFor(criteria, clazz) for criteria in only}
+        plan = [entry for entry in plan if entry[0] in names]
     elif exclude:
         if not isinstance(exclude, tuple): exclude = (exclude,)
-        for criteria in exclude:
-            if isinstance(criteria, str):
-                column = columns.pop(criteria, None)
-                assert column is not None, 'Invalid exclude criteria name \'%s\' for query class %s' % (criteria, clazz)
-            else:
-                typ = typeFor(criteria)
-                assert isinstance(typ, TypeCriteriaEntry), 'Invalid exclude criteria %s' % criteria
-                column = columns.pop(typ.name, None)
-                assert column is not None, 'Invalid exclude criteria \'%s\' for query class %s' % (criteria, clazz)
-
-    for criteria, column in columns.items():
-        if column is None or getattr(clazz, criteria) not in query: continue
+        names = {criteriaNameFor(criteria, clazz) for criteria in exclude}
+        plan = [entry for entry in plan if entry[0] not in names]
+
+    ordered, unordered = [], []
+    for criteria, reference, column, name, build, isOrdered in plan:
+        if reference not in query: continue
 
         crt = getattr(query, criteria)
-        if isinstance(crt, AsBoolean):
-            assert isinstance(crt, AsBoolean)
-            if AsBoolean.value in crt:
-                sqlQuery = sqlQuery.filter(column == crt.value)
-        elif isinstance(crt, AsLike):
-            assert isinstance(crt, AsLike)
-            if AsLike.like in crt: sqlQuery = sqlQuery.filter(column.like(crt.like))
-            elif AsLike.ilike in crt: sqlQuery = sqlQuery.filter(column.ilike(crt.ilike))
-        elif isinstance(crt, AsEqual):
-            assert isinstance(crt, AsEqual)
-            if AsEqual.equal in crt:
-                sqlQuery = sqlQuery.filter(column == crt.equal)
-        elif isinstance(crt, (AsDate, AsTime, AsDateTime, AsRange)):
-            if crt.__class__.start in crt: sqlQuery = sqlQuery.filter(column >= crt.start)
-            elif crt.__class__.until in crt: sqlQuery = sqlQuery.filter(column < crt.until)
-            if crt.__class__.end in crt: sqlQuery = sqlQuery.filter(column <= crt.end)
-            elif crt.__class__.since in crt: sqlQuery = sqlQuery.filter(column > crt.since)
-
-        if isinstance(crt, AsOrdered):
-            assert isinstance(crt, AsOrdered)
-            if AsOrdered.ascending in crt:
-                if AsOrdered.priority in crt and crt.priority:
-                    ordered.append((column, crt.ascending, crt.priority))
-                else:
-                    unordered.append((column, crt.ascending, None))
-
-        ordered.sort(key=lambda pack: pack[2])
-        for column, asc, __ in chain(ordered, unordered):
-            if asc: sqlQuery = sqlQuery.order_by(column)
-            else: sqlQuery = sqlQuery.order_by(column.desc())
+        if build is not None: sqlQuery = build(sqlQuery, column, crt)
+        if isOrdered and AsOrdered.ascending in crt:
+            if AsOrdered.priority in crt and crt.priority: ordered.append((column, crt.ascending, crt.priority, name))
+            else: unordered.append((column, crt.ascending, None, name))
 
+    ordered.sort(key=lambda pack: pack[2])
+    for column, asc, __, ___ in chain(ordered, unordered):
+        if asc: sqlQuery = sqlQuery.order_by(column)
+        else: sqlQuery = sqlQuery.order_by(column.desc())
+
+    if keyset is not None:
+        orderings = [(name, column, asc) for column, asc, __, name in chain(ordered, unordered)]
+        sqlQuery = buildKeyset(sqlQuery, mapped, keyset, orderings)
     return sqlQuery
 
+def planFor(mapped, clazz):
+    '''
+    Provides the compiled plan for building the queries of the query class on the mapped class, the plan is compiled
+    only once for a mapped class and query class.
+
+    @param mapped: class
+        The mapped model class to use the query on.
+    @param clazz: class
+        The query class.
+    @return: tuple(tuple(string, TypeCriteriaEntry, column, string, callable|None, boolean))
+        The plan entries for the criteria that have a mapped column, each entry contains the criteria name, the
+        criteria reference, the mapped column, the model property name, the filter builder and a flag indicating if the
+        criteria is ordered.
+    '''
+    key = (mapped, clazz)
+    plan = _plans.get(key)
+    if plan is not None: return plan
+
+    columns = {}
+    for name in namesForModel(mapped):
+        cp, lname = getattr(mapped, name), name.lower()
+        if lname not in columns and isinstance(cp, (PropertyAttribute, _Case)): columns[lname] = (cp, name)
+
+    queryType = typeFor(clazz)
+    assert isinstance(queryType, TypeQuery), 'Invalid query class %s' % clazz
+    plan = []
+    for criteria in namesForQuery(clazz):
+        column = columns.get(criteria.lower())
+        if column is None: continue
+        crtClass = queryType.query.criterias[criteria]
+        for criteriaClass, build in FILTERS:
+            if issubclass(crtClass, criteriaClass): break
+        else: build = None
+        plan.append((criteria, getattr(clazz, criteria), column[0], column[1], build, issubclass(crtClass, AsOrdered)))
+
+    return _plans.setdefault(key, tuple(plan))
+
+def criteriaNameFor(criteria, clazz):
+    '''
+    Provides the criteria name for the provided criteria name or reference.
+
+    @param criteria: string|TypeCriteriaEntry
+        The criteria name or reference.
+    @param clazz: class
+        The query class of the criteria.
+    @return: string
+        The criteria name.
+    '''
+    if isinstance(criteria, str):
+        assert criteria in typeFor(clazz).query.criterias, \
+        'Invalid criteria name \'%s\' for query class %s' % (criteria, clazz)
+        return criteria
+    typ = typeFor(criteria)
+    assert isinstance(typ, TypeCriteriaEntry), 'Invalid criteria %s' % criteria
+    return typ.name
+
+# --------------------------------------------------------------------
+
+def filterBoolean(sqlQuery, column, crt):
+    '''
+    Builds the filter for the boolean criteria.
+    '''
+    assert isinstance(crt, AsBoolean)
+    if AsBoolean.value in crt: return sqlQuery.filter(column == crt.value)
+    return sqlQuery
+
+def filterLike(sqlQuery, column, crt):
+    '''
+    Builds the filter for the like criteria.
+    '''
+    assert isinstance(crt, AsLike)
+    if AsLike.like in crt: return sqlQuery.filter(column.like(crt.like))
+    if AsLike.ilike in crt: return sqlQuery.filter(column.ilike(crt.ilike))
+    return sqlQuery
+
+def filterEqual(sqlQuery, column, crt):
+    '''
+    Builds the filter for the equal criteria.
+    '''
+    assert isinstance(crt, AsEqual)
+    if AsEqual.equal in crt: return sqlQuery.filter(column == crt.equal)
+    return sqlQuery
+
+def filterRange(sqlQuery, column, crt):
+    '''
+    Builds the filter for the range criteria, like date, time, date time and range.
+    '''
+    assert isinstance(crt, (AsDate, AsTime, AsDateTime, AsRange))
+    if crt.__class__.start in crt: sqlQuery = sqlQuery.filter(column >= crt.start)
+    elif crt.__class__.until in crt: sqlQuery = sqlQuery.filter(column < crt.until)
+    if crt.__class__.end in crt: sqlQuery = sqlQuery.filter(column <= crt.end)
+    elif crt.__class__.since in crt: sqlQuery = sqlQuery.filter(column > crt.since)
+    return sqlQuery
+
+FILTERS = ((AsBoolean, filterBoolean), (AsLike, filterLike), (AsEqual, filterEqual),
+           ((AsDate, AsTime, AsDateTime, AsRange), filterRange))
+# The filter builders indexed by the criteria class, the first matching criteria class is used.
+
+def buildKeyset(sqlQuery, mapped, keyset, orderings=()):
+    '''
+    Builds the keyset pagination on the SQL alchemy query, the ordering is completed with the id of the mapped model
+    in order to have an unique position for each row. The ordering columns should not be nullable since the rows with
+    null values cannot be positioned.
+
+    @param sqlQuery: SQL alchemy
+        The sql alchemy query to use.
+    @param mapped: class
+        The mapped model class to use the keyset on.
+    @param keyset: Keyset
+        The keyset to paginate the query with.
+    @param orderings: Iterable(tuple(string, column, boolean))
+        The ordering already applied on the query, as the model property name, the mapped column and the ascending
+        flag.
+    @raise InputError: If the keyset cursor is not valid for the query ordering.
+    '''
+    assert isinstance(keyset, Keyset), 'Invalid keyset %s' % keyset
+    modelType = typeFor(mapped)
+    assert isinstance(modelType, TypeModel), 'Invalid mapped class %s' % mapped
+
+    names, columns, directions = [], [], []
+    for name, column, asc in orderings:
+        names.append(name)
+        columns.append(column)
+        directions.append(asc)
+        if name == modelType.container.propertyId: break
+    else:
+        names.append(modelType.container.propertyId)
+        columns.append(getattr(mapped, modelType.container.propertyId))
+        directions.append(True)
+        sqlQuery = sqlQuery.order_by(columns[-1])
+    keyset.names = names
+
+    if not keyset.after: return sqlQuery
+    values = keyset.valuesFor(names)
+    if values is None: raise InputError(Ref(_('Invalid after cursor for the requested ordering'), ref=mapped))
+
+    if all(directions): return sqlQuery.filter(tuple_(*columns) > tuple_(*values))
+    if not any(directions): return sqlQuery.filter(tuple_(*columns) < tuple_(*values))
+    # The ordering directions are mixed so the row value comparison is expanded.
+    seeks = []
+    for k, column in enumerate(columns):
+        seek = column > values[k] if directions[k] else column < values[k]
+        seeks.append(and_(*[columns[i] == values[i] for i in range(k)] + [seek]))
+    return sqlQuery.filter(or_(*seeks))
+
+# --------------------------------------------------------------------
+
+class Keyset:
+    '''
+    Provides the keyset (seek) pagination, instead of skipping the preceding rows with an offset the page starts after
+    the ordering values of the last row from the previous page, the values are exchanged with the client as an opaque
+    cursor.
+    '''
+    __slots__ = ('after', 'names')
+
+    def __init__(self, after):
+        '''
+        Construct the keyset.
+
+        @param after: string
+            The cursor of the row to fetch the rows after, empty for the first page.
+        '''
+        assert isinstance(after, str), 'Invalid after cursor %s' % after
+        self.after = after
+        self.names = None
+
+    def valuesFor(self, names):
+        '''
+        Provides the values from the cursor.
+
+        @param names: list[string]
+            The model property names of the ordering.
+        @return: list[object]|None
+            The values of the ordering properties, None if the cursor is not valid for the provided names.
+        '''
+        try: cursor = json.loads(str(urlsafe_b64decode(self.after.encode('ascii') + b'=' * (-len(self.after) % 4)),
+                                     'utf8'), object_hook=decodeValue)
+        except (ValueError, ArithmeticError): return
+        if not isinstance(cursor, list) or len(cursor) != 2 or cursor[0] != names: return
+        if not isinstance(cursor[1], list) or len(cursor[1]) != len(names): return
+        return cursor[1]
+
+    def limitFor(self, limit, isMore=False):
+        '''
+        Provides the number of rows to fetch for a page, one more row than the limit is fetched in order to know if
+        there is a next page.
+
+        @param limit: integer|None
+            The limit of rows in a page.
+        @param isMore: boolean
+            Flag indicating that the rows are fetched with the 'more' count mode that already fetches one more row.
+        @return: integer|None
+            The number of rows to fetch.
+        '''
+        if not limit or isMore: return limit
+        return limit + 1
+
+    def page(self, rows, limit, more=None):
+        '''
+        Provides the page rows and the cursor for the next page.
+
+        @param rows: Iterable
+            The rows fetched for the limit provided by @see: limitFor.
+        @param limit: integer|None
+            The limit of rows in a page.
+        @param more: boolean|None
+            Flag indicating that there are more rows after the fetched rows, None to be known from the fetched rows.
+        @return: tuple(list, string|None)
+            The page rows and the cursor for the next page, None if there is no next page.
+        '''
+        rows = list(rows)
+        if more is None: more = bool(limit) and len(rows) > limit
+        if not more: return rows, None
+        rows = rows[:limit]
+        return rows, self.cursorFor(rows[-1])
+
+    def cursorFor(self, entity):
+        '''
+        Provides the cursor for fetching the rows after the provided entity.
+
+        @param entity: object
+            The last entity of the page.
+        @return: string
+            The opaque cursor.
+        '''
+        assert self.names is not None, 'The keyset has not been applied on a query'
+        cursor = json.dumps([self.names, [getattr(entity, name) for name in self.names]], default=encodeValue,
+                            separators=(',', ':'))
+        return str(urlsafe_b64encode(cursor.encode('utf8')).rstrip(b'='), 'ascii')
+
+def encodeValue(value):
+    '''
+    Encodes a cursor value that has no JSON representation.
+    '''
+    for clazz, key, fmt in FORMATS:
+        if isinstance(value, clazz): return {key: value.strftime(fmt)}
+    if isinstance(value, Decimal): return {'decimal': str(value)}
+    raise TypeError('Cannot use value %r in a cursor' % value)
+
+def decodeValue(obj):
+    '''
+    Decodes a cursor value encoded with @see: encodeValue.
+    '''
+    if len(obj) == 1:
+        for clazz, key, fmt in FORMATS:
+            if key in obj:
+                value = datetime.strptime(obj[key], fmt)
+                if clazz is date: return value.date()
+                if clazz is time: return value.time()
+                return value
+        if 'decimal' in obj: return Decimal(obj['decimal'])
+    raise ValueError('Invalid cursor value %r' % obj)
+
 
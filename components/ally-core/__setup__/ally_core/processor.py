@@ -9,7 +9,7 @@ Created on Nov 24, 2011
 Provides the configurations for the processors used in handling the request.
 '''
 
-from .encoder_decoder import renderingAssembly, parsingAssembly
+from .encoder_decoder import renderingAssembly, parsingAssembly, renderJSON
 from ally.container import ioc
 from ally.core.impl.processor.arguments import ArgumentsPrepareHandler, \
     ArgumentsBuildHandler
@@ -49,6 +49,18 @@ def allow_chuncked_response():
     '''Flag indicating that a chuncked transfer is allowed, more or less if this is false a length is a must'''
     return False
 
+@ioc.config
+def compile_encoders() -> bool:
+    '''Flag indicating that the model encoders should be compiled into specialized functions, this is faster but the
+    model encoders are harder to debug'''
+    return False
+
+@ioc.config
+def encoder_stream_size() -> int:
+    '''The number of collection items that are encoded in one rendering step, the rendered content is flushed in chuncks
+    only between the rendering steps'''
+    return 100
+
 @ioc.config
 def chunck_size():
     '''The buffer size used in the generator returned chuncks'''
@@ -88,7 +100,11 @@ def conversion() -> Handler:
 def createDecoder() -> Handler: return CreateDecoderHandler()
 
 @ioc.entity
-def createEncoder() -> Handler: return CreateEncoderHandler()
+def createEncoder() -> Handler:
+    b = CreateEncoderHandler()
+    b.compileModels = compile_encoders()
+    b.streamSize = encoder_stream_size()
+    return b
 
 @ioc.entity
 def parser() -> Handler:
@@ -127,6 +143,10 @@ def assemblyResources() -> Assembly:
 
 # --------------------------------------------------------------------
 
+@ioc.before(renderJSON)
+def updateRenderJSON():
+    renderJSON().bufferSize = chunck_size()
+
 @ioc.before(assemblyResources)
 def updateAssemblyResources():
     assemblyResources().add(argumentsPrepare(), methodInvoker(), renderer(), conversion(), createDecoder(),
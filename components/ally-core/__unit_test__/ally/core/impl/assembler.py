@@ -0,0 +1,113 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Assemblers testing.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.config import model, service, call
+from ally.api.type import Iter, typeFor
+from ally.container import ioc
+from ally.core.impl.assembler import AssembleGet, AssembleInsert, AssembleUpdateModel, AssembleUpdate, \
+    AssembleDelete
+from ally.core.impl.invoker import InvokerCall
+from ally.core.impl.node import NodeRoot
+from ally.core.impl.resources_management import ResourcesRegister
+from ally.core.spec.resources import ConverterPath
+from ally.support.core.util_resources import findPath
+import unittest
+
+# --------------------------------------------------------------------
+
+@model(id='Id')
+class Item:
+    Id = int
+    Name = str
+
+@service
+class IItemService:
+
+    @call
+    def getById(self, id:Item.Id) -> Item:
+        '''
+        '''
+
+    @call
+    def insert(self, item:Item) -> Item.Id:
+        '''
+        '''
+
+    @call(webName='Bulk')
+    def insertAll(self, items:Iter(Item)) -> Iter(Item.Id):
+        '''
+        '''
+
+    @call(webName='Bulk')
+    def updateAll(self, items:Iter(Item)):
+        '''
+        '''
+
+    @call(webName='Bulk')
+    def deleteAll(self, items:Iter(Item)) -> bool:
+        '''
+        '''
+
+class ItemService(IItemService):
+
+    def getById(self, id): pass
+    def insert(self, item): pass
+    def insertAll(self, items): pass
+    def updateAll(self, items): pass
+    def deleteAll(self, items): pass
+
+# --------------------------------------------------------------------
+
+class TestAssembler(unittest.TestCase):
+
+    def testCollectionModels(self):
+        calls = typeFor(ItemService).service.calls
+        assembler = AssembleInsert()
+        ioc.initialize(assembler)
+
+        self.assertEqual([typeFor(Item)], assembler.collectionModels(InvokerCall(ItemService(), calls['insertAll'])))
+        self.assertEqual([typeFor(Item)], assembler.collectionModels(InvokerCall(ItemService(), calls['deleteAll'])))
+        self.assertEqual([], assembler.collectionModels(InvokerCall(ItemService(), calls['insert'])))
+        self.assertEqual([], assembler.collectionModels(InvokerCall(ItemService(), calls['getById'])))
+
+    def testAssembleBulk(self):
+        assemblers = [AssembleGet(), AssembleInsert(), AssembleUpdateModel(), AssembleUpdate(), AssembleDelete()]
+        for assembler in assemblers: ioc.initialize(assembler)
+        register = ResourcesRegister()
+        register.root, register.assemblers = NodeRoot(), assemblers
+        ioc.initialize(register)
+        register.register(ItemService())
+
+        converterPath = ConverterPath()
+        node = findPath(register.root, ['Item'], converterPath).node
+        self.assertIsNotNone(node)
+        self.assertEqual('insert', node.insert.name)
+
+        node = findPath(register.root, ['Item', 'Bulk'], converterPath).node
+        self.assertIsNotNone(node)
+        self.assertEqual(('insertAll', 'updateAll', 'deleteAll'),
+                         (node.insert.name, node.update.name, node.delete.name))
+        self.assertIsNone(node.get)
+
+        node = findPath(register.root, ['Item', '1'], converterPath).node
+        self.assertEqual('getById', node.get.name)
+        self.assertIsNone(node.insert)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -18,7 +18,7 @@ if True:
 
 from ally.api.config import model
 from ally.api.operator.type import TypeModel
-from ally.api.type import List, typeFor
+from ally.api.type import List, Iter, typeFor
 from ally.container import ioc
 from ally.core.impl.processor.decoder import CreateDecoderHandler
 from ally.core.spec.resources import ConverterPath
@@ -90,6 +90,35 @@ class TestModel(unittest.TestCase):
         self.assertRaises(InputError, resolve, path=deque(('ModelKey', 'Name')), value='The name',
                           target=args, **context)
 
+    def testDecodeCollection(self):
+        transformer = CreateDecoderHandler()
+        ioc.initialize(transformer)
+
+        resolve = transformer.decoderFor('models', Iter(ModelId))
+        context = dict(converter=ConverterPath(), converterId=ConverterPath(), normalizer=ConverterPath())
+
+        args = {}
+        self.assertTrue(resolve(path=deque(('ModelIdList', 0, 'Name')), value='First', target=args, **context))
+        self.assertTrue(resolve(path=deque(('ModelIdList', 1, 'Id')), value='2', target=args, **context))
+        self.assertTrue(resolve(path=deque((0, 'Flags')), value=['1', '2'], target=args, **context))
+        self.assertTrue('models' in args)
+        models = args['models']
+        self.assertEqual(2, len(models))
+        self.assertIsInstance(models[0], ModelId)
+        self.assertEqual(('First', ['1', '2']), (models[0].Name, models[0].Flags))
+        self.assertTrue(models[1].Id == 2)
+
+        self.assertFalse(resolve(path=deque(('ModelIdList', 'Name')), value='Name', target=args, **context))
+        self.assertFalse(resolve(path=deque(), value=['Name'], target=args, **context))
+
+        args = {}
+        self.assertTrue(resolve(path=deque(), value=[], target=args, **context))
+        self.assertEqual([], args['models'])
+        args = {}
+        self.assertTrue(resolve(path=deque(('ModelIdList',)), value=[], target=args, **context))
+        self.assertEqual([], args['models'])
+        self.assertRaises(InputError, resolve, path=deque((1, 'Id')), value='x', target=args, **context)
+
 # --------------------------------------------------------------------
 
 if __name__ == '__main__': unittest.main()
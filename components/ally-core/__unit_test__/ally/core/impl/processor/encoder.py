@@ -17,12 +17,16 @@ if True:
 # --------------------------------------------------------------------
 
 from ally.api.config import model
+from ally.api.extension import IterPart
 from ally.api.type import typeFor, List
 from ally.container import ioc
-from ally.core.impl.processor.encoder import CreateEncoderHandler
+from ally.core.impl.processor.encoder import CreateEncoderHandler, EncodeObject, \
+    EncodeCollection
 from ally.core.spec.transform.exploit import Resolve
-from ally.core.spec.transform.render import RenderToObject
+from ally.core.spec.transform.render import RenderToObject, IRender
 from ally.core.spec.resources import ConverterPath
+from threading import Thread, Barrier
+from time import time
 import unittest
 
 # --------------------------------------------------------------------
@@ -39,6 +43,11 @@ class ModelId:
     Flags = List(str)
     ModelKey = ModelKey
 
+def modelId(**values):
+    model = ModelId()
+    for name, value in values.items(): setattr(model, name, value)
+    return model
+
 # --------------------------------------------------------------------
 
 class TestModel(unittest.TestCase):
@@ -106,6 +115,170 @@ class TestModel(unittest.TestCase):
         resolve.do()
         self.assertFalse(resolve.has())
 
+    def testPart(self):
+        transformer = CreateEncoderHandler()
+        ioc.initialize(transformer)
+
+        resolve = Resolve(transformer.encoderFor(typeFor(List(ModelId))))
+        render = RenderToObject()
+        context = dict(render=render, converter=ConverterPath(), converterId=ConverterPath(), normalizer=ConverterPath())
+
+        render.obj = None
+        resolve.request(value=IterPart([modelId(Id=1)], 10, 0, 1), **context).doAll()
+        self.assertEqual({'total': '10', 'offset': '0', 'limit': '1', 'ModelIdList': [{'Id': '1'}]}, render.obj)
+
+        render.obj = None
+        resolve.request(value=IterPart([modelId(Id=1)], None, None, 1, 'cursor'), **context).doAll()
+        self.assertEqual({'offset': '0', 'limit': '1', 'after': 'cursor', 'ModelIdList': [{'Id': '1'}]}, render.obj)
+
+        render.obj = None
+        resolve.request(value=IterPart([modelId(Id=1)], None, 0, 1, totalMode='more'), **context).doAll()
+        self.assertEqual({'offset': '0', 'limit': '1', 'totalMode': 'more', 'ModelIdList': [{'Id': '1'}]}, render.obj)
+
+    def testCompiled(self):
+        transformer = CreateEncoderHandler()
+        ioc.initialize(transformer)
+        transformerCompiled = CreateEncoderHandler()
+        transformerCompiled.compileModels = True
+        ioc.initialize(transformerCompiled)
+
+        self.assertNotIsInstance(transformerCompiled.encoderFor(typeFor(ModelId)), EncodeObject)
+
+        render = RenderToObject()
+        context = dict(render=render, converter=ConverterPath(), converterId=ConverterPath(), normalizer=ConverterPath())
+
+        models = [ModelId(), modelId(Id=12), modelId(Id=12, ModelKey='The key'),
+                  modelId(Id=13, Name='Uau Name', Flags=['1', '2', '3'], ModelKey='The key')]
+        for ofType, value in [(typeFor(ModelId), model) for model in models] + [(typeFor(List(ModelId)), models)]:
+            render.obj = None
+            Resolve(transformer.encoderFor(ofType)).request(value=value, **context).doAll()
+            expected = render.obj
+
+            render.obj = None
+            Resolve(transformerCompiled.encoderFor(ofType)).request(value=value, **context).doAll()
+            self.assertEqual(expected, render.obj)
+
+    def testStream(self):
+        transformer = CreateEncoderHandler()
+        transformer.streamSize = 2
+        ioc.initialize(transformer)
+
+        encoder = transformer.encoderFor(typeFor(List(ModelId)))
+        self.assertIsInstance(encoder, EncodeCollection)
+        self.assertEqual(2, encoder.streamSize)
+
+        render = RenderToObject()
+        context = dict(render=render, converter=ConverterPath(), converterId=ConverterPath(), normalizer=ConverterPath())
+
+        render.obj = None
+        resolve = Resolve(encoder).request(value=[], **context)
+        resolve.doAll()
+        self.assertEqual({'ModelIdList': []}, render.obj)
+
+        models = [modelId(Id=k, Name='Name %s' % k) for k in range(5)]
+        render.obj = None
+        resolve.request(value=models, **context)
+        steps = 0
+        while resolve.has():
+            resolve.do()
+            steps += 1
+        self.assertEqual(5, steps)
+        self.assertEqual({'ModelIdList': [{'Id': str(k), 'Name': 'Name %s' % k} for k in range(5)]}, render.obj)
+
+        encoder = EncodeCollection('ModelIdList', lambda **data: None)
+        self.assertIsNone(encoder.streamSize)
+
+    def testThreads(self):
+        transformer = CreateEncoderHandler()
+        transformer.compileModels = True
+        ioc.initialize(transformer)
+
+        models = [modelId(Id=k, Name='Name %s' % k, Flags=['1', '2'], ModelKey='Key %s' % k) for k in range(5)]
+        expected = {'ModelIdList': [{'Id': str(k), 'Name': 'Name %s' % k, 'Flags': {'Flags': ['1', '2']},
+                                     'ModelKey': {'Key': 'Key %s' % k}} for k in range(5)]}
+
+        barrier, encoders, failures = Barrier(10), [], []
+        typeList = typeFor(List(ModelId))  # The encoders are cached weakly by type so we need to keep the type.
+        def encode():
+            barrier.wait()
+            encoder = transformer.encoderFor(typeList)
+            encoders.append(encoder)
+            render = RenderToObject()
+            context = dict(render=render, converter=ConverterPath(), converterId=ConverterPath(),
+                           normalizer=ConverterPath())
+            for _k in range(200):
+                render.obj = None
+                Resolve(encoder).request(value=models, **context).doAll()
+                if render.obj != expected: failures.append(render.obj)
+
+        threads = [Thread(target=encode) for _k in range(10)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+
+        self.assertEqual([], failures)
+        self.assertEqual(10, len(encoders))
+        for encoder in encoders: self.assertIs(encoders[0], encoder)
+
+    def testCompiledEvents(self):
+        transformer = CreateEncoderHandler()
+        ioc.initialize(transformer)
+        transformerCompiled = CreateEncoderHandler()
+        transformerCompiled.compileModels = True
+        ioc.initialize(transformerCompiled)
+
+        models = [ModelId(), modelId(Id=12, Name=''), modelId(Id=12, Flags=[]),
+                  modelId(Id=13, Name='Uau Name', Flags=['1', '2', '3'], ModelKey='The key')]
+        for ofType, value in [(typeFor(ModelId), model) for model in models] + [(typeFor(List(ModelId)), models)]:
+            renders = []
+            for encoder in (transformer.encoderFor(ofType), transformerCompiled.encoderFor(ofType)):
+                render = RenderToEvents()
+                context = dict(render=render, converter=ConverterPath(), converterId=ConverterPath(),
+                               normalizer=ConverterPath())
+                Resolve(encoder).request(value=value, **context).doAll()
+                renders.append(render.events)
+            self.assertTrue(renders[0])
+            self.assertEqual(renders[0], renders[1])
+
+    def testCompiledBenchmark(self):
+        transformer = CreateEncoderHandler()
+        ioc.initialize(transformer)
+        transformerCompiled = CreateEncoderHandler()
+        transformerCompiled.compileModels = True
+        ioc.initialize(transformerCompiled)
+
+        models = [modelId(Id=k, Name='Name %s' % k, Flags=['1', '2', '3'], ModelKey='Key %s' % k) for k in range(100)]
+        typeList = typeFor(List(ModelId))
+
+        timings, objs = [], []
+        for encoder in (transformer.encoderFor(typeList), transformerCompiled.encoderFor(typeList)):
+            render = RenderToObject()
+            context = dict(render=render, converter=ConverterPath(), converterId=ConverterPath(),
+                           normalizer=ConverterPath())
+            start = time()
+            for _k in range(50):
+                render.obj = None
+                Resolve(encoder).request(value=models, **context).doAll()
+            timings.append(time() - start)
+            objs.append(render.obj)
+
+        # The timings are only reported since asserting on them is not reliable on a loaded machine.
+        print('Encoded %s models per second and compiled %s models per second' %
+              tuple(int(50 * len(models) / timing) for timing in timings))
+        self.assertEqual(objs[0], objs[1])
+
+# --------------------------------------------------------------------
+
+class RenderToEvents(IRender):
+    '''
+    Render that records the rendering events in the order they are received.
+    '''
+
+    def __init__(self): self.events = []
+    def value(self, name, value): self.events.append(('value', name, value))
+    def objectStart(self, name, attributes=None): self.events.append(('objectStart', name, attributes))
+    def objectEnd(self): self.events.append(('objectEnd',))
+    def collectionStart(self, name, attributes=None): self.events.append(('collectionStart', name, attributes))
+    def collectionEnd(self): self.events.append(('collectionEnd',))
 
 # --------------------------------------------------------------------
 
@@ -0,0 +1,80 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Text parser testing.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.config import model
+from ally.api.type import List, Iter
+from ally.container import ioc
+from ally.core.impl.processor.decoder import CreateDecoderHandler
+from ally.core.impl.processor.parser.text import ParseTextHandler
+from ally.core.spec.resources import ConverterPath
+from io import BytesIO
+import codecs
+import json
+import unittest
+
+# --------------------------------------------------------------------
+
+@model(id='Id')
+class ModelId:
+    Id = int
+    Name = str
+    Flags = List(str)
+
+# --------------------------------------------------------------------
+
+class TestParseText(unittest.TestCase):
+
+    def setUp(self):
+        transformer = CreateDecoderHandler()
+        ioc.initialize(transformer)
+        self.decoder = transformer.decoderFor('models', Iter(ModelId))
+
+        self.parser = ParseTextHandler()
+        self.parser.contentTypes = {'json'}
+        self.parser.parser = lambda content, charSet: json.load(codecs.getreader(charSet)(content))
+        self.parser.parserName = 'json'
+        ioc.initialize(self.parser)
+
+    def parse(self, content):
+        args = {}
+        data = dict(target=args, converter=ConverterPath(), converterId=ConverterPath(), normalizer=ConverterPath())
+        error = self.parser.parse(self.decoder, data, BytesIO(json.dumps(content).encode('utf8')), 'utf8')
+        return error, args.get('models')
+
+    def testList(self):
+        error, models = self.parse([{'Id': '1', 'Name': 'First', 'Flags': ['a', 'b']}, {'Id': '2'}])
+        self.assertIsNone(error)
+        self.assertEqual([(1, 'First', ['a', 'b']), (2, None, None)],
+                         [(model.Id, model.Name, model.Flags) for model in models])
+
+        error, models = self.parse({'ModelIdList': [{'Name': 'First'}, {'Name': 'Second'}]})
+        self.assertIsNone(error)
+        self.assertEqual(['First', 'Second'], [model.Name for model in models])
+
+    def testEmptyList(self):
+        self.assertEqual((None, []), self.parse([]))
+        self.assertEqual((None, []), self.parse({'ModelIdList': []}))
+
+    def testInvalid(self):
+        self.assertEqual('Invalid path \'1/Unknown\' in object', self.parse([{'Id': '1'}, {'Unknown': 'x'}])[0])
+        self.assertEqual('Invalid path \'\' in object', self.parse(['x'])[0])
+        self.assertEqual('Invalid path \'Other\' in object', self.parse({'Other': []})[0])
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
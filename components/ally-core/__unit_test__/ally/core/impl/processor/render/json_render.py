@@ -0,0 +1,100 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+JSON render testing.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.core.impl.processor.render.json import RenderJSON
+from io import BytesIO
+import json
+import unittest
+
+# --------------------------------------------------------------------
+
+def renderModels(render, count):
+    render.collectionStart('ModelList', {'total': str(count)})
+    for k in range(count):
+        render.objectStart('Model', {'href': 'http://localhost/Model/%s' % k})
+        render.value('Id', str(k))
+        render.value('Name', 'Name "%s" ăî€' % k)
+        render.collectionStart('Flags')
+        render.value('Value', 'a')
+        render.value('Value', 'b')
+        render.collectionEnd()
+        render.objectStart('Parent')
+        render.value('Id', '1')
+        render.objectEnd()
+        render.objectEnd()
+    render.collectionEnd()
+
+class OutputCounted(BytesIO):
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, bytes):
+        self.writes += 1
+        return super().write(bytes)
+
+# --------------------------------------------------------------------
+
+class TestRenderJSON(unittest.TestCase):
+
+    def testRender(self):
+        output = BytesIO()
+        renderModels(RenderJSON(output, 'UTF-8', 'backslashreplace', 1024), 2)
+
+        self.assertEqual('{"total":"2","ModelList":['
+                         '{"href":"http://localhost/Model/0","Id":"0","Name":"Name \\"0\\" ăî€",'
+                         '"Flags":{"Flags":["a","b"]},"Parent":{"Id":"1"}},'
+                         '{"href":"http://localhost/Model/1","Id":"1","Name":"Name \\"1\\" ăî€",'
+                         '"Flags":{"Flags":["a","b"]},"Parent":{"Id":"1"}}]}', output.getvalue().decode('utf-8'))
+
+        output = BytesIO()
+        render = RenderJSON(output, 'ascii', 'backslashreplace', 1024)
+        render.objectStart('Model')
+        render.value('Name', 'î')
+        render.objectEnd()
+        self.assertEqual(b'{"Name":"\\xee"}', output.getvalue())
+
+    def testBuffer(self):
+        output = OutputCounted()
+        render = RenderJSON(output, 'UTF-8', 'backslashreplace', 1024)
+        render.collectionStart('ModelList')
+        render.value('Value', 'a')
+        self.assertEqual(0, output.writes)
+        render.collectionEnd()
+        self.assertEqual(1, output.writes)
+        self.assertEqual({'ModelList': ['a']}, json.loads(output.getvalue().decode('utf-8')))
+
+        output = OutputCounted()
+        renderModels(RenderJSON(output, 'UTF-8', 'backslashreplace', 1024), 100)
+        self.assertTrue(10 < output.writes < 100)
+        self.assertEqual(100, len(json.loads(output.getvalue().decode('utf-8'))['ModelList']))
+
+    def testEncodingBlocks(self):
+        for charSet in ('UTF-16', 'UTF-32', 'UTF-8-SIG'):
+            output = OutputCounted()
+            renderModels(RenderJSON(output, charSet, 'backslashreplace', 128), 20)
+            self.assertTrue(output.writes > 1)
+
+            expected = BytesIO()
+            renderModels(RenderJSON(expected, 'UTF-8', 'backslashreplace', 1024), 20)
+            self.assertEqual(expected.getvalue().decode('utf-8'), output.getvalue().decode(charSet))
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,71 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Resources utilities testing.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.config import model
+from ally.api.type import typeFor, Input
+from ally.core.impl.node import NodeRoot, NodePath, NodeProperty
+from ally.core.spec.resources import ConverterPath
+from ally.support.core.util_resources import IndexPath, findPath
+import unittest
+
+# --------------------------------------------------------------------
+
+@model(id='Id')
+class Item:
+    Id = int
+    Name = str
+
+@model(id='Key')
+class Language:
+    Key = str
+
+# --------------------------------------------------------------------
+
+class TestIndexPath(unittest.TestCase):
+
+    def testFindPath(self):
+        converterPath = ConverterPath()
+        root = NodeRoot()
+        index = IndexPath(root, converterPath)
+
+        item = NodePath(root, True, 'Item')
+        itemId = NodeProperty(item, Input('id', typeFor(Item.Id)))
+        NodePath(itemId, True, 'Language')
+
+        for paths in (['Item'], ['Item', '12'], ['Item', 'x'], ['Item', '12', 'Language'], ['Language'], []):
+            self.assertEqual(str(findPath(root, paths, converterPath)), str(index.findPath(paths)))
+            self.assertIs(findPath(root, paths, converterPath).node, index.findPath(paths).node)
+
+        self.assertIs(itemId, index.findPath(['Item', '12']).node)
+        self.assertIsNone(index.findPath(['Item', 'x']).node)
+        self.assertIsNone(index.findPath(['Language']).node)
+
+        # Adding nodes after the index has been used.
+        language = NodePath(root, True, 'Language')
+        languageKey = NodeProperty(language, Input('key', typeFor(Language.Key)))
+        itemName = NodeProperty(item, Input('name', typeFor(Item.Name)))
+
+        self.assertIs(language, index.findPath(['Language']).node)
+        self.assertIs(languageKey, index.findPath(['Language', 'en']).node)
+        self.assertIs(itemName, index.findPath(['Item', 'x']).node)
+        self.assertIs(itemId, index.findPath(['Item', '12']).node)
+        self.assertEqual(12, index.findPath(['Item', '12']).matches[-1].value)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
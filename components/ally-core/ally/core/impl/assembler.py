@@ -36,6 +36,7 @@ class AssembleBase(IAssembler):
     '''
 
     hintModelDomain = 'domain'
+    hintModelValidator = 'validator'
     hintCallWebName = 'webName'
     hintCallReplaceFor = 'replaceFor'
 
@@ -44,12 +45,17 @@ class AssembleBase(IAssembler):
         Construct the assembler.
         '''
         assert isinstance(self.hintModelDomain, str), 'Invalid hint name for model domain %s' % self.hintModelDomain
+        assert isinstance(self.hintModelValidator, str), \
+        'Invalid hint name for model validator %s' % self.hintModelValidator
         assert isinstance(self.hintCallWebName, str), 'Invalid hint name for call web name %s' % self.hintCallWebName
         assert isinstance(self.hintCallReplaceFor, str), \
         'Invalid hint name for call replace %s' % self.hintCallReplaceFor
 
         self.modelHints = {
-        self.hintModelDomain: '(string) The domain where the model is registered'
+        self.hintModelDomain: '(string) The domain where the model is registered',
+
+        self.hintModelValidator: '(string) The name of the model property that changes whenever the model changes, '\
+        'like a last modified time stamp or a version, used as a cheap validator for the rendered model.'
         }
 
         self.callHints = {
@@ -167,6 +173,19 @@ class AssembleBase(IAssembler):
 
     # ----------------------------------------------------------------
 
+    def collectionModels(self, invoker):
+        '''
+        Provides the models types of the mandatory collection inputs, like a Iter(TheEntity) input.
+        
+        @param invoker: Invoker
+            The invoker to provide the collection models for.
+        @return: list[TypeModel]
+            The collection models types.
+        '''
+        assert isinstance(invoker, Invoker), 'Invalid invoker %s' % invoker
+        return [inp.type.itemType for inp in invoker.inputs[:invoker.mandatory]
+                if isinstance(inp.type, Iter) and isinstance(inp.type.itemType, TypeModel)]
+
     def isModelIn(self, model, types):
         '''
         Checks if the model is present in the provided types.
@@ -438,7 +457,9 @@ class AssembleDelete(AssembleOneByOne):
     boolean
     %
     ([...AnyEntity.Property], [AnyEntity.Id])
-    The last property needs to target the actual entity that is being deleted.
+    The last property needs to target the actual entity that is being deleted, for bulk deletes the entities are
+    provided as a collection argument:
+    ([...AnyEntity.Property], Iter(TheEntity))
     !!!Attention the order of the mandatory arguments is crucial since based on that the call is placed in the REST
     Node tree.
     '''
@@ -457,6 +478,7 @@ class AssembleDelete(AssembleOneByOne):
             return False
 
         types = [inp for inp in invoker.inputs[:invoker.mandatory] if isinstance(inp.type, TypeModelProperty)]
+        types.extend(self.collectionModels(invoker))
         if not types:
             log.info('Cannot extract any path types for %s', invoker)
             return False
@@ -479,6 +501,10 @@ class AssembleInsert(AssembleOneByOne):
     TheEntity|TheEnity.Property (usually the unique id property)
     %
     ([...AnyEntity.Property], [TheEntity])
+    or for bulk inserts:
+    Iter(TheEntity|TheEnity.Property)
+    %
+    ([...AnyEntity.Property], Iter(TheEntity))
     !!!Attention the order of the mandatory arguments is crucial since based on that the call is placed in the REST
     Node tree.
     '''
@@ -493,6 +519,9 @@ class AssembleInsert(AssembleOneByOne):
         if invoker.method != INSERT: return False
 
         typ = invoker.output
+        if isinstance(typ, Iter):
+            assert isinstance(typ, Iter)
+            typ = typ.itemType
         if isinstance(typ, (TypeModel, TypeModelProperty)):
             model = typ.container
         else:
@@ -502,6 +531,7 @@ class AssembleInsert(AssembleOneByOne):
 
         types = [inp if isinstance(inp.type, TypeModelProperty) else inp.type
                  for inp in invoker.inputs[:invoker.mandatory] if isinstance(inp.type, (TypeModelProperty, TypeModel))]
+        types.extend(self.collectionModels(invoker))
 
         models = [typ.container for typ in types if isinstance(typ, TypeModel)]
         if len(models) > 1:
@@ -527,7 +557,7 @@ class AssembleUpdate(AssembleOneByOne):
     Method signature needs to be flagged with UPDATE and look like:
     boolean
     %
-    ([...AnyEntity.Property], [TheEntity])
+    ([...AnyEntity.Property], [TheEntity|Iter(TheEntity)])
     !!!Attention the order of the mandatory arguments is crucial since based on that the call is placed in the REST
     Node tree.
     '''
@@ -543,6 +573,7 @@ class AssembleUpdate(AssembleOneByOne):
 
         types = [inp if isinstance(inp.type, TypeModelProperty) else inp.type
                  for inp in invoker.inputs[:invoker.mandatory] if isinstance(inp.type, (TypeModelProperty, TypeModel))]
+        types.extend(self.collectionModels(invoker))
 
         models = [typ.container for typ in types if isinstance(typ, TypeModel)]
         if len(models) > 1:
@@ -11,7 +11,7 @@ Provides the creation for decoders on the request content.
 
 from ally.api.operator.container import Model
 from ally.api.operator.type import TypeModelProperty, TypeModel
-from ally.api.type import Type, List, Input
+from ally.api.type import Type, List, Input, Iter
 from ally.container.ioc import injected
 from ally.core.spec.resources import Invoker, Normalizer, Converter
 from ally.core.spec.transform.exploit import handleExploitError
@@ -22,6 +22,7 @@ from ally.design.processor import HandlerProcessorProceed
 from ally.exception import InputError, Ref
 from ally.internationalization import _
 from collections import Callable, deque
+from threading import Lock
 from weakref import WeakKeyDictionary
 import logging
 
@@ -67,13 +68,18 @@ class CreateDecoderHandler(HandlerProcessorProceed):
     Implementation for a handler that creates the decoders for the request content.
     '''
 
+    nameList = '%sList'
+    # The name to use for the models collections, the collection items are decoded based on their index.
+
     def __init__(self):
         '''
         Construct the decoder.
         '''
+        assert isinstance(self.nameList, str), 'Invalid name list %s' % self.nameList
         super().__init__()
 
         self._cache = WeakKeyDictionary()
+        self._lock = Lock()
 
     def process(self, request:Request, response:Response, **keyargs):
         '''
@@ -91,7 +97,8 @@ class CreateDecoderHandler(HandlerProcessorProceed):
         for inp in request.invoker.inputs:
             assert isinstance(inp, Input)
 
-            if isinstance(inp.type, TypeModel):
+            if isinstance(inp.type, TypeModel) or \
+            (isinstance(inp.type, Iter) and isinstance(inp.type.itemType, TypeModel)):
                 request.decoder = self.decoderFor(inp.name, inp.type)
                 if request.decoder is not None:
                     request.decoderData = dict(target=request.arguments, converterId=request.converterId,
@@ -121,11 +128,14 @@ class CreateDecoderHandler(HandlerProcessorProceed):
             if isinstance(ofType, TypeModel):
                 assert isinstance(ofType, TypeModel)
                 decoder = self.decoderModel(ofType, obtainOnDict(argumentKey, ofType.clazz))
+            elif isinstance(ofType, Iter) and isinstance(ofType.itemType, TypeModel):
+                assert isinstance(ofType, Iter)
+                decoder = self.decoderCollection(ofType.itemType, obtainOnDict(argumentKey, list))
             else:
                 assert log.debug('Cannot decode object type \'%s\'', ofType) or True
                 return None
 
-            self._cache[ofType] = decoder
+            with self._lock: decoder = self._cache.setdefault(ofType, decoder)
 
         return decoder
 
@@ -154,6 +164,22 @@ class CreateDecoderHandler(HandlerProcessorProceed):
 
         return exploit
 
+    def decoderCollection(self, ofType, getter):
+        '''
+        Create a decode exploit for a collection of models.
+        
+        @param ofType: TypeModel
+            The type model of the collection items.
+        @param getter: callable(object) -> list
+            The getter used to get the items list from the target object.
+        @return: callable(**data)
+            The exploit that provides the collection decoding.
+        '''
+        assert isinstance(ofType, TypeModel), 'Invalid type model %s' % ofType
+        assert isinstance(self.nameList, str), 'Invalid name list %s' % self.nameList
+
+        return DecodeCollection(self.nameList % ofType.container.name, getter, ofType.clazz, self.decoderModel(ofType))
+
     def decoderPrimitive(self, propertyName, typeValue):
         '''
         Create a decode exploit for a primitive property also decodes primitive value list.
@@ -326,6 +352,54 @@ class DecodeObject:
         except InputError: raise
         except: handleExploitError(decodeProp)
 
+class DecodeCollection:
+    '''
+    Exploit for models collection decoding, the path needs to contain the index of the decoded item.
+    '''
+    __slots__ = ('name', 'getter', 'creator', 'item')
+
+    def __init__(self, name, getter, creator, item):
+        '''
+        Create a decode exploit for a models collection.
+        
+        @param name: string
+            The name of the collection to decode.
+        @param getter: callable(object) -> list
+            The getter used to obtain the items list from the target object.
+        @param creator: callable() -> object
+            The creator used for the collection items.
+        @param item: DecodeObject
+            The decode exploit used for the collection items.
+        '''
+        assert isinstance(name, str), 'Invalid name %s' % name
+        assert callable(getter), 'Invalid getter %s' % getter
+        assert callable(creator), 'Invalid creator %s' % creator
+        assert isinstance(item, DecodeObject), 'Invalid item decode %s' % item
+
+        self.name = name
+        self.getter = getter
+        self.creator = creator
+        self.item = item
+
+    def __call__(self, path, target, normalizer, **data):
+        assert isinstance(path, deque), 'Invalid path %s' % path
+        assert isinstance(normalizer, Normalizer), 'Invalid normalizer %s' % normalizer
+
+        if not path or (len(path) == 1 and normalizer.normalize(self.name) == path[0]):
+            if data.get('value') != []: return False
+            self.getter(target)  # An empty collection is provided as an empty list value.
+            return True
+
+        index = path.popleft()
+        if path and normalizer.normalize(self.name) == index: index = path.popleft()
+        if not isinstance(index, int) or index < 0: return False
+
+        items = self.getter(target)
+        assert isinstance(items, list), 'Invalid items %s' % items
+        while len(items) <= index: items.append(self.creator())
+
+        return self.item(path=path, target=items[index], normalizer=normalizer, **data)
+
 class DecodePrimitive:
     '''
     Exploit for primitive decoding.
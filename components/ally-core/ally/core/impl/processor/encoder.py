@@ -23,6 +23,7 @@ from ally.core.spec.transform.support import getterOnObjIfIn
 from ally.design.context import defines, Context, requires
 from ally.design.processor import HandlerProcessorProceed
 from collections import Callable, Iterable, OrderedDict
+from threading import Lock
 from weakref import WeakKeyDictionary
 import logging
 
@@ -74,6 +75,10 @@ class CreateEncoderHandler(HandlerProcessorProceed):
     # The name to use for rendering the values in a list of values.
     typeOrders = [Boolean, Integer, Number, Percentage, String, Time, Date, DateTime, Iter]
     # The order in which 
+    compileModels = False
+    # Flag indicating that the model encoders should be compiled into specialized functions.
+    streamSize = 1
+    # The number of collection items to be encoded in one resolve step for items that are flat.
 
     def __init__(self):
         '''
@@ -82,10 +87,13 @@ class CreateEncoderHandler(HandlerProcessorProceed):
         assert isinstance(self.nameList, str), 'Invalid name list %s' % self.nameList
         assert isinstance(self.nameValue, str), 'Invalid name value %s' % self.nameValue
         assert isinstance(self.typeOrders, list), 'Invalid type orders %s' % self.typeOrders
+        assert isinstance(self.compileModels, bool), 'Invalid compile models flag %s' % self.compileModels
+        assert isinstance(self.streamSize, int) and self.streamSize > 0, 'Invalid stream size %s' % self.streamSize
         super().__init__()
 
         self._typeOrders = [typeFor(typ) for typ in self.typeOrders]
         self._cache = WeakKeyDictionary()
+        self._lock = Lock()
 
     def process(self, request:Request, response:Response, **keyargs):
         '''
@@ -129,12 +137,11 @@ class CreateEncoderHandler(HandlerProcessorProceed):
                 assert isinstance(ofType, Iter)
 
                 nameEncoder = self.encoderItem(ofType.itemType)
-                if nameEncoder is not None:
-                    name, encoderItem = nameEncoder
-                    encoder = EncodeCollection(name, encoderItem)
+                if nameEncoder is not None: encoder = self.encoderCollection(*nameEncoder)
 
             elif isinstance(ofType, TypeModel):
                 encoder = self.encoderModel(ofType)
+                if self.compileModels and type(encoder) is EncodeObject: encoder = self.compileModel(ofType, encoder)
 
             elif isinstance(ofType, TypeModelProperty):
                 assert isinstance(ofType, TypeModelProperty)
@@ -145,7 +152,7 @@ class CreateEncoderHandler(HandlerProcessorProceed):
                 encoder = lambda **data: None
 
             else: assert log.debug('Cannot encode object type \'%s\'', ofType) or True
-            self._cache[ofType] = encoder
+            with self._lock: encoder = self._cache.setdefault(ofType, encoder)
 
         return encoder
 
@@ -168,6 +175,20 @@ class CreateEncoderHandler(HandlerProcessorProceed):
         else:
             log.debug('Cannot encode collection item type \'%s\'', ofType.itemType) or True
 
+    def encoderCollection(self, name, exploitItem):
+        '''
+        Create a encode exploit for a collection.
+        
+        @param name: string
+            The name of the collection.
+        @param exploitItem: callable(**data)
+            The exploit that provides the item encoding.
+        @return: callable(**data)
+            The exploit that provides the collection encoding.
+        '''
+        if isFlat(exploitItem): return EncodeCollection(name, exploitItem, streamSize=self.streamSize)
+        return EncodeCollection(name, exploitItem)
+
     def encoderModel(self, ofType, getter=None, exploit=None):
         '''
         Create a encode exploit for a model.
@@ -282,6 +303,78 @@ class CreateEncoderHandler(HandlerProcessorProceed):
             encoder = self.encoderPrimitive(typeProp.type, getter)
         exploit.properties[typeProp.property] = encoder
 
+    def compileModel(self, ofType, exploit):
+        '''
+        Compiles the provided model encode exploit into a single function that reads the model properties and emits
+        the render events directly. The properties that have exploits which are not known are delegated to the
+        exploit, everything else is rendered exactly as the model encode exploit renders it.
+        
+        @param ofType: TypeModel
+            The type model of the encode exploit.
+        @param exploit: EncodeObject
+            The model encode exploit as created by 'encoderModel'.
+        @return: callable(**data)
+            The compiled exploit that provides the model encoding.
+        '''
+        assert isinstance(ofType, TypeModel), 'Invalid type model %s' % ofType
+        assert isinstance(exploit, EncodeObject), 'Invalid encode object %s' % exploit
+        assert exploit.getter is None, 'Cannot compile encode object with getter %s' % exploit
+
+        namespace = dict(NAME=exploit.name, handleExploitError=handleExploitError)
+        lines = ['def encode(value, render, normalizer, converter, converterId, name=None, **data):',
+                 '    if value is None: return',
+                 '    render.objectStart(normalizer.normalize(name or NAME))',
+                 '    try:']
+        for k, (nameProp, encodeProp) in enumerate(exploit.properties.items()):
+            typeProp, nameExploit = ofType.childTypeFor(nameProp), 'e%s' % k
+            namespace[nameExploit], namespace['c%s' % k], namespace['t%s' % k] = encodeProp, typeProp, None
+
+            clazz = type(encodeProp)
+            if clazz is EncodePrimitiveCollection: getter = encodeProp.getterCollection
+            else: getter = getattr(encodeProp, 'getter', None)
+            if clazz is EncodeObject:
+                if len(encodeProp.properties) == 1: (nameId, encodeId), = encodeProp.properties.items()
+                else: encodeId = None
+                if type(encodeId) is not EncodeId or encodeId.getter is not None: clazz = None
+            if getter is None or clazz not in (EncodeId, EncodePrimitive, EncodePrimitiveCollection, EncodeObject):
+                lines.append('        %s(name=%r, value=value, render=render, normalizer=normalizer, converter=converter, '
+                             'converterId=converterId, **data)' % (nameExploit, nameProp))
+                continue
+
+            lines.append('        if c%s in value:' % k)
+            lines.append('            v = value.%s' % nameProp)
+            if clazz is EncodeId:
+                namespace['t%s' % k] = encodeProp.typeValue
+                lines.append('            if v is not None: render.value(%r, converterId.asString(v, t%s))' % (nameProp, k))
+            elif clazz is EncodePrimitive:
+                namespace['t%s' % k] = encodeProp.typeValue
+                lines.append('            if v is not None:')
+                lines.append('                assert t%s.isValid(v), "Invalid value %%r for type %%s" %% (v, t%s)' % (k, k))
+                lines.append('                render.value(normalizer.normalize(%r), converter.asString(v, t%s))' % (nameProp, k))
+            elif clazz is EncodePrimitiveCollection:
+                namespace['t%s' % k] = encodeProp.typeValue
+                lines.append('            if v is not None:')
+                lines.append('                render.collectionStart(%r)' % nameProp)
+                lines.append('                for item in v:')
+                lines.append('                    if item is not None:')
+                lines.append('                        render.value(normalizer.normalize(%r), converter.asString(item, t%s))' %
+                             (encodeProp.nameValue, k))
+                lines.append('                render.collectionEnd()')
+            else:
+                namespace['t%s' % k] = encodeId.typeValue
+                lines.append('            if v is not None:')
+                lines.append('                render.objectStart(normalizer.normalize(%r))' % nameProp)
+                lines.append('                render.value(%r, converterId.asString(v, t%s))' % (nameId, k))
+                lines.append('                render.objectEnd()')
+        if not exploit.properties: lines.append('        pass')
+        lines.append('    except: handleExploitError(encode)')
+        lines.append('    render.objectEnd()')
+
+        exec(compile('\n'.join(lines), '<encoder %s>' % ofType, 'exec'), namespace)
+        encode = namespace['encode']
+        encode.isFlat = isFlat(exploit)
+        return encode
+
     def sortTypePropertyKey(self, propType):
         '''
         Provides the sorting key for property types, used in sort functions.
@@ -335,9 +428,9 @@ class EncodeCollection:
     '''
     Exploit for collection encoding.
     '''
-    __slots__ = ('name', 'exploitItem', 'getter')
+    __slots__ = ('name', 'exploitItem', 'getter', 'streamSize')
 
-    def __init__(self, name, exploitItem, getter=None):
+    def __init__(self, name, exploitItem, getter=None, streamSize=None):
         '''
         Create a encode exploit for a collection.
         
@@ -347,14 +440,19 @@ class EncodeCollection:
             The exploit to be used for the item encoding.
         @param getter: callable(object) -> object|None
             The getter used to get the model collection from the value object.
+        @param streamSize: integer|None
+            The number of items to be encoded directly in one resolve step, this can be used only if the item exploit
+            is flat, if None the items are queued one by one on the resolve.
         '''
         assert isinstance(name, str), 'Invalid name %s' % name
         assert callable(exploitItem), 'Invalid exploit %s' % exploitItem
         assert getter is None or callable(getter), 'Invalid getter %s' % getter
+        assert streamSize is None or isinstance(streamSize, int) and streamSize > 0, 'Invalid stream size %s' % streamSize
 
         self.name = name
         self.exploitItem = exploitItem
         self.getter = getter
+        self.streamSize = streamSize
 
     def __call__(self, value, normalizer, converter, render, resolve, name=None, **data):
         assert isinstance(normalizer, Normalizer), 'Invalid normalizer %s' % normalizer
@@ -366,22 +464,71 @@ class EncodeCollection:
         if value is None: return
         assert isinstance(value, Iterable), 'Invalid value %s' % value
 
-        typeValue = typeFor(value)
-        if typeValue and isinstance(typeValue, TypeExtension):
-            assert isinstance(typeValue, TypeExtension)
-            assert isinstance(typeValue.container, Container)
-            attrs = {}
-            for prop, propType in typeValue.container.properties.items():
-                propValue = getattr(value, prop)
-                if propValue is not None: attrs[normalizer.normalize(prop)] = converter.asString(propValue, propType)
-        else: attrs = None
-
         data.update(normalizer=normalizer, converter=converter, render=render, resolve=resolve)
 
-        render.collectionStart(normalizer.normalize(name or self.name), attrs)
-        resolve.queueBatch(self.exploitItem, (dict(data, value=item) for item in value))
+        render.collectionStart(normalizer.normalize(name or self.name), self.attributesFrom(value, data))
+        items = self.itemsFrom(value, data)
+        if self.streamSize:
+            for item in items:
+                resolve.queue(self.stream, item=item, items=items, data=data)
+                break
+        else: resolve.queueBatch(self.exploitItem, (dict(data, value=item) for item in items))
         resolve.queue(self.finalize, render=render)
 
+    def attributesFrom(self, value, data):
+        '''
+        Provides the attributes to be encoded for the collection value, the extension properties are provided as
+        attributes.
+        
+        @param value: Iterable
+            The collection value.
+        @param data: dictionary{string, object}
+            The data used in encoding the items.
+        @return: dictionary{string: string}|None
+            The attributes for the collection.
+        '''
+        typeValue = typeFor(value)
+        if not typeValue or not isinstance(typeValue, TypeExtension): return
+        assert isinstance(typeValue, TypeExtension)
+        assert isinstance(typeValue.container, Container)
+
+        normalizer, converter = data['normalizer'], data['converter']
+        assert isinstance(normalizer, Normalizer), 'Invalid normalizer %s' % normalizer
+        assert isinstance(converter, Converter), 'Invalid converter %s' % converter
+        attrs = {}
+        for prop, propType in typeValue.container.properties.items():
+            propValue = getattr(value, prop)
+            if propValue is not None: attrs[normalizer.normalize(prop)] = converter.asString(propValue, propType)
+        return attrs
+
+    def itemsFrom(self, value, data):
+        '''
+        Provides the items to be encoded for the collection value.
+        
+        @param value: Iterable
+            The collection value.
+        @param data: dictionary{string, object}
+            The data used in encoding the items.
+        @return: Iterator
+            The items iterator.
+        '''
+        return iter(value)
+
+    def stream(self, item, items, data, resolve, **keyargs):
+        '''
+        Encodes directly at most stream size items and queues the stream again if there are more items.
+        '''
+        assert isinstance(resolve, IResolve), 'Invalid resolve %s' % resolve
+
+        exploitItem, count = self.exploitItem, self.streamSize
+        while True:
+            exploitItem(value=item, **data)
+            try: item = next(items)
+            except StopIteration: return
+            count -= 1
+            if count == 0: break
+        resolve.queue(self.stream, item=item, items=items, data=data)
+
     def finalize(self, render, **data):
         assert isinstance(render, IRender), 'Invalid render %s' % render
 
@@ -469,3 +616,21 @@ class EncodeId(EncodePrimitive):
         if self.getter: value = self.getter(value)
         if value is None: return
         render.value(name, converterId.asString(value, self.typeValue))
+
+# --------------------------------------------------------------------
+
+def isFlat(exploit):
+    '''
+    Checks if the provided exploit is flat, this means that the exploit renders directly without queuing other exploits
+    on the resolve.
+    
+    @param exploit: callable(**data)
+        The exploit to check.
+    @return: boolean
+        True if the exploit is flat, False otherwise.
+    '''
+    assert callable(exploit), 'Invalid exploit %s' % exploit
+
+    if isinstance(exploit, EncodeObject): return all(isFlat(encode) for encode in exploit.properties.values())
+    if isinstance(exploit, EncodePrimitive): return True
+    return getattr(exploit, 'isFlat', False)
@@ -56,8 +56,15 @@ class ParseTextHandler(ParseBaseHandler):
         process.append((deque(), obj))
         while process:
             path, obj = process.popleft()
-            if obj is None or isinstance(obj, (str, list)):
-                if not decoder(path=deque(path), value=obj, **data): return 'Invalid path \'%s\' in object' % '/'.join(path)
+            if isinstance(obj, list) and any(isinstance(item, dict) for item in obj):
+                for index, item in enumerate(obj):
+                    itemPath = deque(path)
+                    itemPath.append(index)
+                    process.append((itemPath, item))
+
+            elif obj is None or isinstance(obj, (str, list)):
+                if not decoder(path=deque(path), value=obj, **data):
+                    return 'Invalid path \'%s\' in object' % '/'.join(str(name) for name in path)
 
             elif isinstance(obj, dict):
                 for name, value in obj.items():
@@ -13,7 +13,7 @@ from .base import RenderBaseHandler
 from ally.container.ioc import injected
 from ally.core.spec.transform.render import IRender
 from ally.support.util_io import IOutputStream
-from codecs import getwriter
+from codecs import getincrementalencoder
 from collections import deque
 from json.encoder import encode_basestring
 
@@ -28,9 +28,12 @@ class RenderJSONHandler(RenderBaseHandler):
 
     encodingError = 'backslashreplace'
     # The encoding error resolving.
+    bufferSize = 1024
+    # The number of characters to be buffered before encoding and writing them to the output.
 
     def __init__(self):
         assert isinstance(self.encodingError, str), 'Invalid string %s' % self.encodingError
+        assert isinstance(self.bufferSize, int), 'Invalid buffer size %s' % self.bufferSize
         super().__init__()
 
     def renderFactory(self, charSet, output):
@@ -40,26 +43,42 @@ class RenderJSONHandler(RenderBaseHandler):
         assert isinstance(charSet, str), 'Invalid char set %s' % charSet
         assert isinstance(output, IOutputStream), 'Invalid content output stream %s' % output
 
-        return RenderJSON(getwriter(charSet)(output, self.encodingError))
+        return RenderJSON(output, charSet, self.encodingError, self.bufferSize)
 
 # --------------------------------------------------------------------
 
 class RenderJSON(IRender):
     '''
-    Renderer for JSON.
+    Renderer for JSON, the rendered text is buffered and encoded in blocks.
     '''
-    __slots__ = ('out', 'isObject', 'isFirst')
+    __slots__ = ('output', 'encoder', 'bufferSize', 'buffer', 'size', 'isObject', 'isFirst')
 
-    def __init__(self, out):
+    def __init__(self, output, charSet, encodingError, bufferSize):
         '''
-        Construct the text object renderer.
+        Construct the JSON renderer.
         
-        @param out: file writer
-            The writer to place the JSON.
+        @param output: IOutputStream
+            The output stream to place the JSON bytes.
+        @param charSet: string
+            The character set to encode the JSON with.
+        @param encodingError: string
+            The encoding error resolving.
+        @param bufferSize: integer
+            The number of characters to buffer before encoding and writing them to the output, the remaining
+            characters are written whenever the root object is ended.
         '''
-        assert out, 'Invalid JSON output stream %s' % out
-
-        self.out = out
+        assert isinstance(output, IOutputStream), 'Invalid content output stream %s' % output
+        assert isinstance(charSet, str), 'Invalid char set %s' % charSet
+        assert isinstance(encodingError, str), 'Invalid encoding error %s' % encodingError
+        assert isinstance(bufferSize, int), 'Invalid buffer size %s' % bufferSize
+
+        self.output = output
+        # We use one incremental encoder for all the blocks so that the encodings with a byte order mark (like UTF-16)
+        # place the mark only at the start of the content.
+        self.encoder = getincrementalencoder(charSet)(encodingError)
+        self.bufferSize = bufferSize
+        self.buffer = []
+        self.size = 0
         self.isObject = deque()
         self.isFirst = True
 
@@ -70,15 +89,13 @@ class RenderJSON(IRender):
         assert self.isObject, 'No container for value'
         assert isinstance(name, str), 'Invalid name %s' % name
         assert isinstance(value, str), 'Invalid value %s' % value
-        out = self.out
 
-        if self.isFirst: self.isFirst = False
-        else: out.write(',')
-        if self.isObject[0]:
-            out.write(encode_basestring(name))
-            out.write(':')
-            out.write(encode_basestring(value))
-        else: out.write(encode_basestring(value))
+        if self.isFirst:
+            self.isFirst = False
+            if self.isObject[0]: self.write('%s:%s' % (encode_basestring(name), encode_basestring(value)))
+            else: self.write(encode_basestring(value))
+        elif self.isObject[0]: self.write(',%s:%s' % (encode_basestring(name), encode_basestring(value)))
+        else: self.write(',%s' % encode_basestring(value))
 
     def objectStart(self, name, attributes=None):
         '''
@@ -95,19 +112,18 @@ class RenderJSON(IRender):
         isObject = self.isObject.popleft()
         assert isObject, 'No object to end'
 
-        self.out.write('}')
+        self.write('}')
+        if not self.isObject: self.flush()
 
     def collectionStart(self, name, attributes=None):
         '''
         @see: IRender.collectionStart
         '''
         assert isinstance(name, str), 'Invalid name %s' % name
-        out = self.out
 
         self.openObject(name, attributes)
-        if not self.isFirst: out.write(',')
-        out.write(encode_basestring(name))
-        out.write(':[')
+        if self.isFirst: self.write('%s:[' % encode_basestring(name))
+        else: self.write(',%s:[' % encode_basestring(name))
         self.isFirst = True
         self.isObject.appendleft(False)
 
@@ -119,7 +135,8 @@ class RenderJSON(IRender):
         isObject = self.isObject.popleft()
         assert not isObject, 'No collection to end'
 
-        self.out.write(']}')
+        self.write(']}')
+        if not self.isObject: self.flush()
 
     # ----------------------------------------------------------------
 
@@ -129,23 +146,39 @@ class RenderJSON(IRender):
         '''
         assert isinstance(name, str), 'Invalid name %s' % name
         assert attributes is None or isinstance(attributes, dict), 'Invalid attributes %s' % attributes
-        out = self.out
 
-        if not self.isFirst: out.write(',')
+        if self.isObject and self.isObject[0]: text = '%s:{' % encode_basestring(name)
+        else: text = '{'
+        if not self.isFirst: text = ',' + text
 
-        if self.isObject and self.isObject[0]:
-            out.write(encode_basestring(name))
-            out.write(':')
-
-        out.write('{')
         self.isFirst = True
         if attributes:
+            texts = [text]
             for attrName, attrValue in attributes.items():
                 assert isinstance(attrName, str), 'Invalid attribute name %s' % attrName
                 assert isinstance(attrValue, str), 'Invalid attribute value %s' % attrValue
 
                 if self.isFirst: self.isFirst = False
-                else: out.write(',')
-                out.write(encode_basestring(attrName))
-                out.write(':')
-                out.write(encode_basestring(attrValue))
+                else: texts.append(',')
+                texts.append(encode_basestring(attrName))
+                texts.append(':')
+                texts.append(encode_basestring(attrValue))
+            text = ''.join(texts)
+        self.write(text)
+
+    def write(self, text):
+        '''
+        Buffers the provided text, the buffer is flushed whenever the buffer size is reached.
+        '''
+        self.buffer.append(text)
+        self.size += len(text)
+        if self.size >= self.bufferSize: self.flush()
+
+    def flush(self):
+        '''
+        Encodes and writes the buffered text to the output.
+        '''
+        if self.buffer:
+            self.output.write(self.encoder.encode(''.join(self.buffer), not self.isObject))
+            del self.buffer[:]
+            self.size = 0
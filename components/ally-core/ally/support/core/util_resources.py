@@ -14,9 +14,10 @@ from ally.api.operator.container import Service, Call
 from ally.api.operator.type import TypeModel, TypeModelProperty, TypeService
 from ally.api.type import typeFor, Input
 from ally.core.impl.invoker import InvokerRestructuring, InvokerCall
-from ally.core.impl.node import NodePath, NodeProperty, MatchProperty
+from ally.core.impl.node import NodePath, NodeProperty, MatchProperty, \
+    ORDER_INTEGER, ORDER_STRING
 from ally.core.spec.resources import Match, Node, Path, ConverterPath, \
-    IResourcesRegister, Invoker, PathExtended
+    IResourcesRegister, Invoker, PathExtended, INodeChildListener
 from ally.support.util import immut
 from collections import deque, Iterable
 
@@ -331,6 +332,117 @@ class ResourcesRegisterDelegate(IResourcesRegister):
         self.main.register(implementation)
         for register in self.others: register.register(implementation)
 
+class IndexPath(INodeChildListener):
+    '''
+    Provides a compiled index over a resources node tree that is used for finding paths, @see: findPath. Instead of
+    trying to match every child node the index uses for each node a dictionary having as a key the normalized names
+    of the path children and one slot for the integer property child and one for the string property child. The index
+    of a node is created when first required and is dropped whenever a child is added to the node, the invokers
+    changes are not relevant since the path matching is not based on them.
+    Attention the index needs to be referenced since the node keeps only weak references to the structure listeners.
+    '''
+    __slots__ = ('root', 'converterPath', '_indexes')
+
+    def __init__(self, root, converterPath):
+        '''
+        Construct the index for the provided root node.
+        
+        @param root: Node
+            The root node to index.
+        @param converterPath: ConverterPath
+            The converter path used in handling the path elements.
+        '''
+        assert isinstance(root, Node), 'Invalid root node %s' % root
+        assert isinstance(converterPath, ConverterPath), 'Invalid converter path %s' % converterPath
+        self.root = root
+        self.converterPath = converterPath
+        self._indexes = {}
+
+        root.addStructureListener(self)
+
+    def findPath(self, paths):
+        '''
+        Finds the resource node for the provided request path, @see: findPath.
+        
+        @param paths: deque[string]|Iterable[string]
+            A deque of string path elements identifying a resource to be searched for, this list will be consumed 
+            of every path element that was successfully identified.
+        @return: Path
+            The path leading to the node that provides the resource if the Path has no node it means that the paths
+            have been recognized only to certain point.
+        '''
+        if not isinstance(paths, deque):
+            assert isinstance(paths, Iterable), 'Invalid iterable paths %s' % paths
+            paths = deque(paths)
+        assert isinstance(paths, deque), 'Invalid paths %s' % paths
+
+        node = self.root
+        if len(paths) == 0: return Path([], node)
+
+        converterPath, matches = self.converterPath, []
+        found = pushMatch(matches, node.tryMatch(converterPath, paths))
+        while found and len(paths) > 0:
+            found = False
+            index = self._indexes.get(id(node))
+            if index is None: index = self._indexes[id(node)] = self._indexFor(node)
+            names, nodeInteger, nodeString, others = index
+
+            if others is not None:
+                for child in others:
+                    assert isinstance(child, Node)
+                    if pushMatch(matches, child.tryMatch(converterPath, paths)):
+                        node = child
+                        found = True
+                        break
+                continue
+
+            child = names.get(paths[0])
+            if child is not None:
+                assert isinstance(child, NodePath)
+                del paths[0]
+                pushMatch(matches, child.newMatch())
+                node, found = child, True
+            elif nodeInteger is not None and pushMatch(matches, nodeInteger.tryMatch(converterPath, paths)):
+                node, found = nodeInteger, True
+            elif nodeString is not None and pushMatch(matches, nodeString.tryMatch(converterPath, paths)):
+                node, found = nodeString, True
+
+        if len(paths) == 0: return Path(matches, node)
+
+        return Path(matches)
+
+    def onChildAdded(self, node, child):
+        '''
+        @see: INodeChildListener.onChildAdded
+        '''
+        self._indexes.pop(id(node), None)
+
+    # ----------------------------------------------------------------
+
+    def _indexFor(self, node):
+        '''
+        Creates the index for the provided node.
+        
+        @param node: Node
+            The node to create the index for.
+        @return: tuple(dictionary{string, NodePath}, NodeProperty|None, NodeProperty|None, tuple(Node)|None)
+            The index containing the path children indexed by the normalized name, the integer property child, the
+            string property child and the children to be matched one by one if the node has children that cannot be
+            indexed.
+        '''
+        assert isinstance(node, Node), 'Invalid node %s' % node
+        names, nodeInteger, nodeString = {}, None, None
+        for child in node.children:
+            if isinstance(child, NodePath):
+                assert isinstance(child, NodePath)
+                names.setdefault(self.converterPath.normalize(child.name), child)
+            elif isinstance(child, NodeProperty) and child.order == ORDER_INTEGER and nodeInteger is None:
+                nodeInteger = child
+            elif isinstance(child, NodeProperty) and child.order == ORDER_STRING and nodeString is None:
+                nodeString = child
+            else: return None, None, None, tuple(node.children)
+        return names, nodeInteger, nodeString, None
+
 class ReplacerMarkCount:
     '''
     Provides the callable support for replacing the invalid matches with markers that are based on a counter, so every
@@ -0,0 +1,40 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Runs the asyncio web server.
+'''
+
+from ..ally_http import server_type, server_version, server_host, server_port, \
+    server_instrument, server_instrument_interval, server_keep_alive_maximum, \
+    server_idle_timeout
+from ..ally_http.server import pathAssemblies, admissionController
+from ally.container import ioc
+from threading import Thread
+
+# --------------------------------------------------------------------
+
+ioc.doc(server_type, '''
+    "asyncio" - server made based on asyncio package, the connections are handled on a single thread and the requests
+                are processed by worker threads, requires python 3.5 or newer
+''')
+
+@ioc.config
+def server_asyncio_workers() -> int:
+    '''The number of worker threads that process the requests for the asyncio server'''
+    return 10
+
+# --------------------------------------------------------------------
+
+@ioc.start
+def runServer():
+    if server_type() == 'asyncio':
+        from ally.http.server import server_asyncio
+        args = pathAssemblies(), server_version(), server_host(), server_port(), server_instrument(), \
+            server_keep_alive_maximum(), server_idle_timeout(), server_asyncio_workers(), admissionController(), \
+            server_instrument_interval()
+        Thread(name='HTTP server thread', target=server_asyncio.run, args=args).start()
@@ -0,0 +1,136 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides the unit testing for the asyncio server request handler.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.design.context import Context, requires, defines
+from ally.design.processor import Assembly, HandlerProcessorProceed, \
+    ONLY_AVAILABLE
+from ally.http.server.server_asyncio import RequestHandler
+from ally.http.spec.server import RequestHTTP, RequestContentHTTP, ResponseHTTP, \
+    ResponseContentHTTP
+from ally.support.util_io import IInputStream
+from collections import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from threading import current_thread
+import asyncio
+import re
+import unittest
+
+# --------------------------------------------------------------------
+
+class Request(Context):
+    uri = requires(str)
+
+class RequestContent(Context):
+    source = requires(IInputStream)
+
+class Response(Context):
+    code = defines(int)
+    isSuccess = defines(bool)
+
+class ResponseContent(Context):
+    source = defines(IInputStream, Iterable)
+
+class ContentHandler(HandlerProcessorProceed):
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def process(self, request:Request, requestCnt:RequestContent, response:Response, responseCnt:ResponseContent,
+                **keyargs):
+        self.threads.add(current_thread())
+        if request.uri == 'error': raise ValueError('Processing failed')
+
+        response.code, response.isSuccess = 200, True
+        if request.uri == 'echo': responseCnt.source = (requestCnt.source.read(),)
+        elif request.uri == 'chunked': responseCnt.source = self.generate()
+
+    def generate(self):
+        for bytes in (b'first', b'', b'second'):
+            self.threads.add(current_thread())
+            yield bytes
+
+# --------------------------------------------------------------------
+
+class TestServerAsyncio(unittest.TestCase):
+
+    def setUp(self):
+        self.content = ContentHandler()
+        assembly = Assembly()
+        assembly.add(self.content)
+        processing = assembly.create(ONLY_AVAILABLE, request=RequestHTTP, requestCnt=RequestContentHTTP,
+                                     response=ResponseHTTP, responseCnt=ResponseContentHTTP)
+
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(2)
+        self.handler = RequestHandler([(re.compile('^'), processing)], 'Test', self.executor)
+        self.server = self.loop.run_until_complete(asyncio.start_server(self.handler, '127.0.0.1', 0))
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    def tearDown(self):
+        self.server.close()
+        self.loop.run_until_complete(self.server.wait_closed())
+        self.executor.shutdown()
+        self.loop.close()
+
+    def request(self, *requests):
+        async def send():
+            reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+            for request in requests: writer.write(request)
+            response = await reader.read()
+            writer.close()
+            return response
+        return self.loop.run_until_complete(asyncio.wait_for(send(), 10))
+
+    def testRoundTrip(self):
+        response = self.request(b'POST /echo HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello',
+                                b'GET /echo HTTP/1.1\r\nConnection: close\r\n\r\n')
+        first, second = response.split(b'HTTP/1.1 ')[1:]
+        self.assertTrue(first.startswith(b'200 OK\r\n'))
+        self.assertIn(b'\r\nContent-Length: 5\r\n', first)
+        self.assertTrue(first.endswith(b'\r\n\r\nhello'))
+        self.assertNotIn(b'Connection: close', first)
+        self.assertIn(b'\r\nContent-Length: 0\r\n', second)
+        self.assertIn(b'\r\nConnection: close\r\n', second)
+
+    def testChunked(self):
+        response = self.request(b'GET /chunked HTTP/1.1\r\nConnection: close\r\n\r\n')
+        head, body = response.split(b'\r\n\r\n', 1)
+        self.assertIn(b'\r\nTransfer-Encoding: chunked', head)
+        self.assertEqual(b'5\r\nfirst\r\n6\r\nsecond\r\n0\r\n\r\n', body)
+        # The response content generators are drained on the worker threads not on the event loop thread.
+        self.assertNotIn(current_thread(), self.content.threads)
+
+        response = self.request(b'POST /echo HTTP/1.1\r\nTransfer-Encoding: chunked\r\nConnection: close\r\n\r\n'
+                                b'3\r\nabc\r\n2\r\nde\r\n0\r\n\r\n')
+        self.assertTrue(response.endswith(b'\r\nContent-Length: 5\r\nConnection: close\r\n\r\nabcde'))
+
+        response = self.request(b'GET /chunked HTTP/1.0\r\n\r\n')
+        head, body = response.split(b'\r\n\r\n', 1)
+        self.assertNotIn(b'Transfer-Encoding', head)
+        self.assertIn(b'\r\nConnection: close', head)
+        self.assertEqual(b'firstsecond', body)
+
+    def testError(self):
+        response = self.request(b'GET /error HTTP/1.1\r\n\r\n')
+        self.assertTrue(response.startswith(b'HTTP/1.1 500 Internal Server Error\r\n'))
+        self.assertIn(b'\r\nConnection: close\r\n', response)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,10 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+In this package are found the modules that provide server support for the ally HTTP framework.
+'''
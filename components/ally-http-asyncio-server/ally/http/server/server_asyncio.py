@@ -0,0 +1,429 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides the asyncio web server, the connections are handled on the asyncio event loop and the processing chains are
+executed on worker threads. Unlike the asyncore server, that drains the response content generators on the loop thread,
+this server drains them on the worker threads, each chunk being pulled by whichever worker is free, so the response
+content generators must not depend on the thread that executed the processing chain (like thread local sessions).
+'''
+
+from ally.design.processor import Processing, Assembly, ONLY_AVAILABLE, \
+    CREATE_REPORT, INSTRUMENT, Chain
+from ally.http.server.server_basic import reportInstrument
+from ally.http.spec.server import RequestHTTP, ResponseHTTP, RequestContentHTTP, \
+    ResponseContentHTTP, METHOD_UNKNOWN, METHODS
+from ally.http.support.admission import AdmissionController
+from ally.http.support.parser import RequestParser
+from ally.support.util_io import IInputStream, IClosable, InputStreamFile, readGenerator
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http.client import responses
+from time import time
+from urllib.parse import urlparse, parse_qsl
+import asyncio
+import logging
+import re
+
+# --------------------------------------------------------------------
+
+log = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------
+
+class RequestContentStream(IInputStream, IClosable):
+    '''
+    The request content stream that reads the content from the asyncio stream reader, the stream is read by the worker
+    threads while the actual reading is performed on the event loop.
+    '''
+    __slots__ = ('_loop', '_reader', '_writer', '_length', '_chunked', '_continue', '_finished', '_closed')
+
+    def __init__(self, loop, reader, writer, length, chunked=False, expectContinue=False):
+        '''
+        Construct the request content stream.
+
+        @param loop: AbstractEventLoop
+            The event loop that handles the connection.
+        @param reader: StreamReader
+            The connection stream reader.
+        @param writer: StreamWriter
+            The connection stream writer, used for the continue response.
+        @param length: integer
+            The content length, ignored if the content is chunked.
+        @param chunked: boolean
+            Flag indicating that the content uses the chunked transfer encoding.
+        @param expectContinue: boolean
+            Flag indicating that the client expects a continue response before sending the content.
+        '''
+        assert isinstance(loop, asyncio.AbstractEventLoop), 'Invalid loop %s' % loop
+        assert isinstance(reader, asyncio.StreamReader), 'Invalid reader %s' % reader
+        assert isinstance(writer, asyncio.StreamWriter), 'Invalid writer %s' % writer
+        assert isinstance(length, int), 'Invalid length %s' % length
+        assert isinstance(chunked, bool), 'Invalid chunked flag %s' % chunked
+        assert isinstance(expectContinue, bool), 'Invalid expect continue flag %s' % expectContinue
+        self._loop = loop
+        self._reader = reader
+        self._writer = writer
+        self._length = 0 if chunked else length
+        self._chunked = chunked
+        self._continue = expectContinue and (chunked or length > 0)
+        self._finished = not chunked and length == 0
+        self._closed = False
+
+    def read(self, nbytes=None):
+        '''
+        @see: IInputStream.read
+
+        Attention this method needs to be called from a thread other then the event loop thread.
+        '''
+        if self._closed: raise ValueError('I/O operation on closed stream')
+        if self._finished or nbytes == 0: return b''
+        return asyncio.run_coroutine_threadsafe(self._read(nbytes), self._loop).result()
+
+    def close(self):
+        '''
+        @see: IClosable.close
+        '''
+        self._closed = True
+
+    def isConsumed(self):
+        '''
+        Checks if the request content has been entirely read from the connection.
+
+        @return: boolean
+            True if the content has been consumed, False otherwise.
+        '''
+        return self._finished
+
+    # ----------------------------------------------------------------
+
+    async def _read(self, nbytes):
+        '''
+        Reads the content from the stream reader, runs on the event loop.
+        '''
+        if self._continue:
+            self._continue = False
+            self._writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+            await self._writer.drain()
+
+        if nbytes is None or nbytes < 0:
+            data = []
+            while not self._finished: data.append(await self._readChunk(None))
+            return b''.join(data)
+        return await self._readChunk(nbytes)
+
+    async def _readChunk(self, nbytes):
+        '''
+        Reads at most the provided number of bytes from the current content chunk, None to read the entire chunk.
+        '''
+        if self._chunked and self._length == 0:
+            line = await self._reader.readuntil(b'\r\n')
+            try: self._length = int(line.split(b';', 1)[0], 16)
+            except ValueError: raise IOError('Invalid chunk size %r' % line)
+            if self._length == 0:
+                while (await self._reader.readuntil(b'\r\n')) != b'\r\n': pass  # Skipping the trailers
+                self._finished = True
+                return b''
+
+        if nbytes is None or nbytes > self._length: nbytes = self._length
+        data = await self._reader.read(nbytes)
+        if not data: raise IOError('The connection has been closed before the content has been received')
+        self._length -= len(data)
+
+        if self._length == 0:
+            if self._chunked: await self._reader.readexactly(2)  # The chunk terminator
+            else: self._finished = True
+        return data
+
+class RequestHandler:
+    '''
+    The request handler for the connections. The requests are parsed and the responses are written on the event loop,
+    the processing chains are executed and the response content generators are drained on the worker threads, a
+    generator is not bound to a worker thread since every chunk is pulled separately. The connection is kept alive
+    for HTTP/1.1 requests (or HTTP/1.0 requests that ask for it), the responses that have no known content length are
+    sent using the chunked transfer encoding.
+    '''
+    protocolVersion = 'HTTP/1.1'
+    # The HTTP protocol version of the responses.
+
+    bufferSize = 64 * 1024
+    # The buffer size used for reading the response content streams.
+    maximumRequestSize = 100 * 1024
+    # The maximum request head size, 100 kilobytes
+    requestTerminator = b'\r\n\r\n'
+    # Terminator that signals the http request head is complete
+    keepAliveMaximum = 100
+    # The maximum number of requests that are processed on a connection, 1 means no keep alive.
+    idleTimeout = 15
+    # The number of seconds after which a connection that has no activity is closed.
+
+    def __init__(self, pathProcessing, serverVersion, executor, admission=None):
+        '''
+        Construct the request handler.
+
+        @param pathProcessing: list[tuple(regex, Processing)]
+            A list that contains tuples having on the first position a regex for matching a path, and the second value
+            the processing for handling the path.
+        @param serverVersion: string
+            The server version name.
+        @param executor: Executor
+            The executor used for running the processing chains.
+        @param admission: AdmissionController|None
+            The admission controller for the requests, None for no admission control.
+        '''
+        assert isinstance(pathProcessing, list), 'Invalid path processing %s' % pathProcessing
+        assert isinstance(serverVersion, str), 'Invalid server version %s' % serverVersion
+        assert executor is not None, 'Invalid executor %s' % executor
+        assert admission is None or isinstance(admission, AdmissionController), 'Invalid admission %s' % admission
+        self.pathProcessing = pathProcessing
+        self.serverVersion = serverVersion
+        self.executor = executor
+        self.admission = admission
+
+    async def __call__(self, reader, writer):
+        '''
+        Handles the connection.
+
+        @param reader: StreamReader
+            The connection stream reader.
+        @param writer: StreamWriter
+            The connection stream writer.
+        '''
+        assert isinstance(reader, asyncio.StreamReader), 'Invalid reader %s' % reader
+        assert isinstance(writer, asyncio.StreamWriter), 'Invalid writer %s' % writer
+
+        count, parser = 0, RequestParser(self.maximumRequestSize)
+        try:
+            while True:
+                try: head = await asyncio.wait_for(reader.readuntil(self.requestTerminator), self.idleTimeout)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError): break
+                except asyncio.LimitOverrunError:
+                    await self.respond(writer, 400, 'Request to long', close=True)
+                    break
+
+                try:
+                    if parser.feed(head) is None: continue  # Just empty lines have been received
+                except ValueError as e:
+                    await self.respond(writer, 400, str(e), close=True)
+                    break
+
+                count += 1
+                if not await self.process(reader, writer, count, parser): break
+        except ConnectionError: assert log.debug('Connection lost for %s', writer.get_extra_info('peername')) or True
+        except: log.exception('A problem occurred while handling the connection')
+        finally: writer.close()
+
+    async def process(self, reader, writer, count, parser):
+        '''
+        Processes the request.
+
+        @param parser: RequestParser
+            The parser that contains the parsed request head.
+        @return: boolean
+            True if the connection should be kept alive, False otherwise.
+        '''
+        assert isinstance(parser, RequestParser), 'Invalid parser %s' % parser
+        headers, version, received = parser.headers, parser.version, time()
+
+        keepAlive = parser.isKeepAlive() and count < self.keepAliveMaximum
+
+        encoding = headers.get('transfer-encoding')
+        if encoding and encoding.lower() != 'identity':
+            if encoding.lower() != 'chunked':
+                return await self.respond(writer, 501, 'Transfer encoding not supported', close=True)
+            length, chunked = 0, True
+        else:
+            try: length, chunked = int(headers.get('content-length', 0)), False
+            except ValueError: return await self.respond(writer, 400, 'Invalid content length', close=True)
+            if length < 0: return await self.respond(writer, 400, 'Invalid content length', close=True)
+
+        url = urlparse(parser.target)
+        path = url.path.lstrip('/')
+        for regex, processing in self.pathProcessing:
+            match = regex.match(path)
+            if match:
+                uriRoot = path[:match.end()]
+                if not uriRoot.endswith('/'): uriRoot += '/'
+
+                assert isinstance(processing, Processing), 'Invalid processing %s' % processing
+                req, reqCnt = processing.contexts['request'](), processing.contexts['requestCnt']()
+                rsp, rspCnt = processing.contexts['response'](), processing.contexts['responseCnt']()
+
+                assert isinstance(req, RequestHTTP), 'Invalid request %s' % req
+                assert isinstance(reqCnt, RequestContentHTTP), 'Invalid request content %s' % reqCnt
+                assert isinstance(rsp, ResponseHTTP), 'Invalid response %s' % rsp
+                assert isinstance(rspCnt, ResponseContentHTTP), 'Invalid response content %s' % rspCnt
+
+                req.scheme, req.uriRoot, req.uri = 'http', uriRoot, path[match.end():]
+                req.parameters = parse_qsl(url.query, True, False)
+                break
+        else:
+            return await self.respond(writer, 404, close=not keepAlive or length != 0 or chunked)
+
+        admission = self.admission
+        if admission is not None and not admission.admit(regex.pattern):
+            return await self.respond(writer, 503, headers=admission.headers(),
+                                      close=not keepAlive or length != 0 or chunked)
+
+        req.methodName = parser.method if parser.method in METHODS else METHOD_UNKNOWN
+        req.headers = headers
+        reqCnt.source = content = RequestContentStream(asyncio.get_event_loop(), reader, writer, length, chunked,
+                                                       parser.isExpectContinue())
+
+        chain = Chain(processing).process(request=req, requestCnt=reqCnt, response=rsp, responseCnt=rspCnt)
+        def execute():
+            # The request that has waited too long for a worker is rejected without being processed.
+            if admission is not None and admission.isExpired(received): return False
+            chain.doAll()
+            return True
+        try: executed = await asyncio.get_event_loop().run_in_executor(self.executor, execute)
+        except:
+            log.exception('A problem occurred while processing the request')
+            return await self.respond(writer, 500, close=True)
+        finally:
+            if admission is not None: admission.release(regex.pattern)
+
+        if not executed:
+            return await self.respond(writer, 503, headers=admission.headers(),
+                                      close=not keepAlive or not content.isConsumed(), version=version)
+
+        assert isinstance(rsp.code, int), 'Invalid response code %s' % rsp.code
+        return await self.respond(writer, rsp.code, rsp.text if ResponseHTTP.text in rsp else None,
+                                  rsp.headers if ResponseHTTP.headers in rsp else None, rspCnt.source,
+                                  not keepAlive or not content.isConsumed(), version)
+
+    async def respond(self, writer, code, text=None, headers=None, source=None, close=False, version=None):
+        '''
+        Writes the response, the content source is written with flow control.
+
+        @return: boolean
+            True if the connection should be kept alive, False otherwise.
+        '''
+        assert isinstance(writer, asyncio.StreamWriter), 'Invalid writer %s' % writer
+        assert isinstance(code, int), 'Invalid response code %s' % code
+        assert isinstance(close, bool), 'Invalid close flag %s' % close
+
+        if text is None: text = responses.get(code, '')
+        lines = ['%s %s %s' % (self.protocolVersion, code, text), 'Server: %s' % self.serverVersion,
+                 'Date: %s' % formatdate(usegmt=True)]
+        hasLength = chunked = False
+        if headers:
+            assert isinstance(headers, dict), 'Invalid headers %s' % headers
+            for name, value in headers.items():
+                lines.append('%s: %s' % (name, value))
+                if name.lower() == 'content-length': hasLength = True
+
+        if not hasLength:
+            if isinstance(source, (tuple, list)):
+                lines.append('Content-Length: %s' % sum(len(bytes) for bytes in source))
+            elif source is not None:
+                if version == 'HTTP/1.0': close = True
+                else:
+                    lines.append('Transfer-Encoding: chunked')
+                    chunked = True
+            elif code >= 200 and code not in (204, 304): lines.append('Content-Length: 0')
+
+        if close: lines.append('Connection: close')
+        elif version == 'HTTP/1.0': lines.append('Connection: keep-alive')
+        lines.append('\r\n')
+        writer.write('\r\n'.join(lines).encode('latin-1'))
+
+        if source is not None:
+            if isinstance(source, (tuple, list)):
+                for bytes in source: writer.write(bytes)
+            elif isinstance(source, InputStreamFile) and not chunked and hasattr(asyncio.get_event_loop(), 'sendfile'):
+                # The loop sends the file content from the kernel if the transport allows it (python 3.7+).
+                await writer.drain()
+                with source: await asyncio.get_event_loop().sendfile(writer.transport, source.fileObj)
+            else:
+                if isinstance(source, IInputStream): source = readGenerator(source, self.bufferSize)
+                source, loop = iter(source), asyncio.get_event_loop()
+                try:
+                    while True:
+                        # The content is provided on the workers since it might be rendered or read from files.
+                        bytes = await loop.run_in_executor(self.executor, next, source, None)
+                        if bytes is None: break
+                        if not bytes: continue
+                        if chunked: writer.write(('%x\r\n' % len(bytes)).encode())
+                        writer.write(bytes)
+                        if chunked: writer.write(b'\r\n')
+                        await writer.drain()
+                finally:
+                    if isinstance(source, IClosable): source.close()
+                if chunked: writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+        return not close
+
+# --------------------------------------------------------------------
+
+def run(pathAssemblies, server_version, host='', port=80, instrument=False, keepAliveMaximum=100, idleTimeout=15,
+        workers=10, admission=None, instrumentInterval=0):
+    '''
+    Run the asyncio server.
+
+    @param pathAssemblies: list[(regex, Assembly)]
+        A list that contains tuples having on the first position a string pattern for matching a path, and as a value
+        the assembly to be used for creating the context for handling the request for the path.
+    @param instrument: boolean
+        If True the processors latency is instrumented, the instrument reports are logged together with the assembly
+        reports, periodically while the server is running and when the server stops.
+    @param keepAliveMaximum: integer
+        The maximum number of requests that are processed on a connection, 1 means no keep alive.
+    @param idleTimeout: integer
+        The number of seconds after which a connection that has no activity is closed.
+    @param workers: integer
+        The number of worker threads that execute the processing chains and drain the response content generators.
+    @param admission: AdmissionController|None
+        The admission controller for the requests, None for no admission control.
+    @param instrumentInterval: integer|float
+        The number of seconds between the instrument reports logged while the server is running, 0 means that the
+        reports are logged only when the server starts and stops.
+    '''
+    assert isinstance(pathAssemblies, list), 'Invalid path assemblies %s' % pathAssemblies
+    assert isinstance(instrument, bool), 'Invalid instrument flag %s' % instrument
+    assert isinstance(keepAliveMaximum, int) and keepAliveMaximum > 0, \
+    'Invalid keep alive maximum %s' % keepAliveMaximum
+    assert isinstance(idleTimeout, (int, float)), 'Invalid idle timeout %s' % idleTimeout
+    assert isinstance(workers, int) and workers > 0, 'Invalid workers %s' % workers
+    RequestHandler.keepAliveMaximum = keepAliveMaximum
+    RequestHandler.idleTimeout = idleTimeout
+    pathProcessing = []
+    for pattern, assembly in pathAssemblies:
+        assert isinstance(pattern, str), 'Invalid pattern %s' % pattern
+        assert isinstance(assembly, Assembly), 'Invalid assembly %s' % assembly
+
+        processing, report = assembly.create(ONLY_AVAILABLE, CREATE_REPORT, INSTRUMENT if instrument else 0,
+                                             request=RequestHTTP, requestCnt=RequestContentHTTP,
+                                             response=ResponseHTTP, responseCnt=ResponseContentHTTP)
+
+        log.info('Assembly report for pattern \'%s\':\n%s', pattern, report)
+        pathProcessing.append((re.compile(pattern), processing))
+    if instrument: logInstrument = reportInstrument(pathProcessing, instrumentInterval)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    executor = ThreadPoolExecutor(workers)
+    handler = RequestHandler(pathProcessing, server_version, executor, admission)
+    try:
+        server = loop.run_until_complete(asyncio.start_server(handler, host, port, limit=handler.maximumRequestSize,
+                                                              backlog=1024))
+        print('=' * 50, 'Started asyncio HTTP server...')
+        loop.run_forever()
+    except KeyboardInterrupt:
+        print('=' * 50, '^C received, shutting down server')
+    except:
+        log.exception('=' * 50 + ' The server has stooped')
+    finally:
+        try:
+            server.close()
+            loop.run_until_complete(server.wait_closed())
+        except: pass
+        executor.shutdown(False)
+        loop.close()
+
+    if instrument: logInstrument()
@@ -9,8 +9,10 @@ Created on Nov 23, 2011
 Runs the asyncore py web server.
 '''
 
-from ..ally_http import server_type, server_version, server_host, server_port
-from ..ally_http.server import pathAssemblies
+from ..ally_http import server_type, server_version, server_host, server_port, \
+    server_instrument, server_instrument_interval, server_keep_alive_maximum, \
+    server_idle_timeout
+from ..ally_http.server import pathAssemblies, admissionController
 from ally.container import ioc
 from ally.http.server import server_asyncore
 from threading import Thread
@@ -24,10 +26,18 @@ def server_type_asyncore():
     '''
     return 'asyncore'
 
+@ioc.config
+def server_workers() -> int:
+    '''The number of worker threads that execute the requests processing, the connections are still handled by a single
+    thread, if 0 the requests are processed on the connections thread'''
+    return 0
+
 # --------------------------------------------------------------------
 
 @ioc.start
 def runServer():
     if server_type() == 'asyncore':
-        args = pathAssemblies(), server_version(), server_host(), server_port()
+        args = pathAssemblies(), server_version(), server_host(), server_port(), server_instrument(), \
+            server_keep_alive_maximum(), server_idle_timeout(), server_workers(), admissionController(), \
+            server_instrument_interval()
         Thread(name='HTTP server thread', target=server_asyncore.run, args=args).start()
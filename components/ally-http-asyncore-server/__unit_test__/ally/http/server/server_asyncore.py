@@ -0,0 +1,214 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides the unit testing for the asyncore server request handler.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.design.context import Context, requires, defines
+from ally.design.processor import Assembly, HandlerProcessor, HandlerProcessorProceed, \
+    ONLY_AVAILABLE, Chain
+from ally.http.server.server_asyncore import AsyncServer, RequestHandler, \
+    RequestContentHTTPAsyncore
+from ally.http.spec.server import RequestHTTP, ResponseHTTP, ResponseContentHTTP
+from ally.http.support.admission import AdmissionController
+from ally.support.util_io import IInputStream
+from asyncore import loop
+from collections import Callable, Iterable
+from io import BytesIO
+from threading import current_thread, Event
+from time import time, sleep
+import re
+import socket
+import unittest
+
+# --------------------------------------------------------------------
+
+class Request(Context):
+    uri = requires(str)
+    headers = requires(dict)
+
+class RequestContent(Context):
+    contentReader = defines(Callable)
+    source = defines(IInputStream)
+
+class Response(Context):
+    code = defines(int)
+    isSuccess = defines(bool)
+    headers = defines(dict)
+
+class ResponseContent(Context):
+    source = defines(IInputStream, Iterable)
+
+class ReaderHandler(HandlerProcessor):
+
+    def process(self, chain, request:Request, requestCnt:RequestContent, **keyargs):
+        assert isinstance(chain, Chain), 'Invalid chain %s' % chain
+        chain.proceed()
+
+        length = int(request.headers.get('content-length', 0))
+        if not length: return
+        stream = BytesIO()
+        def reader(data):
+            stream.write(data)
+            if stream.tell() < length: return
+            stream.seek(0)
+            requestCnt.source, requestCnt.contentReader = stream, None
+            return chain
+        requestCnt.contentReader = reader
+
+class ContentHandler(HandlerProcessorProceed):
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def process(self, request:Request, requestCnt:RequestContent, response:Response, responseCnt:ResponseContent,
+                **keyargs):
+        self.threads.add(current_thread())
+        if request.uri == 'echo': content = requestCnt.source.read()
+        else: content = request.uri.encode()
+        response.code, response.isSuccess = 200, True
+        response.headers = {'Content-Length': str(len(content))}
+        if request.uri == 'chunks': responseCnt.source = self.generate(content)
+        else: responseCnt.source = (content,)
+
+    def generate(self, content):
+        for k in range(len(content)):
+            self.threads.add(current_thread())
+            yield content[k:k + 1]
+
+# --------------------------------------------------------------------
+
+class TestServerAsyncore(unittest.TestCase):
+
+    workers = 0
+
+    def setUp(self):
+        assembly = Assembly()
+        self.content = ContentHandler()
+        assembly.add(ReaderHandler(), self.content)
+        processing = assembly.create(ONLY_AVAILABLE, request=RequestHTTP, requestCnt=RequestContentHTTPAsyncore,
+                                     response=ResponseHTTP, responseCnt=ResponseContentHTTP)
+
+        self.server = AsyncServer(('127.0.0.1', 0), [(re.compile('^'), processing)], RequestHandler, self.workers)
+        self.client, connection = socket.socketpair()
+        self.client.setblocking(False)
+        self.handler = RequestHandler(self.server, connection, ('test', 0))
+        self.received, self.closed = b'', False
+
+    def tearDown(self):
+        self.client.close()
+        if self.handler.connected: self.handler.close()
+        self.server.close()
+
+    def pump(self, until, timeout=5):
+        end = time() + timeout
+        while time() < end:
+            loop(0.01, map=self.server.map, count=1)
+            try: data = self.client.recv(65536)
+            except BlockingIOError: data = None
+            if data == b'': self.closed = True
+            elif data: self.received += data
+            if until(): return
+        self.fail('Timed out with the received %r' % self.received)
+
+    def testPipelined(self):
+        self.client.send(b'GET /a HTTP/1.1\r\n\r\nGET /b HTTP/1.1\r\n\r\n')
+        self.pump(lambda: self.received.endswith(b'\r\n\r\nb'))
+        first, second = self.received.split(b'HTTP/1.1 ')[1:]
+        self.assertTrue(first.startswith(b'200 OK\r\n'))
+        self.assertTrue(first.endswith(b'\r\nContent-Length: 1\r\n\r\na'))
+        self.assertNotIn(b'Connection: close', first + second)
+        self.assertTrue(second.endswith(b'\r\n\r\nb'))
+        self.assertTrue(self.handler.connected)
+        self.assertFalse(self.closed)
+
+    def testContentFollowedByRequest(self):
+        self.client.send(b'POST /echo HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello'
+                         b'GET /next HTTP/1.1\r\nConnection: close\r\n\r\n')
+        self.pump(lambda: self.closed)
+        first, second = self.received.split(b'HTTP/1.1 ')[1:]
+        self.assertTrue(first.endswith(b'\r\nContent-Length: 5\r\n\r\nhello'))
+        self.assertNotIn(b'Connection: close', first)
+        self.assertTrue(second.endswith(b'\r\nContent-Length: 4\r\nConnection: close\r\n\r\nnext'))
+
+    def testKeepAliveMaximum(self):
+        self.handler.keepAliveMaximum = 2
+        self.client.send(b'GET /a HTTP/1.1\r\n\r\nGET /b HTTP/1.1\r\n\r\nGET /c HTTP/1.1\r\n\r\n')
+        self.pump(lambda: self.closed)
+        responses = self.received.split(b'HTTP/1.1 ')[1:]
+        self.assertEqual(2, len(responses))
+        self.assertNotIn(b'Connection: close', responses[0])
+        self.assertTrue(responses[1].endswith(b'\r\nConnection: close\r\n\r\nb'))
+        self.assertFalse(self.handler.connected)
+
+    def testHTTP10(self):
+        self.client.send(b'GET /a HTTP/1.0\r\n\r\n')
+        self.pump(lambda: self.closed)
+        self.assertTrue(self.received.startswith(b'HTTP/1.1 200 OK\r\n'))
+        self.assertTrue(self.received.endswith(b'\r\nConnection: close\r\n\r\na'))
+
+        self.tearDown()
+        self.setUp()
+        self.client.send(b'GET /a HTTP/1.0\r\nConnection: keep-alive\r\n\r\n')
+        self.pump(lambda: self.received.endswith(b'\r\n\r\na'))
+        self.assertIn(b'\r\nConnection: keep-alive\r\n', self.received)
+        self.assertTrue(self.handler.connected)
+
+    def testIdleTimeout(self):
+        self.handler.idleTimeout = 0.05
+        self.client.send(b'GET /a HTTP/1.1\r\n\r\n')
+        self.pump(lambda: self.received.endswith(b'\r\n\r\na'))
+
+        self.server.closeIdle(time())
+        self.assertTrue(self.handler.connected)
+        sleep(0.1)
+        self.server.closeIdle(time())
+        self.assertFalse(self.handler.connected)
+        self.pump(lambda: self.closed)
+
+    def testGenerator(self):
+        self.client.send(b'GET /chunks HTTP/1.1\r\n\r\n')
+        self.pump(lambda: self.received.endswith(b'\r\n\r\nchunks'))
+        self.assertTrue(self.handler.connected)
+
+class TestServerAsyncoreWorkers(TestServerAsyncore):
+
+    workers = 2
+
+    def testGenerator(self):
+        super().testGenerator()
+        # The processing and the response content generators are executed on the workers not on the loop thread.
+        self.assertNotIn(current_thread(), self.content.threads)
+        self.assertEqual(1, len(self.content.threads))
+
+    def testExpired(self):
+        self.server.admission = AdmissionController(maximumAge=0.1)
+        release = Event()
+        for _k in range(self.workers): self.server.executor.submit(release.wait)
+
+        self.client.send(b'POST /echo HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello')
+        self.pump(lambda: self.handler._processing)
+        sleep(0.2)
+        release.set()
+        self.pump(lambda: self.received.endswith(b'\r\n\r\n'))
+        self.assertTrue(self.received.startswith(b'HTTP/1.1 503 Service Unavailable\r\n'))
+        self.assertIn(b'\r\nRetry-After: 1\r\n', self.received)
+        self.assertEqual(dict(total=0, patterns={'^': 0}, rejected=1), self.server.admission.statistics())
+        self.assertEqual(set(), self.content.threads)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
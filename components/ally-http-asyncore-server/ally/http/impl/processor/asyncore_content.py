@@ -18,6 +18,7 @@ from ally.zip.util_zip import normOSPath
 from collections import Callable
 from genericpath import isdir
 from io import BytesIO
+from itertools import count
 import os
 import time
 
@@ -72,7 +73,7 @@ class AsyncoreContentHandler(HandlerProcessor):
         'Unable to access the dump directory %s' % self.dumpRequestsPath
         super().__init__()
         
-        self._count = 0
+        self._count = count()
 
     def process(self, chain, request:Request, requestCnt:RequestContent, response:Response, **keyargs):
         '''
@@ -106,9 +107,7 @@ class AsyncoreContentHandler(HandlerProcessor):
         Provide the path for the request file.
         '''
         tm_year, tm_mon, tm_mday, tm_hour, tm_min, tm_sec, *_rest = time.localtime()
-        path = 'request_%s_%s-%s-%s_%s-%s-%s' % (self._count, tm_year, tm_mon, tm_mday, tm_hour, tm_min, tm_sec)
-        self._count += 1
-        return path
+        return 'request_%s_%s-%s-%s_%s-%s-%s' % (next(self._count), tm_year, tm_mon, tm_mday, tm_hour, tm_min, tm_sec)
 
 # --------------------------------------------------------------------
 
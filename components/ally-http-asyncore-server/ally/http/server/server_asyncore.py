@@ -11,14 +11,19 @@ Provides the asyncore web server based on the python build in http server and as
 
 from ally.design.context import optional
 from ally.design.processor import Processing, Assembly, ONLY_AVAILABLE, \
-    CREATE_REPORT, Chain
+    CREATE_REPORT, INSTRUMENT, Chain
+from ally.http.server.server_basic import reportInstrument
 from ally.http.spec.server import RequestHTTP, ResponseHTTP, RequestContentHTTP, \
     ResponseContentHTTP, METHOD_UNKNOWN, METHODS
-from ally.support.util_io import IInputStream, readGenerator
+from ally.http.support.admission import AdmissionController
+from ally.http.support.parser import RequestParser
+from ally.support.util_io import IInputStream, InputStreamFile, readGenerator
 from asyncore import dispatcher, loop
 from collections import Callable, deque
+from concurrent.futures import ThreadPoolExecutor
 from http.server import BaseHTTPRequestHandler
 from io import BytesIO
+from time import time
 from urllib.parse import urlparse, parse_qsl
 import logging
 import re
@@ -32,6 +37,8 @@ log = logging.getLogger(__name__)
 WRITE_BYTES = 1
 WRITE_ITER = 2
 WRITE_CLOSE = 3
+WRITE_NEXT = 4
+WRITE_FILE = 5
 
 # --------------------------------------------------------------------
 
@@ -53,14 +60,23 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
     Request handler implementation based on @see: async_chat and @see: BaseHTTPRequestHandler.
     The async chat request handler. It relays for the HTTP processing on the @see: BaseHTTPRequestHandler,
     and uses the async_chat to asynchronous communication.
+    The connection is kept alive for HTTP/1.1 requests (or HTTP/1.0 requests that ask for it) if the response content
+    length is known, the pipelined requests are processed in order after the current response is written.
+    If the server has workers the processing chain is executed on the workers, also the response content generators
+    are pulled on the workers since they can call services, the connection reads and writes are always performed on
+    the asyncore loop thread.
     '''
+    protocol_version = 'HTTP/1.1'
+    # The HTTP protocol version of the responses.
     
     bufferSize = 10 * 1024
     # The buffer size used for reading and writing.
     maximumRequestSize = 100 * 1024
     # The maximum request size, 100 kilobytes
-    requestTerminator = b'\r\n\r\n'
-    # Terminator that signals the http request is complete 
+    keepAliveMaximum = 100
+    # The maximum number of requests that are processed on a connection, 1 means no keep alive.
+    idleTimeout = 15
+    # The number of seconds after which a connection that has no activity is closed.
 
     def __init__(self, server, request, address):
         '''
@@ -84,14 +100,17 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         self.request_version = 'HTTP/1.1'
         self.requestline = 0
         
-        self._stage = 1
-        self.rfile = BytesIO()
-        self._readCarry = None
-        self._reader = None
-
-        self.wfile = BytesIO()
+        self._parser = RequestParser(self.maximumRequestSize)
         self._writeq = deque()
+        self._pending = None
+        self._requestsCount = 0
+        self._lastActivity = time()
+        self._processing = False
+        self._response = None
+        self._received = None
+        self._admitted = None
         
+        self._reset()
         self._next(1)
         
     def handle_read(self):
@@ -103,10 +122,18 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
             log.exception('Exception occurred while reading the content from \'%s\'' % self.connection)
             self.close()
             return
+        self._lastActivity = time()
         self.handle_data(data)
     
     def handle_error(self):
         log.exception('A problem occurred in the server')
+        
+    def close(self):
+        '''
+        @see: dispatcher.close
+        '''
+        dispatcher.close(self)
+        self._release()
     
     def end_headers(self):
         '''
@@ -114,7 +141,7 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         '''
         super().end_headers()
         self._writeq.append((WRITE_BYTES, memoryview(self.wfile.getvalue())))
-        self.wfile = None
+        self.wfile = BytesIO()
 
     def log_message(self, format, *args):
         '''
@@ -125,8 +152,29 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         # creates a big delay whenever the request is made from a non localhost client.
         assert log.debug(format, *args) or True
         
+    def isIdle(self, now):
+        '''
+        Checks if the connection had no activity for the idle timeout.
+        
+        @param now: float
+            The current time in seconds.
+        @return: boolean
+            True if the connection is idle, False otherwise.
+        '''
+        if self._processing: return False  # The request is processed by a worker
+        return now - self._lastActivity > self.idleTimeout
+        
     # ----------------------------------------------------------------
     
+    def _reset(self):
+        '''
+        Resets the request data in order to be able to handle a new request on the connection.
+        '''
+        self.wfile = BytesIO()
+        self._reader = None
+        self._readerLength = None
+        self._contentLength = None
+        
     def _next(self, stage):
         '''
         Proceed to next stage.
@@ -149,34 +197,28 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         '''
         Handle the data as being part of the request.
         '''
-        if self._readCarry is not None: data = self._readCarry + data
-        index = data.find(self.requestTerminator)
-        requestTerminatorLen = len(self.requestTerminator)
-        
-        if index >= 0:
-            index += requestTerminatorLen 
-            self.rfile.write(data[:index])
-            self.rfile.seek(0)
-            self.raw_requestline = self.rfile.readline()
-            self.parse_request()
-            self.rfile = None
-            
-            method = self.command
-            if method:
-                method = method.upper()
-                if method not in METHODS: method = METHOD_UNKNOWN
-            else: method = METHOD_UNKNOWN
-            self._process(method)
-            
-            if index < len(data) and self.handle_data: self.handle_data(data[index:])
-        else:
-            self._readCarry = data[-requestTerminatorLen:]
-            self.rfile.write(data[:-requestTerminatorLen])
-            
-            if self.rfile.tell() > self.maximumRequestSize:
-                self.send_response(400, 'Request to long')
-                self.end_headers()
-                self.close()
+        parser = self._parser
+        assert isinstance(parser, RequestParser)
+        try: data = parser.feed(data)
+        except ValueError as e:
+            self._respond(400, str(e), close=True)
+            return
+        if data is None: return  # The request head is not complete yet
+        
+        self._received = time()
+        self._requestsCount += 1
+        self.command, self.path, self.request_version = parser.method, parser.target, parser.version
+        self.requestline = '%s %s %s' % (parser.method, parser.target, parser.version)
+        self.headers = parser.headers
+        self.close_connection = not parser.isKeepAlive()
+        if parser.isExpectContinue(): self.handle_expect_100()
+        
+        try: self._contentLength = int(self.headers.get('content-length', 0))
+        except ValueError: self._contentLength = None
+        if 'transfer-encoding' in self.headers: self._contentLength = None
+        
+        if data: self._pending = data
+        self._process(parser.method if parser.method in METHODS else METHOD_UNKNOWN)
                 
     def _1_writable(self):
         '''
@@ -197,18 +239,29 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         Handle the data as being part of the request.
         '''
         assert self._reader is not None, 'No reader available'
+        if self._readerLength is not None:
+            if len(data) > self._readerLength:
+                # The data after the content belongs to the next pipelined request.
+                data, self._pending = data[:self._readerLength], data[self._readerLength:]
+            self._readerLength -= len(data)
+        
         chain = self._reader(data)
         if chain is not None:
             assert isinstance(chain, Chain), 'Invalid chain %s' % chain
             self._reader = None
-            self._next(3)  # Now we proceed to write stage
-            chain.doAll()
+            self._execute(chain)
             
     def _2_writable(self):
         '''
         @see: dispatcher.writable
         '''
-        return False
+        return bool(self._writeq)  # Only in case there is a continue response
+    
+    def _2_handle_write(self):
+        '''
+        @see: dispatcher.handle_write
+        '''
+        self._3_handle_write()
             
     # ----------------------------------------------------------------
 
@@ -231,8 +284,27 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         assert self._writeq, 'Nothing to write'
         
         what, content = self._writeq[0]
-        assert what in (WRITE_ITER, WRITE_BYTES, WRITE_CLOSE), 'Invalid what %s' % what
-        if what == WRITE_ITER:
+        assert what in (WRITE_ITER, WRITE_BYTES, WRITE_CLOSE, WRITE_NEXT, WRITE_FILE), 'Invalid what %s' % what
+        if what == WRITE_FILE:
+            assert isinstance(content, InputStreamFile)
+            try: sent = content.sendTo(self.socket)
+            except BlockingIOError: return
+            except (socket.error, ValueError):
+                log.exception('Exception occurred while sending the file to the connection \'%s\'' % self.connection)
+                content.close()
+                self.close()
+                return
+            self._lastActivity = time()
+            if not sent:
+                content.close()
+                del self._writeq[0]
+            return
+        elif what == WRITE_ITER:
+            if self.server.executor is not None:
+                self._processing = True
+                self._next(4)  # Now we wait for the worker to pull the content
+                self.server.executor.submit(self._pull, content)
+                return
             try: data = memoryview(next(content))
             except StopIteration:
                 del self._writeq[0]
@@ -241,6 +313,14 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         elif what == WRITE_CLOSE:
             self.close()
             return
+        elif what == WRITE_NEXT:
+            del self._writeq[0]
+            self._reset()
+            self._next(1)  # Now we proceed to the next request
+            if self._pending is not None:
+                data, self._pending = self._pending, None
+                self.handle_data(data)
+            return
         
         dataLen = len(data)
         try:
@@ -250,6 +330,7 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
             log.exception('Exception occurred while writing to the connection \'%s\'' % self.connection)
             self.close()
             return
+        self._lastActivity = time()
         if sent < dataLen:
             if what == WRITE_ITER: self._writeq.appendleft((WRITE_BYTES, data[sent:]))
             elif what == WRITE_BYTES: self._writeq[0] = (WRITE_BYTES, data[sent:])
@@ -257,6 +338,57 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
             if what == WRITE_BYTES: del self._writeq[0]
         
     # ----------------------------------------------------------------
+
+    def _4_readable(self):
+        '''
+        @see: dispatcher.readable
+        '''
+        return False  # The chain is executed by a worker
+            
+    def _4_writable(self):
+        '''
+        @see: dispatcher.writable
+        '''
+        return False  # The chain is executed by a worker
+        
+    # ----------------------------------------------------------------
+    
+    def _respond(self, code, text=None, headers=None, source=None, close=False):
+        '''
+        Queues the response to be written and decides if the connection is kept alive after the response is written.
+        '''
+        assert isinstance(code, int), 'Invalid response code %s' % code
+        
+        if text is None: self.send_response(code)
+        else: self.send_response(code, text)
+        
+        hasLength = False
+        if headers:
+            assert isinstance(headers, dict), 'Invalid headers %s' % headers
+            for name, value in headers.items():
+                self.send_header(name, value)
+                if name.lower() == 'content-length': hasLength = True
+        if not hasLength and source is None:
+            if code >= 200 and code not in (204, 304): self.send_header('Content-Length', '0')
+            hasLength = True
+        
+        if close or self.close_connection or not hasLength or self._requestsCount >= self.keepAliveMaximum:
+            close = True
+        elif self._contentLength != 0 and (self._contentLength is None or self._readerLength is None \
+                                           or self._readerLength > 0):
+            close = True  # The request content was not consumed entirely
+        
+        if close: self.send_header('Connection', 'close')
+        elif self.request_version == 'HTTP/1.0': self.send_header('Connection', 'keep-alive')
+        self.end_headers()
+
+        if source is not None:
+            if isinstance(source, InputStreamFile): self._writeq.append((WRITE_FILE, source))
+            else:
+                if isinstance(source, IInputStream): source = readGenerator(source, self.bufferSize)
+                self._writeq.append((WRITE_ITER, iter(source)))
+        self._writeq.append((WRITE_CLOSE if close else WRITE_NEXT, None))
+        self._next(3)
     
     def _process(self, method):
         url = urlparse(self.path)
@@ -280,55 +412,208 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
                 req.parameters = parse_qsl(url.query, True, False)
                 break
         else:
-            self.send_response(404)
-            self.end_headers()
-            self.close()
+            self._respond(404)
             return
+        
+        admission = self.server.admission
+        if admission is not None:
+            assert isinstance(admission, AdmissionController)
+            if not admission.admit(regex.pattern):
+                self._respond(503, headers=admission.headers())
+                return
+            self._admitted = regex.pattern
 
         req.methodName = method
-        req.headers = dict(self.headers)
+        req.headers = self.headers
 
         def respond():
-            assert isinstance(rsp.code, int), 'Invalid response code %s' % rsp.code
-    
-            if ResponseHTTP.headers in rsp:
-                for name, value in rsp.headers.items(): self.send_header(name, value)
-    
-            if ResponseHTTP.text in rsp: self.send_response(rsp.code, rsp.text)
-            else: self.send_response(rsp.code)
-    
-            self.end_headers()
-    
-            if rspCnt.source is not None:
-                if isinstance(rspCnt.source, IInputStream): source = readGenerator(rspCnt.source, self.bufferSize)
-                else: source = rspCnt.source
-    
-                self._writeq.append((WRITE_ITER, iter(source)))
-            self._writeq.append((WRITE_CLOSE, None))
+            # The response is queued by the loop thread once the chain execution is finalized.
+            self._response = (rsp.code, rsp.text if ResponseHTTP.text in rsp else None,
+                              rsp.headers if ResponseHTTP.headers in rsp else None, rspCnt.source)
             
         chain = Chain(processing)
         chain.process(request=req, requestCnt=reqCnt, response=rsp, responseCnt=rspCnt)
         chain.callBack(respond)
+        self._execute(chain, reqCnt)
         
-        while True:
-            if not chain.do():
-                self._next(3)  # Now we proceed to write stage
-                break
-            if reqCnt.contentReader is not None:
-                self._next(2)  # Now we proceed to read stage
-                self._reader = reqCnt.contentReader
-                break
+    def _execute(self, chain, requestCnt=None):
+        '''
+        Executes the chain on the server workers if there are workers available, otherwise the chain is executed
+        directly on the loop thread.
+        '''
+        if self.server.executor is None:
+            self._proceeded(self._proceed(chain, requestCnt))
+            return
+        
+        self._processing = True
+        self._next(4)  # Now we wait for the worker to execute the chain
+        self.server.executor.submit(self._work, chain, requestCnt)
+        
+    def _work(self, chain, requestCnt):
+        '''
+        Executes the chain on a worker thread, the result is delivered to the loop thread.
+        '''
+        if requestCnt is not None and self._admitted is not None and self.server.admission.isExpired(self._received):
+            # The request has waited too long for a worker so it is rejected without being processed.
+            self.server.wakeup.schedule(self._reject)
+            return
+        
+        try: reader = self._proceed(chain, requestCnt)
+        except:
+            log.exception('A problem occurred while processing the request from %s', self.client_address)
+            self.server.wakeup.schedule(self.close)
+        else: self.server.wakeup.schedule(self._proceeded, reader)
+        
+    def _proceed(self, chain, requestCnt):
+        '''
+        Executes the chain until is finalized or until the request content is required.
+        
+        @param chain: Chain
+            The chain to execute.
+        @param requestCnt: RequestContentHTTPAsyncore|None
+            The request content to check for a content reader, None if the content has already been read.
+        @return: Callable|None
+            The request content reader or None if the chain has been finalized.
+        '''
+        assert isinstance(chain, Chain), 'Invalid chain %s' % chain
+        while chain.do():
+            if requestCnt is not None and requestCnt.contentReader is not None: return requestCnt.contentReader
+            
+    def _proceeded(self, reader):
+        '''
+        Continues on the loop thread after the chain execution, either by reading the request content or by writing
+        the response.
+        '''
+        self._processing = False
+        if reader is not None:
+            self._next(2)  # Now we proceed to read stage
+            self._reader = reader
+            self._readerLength = self._contentLength
+            if self._pending is not None:
+                # The pending data is the request content.
+                data, self._pending = self._pending, None
+                self.handle_data(data)
+        elif self._response is not None:
+            self._release()
+            response, self._response = self._response, None
+            self._respond(*response)  # Now we proceed to write stage
+        else:
+            log.error('No response provided for the request from %s', self.client_address)
+            self.close()
+
+    def _pull(self, content):
+        '''
+        Pulls on a worker thread the next response content chunk, the chunk is delivered to the loop thread.
+        '''
+        try: data = next(content)
+        except StopIteration: data = None
+        except:
+            log.exception('A problem occurred while providing the response to %s', self.client_address)
+            self.server.wakeup.schedule(self.close)
+            return
+        self.server.wakeup.schedule(self._pulled, data)
+
+    def _pulled(self, data):
+        '''
+        Continues on the loop thread with the response content chunk pulled by the worker.
+        '''
+        self._processing = False
+        self._next(3)  # Now we continue the write stage
+        if data is None: del self._writeq[0]  # The content generator is exhausted
+        else: self._writeq.appendleft((WRITE_BYTES, memoryview(data)))
+
+    def _reject(self):
+        '''
+        Rejects on the loop thread the request that has waited too long for a worker.
+        '''
+        self._processing = False
+        self._release()
+        self._respond(503, headers=self.server.admission.headers())
+        
+    def _release(self):
+        '''
+        Releases the admission of the request.
+        '''
+        if self._admitted is not None:
+            self.server.admission.release(self._admitted)
+            self._admitted = None
 
 # --------------------------------------------------------------------
 
+class Wakeup(dispatcher):
+    '''
+    Dispatcher that wakes up the asyncore loop in order to execute the calls scheduled by other threads.
+    '''
+    
+    def __init__(self, map):
+        '''
+        Construct the wakeup dispatcher.
+        
+        @param map: dictionary
+            The asyncore map of the loop to wake up.
+        '''
+        self._calls = deque()
+        receiver, self._sender = socket.socketpair()
+        self._sender.setblocking(False)
+        dispatcher.__init__(self, receiver, map=map)
+        
+    def schedule(self, call, *args):
+        '''
+        Schedules the call to be executed on the loop thread, this method can be called from any thread.
+        
+        @param call: callable
+            The call to execute.
+        @param args: arguments
+            The arguments used for the call.
+        '''
+        assert callable(call), 'Invalid call %s' % call
+        self._calls.append((call, args))
+        try: self._sender.send(b'w')
+        except socket.error: pass  # The wakeup is already pending since the socket buffer is full
+        
+    def readable(self):
+        '''
+        @see: dispatcher.readable
+        '''
+        return True
+    
+    def writable(self):
+        '''
+        @see: dispatcher.writable
+        '''
+        return False
+    
+    def handle_read(self):
+        '''
+        @see: dispatcher.handle_read
+        '''
+        try: self.recv(1024)
+        except socket.error: pass
+        while self._calls:
+            call, args = self._calls.popleft()
+            try: call(*args)
+            except: log.exception('A problem occurred while executing %s on the loop thread', call)
+            
+    def handle_error(self):
+        log.exception('A problem occurred in the server wakeup')
+            
+    def close(self):
+        '''
+        @see: dispatcher.close
+        '''
+        dispatcher.close(self)
+        self._sender.close()
+
 class AsyncServer(dispatcher):
     '''
     The asyncore server handling the connection.
     '''
     timeout = 10.0
     # The timeout for select loop.
+    idleCheck = 1.0
+    # The interval in seconds for checking the idle connections.
 
-    def __init__(self, serverAddress, pathProcessing, requestHandlerFactory):
+    def __init__(self, serverAddress, pathProcessing, requestHandlerFactory, workers=0, admission=None):
         '''
         Construct the server.
         
@@ -340,16 +625,29 @@ class AsyncServer(dispatcher):
         @param requestHandlerFactory: callable(AsyncServer, socket, tuple(string, integer))
             The factory that provides request handlers, takes as arguments the server, request socket
             and client address.
+        @param workers: integer
+            The number of worker threads that execute the processing chains, if 0 the processing chains are executed
+            on the loop thread.
+        @param admission: AdmissionController|None
+            The admission controller for the requests, None for no admission control.
         '''
         assert isinstance(serverAddress, tuple), 'Invalid server address %s' % serverAddress
         assert isinstance(pathProcessing, list), 'Invalid path processing %s' % pathProcessing
         assert callable(requestHandlerFactory), 'Invalid request handler factory %s' % requestHandlerFactory
+        assert isinstance(workers, int) and workers >= 0, 'Invalid workers %s' % workers
+        assert admission is None or isinstance(admission, AdmissionController), 'Invalid admission %s' % admission
         
         self.map = {}
         dispatcher.__init__(self, map=self.map)
         self.serverAddress = serverAddress
         self.pathProcessing = pathProcessing
         self.requestHandlerFactory = requestHandlerFactory
+        self.admission = admission
+        
+        if workers:
+            self.executor = ThreadPoolExecutor(workers)
+            self.wakeup = Wakeup(self.map)
+        else: self.executor = self.wakeup = None
         
         self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
         self.set_reuse_addr()
@@ -371,12 +669,39 @@ class AsyncServer(dispatcher):
         # creates an instance of the handler class to handle the request/response
         # on the incoming connection
         self.requestHandlerFactory(self, request, address)
+        
+    def close(self):
+        '''
+        @see: dispatcher.close
+        '''
+        dispatcher.close(self)
+        if self.executor is not None:
+            self.executor.shutdown(False)
+            self.wakeup.close()
     
     def serve_forever(self):
         '''
         Loops and servers the connections.
         '''
-        loop(self.timeout, map=self.map)
+        timeout, lastCheck = min(self.timeout, self.idleCheck), time()
+        while self.map:
+            loop(timeout, map=self.map, count=1)
+            now = time()
+            if now - lastCheck >= self.idleCheck:
+                self.closeIdle(now)
+                lastCheck = now
+            
+    def closeIdle(self, now):
+        '''
+        Closes the connections that are idle.
+        
+        @param now: float
+            The current time in seconds.
+        '''
+        for handler in list(self.map.values()):
+            if isinstance(handler, RequestHandler) and handler.isIdle(now):
+                assert log.debug('Closing idle connection from %s', handler.client_address) or True
+                handler.close()
             
     def serve_limited(self, count):
         '''
@@ -387,30 +712,54 @@ class AsyncServer(dispatcher):
 
 # --------------------------------------------------------------------
 
-def run(pathAssemblies, server_version, host='', port=80):
+def run(pathAssemblies, server_version, host='', port=80, instrument=False, keepAliveMaximum=100, idleTimeout=15,
+        workers=0, admission=None, instrumentInterval=0):
     '''
     Run the basic server.
     
     @param pathAssemblies: list[(regex, Assembly)]
         A list that contains tuples having on the first position a string pattern for matching a path, and as a value 
         the assembly to be used for creating the context for handling the request for the path.
+    @param instrument: boolean
+        If True the processors latency is instrumented, the instrument reports are logged together with the assembly
+        reports, periodically while the server is running and when the server stops.
+    @param keepAliveMaximum: integer
+        The maximum number of requests that are processed on a connection, 1 means no keep alive.
+    @param idleTimeout: integer
+        The number of seconds after which a connection that has no activity is closed.
+    @param workers: integer
+        The number of worker threads that execute the processing chains, if 0 the processing chains are executed on
+        the server loop thread.
+    @param admission: AdmissionController|None
+        The admission controller for the requests, None for no admission control.
+    @param instrumentInterval: integer|float
+        The number of seconds between the instrument reports logged while the server is running, 0 means that the
+        reports are logged only when the server starts and stops.
     '''
     assert isinstance(pathAssemblies, list), 'Invalid path assemblies %s' % pathAssemblies
+    assert isinstance(instrument, bool), 'Invalid instrument flag %s' % instrument
+    assert isinstance(keepAliveMaximum, int) and keepAliveMaximum > 0, \
+    'Invalid keep alive maximum %s' % keepAliveMaximum
+    assert isinstance(idleTimeout, (int, float)), 'Invalid idle timeout %s' % idleTimeout
+    assert isinstance(workers, int) and workers >= 0, 'Invalid workers %s' % workers
     RequestHandler.server_version = server_version
+    RequestHandler.keepAliveMaximum = keepAliveMaximum
+    RequestHandler.idleTimeout = idleTimeout
     pathProcessing = []
     for pattern, assembly in pathAssemblies:
         assert isinstance(pattern, str), 'Invalid pattern %s' % pattern
         assert isinstance(assembly, Assembly), 'Invalid assembly %s' % assembly
 
-        processing, report = assembly.create(ONLY_AVAILABLE, CREATE_REPORT,
+        processing, report = assembly.create(ONLY_AVAILABLE, CREATE_REPORT, INSTRUMENT if instrument else 0,
                                              request=RequestHTTP, requestCnt=RequestContentHTTPAsyncore,
                                              response=ResponseHTTP, responseCnt=ResponseContentHTTP)
 
         log.info('Assembly report for pattern \'%s\':\n%s', pattern, report)
         pathProcessing.append((re.compile(pattern), processing))
+    if instrument: logInstrument = reportInstrument(pathProcessing, instrumentInterval)
         
     try:
-        server = AsyncServer((host, port), pathProcessing, RequestHandler)
+        server = AsyncServer((host, port), pathProcessing, RequestHandler, workers, admission)
         print('=' * 50, 'Started Async REST API server...')
 #        import profile
 #        profile.runctx('server.serve_limited(1000)', globals(), locals(), 'profiler.data')
@@ -422,4 +771,5 @@ def run(pathAssemblies, server_version, host='', port=80):
         log.exception('=' * 50 + ' The server has stooped')
         try: server.close()
         except: pass
-        
+
+    if instrument: logInstrument()
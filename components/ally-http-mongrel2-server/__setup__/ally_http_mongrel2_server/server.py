@@ -10,7 +10,7 @@ Runs the Mongrel2 web server.
 '''
 
 from ..ally_http import server_host, server_port, server_type, server_version
-from ..ally_http.server import pathAssemblies
+from ..ally_http.server import pathAssemblies, admissionController
 from ally.container import ioc
 from threading import Thread
 
@@ -48,6 +48,12 @@ def recv_spec():
     '''The receive address to use in communication with Mongrel2, see more details at "address_request" configuration'''
     return 'ipc:///tmp/response'
 
+@ioc.config
+def server_mongrel2_workers() -> int:
+    '''The number of worker threads that execute the requests received from Mongrel2, if 0 the requests are executed
+    on the receiver thread one at a time'''
+    return 0
+
 ioc.doc(server_type, '''
     "mongrel2" - mongrel2 server integration, Attention!!! this is not a full server the content will be delivered
                  by Mongrel2 server, so when you set this option please check the README.txt in the component sources
@@ -69,6 +75,7 @@ def requestHandler():
     b = RequestHandler(); yield b
     b.pathAssemblies = pathAssemblies()
     b.serverVersion = server_version()
+    b.admission = admissionController()
 
 # --------------------------------------------------------------------
 
@@ -76,5 +83,6 @@ def requestHandler():
 def runServer():
     if server_type() == 'mongrel2':
         from ally.http.server import server_mongrel2
-        args = (workspace_path(), requestHandler(), send_ident(), send_spec(), recv_ident(), recv_spec())
+        args = (workspace_path(), requestHandler(), send_ident(), send_spec(), recv_ident(), recv_spec(),
+                server_mongrel2_workers())
         Thread(target=server_mongrel2.run, args=args).start()
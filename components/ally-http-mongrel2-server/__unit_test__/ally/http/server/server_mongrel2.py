@@ -0,0 +1,160 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides the unit testing for the mongrel2 server, the test acts as the mongrel2 peer.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.container import ioc
+from ally.design.context import Context, defines
+from ally.design.processor import Assembly, HandlerProcessorProceed
+from ally.http.server.server_mongrel2 import Mongrel2Server, Request, \
+    RequestHandler, RESPONSE_ERROR
+from ally.http.support.admission import AdmissionController
+from collections import Iterable
+from tempfile import gettempdir
+from threading import Thread
+import json
+import time
+import unittest
+import zmq
+
+# --------------------------------------------------------------------
+
+def handle(request):
+    assert isinstance(request, Request)
+    if request.path == '/error': raise ValueError('Handling failed')
+    request.send(b'HTTP/1.1 200 OK\r\n\r\n')
+    time.sleep(0.01)
+    if request.path == '/partial': raise ValueError('Handling failed')
+    request.send(request.path.encode() * 1000)
+    request.send(b'')
+
+class Response(Context):
+    code = defines(int)
+    isSuccess = defines(bool)
+    text = defines(str)
+    headers = defines(dict)
+
+class ResponseContent(Context):
+    source = defines(Iterable)
+
+class SlowHandler(HandlerProcessorProceed):
+
+    def process(self, response:Response, responseCnt:ResponseContent, **keyargs):
+        time.sleep(0.1)
+        response.code, response.isSuccess, response.text, response.headers = 200, True, 'OK', {}
+
+def message(connId, path):
+    headers = json.dumps({'METHOD': 'GET', 'PATH': path}).encode()
+    return b''.join((b'peer ', str(connId).encode(), b' ', path.encode(), b' ',
+                     str(len(headers)).encode(), b':', headers, b',0:,'))
+
+# --------------------------------------------------------------------
+
+class Mongrel2Peer(unittest.TestCase):
+
+    def setUp(self):
+        self.context = zmq.Context()
+        self.push = self.context.socket(zmq.PUSH)
+        self.sub = self.context.socket(zmq.SUB)
+        self.sub.setsockopt(zmq.SUBSCRIBE, b'')
+        self.sub.setsockopt(zmq.RCVTIMEO, 100)
+        sendSpec = 'tcp://127.0.0.1:%s' % self.push.bind_to_random_port('tcp://127.0.0.1')
+        recvSpec = 'tcp://127.0.0.1:%s' % self.sub.bind_to_random_port('tcp://127.0.0.1')
+
+        self.server = self.createServer(sendSpec, recvSpec)
+        serving = Thread(target=self.server.serve_forever)
+        serving.daemon = True
+        serving.start()
+
+        # The messages published before the publisher is connected are dropped.
+        while True:
+            with self.server.respLock: self.server.resp.send(b'ping')
+            try:
+                if self.sub.recv() == b'ping': break
+            except zmq.Again: pass
+        self.sub.setsockopt(zmq.RCVTIMEO, 10000)
+
+    def tearDown(self):
+        self.push.close(0)
+        self.sub.close(0)
+        self.context.term()
+
+    def receive(self, count):
+        responses = {}
+        while count:
+            data = self.sub.recv()
+            if data == b'ping': continue
+            count -= 1
+            header, msg = data.split(b', ', 1)
+            sender, connId = header.split(b' ', 1)
+            self.assertEqual(b'peer', sender)
+            responses.setdefault(int(connId.split(b':', 1)[1]), []).append(msg)
+        return responses
+
+class TestMongrel2Server(Mongrel2Peer):
+
+    def createServer(self, sendSpec, recvSpec):
+        return Mongrel2Server(gettempdir(), b'send', sendSpec, b'recv', recvSpec, handle, 4)
+
+    def testWorkers(self):
+        for connId in range(20): self.push.send(message(connId, '/path%s' % connId))
+        responses = self.receive(60)
+        self.assertEqual(set(range(20)), set(responses))
+        for connId, msgs in responses.items():
+            self.assertEqual([b'HTTP/1.1 200 OK\r\n\r\n', ('/path%s' % connId).encode() * 1000, b''], msgs)
+
+    def testError(self):
+        self.push.send(message(1, '/error'))
+        self.push.send(message(2, '/partial'))
+        responses = self.receive(4)
+        self.assertEqual([RESPONSE_ERROR, b''], responses[1])
+        self.assertEqual([b'HTTP/1.1 200 OK\r\n\r\n', b''], responses[2])
+
+class TestMongrel2ServerAdmission(Mongrel2Peer):
+
+    def createServer(self, sendSpec, recvSpec):
+        assembly = Assembly()
+        assembly.add(SlowHandler())
+        self.handler = RequestHandler()
+        self.handler.pathAssemblies = [('slow', assembly)]
+        self.handler.serverVersion = 'test'
+        self.handler.admission = AdmissionController(maximum=2, maximumAge=0.05)
+        ioc.initialize(self.handler)
+        return Mongrel2Server(gettempdir(), b'send', sendSpec, b'recv', recvSpec, self.handler, 1, self.handler.admit)
+
+    def status(self, msgs):
+        self.assertEqual(2, len(msgs))
+        self.assertEqual(b'', msgs[1])
+        return msgs[0].split(b'\r\n', 1)[0]
+
+    def testAdmission(self):
+        for connId in range(4): self.push.send(message(connId, '/slow'))
+        responses = self.receive(8)
+        self.assertEqual(b'HTTP/1.1 200 OK', self.status(responses[0]))
+        for connId in range(1, 4): self.assertEqual(b'HTTP/1.1 503 Service Unavailable', self.status(responses[connId]))
+        self.assertIn(b'Retry-After: 1', responses[3][0])
+        # The admission is released after the response is sent.
+        for _k in range(100):
+            if not self.handler.admission.statistics()['total']: break
+            time.sleep(0.01)
+        self.assertEqual(dict(total=0, patterns={'slow': 0}, rejected=3), self.handler.admission.statistics())
+
+        self.push.send(message(4, '/slow'))
+        self.assertEqual(b'HTTP/1.1 200 OK', self.status(self.receive(2)[4]))
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -15,10 +15,14 @@ from ally.design.processor import Processing, Assembly, ONLY_AVAILABLE, \
     CREATE_REPORT, Chain
 from ally.http.spec.server import RequestHTTP, ResponseHTTP, RequestContentHTTP, \
     ResponseContentHTTP, METHODS, METHOD_UNKNOWN
+from ally.http.support.admission import AdmissionController
 from ally.support.util_io import IInputStream, IClosable
 from collections import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from os import path, remove
+from threading import Lock
+from time import time
 from urllib.parse import parse_qsl
 from uuid import uuid4
 import json
@@ -29,6 +33,9 @@ import zmq
 # --------------------------------------------------------------------
 
 log = logging.getLogger(__name__)
+
+RESPONSE_ERROR = b'HTTP/1.1 500 Internal Server Error\r\nContent-Type: text\r\nContent-Length: 0\r\n\r\n'
+# The response sent if the request handling fails before a response has been sent.
     
 # --------------------------------------------------------------------
 
@@ -43,6 +50,8 @@ class RequestHandler:
     # the assembly to be used for creating the context for handling the request for the path.
     serverVersion = str
     # The server version name
+    admission = None
+    # The admission controller for the requests, None for no admission control.
  
     httpFormat = 'HTTP/1.1 %(code)s %(status)s\r\n%(headers)s\r\n\r\n'
     # The http format for the response.
@@ -51,6 +60,8 @@ class RequestHandler:
         assert isinstance(self.pathAssemblies, list), 'Invalid path assemblies %s' % self.pathAssemblies
         assert isinstance(self.serverVersion, str), 'Invalid server version %s' % self.serverVersion
         assert isinstance(self.httpFormat, str), 'Invalid http format for the response %s' % self.httpFormat
+        assert self.admission is None or isinstance(self.admission, AdmissionController), \
+        'Invalid admission %s' % self.admission
         
         pathProcessing = []
         for pattern, assembly in self.pathAssemblies:
@@ -67,14 +78,56 @@ class RequestHandler:
         self.defaultHeaders = {'Server':self.serverVersion, 'Content-Type':'text'}
         self.scheme = 'http'
 
+    def admit(self, request):
+        '''
+        Admits the request for processing, this is called by the server before the request is dispatched to a worker,
+        the rejected requests are responded with 503 Service Unavailable.
+        
+        @param request: Request
+            The request to admit.
+        @return: boolean
+            True if the request is admitted and needs to be processed, False if the request has been rejected.
+        '''
+        assert isinstance(request, Request), 'Invalid request %s' % request
+        if self.admission is None: return True
+        assert isinstance(self.admission, AdmissionController)
+        
+        path = request.path
+        if path.startswith('/'): path = path[1:]
+        for regex, _processing in self.pathProcessing:
+            if regex.match(path): break
+        else: return True
+        
+        if not self.admission.admit(regex.pattern):
+            self._reject(request)
+            return False
+        request.admitted = regex.pattern
+        return True
+
     def __call__(self, request):
         '''
-        Process the Mongrel2 call.
+        Process the Mongrel2 call, if the request has been admitted the admission is released after the processing.
         
         @param request: Request
             The request to process.
         '''
         assert isinstance(request, Request), 'Invalid request %s' % request
+        if request.admitted is None: return self._process(request)
+        
+        assert isinstance(self.admission, AdmissionController)
+        try:
+            # The request that has waited too long for a worker is rejected without being processed.
+            if self.admission.isExpired(request.received): self._reject(request)
+            else: self._process(request)
+        finally: self.admission.release(request.admitted)
+
+    # ----------------------------------------------------------------
+
+    def _process(self, request):
+        '''
+        Process the Mongrel2 request.
+        '''
+        assert isinstance(request, Request), 'Invalid request %s' % request
         path = request.path
         responseHeaders = dict(self.defaultHeaders)
         if path.startswith('/'): path = path[1:]
@@ -122,8 +175,6 @@ class RequestHandler:
         if rspCnt.source is not None: request.push(rspCnt.source)
         self._end(request)
 
-    # ----------------------------------------------------------------
-
     def _respond(self, request, code, status, headers):
         '''
         Respond with the HTTP response.
@@ -134,6 +185,16 @@ class RequestHandler:
         msg = self.httpFormat % msg
         request.send(msg.encode())
         
+    def _reject(self, request):
+        '''
+        Respond with the HTTP service unavailable response.
+        '''
+        assert isinstance(self.admission, AdmissionController)
+        responseHeaders = dict(self.defaultHeaders)
+        responseHeaders.update(self.admission.headers())
+        self._respond(request, 503, 'Service Unavailable', responseHeaders)
+        self._end(request)
+        
     def _end(self, request):
         '''
         End the request response.
@@ -147,16 +208,27 @@ class Mongrel2Server:
     '''
     The mongrel2 server handling the connection.
     Made based on the mongrel2.handler
+    If the server has workers the receiver loop only accepts the requests and dispatches them to the workers, the
+    responses are sent back by the workers through the shared response socket.
     '''
     
-    def __init__(self, workspacePath, sendIdent, sendSpec, recvIdent, recvSpec, requestHandler):
+    def __init__(self, workspacePath, sendIdent, sendSpec, recvIdent, recvSpec, requestHandler, workers=0, admit=None):
         '''
         Your addresses should be the same as what you configured
         in the config.sqlite for Mongrel2 and are usually like 
         tcp://127.0.0.1:9998
+        
+        @param workers: integer
+            The number of worker threads that execute the requests, if 0 the requests are executed on the receiver
+            thread.
+        @param admit: callable(Request)|None
+            The call used on the receiver thread for admitting the requests before they are dispatched to the workers,
+            the call returns False if the request has been rejected, None for no admission control.
         '''
         assert isinstance(workspacePath, str), 'Invalid path workspace %s' % workspacePath
         assert callable(requestHandler), 'Invalid request handler %s' % requestHandler
+        assert isinstance(workers, int) and workers >= 0, 'Invalid workers %s' % workers
+        assert admit is None or callable(admit), 'Invalid admit %s' % admit
         self.workspacePath = workspacePath
         self.context = zmq.Context()
         self.reqs = self.context.socket(zmq.PULL)
@@ -167,8 +239,13 @@ class Mongrel2Server:
         self.resp = self.context.socket(zmq.PUB)
         if sendIdent: self.resp.setsockopt(zmq.IDENTITY, sendIdent)
         self.resp.connect(recvSpec)
+        # The zmq sockets are not thread safe so the sends from the workers are serialized.
+        self.respLock = Lock()
         
         self.requestHandler = requestHandler
+        self.admit = admit
+        if workers: self.executor = ThreadPoolExecutor(workers)
+        else: self.executor = None
         
     def accept(self):
         '''
@@ -210,21 +287,55 @@ class Mongrel2Server:
                     assert log.debug('Upload starting in file %s' % started) or True
                     continue
 
-            try: self.requestHandler(request)
-            finally:
-                if upload is not None:
-                    # Remove the uploaded file.
-                    pathUpload, stream = upload
-                    try: stream.close()
-                    except: pass
-                    remove(pathUpload)
-                    assert log.debug('Removed upload file %s' % pathUpload) or True
+            if self.admit is not None and not self.admit(request): self._removeUpload(upload)
+            elif self.executor is None: self.handle(request, upload)
+            else: self.executor.submit(self.handle, request, upload)
+                
+    def handle(self, request, upload=None):
+        '''
+        Handles the request, the upload file is removed after the request is handled. If the request handling fails
+        an internal server error is sent, or if the response has already been started the connection is closed.
+        
+        @param request: Request
+            The request to handle.
+        @param upload: tuple(string, file)|None
+            The upload path and stream for the request.
+        '''
+        try: self.requestHandler(request)
+        except:
+            try:
+                if not request.isResponded: request.send(RESPONSE_ERROR)
+                request.send(b'')
+            except: log.exception('Cannot send the error response for %s', request.path)
+            log.exception('Exception occurred while processing request for %s', request.path)
+        finally: self._removeUpload(upload)
+        
+    def _removeUpload(self, upload):
+        '''
+        Removes the uploaded file if there is one.
+        '''
+        if upload is not None:
+            pathUpload, stream = upload
+            try: stream.close()
+            except: pass
+            remove(pathUpload)
+            assert log.debug('Removed upload file %s' % pathUpload) or True
+                
+    def server_close(self):
+        '''
+        Closes the server, the requests already dispatched to the workers are finalized first.
+        '''
+        if self.executor is not None: self.executor.shutdown()
+        self.reqs.close()
+        self.resp.close()
+        self.context.term()
 
 class Request:
     '''
     Simple container for request data.
     '''
-    __slots__ = ('server', 'sender', 'connId', 'path', 'headers', 'body', 'data', 'isDisconnect', '_header')
+    __slots__ = ('server', 'sender', 'connId', 'path', 'headers', 'body', 'data', 'isDisconnect', 'isResponded',
+                 'received', 'admitted', '_header')
     
     def __init__(self, server, sender, connId, path, headers, body):
         '''
@@ -242,6 +353,9 @@ class Request:
         self.path = path
         self.headers = headers
         self.body = body
+        self.isResponded = False
+        self.received = time()
+        self.admitted = None
         
         if headers.get('METHOD') == 'JSON':
             self.data = json.loads(str(self.body, 'utf8'))
@@ -256,7 +370,8 @@ class Request:
         '''
         Send the bytes message.
         '''
-        self.server.resp.send(self._header + msg)
+        self.isResponded = True
+        with self.server.respLock: self.server.resp.send(self._header + msg)
         
     def push(self, content):
         '''
@@ -277,15 +392,18 @@ class Request:
 
 # --------------------------------------------------------------------
 
-def run(workspacePath, requestHandler, sendIdent, sendSpec, recvIdent, recvSpec):
+def run(workspacePath, requestHandler, sendIdent, sendSpec, recvIdent, recvSpec, workers=0):
     assert isinstance(workspacePath, str), 'Invalid path workspace %s' % workspacePath
     assert callable(requestHandler), 'Invalid request handler %s' % requestHandler
+    assert isinstance(workers, int) and workers >= 0, 'Invalid workers %s' % workers
+    if isinstance(requestHandler, RequestHandler): admit = requestHandler.admit
+    else: admit = None
     if sendIdent is None: sendIdent = uuid4().hex.encode('utf8')
     elif isinstance(sendIdent, str): sendIdent = sendIdent.encode('utf8')
     if recvIdent is None: recvIdent = uuid4().hex.encode('utf8')
     elif isinstance(recvIdent, str): recvIdent = recvIdent.encode('utf8')
     
-    server = Mongrel2Server(workspacePath, sendIdent, sendSpec, recvIdent, recvSpec, requestHandler)
+    server = Mongrel2Server(workspacePath, sendIdent, sendSpec, recvIdent, recvSpec, requestHandler, workers, admit)
     try:
         print('=' * 50, 'Started Mongrel2 REST API server...')
         server.serve_forever()
@@ -43,3 +43,55 @@ def server_port() -> int:
 def server_version() -> str:
     '''The server version name'''
     return 'Ally/0.1'
+
+@ioc.config
+def server_instrument() -> bool:
+    '''
+    If true the latency of the processors will be instrumented and the instrument reports are logged together with
+    the assembly reports, periodically while the server is running and when the server is stopped
+    '''
+    return False
+
+@ioc.config
+def server_instrument_interval() -> int:
+    '''The number of seconds between the instrument reports logged while the server is running, 0 means that the
+    reports are logged only when the server starts and stops'''
+    return 300
+
+@ioc.config
+def server_keep_alive_maximum() -> int:
+    '''The maximum number of requests that are processed on a connection, 1 means that the connection is closed after
+    each request, not all the server types support keep alive connections'''
+    return 100
+
+@ioc.config
+def server_idle_timeout() -> int:
+    '''The number of seconds after which a connection that has no activity (like an idle keep alive connection) is
+    closed'''
+    return 15
+
+@ioc.config
+def server_maximum_requests() -> int:
+    '''The maximum number of requests that are processed at once (including the requests waiting for a worker), the
+    requests over this limit are rejected with 503 Service Unavailable, 0 means no limit'''
+    return 0
+
+@ioc.config
+def server_maximum_wait() -> float:
+    '''The maximum number of seconds that a request can wait for a worker before being processed, the requests that
+    waited longer are rejected with 503 Service Unavailable, 0 means no limit, only the server types that queue the
+    requests for workers use this limit'''
+    return 0
+
+@ioc.config
+def server_pattern_limits() -> dict:
+    '''The maximum number of requests that are processed at once for a path pattern, the key is the path pattern as
+    used for the path assemblies and the value is the limit. Use a limit for the expensive patterns (like the REST
+    resources) that is lower than the maximum requests so that the cheap patterns (like the content) are still served
+    under load'''
+    return {}
+
+@ioc.config
+def server_retry_after() -> int:
+    '''The number of seconds that is provided in the Retry-After header of the rejected requests'''
+    return 1
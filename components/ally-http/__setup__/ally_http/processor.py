@@ -12,10 +12,13 @@ Provides the configurations for the processors used in handling the request.
 from ally.container import ioc
 from ally.design.processor import Handler
 from ally.http.impl.processor.header import HeaderHandler
+from ally.http.impl.processor.headers.content_encoding import \
+    ContentEncodingEncodeHandler
 from ally.http.impl.processor.headers.content_length import \
     ContentLengthDecodeHandler, ContentLengthEncodeHandler
 from ally.http.impl.processor.headers.content_type import \
     ContentTypeDecodeHandler, ContentTypeEncodeHandler
+from ally.http.impl.processor.headers.etag import ETagEncodeHandler
 from ally.http.impl.processor.internal_error import InternalErrorHandler
 
 # --------------------------------------------------------------------
@@ -26,6 +29,36 @@ def read_from_params():
     '''If true will also read header values that are provided as query parameters'''
     return True
 
+@ioc.config
+def compress_content() -> bool:
+    '''Flag indicating that the response content should be compressed (gzip or deflate) if the client accepts it, by
+    default the compression is disabled so the responses are provided as they are unless this is explicitly enabled'''
+    return False
+
+@ioc.config
+def compress_content_types() -> list:
+    '''The content types of the responses that are compressed, the other content types are left as they are'''
+    return ['text/json', 'application/json', 'text/xml', 'application/xml', 'text/plain', 'text/html', 'text/css',
+            'text/javascript', 'application/javascript', 'text/yaml', 'application/x-yaml']
+
+@ioc.config
+def compress_minimum_size() -> int:
+    '''The minimum response content size in bytes that is compressed, smaller contents are not worth compressing'''
+    return 1024
+
+@ioc.config
+def etag_content() -> bool:
+    '''Flag indicating that the GET responses should have an entity tag and respond with not modified if the client
+    already has the content, by default the entity tags are disabled so the responses are provided as they are unless
+    this is explicitly enabled'''
+    return False
+
+@ioc.config
+def etag_hash_limit() -> int:
+    '''The maximum size in bytes of the streamed (chuncked) content that is gathered in order to provide the entity tag,
+    larger contents are streamed without an entity tag'''
+    return 65536
+
 # --------------------------------------------------------------------
 
 @ioc.entity
@@ -55,3 +88,16 @@ def contentTypeEncode() -> Handler: return ContentTypeEncodeHandler()
 
 @ioc.entity
 def contentLengthEncode() -> Handler: return ContentLengthEncodeHandler()
+
+@ioc.entity
+def contentEncodingEncode() -> Handler:
+    b = ContentEncodingEncodeHandler()
+    b.contentTypes = compress_content_types()
+    b.minimumSize = compress_minimum_size()
+    return b
+
+@ioc.entity
+def etagEncode() -> Handler:
+    b = ETagEncodeHandler()
+    b.hashLimit = etag_hash_limit()
+    return b
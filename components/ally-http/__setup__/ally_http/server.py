@@ -9,9 +9,12 @@ Created on Nov 23, 2011
 Runs the basic web server.
 '''
 
-from . import server_type, server_version, server_host, server_port
+from . import server_type, server_version, server_host, server_port, \
+    server_instrument, server_instrument_interval, server_maximum_requests, \
+    server_maximum_wait, server_pattern_limits, server_retry_after
 from ally.container import ioc
 from ally.http.server import server_basic
+from ally.http.support.admission import AdmissionController
 from ally.http.server.wsgi import RequestHandler
 from threading import Thread
 
@@ -25,16 +28,26 @@ def pathAssemblies():
     '''
     return []
 
+@ioc.entity
+def admissionController() -> AdmissionController:
+    '''
+    The admission controller used by the servers in order to reject the requests that exceed the limits.
+    '''
+    return AdmissionController(server_maximum_requests(), server_maximum_wait(), server_pattern_limits(),
+                               server_retry_after())
+
 @ioc.entity
 def requestHandlerWSGI():
     b = RequestHandler(); yield b
     b.pathAssemblies = pathAssemblies()
     b.serverVersion = server_version()
+    b.admission = admissionController()
 
 # --------------------------------------------------------------------
 
 @ioc.start
 def runServer():
     if server_type() == 'basic':
-        args = pathAssemblies(), server_version(), server_host(), server_port()
+        args = pathAssemblies(), server_version(), server_host(), server_port(), server_instrument(), \
+            admissionController(), server_instrument_interval()
         Thread(name='HTTP server thread', target=server_basic.run, args=args).start()
@@ -0,0 +1,107 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Content encoding compression testing.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.container import ioc
+from ally.design.context import Context, defines
+from ally.design.processor import Assembly, Chain
+from ally.http.impl.processor.header import HeaderHandler
+from ally.http.impl.processor.headers.content_encoding import \
+    ContentEncodingEncodeHandler
+from collections import Iterable
+from io import BytesIO
+import unittest
+import zlib
+
+# --------------------------------------------------------------------
+
+class Request(Context):
+    headers = defines(dict)
+
+class Response(Context):
+    pass
+
+class ResponseContent(Context):
+    source = defines(Iterable)
+    type = defines(str)
+    length = defines(int)
+
+# --------------------------------------------------------------------
+
+class TestContentEncoding(unittest.TestCase):
+
+    def setUp(self):
+        header = HeaderHandler()
+        ioc.initialize(header)
+        compress = ContentEncodingEncodeHandler()
+        compress.minimumSize = 10
+        ioc.initialize(compress)
+
+        assembly = Assembly()
+        assembly.add(header, compress)
+        self.processing = assembly.create(request=Request, response=Response, responseCnt=ResponseContent)
+        self.content = ('{"ModelList":[%s]}' % ','.join('{"Id":"%s"}' % k for k in range(100))).encode()
+
+    def process(self, accept, source, type='text/json', length=None):
+        contexts = self.processing.contexts
+        request, response, responseCnt = contexts['request'](), contexts['response'](), contexts['responseCnt']()
+        request.headers = {'Accept-Encoding': accept} if accept else {}
+        responseCnt.source, responseCnt.type, responseCnt.length = source, type, length
+
+        Chain(self.processing).process(request=request, response=response, responseCnt=responseCnt).doAll()
+        return response.headers, responseCnt
+
+    def testGzip(self):
+        headers, responseCnt = self.process('gzip, deflate', (self.content,), length=len(self.content))
+        self.assertEqual('gzip', headers['Content-Encoding'])
+        self.assertEqual('Accept-Encoding', headers['Vary'])
+        content, = responseCnt.source
+        self.assertEqual(len(content), responseCnt.length)
+        self.assertLess(len(content), len(self.content))
+        self.assertEqual(self.content, zlib.decompress(content, 16 + zlib.MAX_WBITS))
+
+    def testDeflateStream(self):
+        chunks = (self.content[k:k + 100] for k in range(0, len(self.content), 100))
+        headers, responseCnt = self.process('gzip;q=0.5, deflate', chunks)
+        self.assertEqual('deflate', headers['Content-Encoding'])
+        self.assertIsNone(responseCnt.length)
+        self.assertEqual(self.content, zlib.decompress(b''.join(responseCnt.source)))
+
+        headers, responseCnt = self.process('deflate', BytesIO(self.content), length=len(self.content))
+        self.assertEqual('deflate', headers['Content-Encoding'])
+        self.assertIsNone(responseCnt.length)
+        self.assertEqual(self.content, zlib.decompress(b''.join(responseCnt.source)))
+
+    def testSkip(self):
+        headers, responseCnt = self.process(None, (self.content,), length=len(self.content))
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual((self.content,), responseCnt.source)
+
+        headers, responseCnt = self.process('gzip;q=0, identity', (self.content,))
+        self.assertNotIn('Content-Encoding', headers)
+
+        headers, responseCnt = self.process('gzip', (b'{}',), length=2)
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual('Accept-Encoding', headers['Vary'])
+
+        headers, responseCnt = self.process('gzip', (self.content,), type='application/zip')
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertNotIn('Vary', headers)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,105 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Entity tag and conditional GET testing.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.container import ioc
+from ally.design.context import Context, defines
+from ally.design.processor import Assembly, Chain
+from ally.http.impl.processor.header import HeaderHandler
+from ally.http.impl.processor.headers.etag import ETagEncodeHandler, \
+    isNoneMatch
+from collections import Iterable
+import unittest
+
+# --------------------------------------------------------------------
+
+class Request(Context):
+    headers = defines(dict)
+    methodName = defines(str)
+
+class Response(Context):
+    pass
+
+class ResponseContent(Context):
+    source = defines(Iterable)
+    length = defines(int)
+
+# --------------------------------------------------------------------
+
+class TestETag(unittest.TestCase):
+
+    def setUp(self):
+        header = HeaderHandler()
+        ioc.initialize(header)
+        etag = ETagEncodeHandler()
+        etag.hashLimit = 100
+        ioc.initialize(etag)
+
+        assembly = Assembly()
+        assembly.add(header, etag)
+        self.processing = assembly.create(request=Request, response=Response, responseCnt=ResponseContent)
+
+    def process(self, source, ifNoneMatch=None, methodName='GET'):
+        contexts = self.processing.contexts
+        request, response, responseCnt = contexts['request'](), contexts['response'](), contexts['responseCnt']()
+        request.headers = {'If-None-Match': ifNoneMatch} if ifNoneMatch else {}
+        request.methodName = methodName
+        response.code, response.isSuccess = 200, True
+        responseCnt.source = source
+
+        Chain(self.processing).process(request=request, response=response, responseCnt=responseCnt).doAll()
+        return response, responseCnt
+
+    def testETag(self):
+        response, responseCnt = self.process((b'{"Id":', b'"1"}'))
+        etag = response.headers['ETag']
+        self.assertEqual(200, response.code)
+        self.assertEqual((b'{"Id":', b'"1"}'), responseCnt.source)
+
+        response, responseCnt = self.process((chunk for chunk in (b'{"Id":', b'"1"}')))
+        self.assertEqual(etag, response.headers['ETag'])
+        self.assertEqual((b'{"Id":', b'"1"}'), responseCnt.source)
+        self.assertEqual(10, responseCnt.length)
+
+        response, responseCnt = self.process((b'{"Id":"1"}',), '"other", %s' % etag)
+        self.assertEqual(304, response.code)
+        self.assertTrue(response.isSuccess)
+        self.assertIsNone(responseCnt.source)
+
+        response, responseCnt = self.process((b'{"Id":"2"}',), etag)
+        self.assertEqual(200, response.code)
+        self.assertNotEqual(etag, response.headers['ETag'])
+
+    def testSkip(self):
+        response, responseCnt = self.process((b'{"Id":"1"}',), methodName='POST')
+        self.assertNotIn('ETag', response.headers)
+
+        chunks = [b'0123456789' * 3] * 5
+        response, responseCnt = self.process((chunk for chunk in chunks))
+        self.assertNotIn('ETag', response.headers)
+        self.assertEqual(chunks, list(responseCnt.source))
+
+    def testIsNoneMatch(self):
+        self.assertTrue(isNoneMatch('"a"', '*'))
+        self.assertTrue(isNoneMatch('"a"', 'W/"a"'))
+        self.assertTrue(isNoneMatch('W/"a"', '"b", "a"'))
+        self.assertFalse(isNoneMatch('"a"', '"b"'))
+        self.assertFalse(isNoneMatch('"a"', None))
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,94 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides the unit testing for the WSGI request handler.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.container import ioc
+from ally.design.context import Context, defines
+from ally.design.processor import Assembly, HandlerProcessorProceed
+from ally.http.server.wsgi import RequestHandler
+from ally.http.support.admission import AdmissionController
+from collections import Iterable
+from io import BytesIO
+import unittest
+
+# --------------------------------------------------------------------
+
+class Response(Context):
+    code = defines(int)
+    isSuccess = defines(bool)
+    headers = defines(dict)
+
+class ResponseContent(Context):
+    source = defines(Iterable)
+
+class ContentHandler(HandlerProcessorProceed):
+
+    def __init__(self):
+        super().__init__()
+        self.processing = None
+
+    def process(self, response:Response, responseCnt:ResponseContent, **keyargs):
+        if self.processing: self.processing()
+        response.code, response.isSuccess, response.headers = 200, True, {}
+        responseCnt.source = (b'content',)
+
+# --------------------------------------------------------------------
+
+class TestWSGI(unittest.TestCase):
+
+    def setUp(self):
+        self.content = ContentHandler()
+        assembly = Assembly()
+        assembly.add(self.content)
+
+        self.handler = RequestHandler()
+        self.handler.pathAssemblies = [('resources', assembly)]
+        self.handler.serverVersion = 'test'
+        self.handler.admission = AdmissionController(maximum=1, retryAfter=5)
+        ioc.initialize(self.handler)
+
+    def call(self, path):
+        responded = []
+        context = {'PATH_INFO': path, 'wsgi.url_scheme': 'http', 'REQUEST_METHOD': 'GET', 'QUERY_STRING': '',
+                   'wsgi.input': BytesIO()}
+        content = b''.join(self.handler(context, lambda status, headers: responded.append((status, dict(headers)))))
+        self.assertEqual(1, len(responded))
+        status, headers = responded[0]
+        return status, headers, content
+
+    def testAdmission(self):
+        self.assertEqual(('200 OK', b'content'), self.call('/resources')[::2])
+
+        rejected = []
+        self.content.processing = lambda: rejected.append(self.call('/resources'))
+        self.assertEqual('200 OK', self.call('/resources')[0])
+        self.content.processing = None
+
+        status, headers, content = rejected[0]
+        self.assertEqual('503 Service Unavailable', status)
+        self.assertEqual('5', headers['Retry-After'])
+        self.assertEqual(b'', content)
+        self.assertEqual(dict(total=0, patterns={'resources': 0}, rejected=1),
+                         self.handler.admission.statistics())
+
+    def testNotFound(self):
+        self.assertEqual('404 Not Found', self.call('/other')[0])
+        self.assertEqual(0, self.handler.admission.statistics()['rejected'])
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,54 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides the unit testing for the admission controller.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.http.support.admission import AdmissionController
+from time import time
+import unittest
+
+# --------------------------------------------------------------------
+
+class TestAdmission(unittest.TestCase):
+
+    def testLimits(self):
+        admission = AdmissionController(3, limits={'^resources': 2}, retryAfter=5)
+
+        self.assertTrue(admission.admit('^resources'))
+        self.assertTrue(admission.admit('^resources'))
+        self.assertFalse(admission.admit('^resources'))
+        self.assertTrue(admission.admit('^content'))
+        self.assertFalse(admission.admit('^content'))
+        self.assertEqual({'total': 3, 'patterns': {'^resources': 2, '^content': 1}, 'rejected': 2},
+                         admission.statistics())
+
+        admission.release('^resources')
+        self.assertTrue(admission.admit('^content'))
+        admission.release('^content')
+        self.assertTrue(admission.admit('^resources'))
+        self.assertFalse(admission.admit('^resources'))
+        self.assertEqual({'Retry-After': '5'}, admission.headers())
+
+    def testExpired(self):
+        admission = AdmissionController(maximumAge=2)
+        self.assertFalse(admission.isExpired(time() - 1))
+        self.assertTrue(admission.isExpired(time() - 3))
+        self.assertEqual(1, admission.statistics()['rejected'])
+        self.assertFalse(AdmissionController().isExpired(time() - 100))
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
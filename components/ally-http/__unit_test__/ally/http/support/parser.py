@@ -0,0 +1,118 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides the unit testing for the HTTP parsers.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.http.support.parser import RequestParser, ResponseParser, ContentParser, \
+    HeadParser
+import unittest
+
+# --------------------------------------------------------------------
+
+class TestParser(unittest.TestCase):
+
+    def testParse(self):
+        parser = RequestParser()
+        rest = parser.feed(b'GET /resources/User?offset=1 HTTP/1.1\r\nHost: localhost\r\nAccept: text/json\r\n'
+                           b'X-Filter: Name\r\nx-filter: Id\r\nContent-Type: text/plain;\r\n charset=UTF-8\r\n\r\n')
+        self.assertEqual(b'', rest)
+        self.assertEqual('GET', parser.method)
+        self.assertEqual('/resources/User?offset=1', parser.target)
+        self.assertEqual('HTTP/1.1', parser.version)
+        self.assertEqual({'host': 'localhost', 'accept': 'text/json', 'x-filter': 'Name,Id',
+                          'content-type': 'text/plain; charset=UTF-8'}, parser.headers)
+        self.assertTrue(parser.isKeepAlive())
+        self.assertFalse(parser.isExpectContinue())
+
+    def testIncremental(self):
+        parser = RequestParser()
+        data = b'\r\nPOST /p HTTP/1.0\r\nConnection: Keep-Alive\r\nContent-Length: 5\r\n\r\nhelloGET / HTTP/1.1\r\n\r\n'
+        for k in range(len(data)):
+            rest = parser.feed(data[k:k + 1])
+            if rest is not None: break
+        self.assertEqual(b'', rest)
+        self.assertEqual('POST', parser.method)
+        self.assertEqual({'connection': 'Keep-Alive', 'content-length': '5'}, parser.headers)
+        self.assertTrue(parser.isKeepAlive())
+
+        # The content is consumed by the server, the parser is only fed with the next request.
+        self.assertEqual(b'', parser.feed(data[k + 6:]))
+        self.assertEqual(('GET', '/', 'HTTP/1.1', {}), (parser.method, parser.target, parser.version, parser.headers))
+
+    def testFlags(self):
+        parser = RequestParser()
+        parser.feed(b'PUT / HTTP/1.1\nConnection: close\nExpect: 100-Continue\n\n')
+        self.assertFalse(parser.isKeepAlive())
+        self.assertTrue(parser.isExpectContinue())
+        parser.feed(b'GET / HTTP/1.0\r\n\r\n')
+        self.assertFalse(parser.isKeepAlive())
+
+    def testInvalid(self):
+        for data in (b'GET /\r\n\r\n', b'GET / HTTP/2.0\r\n\r\n', b'GET / HTTP/1.1\r\n Host: x\r\n\r\n',
+                     b'GET / HTTP/1.1\r\nHost : x\r\n\r\n', b'GET / HTTP/1.1\r\nHost\r\n\r\n'):
+            self.assertRaises(ValueError, RequestParser().feed, data)
+
+        parser = RequestParser(100)
+        self.assertIsNone(parser.feed(b'GET / HTTP/1.1\r\n'))
+        self.assertRaises(ValueError, parser.feed, b'X-Long: ' + b'x' * 100)
+        self.assertRaises(TypeError, HeadParser)
+
+    def testResponse(self):
+        parser = ResponseParser()
+        self.assertIsNone(parser.feed(b'HTTP/1.1 404 Not Found\r\nContent-Length: 3\r\n'))
+        self.assertEqual(b'abc', parser.feed(b'\r\nabc'))
+        self.assertEqual((404, 'Not Found', {'content-length': '3'}), (parser.code, parser.status, parser.headers))
+        self.assertTrue(parser.isKeepAlive())
+        self.assertTrue(parser.hasContent('GET'))
+        self.assertFalse(parser.hasContent('HEAD'))
+
+        parser.feed(b'HTTP/1.0 304\r\n\r\n')
+        self.assertEqual((304, ''), (parser.code, parser.status))
+        self.assertFalse(parser.hasContent('GET'))
+        self.assertFalse(parser.isKeepAlive())
+        self.assertRaises(ValueError, ResponseParser().feed, b'HTTP/1.1 20 OK\r\n\r\n')
+
+    def testContent(self):
+        content = ContentParser({'content-length': '5'})
+        self.assertEqual(3, content.feed(b'hel'))
+        self.assertEqual(2, content.feed(b'loGET'))
+        self.assertTrue(content.isComplete)
+
+        self.assertTrue(ContentParser({}).isComplete)
+        self.assertTrue(ContentParser({'content-length': '5'}, hasContent=False).isComplete)
+        content = ContentParser({}, untilClose=True)
+        self.assertTrue(content.isUntilClose())
+        self.assertEqual(3, content.feed(b'abc'))
+        self.assertFalse(content.isComplete)
+        self.assertRaises(ValueError, ContentParser, {'content-length': '-1'})
+
+    def testContentChunked(self):
+        data = b'5;ext=1\r\nhello\r\n10\r\n' + b'x' * 16 + b'\r\n0\r\nX-Trailer: 1\r\n\r\nHTTP/1.1'
+        for size in (1, 3, len(data)):
+            content, consumed = ContentParser({'transfer-encoding': 'gzip, chunked'}), 0
+            for k in range(0, len(data), size):
+                self.assertFalse(content.isComplete)
+                consumed += content.feed(data[k:k + size])
+                if content.isComplete: break
+            self.assertTrue(content.isComplete)
+            self.assertEqual(len(data) - len(b'HTTP/1.1'), consumed)
+
+        self.assertRaises(ValueError, ContentParser({'transfer-encoding': 'chunked'}).feed, b'z\r\n')
+        self.assertRaises(ValueError, ContentParser({'transfer-encoding': 'chunked'}).feed, b'1\r\nab\r\n')
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
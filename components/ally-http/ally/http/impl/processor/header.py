@@ -117,7 +117,9 @@ class DecoderHeader(IDecoderHeader):
         assert parameters is None or isinstance(parameters, list), 'Invalid parameters %s' % parameters
 
         self.handler = handler
-        self.headers = {hname.lower():hvalue for hname, hvalue in headers.items()}
+        # The servers provide the header names in lower case so there is no need to normalize them again.
+        if all(hname.islower() for hname in headers): self.headers = headers
+        else: self.headers = {hname.lower():hvalue for hname, hvalue in headers.items()}
         self.parameters = parameters
         if parameters: self.parametersUsed = {}
 
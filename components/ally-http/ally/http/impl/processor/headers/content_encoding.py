@@ -0,0 +1,192 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides the response content compression based on the accept encoding HTTP request header.
+'''
+
+from ally.container.ioc import injected
+from ally.design.context import Context, requires, optional
+from ally.design.processor import HandlerProcessorProceed
+from ally.http.spec.server import IEncoderHeader, IDecoderHeader
+from ally.support.util_io import IInputStream, IClosable
+from collections import Iterable
+import zlib
+
+# --------------------------------------------------------------------
+
+ENCODING_GZIP = 'gzip'
+# The gzip content encoding name.
+ENCODING_DEFLATE = 'deflate'
+# The deflate content encoding name.
+ENCODING_IDENTITY = 'identity'
+# The identity (no encoding) content encoding name.
+
+ENCODINGS = {ENCODING_GZIP: 16 + zlib.MAX_WBITS, ENCODING_DEFLATE: zlib.MAX_WBITS}
+# The zlib window bits used for the known content encodings.
+
+# --------------------------------------------------------------------
+
+class Request(Context):
+    '''
+    The request context.
+    '''
+    # ---------------------------------------------------------------- Required
+    decoderHeader = requires(IDecoderHeader)
+
+class Response(Context):
+    '''
+    The response context.
+    '''
+    # ---------------------------------------------------------------- Required
+    encoderHeader = requires(IEncoderHeader)
+    # ---------------------------------------------------------------- Optional
+    headers = optional(dict)
+
+class ResponseContent(Context):
+    '''
+    The response content context.
+    '''
+    # ---------------------------------------------------------------- Optional
+    source = optional(IInputStream, Iterable)
+    type = optional(str)
+    length = optional(int)
+
+# --------------------------------------------------------------------
+
+@injected
+class ContentEncodingEncodeHandler(HandlerProcessorProceed):
+    '''
+    Implementation for a processor that compresses the response content based on the accept encoding HTTP request
+    header and provides the encoding of content encoding HTTP response header.
+    '''
+
+    nameAcceptEncoding = 'Accept-Encoding'
+    # The header name where the accepted encodings are specified.
+    nameContentEncoding = 'Content-Encoding'
+    # The header name where the content encoding is specified.
+    nameVary = 'Vary'
+    # The header name where the request headers that vary the response are specified.
+    attrQuality = 'q'
+    # The name of the accept encoding attribute where the quality is provided.
+    encodings = [ENCODING_GZIP, ENCODING_DEFLATE]
+    # The content encodings to use in the order of preference.
+    contentTypes = ['text/json', 'application/json', 'text/xml', 'application/xml', 'text/plain', 'text/html',
+                    'text/css', 'text/javascript', 'application/javascript', 'text/yaml', 'application/x-yaml']
+    # The content types to be compressed, other content types (like images or archives) are already compressed.
+    minimumSize = 1024
+    # The minimum content length in bytes for the content to be compressed, applied only if the length is known.
+    level = 6
+    # The zlib compression level.
+    bufferSize = 8192
+    # The buffer size used in reading the content source streams.
+
+    def __init__(self):
+        assert isinstance(self.nameAcceptEncoding, str), 'Invalid accept encoding name %s' % self.nameAcceptEncoding
+        assert isinstance(self.nameContentEncoding, str), \
+        'Invalid content encoding name %s' % self.nameContentEncoding
+        assert isinstance(self.nameVary, str), 'Invalid vary name %s' % self.nameVary
+        assert isinstance(self.attrQuality, str), 'Invalid quality attribute name %s' % self.attrQuality
+        assert isinstance(self.encodings, list), 'Invalid encodings %s' % self.encodings
+        assert isinstance(self.contentTypes, list), 'Invalid content types %s' % self.contentTypes
+        assert isinstance(self.minimumSize, int), 'Invalid minimum size %s' % self.minimumSize
+        assert isinstance(self.level, int), 'Invalid compression level %s' % self.level
+        assert isinstance(self.bufferSize, int), 'Invalid buffer size %s' % self.bufferSize
+        if __debug__:
+            for encoding in self.encodings: assert encoding in ENCODINGS, 'Unknown encoding %s' % encoding
+        super().__init__()
+
+        self._contentTypes = frozenset(self.contentTypes)
+
+    def process(self, request:Request, response:Response, responseCnt:ResponseContent, **keyargs):
+        '''
+        @see: HandlerProcessorProceed.process
+
+        Compresses the response content.
+        '''
+        assert isinstance(request, Request), 'Invalid request %s' % request
+        assert isinstance(response, Response), 'Invalid response %s' % response
+        assert isinstance(responseCnt, ResponseContent), 'Invalid response content %s' % responseCnt
+        assert isinstance(request.decoderHeader, IDecoderHeader), \
+        'Invalid header decoder %s' % request.decoderHeader
+        assert isinstance(response.encoderHeader, IEncoderHeader), \
+        'Invalid header encoder %s' % response.encoderHeader
+
+        if ResponseContent.source not in responseCnt: return  # There is no content to compress
+        if responseCnt.type not in self._contentTypes: return  # The content is not compressible
+        if Response.headers in response and self.nameContentEncoding in response.headers: return  # Already encoded
+
+        response.encoderHeader.encode(self.nameVary, self.nameAcceptEncoding)
+        if ResponseContent.length in responseCnt and responseCnt.length < self.minimumSize: return
+
+        encoding = self.negotiate(request.decoderHeader.decode(self.nameAcceptEncoding))
+        if encoding is None: return
+
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, ENCODINGS[encoding])
+        if isinstance(responseCnt.source, tuple):
+            # The content is already in memory so we compress it at once in order to preserve the content length.
+            content = b''.join(compressor.compress(bytes) for bytes in responseCnt.source) + compressor.flush()
+            responseCnt.source = (content,)
+            responseCnt.length = len(content)
+        else:
+            responseCnt.source = self.compress(responseCnt.source, compressor)
+            responseCnt.length = None
+
+        response.encoderHeader.encode(self.nameContentEncoding, encoding)
+
+    # ----------------------------------------------------------------
+
+    def negotiate(self, accepted):
+        '''
+        Negotiates the content encoding to use.
+
+        @param accepted: list[tuple(string, dictionary{string, string})]|None
+            The decoded accept encoding header.
+        @return: string|None
+            The content encoding to use, None if the content should not be encoded.
+        '''
+        if not accepted: return
+
+        qualities = {}
+        for value, attributes in accepted:
+            try: quality = float(attributes.get(self.attrQuality) or 1)
+            except ValueError: quality = 0
+            qualities[value.lower()] = quality
+
+        encoding, encodingQuality = None, 0
+        for name in self.encodings:
+            quality = qualities.get(name, qualities.get('*', 0))
+            if quality > encodingQuality: encoding, encodingQuality = name, quality
+        if encoding and qualities.get(ENCODING_IDENTITY, 0) > encodingQuality: return
+        return encoding
+
+    def compress(self, source, compressor):
+        '''
+        Generator that compresses the provided source.
+
+        @param source: IInputStream|Iterable(bytes)
+            The source to compress.
+        @param compressor: zlib compressor
+            The compressor to use.
+        @return: Iterable(bytes)
+            The compressed source.
+        '''
+        if isinstance(source, IInputStream):
+            assert isinstance(source, IInputStream)
+            try:
+                while True:
+                    block = source.read(self.bufferSize)
+                    if not block: break
+                    block = compressor.compress(block)
+                    if block: yield block
+            finally:
+                if isinstance(source, IClosable): source.close()
+        else:
+            for block in source:
+                block = compressor.compress(block)
+                if block: yield block
+        yield compressor.flush()
@@ -0,0 +1,142 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides the entity tag HTTP response header and the conditional GET based on the if none match HTTP request header.
+'''
+
+from ally.container.ioc import injected
+from ally.design.context import Context, requires, optional, defines
+from ally.design.processor import HandlerProcessorProceed
+from ally.http.spec.codes import NOT_MODIFIED
+from ally.http.spec.server import IEncoderHeader, IDecoderHeader, METHOD_GET
+from ally.support.util_io import IInputStream
+from collections import Iterable
+from hashlib import sha1
+from itertools import chain
+
+# --------------------------------------------------------------------
+
+class Request(Context):
+    '''
+    The request context.
+    '''
+    # ---------------------------------------------------------------- Required
+    methodName = requires(str)
+    decoderHeader = requires(IDecoderHeader)
+
+class Response(Context):
+    '''
+    The response context.
+    '''
+    # ---------------------------------------------------------------- Defined
+    code = defines(int)
+    isSuccess = defines(bool)
+    text = defines(str)
+    # ---------------------------------------------------------------- Required
+    encoderHeader = requires(IEncoderHeader)
+    # ---------------------------------------------------------------- Optional
+    headers = optional(dict)
+
+class ResponseContent(Context):
+    '''
+    The response content context.
+    '''
+    # ---------------------------------------------------------------- Optional
+    source = optional(IInputStream, Iterable)
+    length = optional(int)
+
+# --------------------------------------------------------------------
+
+@injected
+class ETagEncodeHandler(HandlerProcessorProceed):
+    '''
+    Implementation for a processor that provides the encoding of the entity tag HTTP response header as a strong hash
+    of the response content and responds with not modified if the entity tag matches the if none match HTTP request
+    header.
+    '''
+
+    nameETag = 'ETag'
+    # The header name for the entity tag.
+    nameIfNoneMatch = 'If-None-Match'
+    # The header name for the entity tags that the client already has.
+    hashLimit = 65536
+    # The maximum content size in bytes that is hashed for streamed content, the streamed content is gathered while
+    # hashing since the entity tag needs to be placed in the headers before the content.
+
+    def __init__(self):
+        assert isinstance(self.nameETag, str), 'Invalid entity tag name %s' % self.nameETag
+        assert isinstance(self.nameIfNoneMatch, str), 'Invalid if none match name %s' % self.nameIfNoneMatch
+        assert isinstance(self.hashLimit, int), 'Invalid hash limit %s' % self.hashLimit
+        super().__init__()
+
+    def process(self, request:Request, response:Response, responseCnt:ResponseContent, **keyargs):
+        '''
+        @see: HandlerProcessorProceed.process
+
+        Encodes the entity tag and checks the conditional GET.
+        '''
+        assert isinstance(request, Request), 'Invalid request %s' % request
+        assert isinstance(response, Response), 'Invalid response %s' % response
+        assert isinstance(responseCnt, ResponseContent), 'Invalid response content %s' % responseCnt
+        assert isinstance(request.decoderHeader, IDecoderHeader), \
+        'Invalid header decoder %s' % request.decoderHeader
+        assert isinstance(response.encoderHeader, IEncoderHeader), \
+        'Invalid header encoder %s' % response.encoderHeader
+
+        if request.methodName != METHOD_GET or response.isSuccess is False: return
+        if Response.headers in response and self.nameETag in response.headers: return  # Already has an entity tag
+        if ResponseContent.source not in responseCnt or isinstance(responseCnt.source, IInputStream): return
+
+        hashContent = sha1()
+        if isinstance(responseCnt.source, tuple):
+            for bytes in responseCnt.source: hashContent.update(bytes)
+        else:
+            source, chunks, size = iter(responseCnt.source), [], 0
+            for bytes in source:
+                hashContent.update(bytes)
+                chunks.append(bytes)
+                size += len(bytes)
+                if size > self.hashLimit:
+                    # The content is to large to be gathered so we just stream it without an entity tag.
+                    responseCnt.source = chain(chunks, source)
+                    return
+            responseCnt.source = tuple(chunks)
+            responseCnt.length = size
+
+        etag = '"%s"' % hashContent.hexdigest()
+        response.encoderHeader.encode(self.nameETag, etag)
+        if isNoneMatch(etag, request.decoderHeader.retrieve(self.nameIfNoneMatch)):
+            response.code, response.isSuccess = NOT_MODIFIED
+            response.text = 'Not modified'
+            responseCnt.source = responseCnt.length = None
+
+# --------------------------------------------------------------------
+
+def isNoneMatch(etag, value):
+    '''
+    Checks if the provided entity tag is found in the if none match header value, the comparison is a weak comparison
+    as required for the if none match header.
+
+    @param etag: string
+        The entity tag to check.
+    @param value: string|None
+        The if none match raw header value.
+    @return: boolean
+        True if the entity tag is matched by the header value, False otherwise.
+    '''
+    assert isinstance(etag, str), 'Invalid entity tag %s' % etag
+    if not value: return False
+    assert isinstance(value, str), 'Invalid if none match value %s' % value
+
+    if etag.startswith('W/'): etag = etag[2:]
+    for tag in value.split(','):
+        tag = tag.strip()
+        if tag == '*': return True
+        if tag.startswith('W/'): tag = tag[2:]
+        if tag == etag: return True
+    return False
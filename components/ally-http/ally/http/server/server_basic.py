@@ -11,12 +11,16 @@ thread serving requests one at a time).
 '''
 
 from ally.design.processor import Processing, Assembly, ONLY_AVAILABLE, \
-    CREATE_REPORT, Chain
+    CREATE_REPORT, INSTRUMENT, Chain
 from ally.http.spec.server import METHOD_GET, METHOD_DELETE, METHOD_POST, \
     METHOD_PUT, METHOD_OPTIONS, RequestHTTP, ResponseHTTP, RequestContentHTTP, \
     ResponseContentHTTP
-from ally.support.util_io import readGenerator, IInputStream
+from ally.http.support.admission import AdmissionController
+from ally.http.support.parser import RequestParser
+from ally.support.util_io import readGenerator, IInputStream, InputStreamFile
 from http.server import HTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+from time import sleep
 from urllib.parse import urlparse, parse_qsl
 import logging
 import re
@@ -47,6 +51,30 @@ class RequestHandler(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
         self._process(METHOD_OPTIONS)
 
+    def parse_request(self):
+        '''
+        @see: BaseHTTPRequestHandler.parse_request
+        
+        Parses the request head using the request parser instead of the email headers parser.
+        '''
+        self.command, self.request_version, self.close_connection = None, 'HTTP/1.0', True
+        self.requestline = str(self.raw_requestline, 'latin-1').rstrip('\r\n')
+
+        parser, data = RequestParser(), self.raw_requestline
+        try:
+            while parser.feed(data) is None:
+                data = self.rfile.readline(65537)
+                if not data: raise ValueError('Incomplete request')
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return False
+
+        self.command, self.path, self.request_version = parser.method, parser.target, parser.version
+        self.headers = parser.headers
+        self.close_connection = self.protocol_version < 'HTTP/1.1' or not parser.isKeepAlive()
+        if parser.isExpectContinue() and self.protocol_version >= 'HTTP/1.1': return self.handle_expect_100()
+        return True
+
     # ----------------------------------------------------------------
 
     def _process(self, method):
@@ -75,11 +103,22 @@ class RequestHandler(BaseHTTPRequestHandler):
             self.end_headers()
             return
 
+        admission = self.server.admission
+        if admission is not None:
+            assert isinstance(admission, AdmissionController), 'Invalid admission %s' % admission
+            if not admission.admit(regex.pattern):
+                self.send_response(503)
+                for name, value in admission.headers().items(): self.send_header(name, value)
+                self.end_headers()
+                return
+
         req.methodName = method
-        req.headers = dict(self.headers)
+        req.headers = self.headers
         reqCnt.source = self.rfile
 
-        Chain(processing).process(request=req, requestCnt=reqCnt, response=rsp, responseCnt=rspCnt).doAll()
+        try: Chain(processing).process(request=req, requestCnt=reqCnt, response=rsp, responseCnt=rspCnt).doAll()
+        finally:
+            if admission is not None: admission.release(regex.pattern)
 
         assert isinstance(rsp.code, int), 'Invalid response code %s' % rsp.code
         if ResponseHTTP.headers in rsp:
@@ -90,7 +129,11 @@ class RequestHandler(BaseHTTPRequestHandler):
 
         self.end_headers()
 
-        if rspCnt.source is not None:
+        if isinstance(rspCnt.source, InputStreamFile):
+            self.wfile.flush()
+            with rspCnt.source as source:
+                while source.sendTo(self.connection): pass
+        elif rspCnt.source is not None:
             if isinstance(rspCnt.source, IInputStream): source = readGenerator(rspCnt.source)
             else: source = rspCnt.source
 
@@ -111,7 +154,7 @@ class BasicServer(HTTPServer):
     The basic server.
     '''
     
-    def __init__(self, serverAddress, pathProcessing, requestHandlerFactory):
+    def __init__(self, serverAddress, pathProcessing, requestHandlerFactory, admission=None):
         '''
         Construct the server.
         
@@ -123,40 +166,86 @@ class BasicServer(HTTPServer):
         @param requestHandlerFactory: callable(AsyncServer, socket, tuple(string, integer))
             The factory that provides request handlers, takes as arguments the server, request socket
             and client address.
+        @param admission: AdmissionController|None
+            The admission controller for the requests, None for no admission control.
         '''
         assert isinstance(serverAddress, tuple), 'Invalid server address %s' % serverAddress
         assert isinstance(pathProcessing, list), 'Invalid path processing %s' % pathProcessing
         assert callable(requestHandlerFactory), 'Invalid request handler factory %s' % requestHandlerFactory
+        assert admission is None or isinstance(admission, AdmissionController), 'Invalid admission %s' % admission
         super().__init__(serverAddress, requestHandlerFactory)
         
         self.pathProcessing = pathProcessing
+        self.admission = admission
 
 # --------------------------------------------------------------------
 
-def run(pathAssemblies, server_version, host='', port=80):
+def reportInstrument(pathProcessing, interval=0):
+    '''
+    Logs the instrument reports for the instrumented path processing, the reports are logged right away (together with
+    the assembly reports) and then periodically while the process is running.
+    
+    @param pathProcessing: list[(regex, Processing)]
+        The instrumented path processing to log the reports for.
+    @param interval: integer|float
+        The number of seconds between the logged reports, 0 means that the reports are not logged periodically.
+    @return: callable()
+        The function that logs the instrument reports on demand, like when the server stops.
+    '''
+    assert isinstance(pathProcessing, list), 'Invalid path processing %s' % pathProcessing
+    assert isinstance(interval, (int, float)) and interval >= 0, 'Invalid interval %s' % interval
+
+    def logReports():
+        for regex, processing in pathProcessing:
+            assert isinstance(processing, Processing), 'Invalid processing %s' % processing
+            log.info('Instrument report for pattern \'%s\':\n%s', regex.pattern, processing.instrument.report())
+
+    def logPeriodically():
+        while True:
+            sleep(interval)
+            logReports()
+
+    logReports()
+    if interval:
+        thread = Thread(name='Instrument report thread', target=logPeriodically)
+        thread.daemon = True
+        thread.start()
+    return logReports
+
+def run(pathAssemblies, server_version, host='', port=80, instrument=False, admission=None, instrumentInterval=0):
     '''
     Run the basic server.
     
     @param pathAssemblies: list[(regex, Assembly)]
         A list that contains tuples having on the first position a string pattern for matching a path, and as a value 
         the assembly to be used for creating the context for handling the request for the path.
+    @param instrument: boolean
+        If True the processors latency is instrumented, the instrument reports are logged together with the assembly
+        reports, periodically while the server is running and when the server stops.
+    @param admission: AdmissionController|None
+        The admission controller for the requests, None for no admission control.
+    @param instrumentInterval: integer|float
+        The number of seconds between the instrument reports logged while the server is running, 0 means that the
+        reports are logged only when the server starts and stops.
     '''
     assert isinstance(pathAssemblies, list), 'Invalid path assemblies %s' % pathAssemblies
+    assert isinstance(instrument, bool), 'Invalid instrument flag %s' % instrument
     RequestHandler.server_version = server_version
     pathProcessing = []
     for pattern, assembly in pathAssemblies:
         assert isinstance(pattern, str), 'Invalid pattern %s' % pattern
         assert isinstance(assembly, Assembly), 'Invalid assembly %s' % assembly
 
-        processing, report = assembly.create(ONLY_AVAILABLE, CREATE_REPORT,
+        processing, report = assembly.create(ONLY_AVAILABLE, CREATE_REPORT, INSTRUMENT if instrument else 0,
                                              request=RequestHTTP, requestCnt=RequestContentHTTP,
                                              response=ResponseHTTP, responseCnt=ResponseContentHTTP)
 
         log.info('Assembly report for pattern \'%s\':\n%s', pattern, report)
         pathProcessing.append((re.compile(pattern), processing))
+    if instrument: logInstrument = reportInstrument(pathProcessing, instrumentInterval)
     
     try:
-        server = BasicServer((host, port), pathProcessing, RequestHandler)
+        server = BasicServer((host, port), pathProcessing, RequestHandler, admission)
         print('=' * 50, 'Started HTTP server...')
         server.serve_forever()
     except KeyboardInterrupt:
@@ -166,3 +255,5 @@ def run(pathAssemblies, server_version, host='', port=80):
         log.exception('=' * 50 + ' The server has stooped')
         try: server.server_close()
         except: pass
+
+    if instrument: logInstrument()
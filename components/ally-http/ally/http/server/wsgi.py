@@ -14,7 +14,8 @@ from ally.design.processor import Processing, Assembly, ONLY_AVAILABLE, \
     CREATE_REPORT, Chain
 from ally.http.spec.server import RequestHTTP, ResponseHTTP, RequestContentHTTP, \
     ResponseContentHTTP, METHODS, METHOD_UNKNOWN
-from ally.support.util_io import IInputStream, readGenerator
+from ally.http.support.admission import AdmissionController
+from ally.support.util_io import IInputStream, InputStreamFile, readGenerator
 from urllib.parse import parse_qsl
 import logging
 import re
@@ -36,6 +37,9 @@ class RequestHandler:
     # the assembly to be used for creating the context for handling the request for the path.
     serverVersion = str
     # The server version name
+    admission = None
+    # The admission controller for the requests, None for no admission control, since the WSGI server provides the
+    # workers the time that a request waits for a worker is not known so only the requests limits are applied.
     headerPrefix = 'HTTP_'
     # The prefix used in the WSGI context for the headers.
     headers = {'CONTENT_TYPE', 'CONTENT_LENGTH'}
@@ -116,6 +120,8 @@ class RequestHandler:
         assert isinstance(self.headerPrefix, str), 'Invalid header prefix %s' % self.headerPrefix
         assert isinstance(self.headers, set), 'Invalid headers %s' % self.headers
         assert isinstance(self.responses, dict), 'Invalid responses %s' % self.responses
+        assert self.admission is None or isinstance(self.admission, AdmissionController), \
+        'Invalid admission %s' % self.admission
 
         pathProcessing = []
         for pattern, assembly in self.pathAssemblies:
@@ -163,6 +169,14 @@ class RequestHandler:
             respond('404 Not Found', list(responseHeaders.items()))
             return ()
 
+        admission = self.admission
+        if admission is not None:
+            assert isinstance(admission, AdmissionController), 'Invalid admission %s' % admission
+            if not admission.admit(regex.pattern):
+                responseHeaders.update(admission.headers())
+                respond('503 %s' % self.responses[503][0], list(responseHeaders.items()))
+                return ()
+
         method = context['REQUEST_METHOD']
         if method:
             method = method.upper()
@@ -178,7 +192,9 @@ class RequestHandler:
                             for hname, hvalue in context.items() if hname in self.headers})
         reqCnt.source = context.get('wsgi.input')
 
-        Chain(processing).process(request=req, requestCnt=reqCnt, response=rsp, responseCnt=rspCnt).doAll()
+        try: Chain(processing).process(request=req, requestCnt=reqCnt, response=rsp, responseCnt=rspCnt).doAll()
+        finally:
+            if admission is not None: admission.release(regex.pattern)
 
         assert isinstance(rsp.code, int), 'Invalid response code %s' % rsp.code
 
@@ -192,6 +208,9 @@ class RequestHandler:
         respond(status, list(responseHeaders.items()))
 
         if rspCnt.source is not None:
+            if isinstance(rspCnt.source, InputStreamFile) and 'wsgi.file_wrapper' in context:
+                # The WSGI server can send the file content in an optimized manner.
+                return context['wsgi.file_wrapper'](rspCnt.source.fileObj, InputStreamFile.bufferSize)
             if isinstance(rspCnt.source, IInputStream): return readGenerator(rspCnt.source)
             return rspCnt.source
         return ()
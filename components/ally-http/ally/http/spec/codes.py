@@ -15,4 +15,5 @@ INTERNAL_ERROR = (500, False) # HTTP code 500 Internal Server Error
 INVALID_REQUEST = (400, False)  # HTTP code 400 Bad Request
 INVALID_HEADER_VALUE = (400, False) # HTTP code 400 Bad Request
 PATH_NOT_FOUND = (404, False)  # HTTP code 404 Not Found
+NOT_MODIFIED = (304, True)  # HTTP code 304 Not Modified
 
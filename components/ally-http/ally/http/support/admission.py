@@ -0,0 +1,125 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides the admission control for the requests processed by the servers.
+'''
+
+from threading import Lock
+from time import time
+
+# --------------------------------------------------------------------
+
+class AdmissionController:
+    '''
+    Provides the admission control for the requests, the servers reject with 503 Service Unavailable and a Retry-After
+    header the requests that exceed the limits before any processor runs. The requests are limited by the total number
+    of requests in processing, by the number of requests in processing for each path pattern and by the time that a
+    request waits for a worker. In order to shed the expensive requests first (like the REST resources) while the cheap
+    requests (like the content delivery) are still served use a path pattern limit lower than the total limit.
+    '''
+    __slots__ = ('maximum', 'maximumAge', 'limits', 'retryAfter', '_lock', '_total', '_counts', 'rejected')
+
+    def __init__(self, maximum=0, maximumAge=0, limits=None, retryAfter=1):
+        '''
+        Construct the admission controller.
+
+        @param maximum: integer
+            The maximum number of requests in processing, including the requests waiting for a worker, 0 for no limit.
+        @param maximumAge: integer|float
+            The maximum number of seconds that a request can wait for a worker before its processing starts, 0 for
+            no limit.
+        @param limits: dictionary{string: integer}|None
+            The maximum number of requests in processing for a path pattern, the patterns are the ones used in the
+            path assemblies.
+        @param retryAfter: integer
+            The number of seconds the clients are advised to wait before retrying a rejected request.
+        '''
+        assert isinstance(maximum, int) and maximum >= 0, 'Invalid maximum %s' % maximum
+        assert isinstance(maximumAge, (int, float)) and maximumAge >= 0, 'Invalid maximum age %s' % maximumAge
+        assert limits is None or isinstance(limits, dict), 'Invalid limits %s' % limits
+        assert isinstance(retryAfter, int), 'Invalid retry after %s' % retryAfter
+        if __debug__ and limits:
+            for pattern, limit in limits.items():
+                assert isinstance(pattern, str), 'Invalid pattern %s' % pattern
+                assert isinstance(limit, int) and limit > 0, 'Invalid limit %s for pattern %s' % (limit, pattern)
+
+        self.maximum = maximum
+        self.maximumAge = maximumAge
+        self.limits = limits or {}
+        self.retryAfter = retryAfter
+
+        self._lock = Lock()
+        self._total = 0
+        self._counts = {}
+        self.rejected = 0
+
+    def admit(self, pattern):
+        '''
+        Admits a request for processing, an admitted request needs to be released when its processing is finalized.
+
+        @param pattern: string
+            The path pattern matched by the request.
+        @return: boolean
+            True if the request is admitted, False if the request should be rejected.
+        '''
+        assert isinstance(pattern, str), 'Invalid pattern %s' % pattern
+        limit = self.limits.get(pattern)
+        with self._lock:
+            count = self._counts.get(pattern, 0)
+            if (self.maximum and self._total >= self.maximum) or (limit and count >= limit):
+                self.rejected += 1
+                return False
+            self._total += 1
+            self._counts[pattern] = count + 1
+        return True
+
+    def release(self, pattern):
+        '''
+        Releases an admitted request.
+
+        @param pattern: string
+            The path pattern used for admitting the request.
+        '''
+        assert isinstance(pattern, str), 'Invalid pattern %s' % pattern
+        with self._lock:
+            assert self._counts.get(pattern), 'No request admitted for pattern %s' % pattern
+            self._total -= 1
+            self._counts[pattern] -= 1
+
+    def isExpired(self, received):
+        '''
+        Checks if a request has waited too long for a worker, an expired request is counted as rejected but it still
+        needs to be released.
+
+        @param received: float
+            The time in seconds when the request has been received.
+        @return: boolean
+            True if the request should be rejected, False otherwise.
+        '''
+        assert isinstance(received, float), 'Invalid received time %s' % received
+        if not self.maximumAge or time() - received <= self.maximumAge: return False
+        with self._lock: self.rejected += 1
+        return True
+
+    def headers(self):
+        '''
+        Provides the headers for the rejected requests response.
+
+        @return: dictionary{string: string}
+            The response headers.
+        '''
+        return {'Retry-After': str(self.retryAfter)}
+
+    def statistics(self):
+        '''
+        Provides the admission statistics.
+
+        @return: dictionary{string: integer|dictionary{string: integer}}
+            The admission statistics.
+        '''
+        with self._lock: return dict(total=self._total, patterns=dict(self._counts), rejected=self.rejected)
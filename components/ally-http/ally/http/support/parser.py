@@ -0,0 +1,314 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides the HTTP/1.x request and response head parsers that work directly on the received bytes.
+'''
+
+import abc
+
+# --------------------------------------------------------------------
+
+VERSIONS = frozenset(('HTTP/1.0', 'HTTP/1.1'))
+# The supported HTTP versions.
+CHUNK_SIZE, CHUNK_DATA, CHUNK_END, CHUNK_TRAILER = 1, 2, 3, 4
+# The chunked content states, expecting the chunk size line, the chunk data, the chunk data line end and the trailer.
+
+# --------------------------------------------------------------------
+
+class HeadParser(metaclass=abc.ABCMeta):
+    '''
+    Incremental parser for the HTTP/1.x message head, the data is fed as it is received from the connection and once
+    the head is complete the start line and the headers are parsed in one go. The header names are provided in
+    lower case and the headers that are provided multiple times are joined using ','.
+    '''
+    __slots__ = ('maximumSize', 'version', 'headers', '_buffer')
+
+    def __init__(self, maximumSize=102400):
+        '''
+        Construct the head parser.
+
+        @param maximumSize: integer
+            The maximum size in bytes for the message head.
+        '''
+        assert isinstance(maximumSize, int), 'Invalid maximum size %s' % maximumSize
+        self.maximumSize = maximumSize
+
+        self.version = self.headers = None
+        self._buffer = b''
+
+    def feed(self, data):
+        '''
+        Feeds the data received for the message, after the message head has been parsed the parser can be used for
+        the next message.
+
+        @param data: bytes
+            The received data.
+        @return: bytes|None
+            None if the message head is not complete yet, otherwise the data that follows the message head, this is
+            either message content or the next pipelined message.
+        @raise ValueError: If the message head is not a valid HTTP/1.x message head.
+        '''
+        assert isinstance(data, (bytes, bytearray)), 'Invalid data %s' % data
+
+        if self._buffer: data = self._buffer + data
+        else: data = data.lstrip(b'\r\n')  # The empty lines before the request line are ignored.
+
+        start = max(len(self._buffer) - 3, 0)
+        index = data.find(b'\r\n\r\n', start)
+        if index >= 0: end, separator = index + 4, '\r\n'
+        else:
+            index = data.find(b'\n\n', start)
+            if index >= 0: end, separator = index + 2, '\n'
+
+        if index < 0:
+            if len(data) > self.maximumSize: raise ValueError('Request to long')
+            self._buffer = bytes(data)
+            return
+        if index > self.maximumSize: raise ValueError('Request to long')
+
+        self._buffer = b''
+        self.parse(data[:index].decode('latin-1').split(separator))
+        return data[end:]
+
+    @abc.abstractmethod
+    def parse(self, lines):
+        '''
+        Parses the message head lines.
+
+        @param lines: list[string]
+            The start line followed by the header lines.
+        @raise ValueError: If the message head is not a valid HTTP/1.x message head.
+        '''
+
+    def parseHeaders(self, lines):
+        '''
+        Parses the header lines.
+
+        @param lines: list[string]
+            The start line followed by the header lines, the start line is ignored.
+        @return: dictionary{string: string}
+            The headers indexed by the lower case name.
+        @raise ValueError: If a header line is not valid.
+        '''
+        assert isinstance(lines, list), 'Invalid lines %s' % lines
+
+        headers, name = {}, None
+        for k in range(1, len(lines)):
+            line = lines[k].rstrip('\r')
+            if not line: continue
+            if line[0] in ' \t':
+                # Obsolete line folding.
+                if name is None: raise ValueError('Bad header folding (%r)' % line)
+                headers[name] += ' ' + line.strip()
+                continue
+
+            name, sep, value = line.partition(':')
+            if not sep or not name or name[-1] in ' \t': raise ValueError('Bad header (%r)' % line)
+            name, value = name.lower(), value.strip()
+            if name in headers: headers[name] += ',' + value
+            else: headers[name] = value
+        return headers
+
+    def isKeepAlive(self):
+        '''
+        Checks if the peer allows the connection to be kept alive after the parsed message.
+
+        @return: boolean
+            True if the connection can be kept alive, False otherwise.
+        '''
+        assert self.headers is not None, 'No request parsed'
+        connection = self.headers.get('connection')
+        if connection: tokens = {token.strip() for token in connection.lower().split(',')}
+        else: tokens = ()
+
+        if self.version == 'HTTP/1.0': return 'keep-alive' in tokens
+        return 'close' not in tokens
+
+class RequestParser(HeadParser):
+    '''
+    Incremental parser for the HTTP/1.x request head.
+    '''
+    __slots__ = ('method', 'target')
+
+    def __init__(self, maximumSize=102400):
+        '''
+        Construct the request parser.
+
+        @param maximumSize: integer
+            The maximum size in bytes for the request head.
+        '''
+        super().__init__(maximumSize)
+        self.method = self.target = None
+
+    def parse(self, lines):
+        '''
+        @see: HeadParser.parse
+        '''
+        assert isinstance(lines, list), 'Invalid lines %s' % lines
+
+        requestLine = lines[0].split()
+        if len(requestLine) != 3: raise ValueError('Bad request syntax (%r)' % lines[0])
+        method, target, version = requestLine
+        if version not in VERSIONS: raise ValueError('Bad request version (%r)' % version)
+
+        self.method, self.target, self.version, self.headers = method.upper(), target, version, self.parseHeaders(lines)
+
+    def isExpectContinue(self):
+        '''
+        Checks if the client waits for a continue response before sending the request content.
+
+        @return: boolean
+            True if a continue response is expected, False otherwise.
+        '''
+        assert self.headers is not None, 'No request parsed'
+        return self.version != 'HTTP/1.0' and self.headers.get('expect', '').lower() == '100-continue'
+
+class ResponseParser(HeadParser):
+    '''
+    Incremental parser for the HTTP/1.x response head.
+    '''
+    __slots__ = ('code', 'status')
+
+    def __init__(self, maximumSize=102400):
+        '''
+        Construct the response parser.
+
+        @param maximumSize: integer
+            The maximum size in bytes for the response head.
+        '''
+        super().__init__(maximumSize)
+        self.code = self.status = None
+
+    def parse(self, lines):
+        '''
+        @see: HeadParser.parse
+        '''
+        assert isinstance(lines, list), 'Invalid lines %s' % lines
+
+        statusLine = lines[0].split(None, 2)
+        if len(statusLine) < 2: raise ValueError('Bad status line (%r)' % lines[0])
+        version, code = statusLine[:2]
+        if version not in VERSIONS: raise ValueError('Bad response version (%r)' % version)
+        if len(code) != 3 or not code.isdigit(): raise ValueError('Bad status code (%r)' % code)
+
+        self.version, self.code, self.headers = version, int(code), self.parseHeaders(lines)
+        self.status = statusLine[2].rstrip('\r') if len(statusLine) > 2 else ''
+
+    def hasContent(self, method):
+        '''
+        Checks if the parsed response has content.
+
+        @param method: string
+            The method of the request that the response is for.
+        @return: boolean
+            True if the response is followed by content, False otherwise.
+        '''
+        assert self.code is not None, 'No response parsed'
+        return method != 'HEAD' and self.code >= 200 and self.code not in (204, 304)
+
+# --------------------------------------------------------------------
+
+class ContentParser:
+    '''
+    Tracks the content that follows a HTTP/1.x message head in order to find where the message ends, the content is
+    not decoded, the chunked content is only followed up to the last chunk and trailer.
+    '''
+    __slots__ = ('isComplete', '_remaining', '_state', '_line')
+
+    maximumLine = 8192
+    # The maximum size in bytes for a chunk size or trailer line.
+
+    def __init__(self, headers, hasContent=True, untilClose=False):
+        '''
+        Construct the content parser.
+
+        @param headers: dictionary{string: string}
+            The message headers with the names in lower case.
+        @param hasContent: boolean
+            Flag indicating that the message can have content.
+        @param untilClose: boolean
+            Flag indicating that a message without a length or a chunked transfer encoding has content until the
+            connection is closed, this is the case of responses, for requests there is no content.
+        @raise ValueError: If the content length is not valid.
+        '''
+        assert isinstance(headers, dict), 'Invalid headers %s' % headers
+        self._state, self._line = None, b''
+
+        transferEncoding = headers.get('transfer-encoding')
+        if not hasContent: self._remaining = 0
+        elif transferEncoding and transferEncoding.rsplit(',', 1)[-1].strip().lower() == 'chunked':
+            self._state, self._remaining = CHUNK_SIZE, 0
+        elif 'content-length' in headers:
+            length = headers['content-length']
+            if not length.isdigit(): raise ValueError('Invalid content length (%r)' % length)
+            self._remaining = int(length)
+        elif untilClose: self._remaining = None
+        else: self._remaining = 0
+
+        self.isComplete = self._state is None and self._remaining == 0
+
+    def isUntilClose(self):
+        '''
+        Checks if the content ends only when the connection is closed.
+
+        @return: boolean
+            True if the content ends with the connection, False otherwise.
+        '''
+        return self._remaining is None
+
+    def feed(self, data):
+        '''
+        Feeds the data received after the message head.
+
+        @param data: bytes
+            The received data.
+        @return: integer
+            The number of bytes from the data that belong to the content, if the content is complete the remaining
+            bytes are for the next message.
+        @raise ValueError: If the chunked content is not valid.
+        '''
+        assert isinstance(data, (bytes, bytearray)), 'Invalid data %s' % data
+        if self.isComplete: return 0
+        if self._remaining is None: return len(data)
+        if self._state is None:
+            count = min(self._remaining, len(data))
+            self._remaining -= count
+            self.isComplete = self._remaining == 0
+            return count
+
+        index = 0
+        while index < len(data):
+            if self._state == CHUNK_DATA:
+                count = min(self._remaining, len(data) - index)
+                self._remaining -= count
+                index += count
+                if not self._remaining: self._state = CHUNK_END
+                continue
+
+            end = data.find(b'\n', index)
+            if end < 0:
+                self._line += data[index:]
+                if len(self._line) > self.maximumLine: raise ValueError('Chunk line to long')
+                return len(data)
+            line = (self._line + data[index:end]).rstrip(b'\r')
+            self._line, index = b'', end + 1
+
+            if self._state == CHUNK_SIZE:
+                size = line.split(b';', 1)[0].strip()
+                try: self._remaining = int(size, 16)
+                except ValueError: raise ValueError('Invalid chunk size (%r)' % line)
+                if self._remaining < 0: raise ValueError('Invalid chunk size (%r)' % line)
+                if self._remaining: self._state = CHUNK_DATA
+                else: self._state = CHUNK_TRAILER
+            elif self._state == CHUNK_END:
+                if line: raise ValueError('Invalid chunk end (%r)' % line)
+                self._state = CHUNK_SIZE
+            elif not line:
+                self.isComplete = True
+                break
+        return index
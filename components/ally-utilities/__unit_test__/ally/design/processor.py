@@ -0,0 +1,196 @@
+'''
+Created on Oct 18, 2026
+
+@package: utilities
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides testing for the processors chain execution.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.design.context import Context, requires, defines
+from ally.design.processor import HandlerProcessor, HandlerProcessorProceed, \
+    Assembly, Chain, CallProceed, INSTRUMENT, CREATE_REPORT
+from threading import Thread
+import unittest
+
+# --------------------------------------------------------------------
+
+class Data(Context):
+    calls = requires(list)
+
+class DataDefine(Context):
+    calls = defines(list)
+
+# --------------------------------------------------------------------
+
+class DefineHandler(HandlerProcessorProceed):
+
+    def process(self, data:DataDefine, **keyargs):
+        data.calls = []
+
+class ProceedHandler(HandlerProcessorProceed):
+
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+
+    def process(self, data:Data, **keyargs):
+        data.calls.append(self.name)
+
+class StopHandler(HandlerProcessor):
+
+    def __init__(self, name, stop=True):
+        super().__init__()
+        self.name = name
+        self.stop = stop
+
+    def process(self, chain, data:Data, **keyargs):
+        data.calls.append(self.name)
+        if not self.stop: chain.proceed()
+
+class BranchHandler(HandlerProcessor):
+
+    def __init__(self, processing):
+        super().__init__()
+        self.processing = processing
+
+    def process(self, chain, data:Data, **keyargs):
+        data.calls.append('branch')
+        chain.callBack(lambda: data.calls.append('callBack'))
+        chain.branch(self.processing)
+
+class ErrorHandler(HandlerProcessorProceed):
+
+    def process(self, data:Data, **keyargs):
+        raise ValueError('Failed')
+
+class CallBackErrorHandler(HandlerProcessor):
+
+    def process(self, chain, data:Data, **keyargs):
+        chain.callBackError(lambda: data.calls.append('error'))
+        chain.proceed()
+
+# --------------------------------------------------------------------
+
+class TestProcessor(unittest.TestCase):
+
+    def testCompile(self):
+        assembly = Assembly()
+        assembly.add(DefineHandler(), ProceedHandler('a'), ProceedHandler('b'), StopHandler('c', False),
+                     ProceedHandler('d'))
+        processing = assembly.create(data=Data)
+
+        self.assertIsInstance(processing.calls, tuple)
+        self.assertEqual(3, len(processing.calls))
+        self.assertIsInstance(processing.calls[0], CallProceed)
+        self.assertEqual(3, len(processing.calls[0].functions))
+
+        data = processing.contexts['data']()
+        chain = Chain(processing).process(data=data).doAll()
+        self.assertEqual(['a', 'b', 'c', 'd'], data.calls)
+        self.assertTrue(chain.isConsumed())
+
+        data = processing.contexts['data']()
+        chain = Chain(processing).process(data=data).doAll()
+        self.assertEqual(['a', 'b', 'c', 'd'], data.calls)
+
+    def testStop(self):
+        assembly = Assembly()
+        assembly.add(DefineHandler(), ProceedHandler('a'), StopHandler('b'), ProceedHandler('c'))
+        processing = assembly.create(data=Data)
+
+        data = processing.contexts['data']()
+        chain = Chain(processing).process(data=data).doAll()
+        self.assertEqual(['a', 'b'], data.calls)
+        self.assertFalse(chain.isConsumed())
+
+    def testBranchCallBack(self):
+        assemblyBranch = Assembly()
+        assemblyBranch.add(ProceedHandler('x'), ProceedHandler('y'))
+        processingBranch = assemblyBranch.create(data=DataDefine)
+
+        assembly = Assembly()
+        assembly.add(DefineHandler(), ProceedHandler('a'), BranchHandler(processingBranch), ProceedHandler('b'))
+        processing = assembly.create(data=Data)
+
+        data = processing.contexts['data']()
+        chain = Chain(processing).process(data=data).doAll()
+        self.assertEqual(['a', 'branch', 'x', 'y', 'callBack'], data.calls)
+        self.assertTrue(chain.isConsumed())
+
+    def testCallBackError(self):
+        assembly = Assembly()
+        assembly.add(DefineHandler(), CallBackErrorHandler(), ProceedHandler('a'), ErrorHandler(), ProceedHandler('b'))
+        processing = assembly.create(data=Data)
+
+        data = processing.contexts['data']()
+        chain = Chain(processing).process(data=data).doAll()
+        self.assertEqual(['a', 'error'], data.calls)
+        self.assertFalse(chain.isConsumed())
+
+        assembly = Assembly()
+        assembly.add(DefineHandler(), ProceedHandler('a'), ErrorHandler())
+        processing = assembly.create(data=Data)
+
+        data = processing.contexts['data']()
+        self.assertRaises(ValueError, Chain(processing).process(data=data).doAll)
+
+    def testInstrument(self):
+        assembly = Assembly()
+        assembly.add(DefineHandler(), ProceedHandler('a'), StopHandler('b', False), ProceedHandler('c'))
+        processing, report = assembly.create(INSTRUMENT, CREATE_REPORT, data=Data)
+        self.assertIn('instrumented', report)
+        self.assertEqual(3, len(processing.calls))
+
+        for _k in range(5):
+            data = processing.contexts['data']()
+            Chain(processing).process(data=data).doAll()
+            self.assertEqual(['a', 'b', 'c'], data.calls)
+
+        statistics = processing.instrument.statistics()
+        self.assertEqual(3, len(statistics))
+        counts = {lineNumber: count for (_name, _fileName, lineNumber), (count, *_rest) in statistics.items()}
+        self.assertEqual([5, 5, 10], sorted(counts.values()))
+        for count, _total, _minimum, _maximum, histogram in statistics.values(): self.assertEqual(count, sum(histogram))
+        self.assertIn('Instrument report', processing.instrument.report())
+
+        self.assertIsNone(assembly.create(data=Data).instrument)
+
+    def testThreads(self):
+        assemblyBranch = Assembly()
+        assemblyBranch.add(ProceedHandler('x'))
+        processingBranch = assemblyBranch.create(data=DataDefine)
+
+        assembly = Assembly()
+        assembly.add(DefineHandler(), ProceedHandler('a'), StopHandler('b', False), BranchHandler(processingBranch),
+                     ProceedHandler('c'))
+        processing = assembly.create(INSTRUMENT, data=Data)
+
+        failures = []
+        def execute():
+            for _k in range(500):
+                data = processing.contexts['data']()
+                Chain(processing).process(data=data).doAll()
+                if data.calls != ['a', 'b', 'branch', 'x', 'callBack']: failures.append(data.calls)
+
+        threads = [Thread(target=execute) for _k in range(10)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+
+        self.assertEqual([], failures)
+        for count, _total, _minimum, _maximum, histogram in processing.instrument.statistics().values():
+            self.assertEqual(5000, count)
+            self.assertEqual(5000, sum(histogram))
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
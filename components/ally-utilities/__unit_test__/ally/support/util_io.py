@@ -0,0 +1,78 @@
+'''
+Created on Oct 18, 2026
+
+@package: utilities
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Testing for the I/O utility.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.support.util_io import InputStreamFile, IInputStream, IClosable, \
+    readGenerator
+from tempfile import TemporaryFile
+import socket
+import unittest
+
+# --------------------------------------------------------------------
+
+class TestIO(unittest.TestCase):
+
+    def testInputStreamFile(self):
+        content = bytes(range(256)) * 4096
+        with TemporaryFile() as fileObj:
+            fileObj.write(content)
+            fileObj.seek(0)
+
+            stream = InputStreamFile(fileObj)
+            self.assertIsInstance(stream, IInputStream)
+            self.assertIsInstance(stream, IClosable)
+            self.assertEqual(content, b''.join(readGenerator(stream, 10000)))
+            self.assertTrue(fileObj.closed)
+
+    def testInputStreamFileSend(self):
+        content = bytes(range(256)) * 4096
+        with TemporaryFile() as fileObj:
+            fileObj.write(content)
+            fileObj.seek(0)
+            stream = InputStreamFile(fileObj)
+
+            sender, receiver = socket.socketpair()
+            sender.setblocking(False)
+            received = []
+            try:
+                # The socket buffer is smaller than the content so the content is sent in several partial sends.
+                sends = 0
+                while True:
+                    try: sent = stream.sendTo(sender)
+                    except BlockingIOError: sent = None
+                    if sent == 0: break
+                    if sent: sends += 1
+                    while True:
+                        try: data = receiver.recv(65536, socket.MSG_DONTWAIT)
+                        except BlockingIOError: break
+                        received.append(data)
+                sender.close()
+                while True:
+                    data = receiver.recv(65536)
+                    if not data: break
+                    received.append(data)
+            finally:
+                sender.close()
+                receiver.close()
+
+            self.assertTrue(sends > 1)
+            self.assertEqual(content, b''.join(received))
+            self.assertEqual(0, stream.sendTo(sender))
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
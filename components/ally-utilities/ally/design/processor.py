@@ -12,8 +12,11 @@ Module containing the support for a chained processors execution of context type
 from ally.design.context import Context, Attribute, DEFINED, OPTIONAL, \
     ContextMetaClass, REQUIRED
 from ally.support.util_sys import locationStack
+from bisect import bisect_right
 from collections import Iterable, deque
 from inspect import isclass, isfunction, getfullargspec, ismethod
+from threading import Lock
+from time import time
 import abc
 import logging
 
@@ -156,33 +159,65 @@ class ContextualProceed(Processor):
         assert 'self' == fnArgs.args[0], \
         'The processor needs to be tagged in a class definition (needs self as the first argument)'
 
-        def call(chain, **keyargs):
-            assert isinstance(chain, Chain), 'Invalid processors chain %s' % chain
-            function(**keyargs)
-            chain.proceed()
-        assert isfunction(function) or ismethod(function), 'Invalid function %s' % function
         cd = function.__code__
-        super().__init__(Contextual.contextsFrom(fnArgs.args[1:], fnArgs.annotations), call, function.__name__,
-                         cd.co_filename, cd.co_firstlineno)
+        super().__init__(Contextual.contextsFrom(fnArgs.args[1:], fnArgs.annotations), CallProceed(function),
+                         function.__name__, cd.co_filename, cd.co_firstlineno)
+
+class CallProceed:
+    '''
+    The call used by the proceed processors, it executes the contained functions one after another and then proceeds
+    the chain. Consecutive proceed calls are merged by the assembly into a single call, this is possible since the
+    proceed functions have no access to the chain and thus cannot alter the execution flow or the arguments.
+    '''
+    __slots__ = ('functions',)
+
+    def __init__(self, *functions):
+        '''
+        Construct the proceed call.
+        
+        @param functions: arguments[callable]
+            The functions to be called, in the provided order, with the chain key arguments.
+        '''
+        assert functions, 'At least one function is required'
+        if __debug__:
+            for function in functions: assert callable(function), 'Invalid function %s' % function
+        self.functions = functions
+
+    def __call__(self, chain, **keyargs):
+        '''
+        Executes the functions and proceeds the chain.
+        '''
+        assert isinstance(chain, Chain), 'Invalid processors chain %s' % chain
+        for function in self.functions: function(**keyargs)
+        chain.proceed()
+
+    def __str__(self):
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(str(function) for function in self.functions))
 
 # --------------------------------------------------------------------
 
 class Processing:
     '''
-    Container for processor's, provides chains for their execution.
-    !!! Attention, never ever use a processing in multiple threads, only one thread is allowed to execute 
-    a processing at one time.
+    Container for processor's, provides chains for their execution. The calls are registered in a deque and once the
+    registration is finalized they are compiled into a tuple, @see: Processing.compile.
+    A compiled processing is immutable and can be shared by multiple threads, each thread executing it with its own
+    chain, the processors need to keep any cached data safe for concurrent use. A chain should be executed by only one
+    thread at a time.
     '''
-    __slots__ = ('contexts', 'calls')
+    __slots__ = ('contexts', 'calls', 'instrument')
 
-    def __init__(self, contexts):
+    def __init__(self, contexts, instrument=None):
         '''
         Construct the processing.
         
         @param contexts: dictionary{string, Context class}
             The contexts to be associated with the processing.
+        @param instrument: Instrument|None
+            The instrument that records the processors latency for this processing, None if the processing is not
+            instrumented.
         '''
         assert isinstance(contexts, dict), 'Invalid contexts %s' % contexts
+        assert instrument is None or isinstance(instrument, Instrument), 'Invalid instrument %s' % instrument
         if __debug__:
             for key, clazz in contexts.items():
                 assert isinstance(key, str), 'Invalid context name %s' % key
@@ -190,13 +225,31 @@ class Processing:
 
         self.contexts = contexts
         self.calls = deque()
+        self.instrument = instrument
+
+    def compile(self):
+        '''
+        Compiles the registered calls into an immutable tuple, consecutive proceed calls are merged into a single call
+        in order to reduce the chain overhead.
         
+        @return: self
+            Same instance for chaining purposes.
+        '''
+        calls = []
+        for call in self.calls:
+            assert callable(call), 'Invalid processor call %s' % call
+            if isinstance(call, CallProceed) and calls and isinstance(calls[-1], CallProceed):
+                calls[-1] = CallProceed(*(calls[-1].functions + call.functions))
+            else: calls.append(call)
+        self.calls = tuple(calls)
+        return self
+
 class Chain:
     '''
     A chain that contains a list of processors (callables) that are executed one by one. Each processor will have
     the duty to proceed with the processing if is the case by calling the chain.
     '''
-    __slots__ = ('_calls', '_callBacks', '_callBacksErrors', '_keyargs', '_consumed', '_proceed')
+    __slots__ = ('_calls', '_index', '_callBacks', '_callBacksErrors', '_keyargs', '_consumed', '_proceed')
 
     def __init__(self, processing):
         '''
@@ -208,9 +261,11 @@ class Chain:
         '''
         if isinstance(processing, Processing): processing = processing.calls
         assert isinstance(processing, Iterable), 'Invalid processing %s' % processing
-        self._calls = deque(processing)
+        if not isinstance(processing, tuple): processing = tuple(processing)
         if __debug__:
-            for call in self._calls: assert callable(call), 'Invalid processor call %s' % call
+            for call in processing: assert callable(call), 'Invalid processor call %s' % call
+        self._calls = processing
+        self._index = 0
         self._callBacks = deque()
         self._callBacksErrors = deque()
         self._keyargs = None
@@ -271,8 +326,9 @@ class Chain:
         '''
         assert isinstance(processing, Processing), 'Invalid processing %s' % processing
         assert self._keyargs is not None, 'Cannot branch if no process is called'
-        self._calls.clear()
-        self._calls.extend(processing.calls)
+        if isinstance(processing.calls, tuple): self._calls = processing.calls
+        else: self._calls = tuple(processing.calls)
+        self._index = 0
         self._proceed = True
         return self
     
@@ -315,10 +371,11 @@ class Chain:
             True if the chain has performed the execution of the next element, False if there is no more to be executed.
         '''
         assert self._keyargs is not None, 'Cannot proceed if no process is called'
-        assert self._calls, 'Nothing to execute'
+        assert self._index < len(self._calls), 'Nothing to execute'
         assert self._proceed, 'Cannot proceed if no process is called'
         
-        call = self._calls.popleft()
+        call = self._calls[self._index]
+        self._index += 1
         assert log.debug('Processing %s', call) or True
         self._proceed = False
         try: call(self, **self._keyargs)
@@ -331,12 +388,12 @@ class Chain:
         assert log.debug('Processing finalized \'%s\'', call) or True
         if self._proceed:
             assert log.debug('Proceed signal received, continue execution') or True
-            if self._calls: return True
+            if self._index < len(self._calls): return True
             assert log.debug('Processing finalized by consuming') or True
             self._consumed = True
             self._keyargs = None
         else:
-            self._calls.clear()
+            self._index = len(self._calls)
             self._keyargs = None
         while self._callBacks: self._callBacks.pop()()
         return False
@@ -430,6 +487,9 @@ ONLY_AVAILABLE = 1 << 3
 # Assembly create flag that dictates that only the available processors should be used.
 CREATE_REPORT = 1 << 4
 # Assembly create flag that dictates that a report should be created, this will modify the return value for the create.
+INSTRUMENT = 1 << 5
+# Assembly create flag that dictates that the processors calls should be instrumented in order to record their latency,
+# the recorded data is available on the created processing instrument.
 
 class AssemblyError(Exception):
     '''
@@ -558,10 +618,15 @@ class Assembly:
 
         if not processors: raise AssemblyError('No processors available to create a processing')
 
-        processing = Processing(assContext.create())
-        for processor in processors:
-            assert isinstance(processor, Processor), 'Invalid processor %s' % processor
-            processor.register(processing)
+        if flag & INSTRUMENT:
+            processing = Processing(assContext.create(), Instrument())
+            for processor in processors: processing.instrument.register(processor, processing)
+        else:
+            processing = Processing(assContext.create())
+            for processor in processors:
+                assert isinstance(processor, Processor), 'Invalid processor %s' % processor
+                processor.register(processing)
+        processing.compile()
 
         if flag & CREATE_REPORT:
             report = []
@@ -580,6 +645,10 @@ class Assembly:
                 report.append('\nThe following attributes are not used by any processor:\n\t%s' % 
                               ', '.join('%s.%s' % key for key in sorted(definedOnly)))
 
+            if flag & INSTRUMENT:
+                report.append('\nThe latency of the %s processors is instrumented, the instrument report is available on '
+                              'the processing' % len(processors))
+
             if not report: report.append('Nothing to report, everything fits nicely')
 
             report.insert(0, '-' * 50 + ' Assembly report')
@@ -1014,6 +1083,162 @@ class AssemblyAttribute:
 
 # --------------------------------------------------------------------
 
+class Instrument:
+    '''
+    Records the wall time and the call count for the processors calls of a processing. The recorded times are kept
+    in fixed buckets histograms, one for each processor identified by name, file name and line number.
+    '''
+    __slots__ = ('entries',)
+
+    buckets = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+    # The buckets upper limits in seconds, the times bigger then the last limit are recorded in an overflow bucket.
+
+    def __init__(self):
+        '''
+        Construct the instrument.
+        '''
+        self.entries = {}
+
+    def register(self, processor, processing):
+        '''
+        Registers the provided processor into the processing and instruments the calls that the processor has
+        registered.
+        
+        @param processor: Processor
+            The processor to register.
+        @param processing: Processing
+            The processing to register to.
+        '''
+        assert isinstance(processor, Processor), 'Invalid processor %s' % processor
+        assert isinstance(processing, Processing), 'Invalid processing %s' % processing
+        assert isinstance(processing.calls, deque), 'The processing %s is already compiled' % processing
+
+        key = (processor.name, processor.fileName, processor.lineNumber)
+        entry = self.entries.get(key)
+        if entry is None: entry = self.entries[key] = InstrumentEntry(len(self.buckets) + 1)
+
+        index = len(processing.calls)
+        processor.register(processing)
+        for k in range(index, len(processing.calls)):
+            call = processing.calls[k]
+            if isinstance(call, CallProceed):
+                call = CallProceed(*(CallInstrumented(function, entry, self.buckets) for function in call.functions))
+            else: call = CallInstrumented(call, entry, self.buckets)
+            processing.calls[k] = call
+
+    def statistics(self):
+        '''
+        Provides the recorded statistics.
+        
+        @return: dictionary{tuple(string, string, integer), tuple(integer, float, float, float, list[integer])}
+            A dictionary having as a key a tuple with the processor name, file name and line number and as a value
+            a tuple containing the call count, the total, minimum and maximum time in seconds and the count for each
+            bucket of the histogram.
+        '''
+        statistics = {}
+        for key, entry in self.entries.items():
+            assert isinstance(entry, InstrumentEntry)
+            with entry.lock:
+                statistics[key] = (entry.count, entry.total, entry.minimum, entry.maximum, list(entry.histogram))
+        return statistics
+
+    def report(self):
+        '''
+        Provides the instrument report, the processors are sorted by the total time.
+        
+        @return: string
+            The text containing the instrument report.
+        '''
+        limits = ['<%gms' % (limit * 1000) for limit in self.buckets]
+        limits.append('>%gms' % (self.buckets[-1] * 1000))
+
+        report = []
+        for key, entry in sorted(self.entries.items(), key=lambda item: item[1].total, reverse=True):
+            assert isinstance(entry, InstrumentEntry)
+            name, fileName, lineNumber = key
+            report.append('\n  File "%s", line %i, in %s' % (fileName, lineNumber, name))
+            if not entry.count:
+                report.append('\n\t-not called')
+                continue
+            report.append('\n\t-calls: %i, total: %.3fms, average: %.3fms, minimum: %.3fms, maximum: %.3fms' % 
+                          (entry.count, entry.total * 1000, entry.total * 1000 / entry.count, entry.minimum * 1000,
+                           entry.maximum * 1000))
+            report.append('\n\t-histogram: %s' % ', '.join('%s: %i' % (limit, count)
+                                                             for limit, count in zip(limits, entry.histogram) if count))
+
+        if not report: report.append('\nNothing to report, no processors are instrumented')
+
+        report.insert(0, '-' * 50 + ' Instrument report')
+        report.append('\n')
+        report.append('-' * 50)
+        report.append('\n')
+        return ''.join(report)
+
+class InstrumentEntry:
+    '''
+    Contains the recorded data for an instrumented processor.
+    '''
+    __slots__ = ('count', 'total', 'minimum', 'maximum', 'histogram', 'lock')
+
+    def __init__(self, size):
+        '''
+        Construct the instrument entry.
+        
+        @param size: integer
+            The number of buckets in the histogram.
+        '''
+        assert isinstance(size, int), 'Invalid size %s' % size
+        self.count = 0
+        self.total = 0.0
+        self.minimum = 0.0
+        self.maximum = 0.0
+        self.histogram = [0] * size
+        self.lock = Lock()
+
+class CallInstrumented:
+    '''
+    The call wrapper that records the wall time of the wrapped call into an instrument entry.
+    '''
+    __slots__ = ('call', 'entry', 'buckets')
+
+    def __init__(self, call, entry, buckets):
+        '''
+        Construct the instrumented call.
+        
+        @param call: callable
+            The call to be instrumented.
+        @param entry: InstrumentEntry
+            The entry to record to.
+        @param buckets: tuple(float)
+            The buckets upper limits.
+        '''
+        assert callable(call), 'Invalid call %s' % call
+        assert isinstance(entry, InstrumentEntry), 'Invalid entry %s' % entry
+        assert isinstance(buckets, tuple), 'Invalid buckets %s' % buckets
+        self.call = call
+        self.entry = entry
+        self.buckets = buckets
+
+    def __call__(self, *args, **keyargs):
+        '''
+        Executes the call and records the time.
+        '''
+        start = time()
+        try: return self.call(*args, **keyargs)
+        finally:
+            elapsed, entry = time() - start, self.entry
+            with entry.lock:
+                if not entry.count or elapsed < entry.minimum: entry.minimum = elapsed
+                if elapsed > entry.maximum: entry.maximum = elapsed
+                entry.count += 1
+                entry.total += elapsed
+                entry.histogram[bisect_right(self.buckets, elapsed)] += 1
+
+    def __str__(self):
+        return '%s(%s)' % (self.__class__.__name__, self.call)
+
+# --------------------------------------------------------------------
+
 def location(processor):
     '''
     Provides a processor location message used for exceptions.
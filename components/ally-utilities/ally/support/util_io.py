@@ -345,3 +345,75 @@ class KeepOpen:
 
     def __getattr__(self, name): return getattr(self._fileObj, name)
 
+
+class InputStreamFile(IInputStream, IClosable):
+    '''
+    Provides the input stream for a file system file, the servers can detect this stream in order to send the file
+    content directly from the kernel instead of copying it in user space.
+    '''
+    __slots__ = ['fileObj']
+
+    bufferSize = 65536
+    # The buffer size used for sending the content when the platform has no kernel file sending.
+
+    def __init__(self, fileObj):
+        '''
+        Construct the file input stream.
+
+        @param fileObj: file
+            The binary file object opened for reading, it needs to be a file system file that has a file descriptor.
+        '''
+        assert isinstance(fileObj, IInputStream), 'Invalid file object %s' % fileObj
+        assert isinstance(fileObj.fileno(), int), 'Invalid file object %s has no file descriptor' % fileObj
+        self.fileObj = fileObj
+
+    def read(self, nbytes=None):
+        '''
+        @see: IInputStream.read
+        '''
+        return self.fileObj.read(nbytes)
+
+    def close(self):
+        '''
+        @see: IClosable.close
+        '''
+        self.fileObj.close()
+
+    def fileno(self):
+        '''
+        Provides the file descriptor.
+        '''
+        return self.fileObj.fileno()
+
+    def sendTo(self, sock, count=None):
+        '''
+        Sends the file content from the current file position to the socket, the file position is advanced with the
+        sent bytes so that after a partial send the content continues from where it stopped.
+
+        @param sock: socket
+            The connected socket to send the content to.
+        @param count: integer|None
+            The maximum number of bytes to send, None to send up to the end of the file.
+        @return: integer
+            The number of bytes sent, 0 if there is no more content to send.
+        @raise BlockingIOError: If the socket is non blocking and it cannot accept any data.
+        '''
+        assert count is None or isinstance(count, int), 'Invalid count %s' % count
+        offset = self.fileObj.tell()
+        if count is None: count = os.fstat(self.fileObj.fileno()).st_size - offset
+        if count <= 0: return 0
+
+        sent = 0
+        try:
+            if hasattr(os, 'sendfile'): sent = os.sendfile(sock.fileno(), self.fileObj.fileno(), offset, count)
+            else:
+                data = self.fileObj.read(min(count, self.bufferSize))
+                if data: sent = sock.send(data)
+        finally: self.fileObj.seek(offset + sent)
+        return sent
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -12,7 +12,8 @@ Provides the configurations for delivering files from the local file system.
 from ..ally_core.processor import explainError, renderer
 from ..ally_core_http.processor import contentLengthEncode, contentTypeEncode, \
     header, allowEncode, acceptDecode, updatePathAssembliesForResources
-from ..ally_http.processor import internalError
+from ..ally_http.processor import internalError, contentEncodingEncode, \
+    compress_content
 from ..ally_http.server import pathAssemblies
 from ally.container import ioc
 from ally.core.cdm.processor.content_delivery import ContentDeliveryHandler
@@ -65,6 +66,7 @@ def contentDelivery() -> Handler:
 @ioc.before(assemblyContent)
 def updateAssemblyContent():
     assemblyContent().add(internalError(), header(), contentDelivery(), contentTypeEncode(), contentLengthEncode())
+    if compress_content(): assemblyContent().add(contentEncodingEncode(), before=contentLengthEncode())
 # TODO: add also caching headers
 @ioc.before(assemblyContentError)
 def updateAssemblyContentError():
@@ -17,7 +17,7 @@ from ally.design.context import Context, requires, defines
 from ally.design.processor import Chain, Function, Assembly, NO_VALIDATION, \
     Processing, Handler
 from ally.http.spec.server import METHOD_GET
-from ally.support.util_io import IInputStream
+from ally.support.util_io import IInputStream, InputStreamFile
 from ally.zip.util_zip import normOSPath, normZipPath
 from mimetypes import guess_type
 from os.path import isdir, isfile, join, dirname, normpath, sep
@@ -138,7 +138,7 @@ class ContentDeliveryHandler(Handler):
                 # This will be set upon successful file open
                 rf = None
                 if isfile(entryPath):
-                    rf, size = open(entryPath, 'rb'), os.path.getsize(entryPath)
+                    rf, size = InputStreamFile(open(entryPath, 'rb')), os.path.getsize(entryPath)
                 else:
                     linkPath = entryPath
                     while len(linkPath) > len(self.repositoryPath):
@@ -189,7 +189,7 @@ class ContentDeliveryHandler(Handler):
         else:
             return None
         if isfile(resPath):
-            return open(resPath, 'rb'), os.path.getsize(resPath)
+            return InputStreamFile(open(resPath, 'rb')), os.path.getsize(resPath)
 
     def _processZiplink(self, subPath, zipFilePath, inFilePath):
         '''
@@ -128,6 +128,15 @@ class TestMessageService(IMessageService):
     def delete(self, id):
         pass
 
+    def insertAll(self, entities):
+        pass
+
+    def updateAll(self, entities):
+        pass
+
+    def deleteAll(self, entities):
+        pass
+
 class TestSourceService(ISourceService):
     def getById(self, id):
         src = Source()
@@ -155,6 +164,15 @@ class TestSourceService(ISourceService):
     def delete(self, id):
         pass
 
+    def insertAll(self, entities):
+        pass
+
+    def updateAll(self, entities):
+        pass
+
+    def deleteAll(self, entities):
+        pass
+
 
 class TestHTTPDelivery(unittest.TestCase):
     _poDir = join(dirname(abspath(__file__)), 'po')
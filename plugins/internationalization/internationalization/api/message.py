@@ -16,7 +16,8 @@ from admin.introspection.api.plugin import Plugin
 from ally.api.config import service, call, query, LIMIT_DEFAULT
 from ally.api.criteria import AsLike
 from ally.api.type import Iter, List
-from ally.support.api.entity import Entity, QEntity, IEntityGetCRUDService
+from ally.support.api.entity import Entity, QEntity, IEntityGetCRUDService, \
+    IEntityBulkService
 from internationalization.api.source import QSource
 
 # --------------------------------------------------------------------
@@ -46,14 +47,14 @@ class QMessage(QEntity):
 # --------------------------------------------------------------------
 
 @service((Entity, Message))
-class IMessageService(IEntityGetCRUDService):
+class IMessageService(IEntityGetCRUDService, IEntityBulkService):
     '''
     The messages service.
     '''
 
     @call
     def getMessages(self, sourceId:Source.Id=None, offset:int=None, limit:int=LIMIT_DEFAULT, detailed:bool=True,
-                    qm:QMessage=None, qs:QSource=None) -> Iter(Message):
+                    qm:QMessage=None, qs:QSource=None, after:str=None) -> Iter(Message):
         '''
         Provides the messages searched based on the given parameters.
 
@@ -69,11 +70,14 @@ class IMessageService(IEntityGetCRUDService):
             Query for filtering the messages based on message attributes. @see QMessage
         @param qs: QSource
             Query for filtering the messages based on the message source. @see QSource
+        @param after: string
+            Return the elements after the cursor provided as 'after' by the previous elements, an empty cursor starts
+            the keyset pagination. The elements are positioned by the messages query ordering and the message id.
         '''
 
     @call
     def getComponentMessages(self, component:Component.Id, offset:int=None, limit:int=LIMIT_DEFAULT, detailed:bool=True,
-                             qm:QMessage=None, qs:QSource=None) -> Iter(Message):
+                             qm:QMessage=None, qs:QSource=None, after:str=None) -> Iter(Message):
         '''
         Provides the messages for the given component.
 
@@ -89,11 +93,14 @@ class IMessageService(IEntityGetCRUDService):
             Query for filtering the messages based on message attributes. @see QMessage
         @param qs: QSource
             Query for filtering the messages based on the message source. @see QSource
+        @param after: string
+            Return the elements after the cursor provided as 'after' by the previous elements, an empty cursor starts
+            the keyset pagination. The elements are positioned by the messages query ordering and the message id.
         '''
 
     @call
     def getPluginMessages(self, plugin:Plugin.Id, offset:int=None, limit:int=LIMIT_DEFAULT, detailed:bool=True,
-                          qm:QMessage=None, qs:QSource=None) -> Iter(Message):
+                          qm:QMessage=None, qs:QSource=None, after:str=None) -> Iter(Message):
         '''
         Provides the messages for the given plugin.
 
@@ -109,4 +116,7 @@ class IMessageService(IEntityGetCRUDService):
             Query for filtering the messages based on message attributes. @see QMessage
         @param qs: QSource
             Query for filtering the messages based on the message source. @see QSource
+        @param after: string
+            Return the elements after the cursor provided as 'after' by the previous elements, an empty cursor starts
+            the keyset pagination. The elements are positioned by the messages query ordering and the message id.
         '''
@@ -14,7 +14,8 @@ from admin.api.domain_admin import modelAdmin
 from ally.api.config import service, query
 from ally.api.criteria import AsEqual
 from ally.internationalization import N_
-from ally.support.api.entity import Entity, QEntity, IEntityService
+from ally.support.api.entity import Entity, QEntity, IEntityService, \
+    IEntityBulkService
 
 # --------------------------------------------------------------------
 
@@ -47,7 +48,7 @@ class QSource(QFile):
 # --------------------------------------------------------------------
 
 @service((Entity, Source), (QEntity, QSource))
-class ISourceService(IEntityService):
+class ISourceService(IEntityService, IEntityBulkService):
     '''
     The sources service.
     '''
@@ -15,7 +15,8 @@ from ally.container.ioc import injected
 from ally.container.support import setup
 from internationalization.meta.source import Source
 from sql_alchemy.impl.entity import EntityGetCRUDServiceAlchemy
-from ally.support.sqlalchemy.util_service import buildQuery, buildLimits
+from ally.support.sqlalchemy.util_service import buildQuery, buildLimits, \
+    buildKeyset, Keyset, buildCount, COUNT_MORE
 from ally.api.extension import IterPart
 
 # --------------------------------------------------------------------
@@ -30,36 +31,59 @@ class MessageServiceAlchemy(EntityGetCRUDServiceAlchemy, IMessageService):
     def __init__(self):
         EntityGetCRUDServiceAlchemy.__init__(self, Message, QMessage)
 
-    def getMessages(self, sourceId=None, offset=None, limit=None, detailed=False, qm=None, qs=None):
+    def getMessages(self, sourceId=None, offset=None, limit=None, detailed=False, qm=None, qs=None, after=None):
         '''
         @see: IMessageService.getMessages
         '''
         sql = self.session().query(Message)
         if sourceId: sql = sql.filter(Message.Source == sourceId)
-        if qm: sql = buildQuery(sql, qm, Message)
-        if qs: sql = buildQuery(sql.join(Source), qs, Source)
-        sqlLimit = buildLimits(sql, offset, limit)
-        if detailed: return IterPart(sqlLimit.all(), sql.count(), offset, limit)
-        return sqlLimit.all()
+        return self._getMessages(sql, offset, limit, detailed, qm, qs, after, True)
 
-    def getComponentMessages(self, component, offset=None, limit=None, detailed=False, qm=None, qs=None):
+    def getComponentMessages(self, component, offset=None, limit=None, detailed=False, qm=None, qs=None, after=None):
         '''
         @see: IMessageService.getComponentMessages
         '''
         sql = self.session().query(Message).join(Source).filter(Source.Component == component)
-        if qm: sql = buildQuery(sql, qm, Message)
-        if qs: sql = buildQuery(sql, qs, Source)
-        sqlLimit = buildLimits(sql, offset, limit)
-        if detailed: return IterPart(sqlLimit.all(), sql.count(), offset, limit)
-        return sqlLimit.all()
+        return self._getMessages(sql, offset, limit, detailed, qm, qs, after)
 
-    def getPluginMessages(self, plugin, offset=None, limit=None, detailed=False, qm=None, qs=None):
+    def getPluginMessages(self, plugin, offset=None, limit=None, detailed=False, qm=None, qs=None, after=None):
         '''
         @see: IMessageService.getPluginMessages
         '''
         sql = self.session().query(Message).join(Source).filter(Source.Plugin == plugin)
-        if qm: sql = buildQuery(sql, qm, Message)
-        if qs: sql = buildQuery(sql, qs, Source)
-        sqlLimit = buildLimits(sql, offset, limit)
-        if detailed: return IterPart(sqlLimit.all(), sql.count(), offset, limit)
-        return sqlLimit.all()
+        return self._getMessages(sql, offset, limit, detailed, qm, qs, after)
+
+    # ----------------------------------------------------------------
+
+    def _getMessages(self, sql, offset, limit, detailed, qm, qs, after, join=False):
+        '''
+        Provides the messages for the SQL alchemy query, with offset or keyset pagination.
+        '''
+        sqlAll = self._buildQueries(sql, qm, qs, join)
+        if after is None: keyset, sqlPage, fetch = None, sqlAll, limit
+        else:
+            keyset = Keyset(after)
+            # The keyset is not applied on the total count query.
+            sqlPage = self._buildQueries(sql, qm, qs, join, keyset)
+            fetch = keyset.limitFor(limit, detailed and self.countMode == COUNT_MORE)
+
+        if detailed:
+            messages, total, mode = buildCount(sqlPage, offset, fetch, self.countMode,
+                                               None if keyset is None else sqlAll, self.countStaleness)
+        else: messages, total, mode = [] if fetch == 0 else buildLimits(sqlPage, offset, fetch).all(), None, None
+        if keyset is None:
+            if detailed: return IterPart(messages, total, offset, limit, totalMode=mode)
+            return messages
+
+        messages, after = keyset.page(messages, limit, total is None if mode == COUNT_MORE else None)
+        return IterPart(messages, total, offset, limit, after, mode)
+
+    def _buildQueries(self, sql, qm, qs, join, keyset=None):
+        '''
+        Builds the messages and sources queries, with keyset pagination the messages are positioned by the messages
+        query ordering and the message id so the sources query ordering has no effect.
+        '''
+        if qm: sql = buildQuery(sql, qm, Message, keyset=keyset)
+        elif keyset is not None: sql = buildKeyset(sql, Message, keyset)
+        if qs: sql = buildQuery(sql.join(Source) if join else sql, qs, Source)
+        return sql
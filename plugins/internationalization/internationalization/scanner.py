@@ -177,7 +177,7 @@ class Scanner(IAnalyzer):
 
             if isinstance(file, Source): source = file
             else: source = None
-            messages = None
+            messages, inserts, updates = None, [], {}
             try:
                 for text, context, lineno, comments in extractor:
                     if not source:
@@ -207,17 +207,21 @@ class Scanner(IAnalyzer):
                         msg.LineNumber = lineno
                         msg.Comments = '\n'.join(comments)
 
-                        self.messageService.insert(msg)
+                        inserts.append(msg)
                         messages[singular] = msg
                     else:
                         msg.Plural = plurals
                         msg.Context = context
                         msg.LineNumber = lineno
                         msg.Comments = '\n'.join(comments)
-                        self.messageService.update(msg)
+                        if msg.Id is not None: updates[msg.Id] = msg
             except UnicodeDecodeError as e:
                 log.error('%s: %s' % (filePath, str(e)))
 
+            # The messages of the source are persisted in bulk.
+            if inserts: self.messageService.insertAll(inserts)
+            if updates: self.messageService.updateAll(updates.values())
+
             if processModified and filePath not in files:
                 file = File()
                 file.Component = componentId
@@ -44,8 +44,8 @@ class RoleServiceAlchemy(EntityServiceAlchemy, IRoleService):
         '''
         sql = self.rbacService.rolesForRbacSQL(roleId, self.session().query(RoleMapped))
         if detailed:
-            entities, total = self._getAllWithCount(None, q, offset, limit, sql)
-            return IterPart(entities, total, offset, limit)
+            entities, total, mode = self._getAllWithCount(None, q, offset, limit, sql)
+            return IterPart(entities, total, offset, limit, totalMode=mode)
         return self._getAll(filter, q, offset, limit, sql)
     
     def getRights(self, roleId, offset=None, limit=None, detailed=False, q=None):
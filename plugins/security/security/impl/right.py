@@ -53,6 +53,6 @@ class RightServiceAlchemy(EntityGetServiceAlchemy, EntityCRUDServiceAlchemy, IRi
         if typeId: filter = RightMapped.Type == typeId
         else: filter = None
         if detailed:
-            entities, total = self._getAllWithCount(filter, q, offset, limit)
-            return IterPart(entities, total, offset, limit)
+            entities, total, mode = self._getAllWithCount(filter, q, offset, limit)
+            return IterPart(entities, total, offset, limit, totalMode=mode)
         return self._getAll(filter, q, offset, limit)
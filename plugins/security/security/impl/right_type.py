@@ -27,6 +27,9 @@ class RightTypeServiceAlchemy(EntityNQServiceAlchemy, IRightTypeService):
     @see: IRightTypeService
     '''
     
+    cacheEntries = 100
+    # The right types are read for every access check and are changed only when populated.
+    
     def __init__(self):
         EntityNQServiceAlchemy.__init__(self, RightTypeMapped)
         
@@ -15,10 +15,13 @@ from ally.exception import InputError, Ref
 from ally.internationalization import _
 from ally.support.api import entity as api
 from ally.support.api.util_service import copy
+from ally.support.sqlalchemy.cache import cacheFor, invalidate, EntityCache
 from ally.support.sqlalchemy.session import SessionSupport
-from ally.support.sqlalchemy.util_service import buildQuery, buildLimits, handle
+from ally.support.sqlalchemy.util_service import buildQuery, buildLimits, handle, \
+    buildKeyset, Keyset, buildCount, COUNT_QUERY, COUNT_MODES, COUNT_MORE
 from inspect import isclass
-from sqlalchemy.exc import SQLAlchemyError, OperationalError
+from sqlalchemy.exc import SQLAlchemyError, OperationalError, IntegrityError
+from sqlalchemy.orm import class_mapper
 import logging
 from ally.support.sqlalchemy.mapper import MappedSupport
 from ally.api.extension import IterPart
@@ -34,6 +37,16 @@ class EntitySupportAlchemy(SessionSupport):
     Provides support generic entity handling.
     '''
 
+    countMode = COUNT_QUERY
+    # The mode used for the total count of the detailed list calls, one of the util_service COUNT_* modes.
+    countStaleness = 60
+    # The number of seconds an approximate total count is used before it is counted again.
+    cacheEntries = 0
+    # The maximum number of entities cached by id in the process wide entity cache, 0 for no cache. Enable the cache
+    # only for reference data since the cached entities are provided as detached copies.
+    cacheTimeToLive = 300
+    # The number of seconds that an entity is cached.
+
     def __init__(self, Entity, QEntity=None):
         '''
         Construct the entity support for the provided model class and query class.
@@ -48,9 +61,15 @@ class EntitySupportAlchemy(SessionSupport):
         assert isinstance(Entity, MappedSupport), 'Invalid mapped class %s' % Entity
         self.modelType = typeFor(Entity)
         assert isinstance(self.modelType, TypeModel), 'Invalid model class %s' % Entity
+        assert self.countMode in COUNT_MODES, 'Invalid count mode %s' % self.countMode
+        assert isinstance(self.countStaleness, (int, float)), 'Invalid count staleness %s' % self.countStaleness
+        assert isinstance(self.cacheEntries, int), 'Invalid cache entries %s' % self.cacheEntries
+        assert isinstance(self.cacheTimeToLive, (int, float)), 'Invalid cache time to live %s' % self.cacheTimeToLive
 
         self.model = self.modelType.container
         self.Entity = Entity
+        if self.cacheEntries: self.cache = cacheFor(Entity, 'Id', self.cacheEntries, self.cacheTimeToLive)
+        else: self.cache = None
 
         if QEntity is not None:
             assert isclass(QEntity), 'Invalid class %s' % QEntity
@@ -62,7 +81,7 @@ class EntitySupportAlchemy(SessionSupport):
             self.query = self.queryType = None
         self.QEntity = QEntity
 
-    def _getAll(self, filter=None, query=None, offset=None, limit=None, sql=None):
+    def _getAll(self, filter=None, query=None, offset=None, limit=None, sql=None, keyset=None):
         '''
         Provides all the entities for the provided filter, with offset and limit. Also if query is known to the
         service then also a query can be provided.
@@ -77,20 +96,19 @@ class EntitySupportAlchemy(SessionSupport):
             The limit of elements to get.
         @param sql: SQL alchemy|None
             The sql alchemy query to use.
+        @param keyset: Keyset|None
+            The keyset to fetch the elements after.
         @return: list
             The list of all filtered and limited elements.
         '''
         if limit == 0: return []
         sql = sql or self.session().query(self.Entity)
         if filter is not None: sql = sql.filter(filter)
-        if query:
-            assert self.QEntity, 'No query provided for the entity service'
-            assert self.queryType.isValid(query), 'Invalid query %s, expected %s' % (query, self.QEntity)
-            sql = buildQuery(sql, query, self.Entity)
+        sql = self._buildQuery(sql, query, keyset)
         sql = buildLimits(sql, offset, limit)
         return sql.all()
 
-    def _getAllWithCount(self, filter=None, query=None, offset=None, limit=None, sql=None):
+    def _getAllWithCount(self, filter=None, query=None, offset=None, limit=None, sql=None, keyset=None):
         '''
         Provides all the entities for the provided filter, with offset and limit and the total count. Also if query is 
         known to the service then also a query can be provided.
@@ -105,18 +123,54 @@ class EntitySupportAlchemy(SessionSupport):
             The limit of elements to get.
         @param sql: SQL alchemy|None
             The sql alchemy query to use.
-        @return: tuple(list, integer)
-            The list of all filtered and limited elements and the count of the total elements.
+        @param keyset: Keyset|None
+            The keyset to fetch the elements after, the total count is not affected by the keyset.
+        @return: tuple(list, integer|None, string)
+            The list of all filtered and limited elements, the count of the total elements and the count mode that
+            provided the total, @see: buildCount.
         '''
         sql = sql or self.session().query(self.Entity)
         if filter is not None: sql = sql.filter(filter)
+        if keyset is None: sql, sqlCount = self._buildQuery(sql, query), None
+        else: sql, sqlCount = self._buildQuery(sql, query, keyset), self._buildQuery(sql, query)
+        return buildCount(sql, offset, limit, self.countMode, sqlCount, self.countStaleness)
+
+    def _getAllPart(self, filter=None, query=None, offset=None, limit=None, detailed=False, after=None):
+        '''
+        Provides the entities for the list services, with offset or keyset pagination.
+
+        @param detailed: boolean
+            If true the total count of the elements is also provided.
+        @param after: string|None
+            The keyset pagination cursor to fetch the elements after, empty for the first page, None for no keyset
+            pagination.
+        @return: list|IterPart
+            The elements, as a part if detailed or paginated with keyset.
+        @see: EntitySupportAlchemy._getAllWithCount
+        '''
+        if after is None: keyset, fetch = None, limit
+        else:
+            keyset = Keyset(after)
+            fetch = keyset.limitFor(limit, detailed and self.countMode == COUNT_MORE)
+        if detailed: entities, total, mode = self._getAllWithCount(filter, query, offset, fetch, keyset=keyset)
+        else: entities, total, mode = self._getAll(filter, query, offset, fetch, keyset=keyset), None, None
+        if keyset is None:
+            if detailed: return IterPart(entities, total, offset, limit, totalMode=mode)
+            return entities
+
+        entities, after = keyset.page(entities, limit, total is None if mode == COUNT_MORE else None)
+        return IterPart(entities, total, offset, limit, after, mode)
+
+    def _buildQuery(self, sql, query=None, keyset=None):
+        '''
+        Builds the query and keyset on the provided SQL alchemy query.
+        '''
         if query:
             assert self.QEntity, 'No query provided for the entity service'
             assert self.queryType.isValid(query), 'Invalid query %s, expected %s' % (query, self.QEntity)
-            sql = buildQuery(sql, query, self.Entity)
-        sqlLimit = buildLimits(sql, offset, limit)
-        if limit == 0: return (), sql.count()
-        return sqlLimit.all(), sql.count()
+            return buildQuery(sql, query, self.Entity, keyset=keyset)
+        if keyset is not None: return buildKeyset(sql, self.Entity, keyset)
+        return sql
 
 # --------------------------------------------------------------------
 
@@ -129,41 +183,68 @@ class EntityGetServiceAlchemy(EntitySupportAlchemy):
         '''
         @see: IEntityGetService.getById
         '''
+        if self.cache is not None:
+            assert isinstance(self.cache, EntityCache)
+            entity = self.cache.get(id)
+            if entity is not None: return entity
+
         entity = self.session().query(self.Entity).get(id)
         if not entity: raise InputError(Ref(_('Unknown id'), ref=self.Entity.Id))
+        if self.cache is not None: self.cache.put(id, entity, self.session())
         return entity
 
+    def getByIds(self, ids):
+        '''
+        Provides the entities for the provided ids, this is not a service call it is used in fetching at once the
+        entities that are referenced by a collection. The entities are provided from and kept in the entity cache just
+        like for the get by id.
+        
+        @param ids: list[integer]
+            The ids of the entities to find.
+        @return: list
+            The entities for the ids, the unknown ids are ignored.
+        '''
+        if not ids: return []
+        if self.cache is None: return self.session().query(self.Entity).filter(self.Entity.Id.in_(ids)).all()
+        assert isinstance(self.cache, EntityCache)
+
+        entities, missing = [], []
+        for id in ids:
+            entity = self.cache.get(id)
+            if entity is None: missing.append(id)
+            else: entities.append(entity)
+        if missing:
+            session = self.session()
+            for entity in session.query(self.Entity).filter(self.Entity.Id.in_(missing)).all():
+                self.cache.put(entity.Id, entity, session)
+                entities.append(entity)
+        return entities
+
 class EntityFindServiceAlchemy(EntitySupportAlchemy):
     '''
     Generic implementation for @see: IEntityFindService
     '''
 
-    def getAll(self, offset=None, limit=None, detailed=False):
+    def getAll(self, offset=None, limit=None, detailed=False, after=None):
         '''
         @see: IEntityQueryService.getAll
         '''
-        if detailed:
-            entities, total = self._getAllWithCount(None, None, offset, limit)
-            return IterPart(entities, total, offset, limit)
-        return self._getAll(None, None, offset, limit)
+        return self._getAllPart(None, None, offset, limit, detailed, after)
 
 class EntityQueryServiceAlchemy(EntitySupportAlchemy):
     '''
     Generic implementation for @see: IEntityQueryService
     '''
 
-    def getAll(self, offset=None, limit=None, detailed=False, q=None):
+    def getAll(self, offset=None, limit=None, detailed=False, q=None, after=None):
         '''
         @see: IEntityQueryService.getAll
         '''
-        if detailed:
-            entities, total = self._getAllWithCount(None, q, offset, limit)
-            return IterPart(entities, total, offset, limit)
-        return self._getAll(None, q, offset, limit)
+        return self._getAllPart(None, q, offset, limit, detailed, after)
 
 class EntityCRUDServiceAlchemy(EntitySupportAlchemy):
     '''
-    Generic implementation for @see: IEntityCRUDService
+    Generic implementation for @see: IEntityCRUDService and @see: IEntityBulkService
     '''
 
     def insert(self, entity):
@@ -177,6 +258,7 @@ class EntityCRUDServiceAlchemy(EntitySupportAlchemy):
             self.session().flush((entityDb,))
         except SQLAlchemyError as e: handle(e, entityDb)
         entity.Id = entityDb.Id
+        invalidate(self.Entity, 'Id', entityDb.Id, self.session())
         return entityDb.Id
 
     def update(self, entity):
@@ -189,17 +271,98 @@ class EntityCRUDServiceAlchemy(EntitySupportAlchemy):
         if not entityDb: raise InputError(Ref(_('Unknown id'), ref=self.Entity.Id))
         try: self.session().flush((copy(entity, entityDb),))
         except SQLAlchemyError as e: handle(e, self.Entity)
+        invalidate(self.Entity, 'Id', entity.Id, self.session())
 
     def delete(self, id):
         '''
         @see: IEntityCRUDService.delete
         '''
+        invalidate(self.Entity, 'Id', id, self.session())
         try:
             return self.session().query(self.Entity).filter(self.Entity.Id == id).delete() > 0
         except OperationalError:
             assert log.debug('Could not delete entity %s with id \'%s\'', self.Entity, id, exc_info=True) or True
             raise InputError(Ref(_('Cannot delete because is in use'), model=self.model))
 
+    def insertAll(self, entities):
+        '''
+        @see: IEntityBulkService.insertAll
+        '''
+        entities = list(entities)
+        entitiesDb = []
+        for entity in entities:
+            assert self.modelType.isValid(entity), 'Invalid entity %s, expected %s' % (entity, self.Entity)
+            entitiesDb.append(copy(entity, self.Entity()))
+        if not entitiesDb: return ()
+        try:
+            self.session().add_all(entitiesDb)
+            self.session().flush(entitiesDb)
+        except SQLAlchemyError as e: handle(e, self.Entity)
+
+        ids = []
+        for entity, entityDb in zip(entities, entitiesDb):
+            entity.Id = entityDb.Id
+            invalidate(self.Entity, 'Id', entityDb.Id, self.session())
+            ids.append(entityDb.Id)
+        return ids
+
+    def updateAll(self, entities):
+        '''
+        @see: IEntityBulkService.updateAll
+        '''
+        entities = list(entities)
+        for entity in entities:
+            assert self.modelType.isValid(entity), 'Invalid entity %s, expected %s' % (entity, self.Entity)
+            if not isinstance(entity.Id, int): raise InputError(Ref(_('Unknown id'), ref=self.Entity.Id))
+        if not entities: return
+
+        ids = {entity.Id for entity in entities}
+        entitiesDb = {entityDb.Id: entityDb for entityDb in
+                      self.session().query(self.Entity).filter(self.Entity.Id.in_(ids))}
+        if len(entitiesDb) != len(ids):
+            raise InputError(*(Ref(_('Unknown id %(id)s') % dict(id=id), ref=self.Entity.Id)
+                               for id in sorted(ids.difference(entitiesDb))))
+        try: self.session().flush([copy(entity, entitiesDb[entity.Id]) for entity in entities])
+        except SQLAlchemyError as e: handle(e, self.Entity)
+        for id in ids: invalidate(self.Entity, 'Id', id, self.session())
+
+    def deleteAll(self, entities):
+        '''
+        @see: IEntityBulkService.deleteAll
+        '''
+        ids = set()
+        for entity in entities:
+            assert self.modelType.isValid(entity), 'Invalid entity %s, expected %s' % (entity, self.Entity)
+            if not isinstance(entity.Id, int): raise InputError(Ref(_('Unknown id'), ref=self.Entity.Id))
+            ids.add(entity.Id)
+        if not ids: return True
+
+        sql = self.session().query(self.Entity).filter(self.Entity.Id.in_(ids))
+        if class_mapper(self.Entity).inherits is None:
+            sqlIds = self.session().query(self.Entity.Id).filter(self.Entity.Id.in_(ids))
+            known = {id for id, in sqlIds}
+        else:
+            # The joined inheritance entities are deleted through the session in order to remove all the tables rows.
+            entitiesDb = sql.all()
+            known = {entityDb.Id for entityDb in entitiesDb}
+        if len(known) != len(ids):
+            raise InputError(*(Ref(_('Unknown id %(id)s') % dict(id=id), ref=self.Entity.Id)
+                               for id in sorted(ids.difference(known))))
+
+        for id in ids: invalidate(self.Entity, 'Id', id, self.session())
+        try:
+            if class_mapper(self.Entity).inherits is None: count = sql.delete(synchronize_session=False)
+            else:
+                for entityDb in entitiesDb: self.session().delete(entityDb)
+                self.session().flush(entitiesDb)
+                count = len(entitiesDb)
+        except (OperationalError, IntegrityError):
+            assert log.debug('Could not delete entities %s with ids %s', self.Entity, ids, exc_info=True) or True
+            raise InputError(Ref(_('Cannot delete because is in use'), model=self.model))
+        # The entities deleted meanwhile by other transactions are reported so that the whole batch is rolled back.
+        if count != len(ids): raise InputError(Ref(_('Unknown id'), ref=self.Entity.Id))
+        return True
+
 class EntityGetCRUDServiceAlchemy(EntityGetServiceAlchemy, EntityCRUDServiceAlchemy):
     '''
     Generic implementation for @see: IEntityGetCRUDService
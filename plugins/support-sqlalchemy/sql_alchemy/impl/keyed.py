@@ -15,6 +15,7 @@ from ally.exception import InputError, Ref
 from ally.internationalization import _
 from ally.support.api import keyed as api
 from ally.support.api.util_service import copy
+from ally.support.sqlalchemy.cache import cacheFor, invalidate, EntityCache
 from ally.support.sqlalchemy.session import SessionSupport
 from ally.support.sqlalchemy.util_service import buildQuery, buildLimits, handle
 from inspect import isclass
@@ -34,6 +35,12 @@ class EntitySupportAlchemy(SessionSupport):
     Provides support generic entity handling.
     '''
 
+    cacheEntries = 0
+    # The maximum number of entities cached by key in the process wide entity cache, 0 for no cache. Enable the cache
+    # only for reference data since the cached entities are provided as detached copies.
+    cacheTimeToLive = 300
+    # The number of seconds that an entity is cached.
+
     def __init__(self, Entity, QEntity=None):
         '''
         Construct the entity support for the provided model class and query class.
@@ -48,9 +55,13 @@ class EntitySupportAlchemy(SessionSupport):
         assert isinstance(Entity, MappedSupport), 'Invalid mapped class %s' % Entity
         self.modelType = typeFor(Entity)
         assert isinstance(self.modelType, TypeModel), 'Invalid model class %s' % Entity
+        assert isinstance(self.cacheEntries, int), 'Invalid cache entries %s' % self.cacheEntries
+        assert isinstance(self.cacheTimeToLive, (int, float)), 'Invalid cache time to live %s' % self.cacheTimeToLive
 
         self.model = self.modelType.container
         self.Entity = Entity
+        if self.cacheEntries: self.cache = cacheFor(Entity, 'Key', self.cacheEntries, self.cacheTimeToLive)
+        else: self.cache = None
 
         if QEntity is not None:
             assert isclass(QEntity), 'Invalid class %s' % QEntity
@@ -151,8 +162,15 @@ class EntityGetServiceAlchemy(EntitySupportAlchemy):
         '''
         @see: IEntityGetService.getByKey
         '''
-        try: return self.session().query(self.Entity).filter(self.Entity.Key == key).one()
+        if self.cache is not None:
+            assert isinstance(self.cache, EntityCache)
+            entity = self.cache.get(key)
+            if entity is not None: return entity
+
+        try: entity = self.session().query(self.Entity).filter(self.Entity.Key == key).one()
         except NoResultFound: raise InputError(Ref(_('Unknown key'), ref=self.Entity.Key))
+        if self.cache is not None: self.cache.put(key, entity, self.session())
+        return entity
 
 class EntityFindServiceAlchemy(EntitySupportAlchemy):
     '''
@@ -191,6 +209,7 @@ class EntityCRUDServiceAlchemy(EntitySupportAlchemy):
             self.session().add(entityDb)
             self.session().flush((entityDb,))
         except SQLAlchemyError as e: handle(e, entityDb)
+        invalidate(self.Entity, 'Key', entity.Key, self.session())
         return entity.Key
 
     def update(self, entity):
@@ -205,11 +224,13 @@ class EntityCRUDServiceAlchemy(EntitySupportAlchemy):
         try:
             self.session().flush((copy(entity, entityDb),))
         except SQLAlchemyError as e: handle(e, self.Entity)
+        invalidate(self.Entity, 'Key', entity.Key, self.session())
 
     def delete(self, key):
         '''
         @see: IEntityCRUDService.delete
         '''
+        invalidate(self.Entity, 'Key', key, self.session())
         try:
             return self.session().query(self.Entity).filter(self.Entity.Key == key).delete() > 0
         except OperationalError:
@@ -9,7 +9,7 @@ Created on Oct 18, 2012
 Configuration to add multiprocessing abilities to the database.
 '''
 
-from __setup__.ally_core_http import server_type
+from __setup__.ally_http import server_type
 from ally.container import ioc
 import ally_deploy_application
 import logging
@@ -9,12 +9,13 @@ Created on Nov 23, 2011
 Runs the production web server.
 '''
 
-from ..ally_core_http import server_type, server_version, server_host, \
-    server_port
-from ..ally_core_http.processor import pathAssemblies
-from ally.container import ioc
+from ..ally_core_http.processor import response_cache
+from ..ally_http import server_type, server_version, server_host, server_port
+from ..ally_http.server import pathAssemblies, admissionController
+from ally.container import ioc, support
 from ally.core.http.server import server_production
 from threading import Thread
+import signal
 
 # --------------------------------------------------------------------
 
@@ -33,11 +34,37 @@ def processes_thread_size():
     '''
     return 20
 
+@ioc.config
+def processes_reuse_port():
+    '''
+    If true and the platform supports it each process has its own server socket bound using the SO_REUSEPORT option
+    and the connections are distributed by the kernel, otherwise the processes accept the connections on a shared
+    server socket.
+    '''
+    return True
+
+ioc.doc(server_type, '''
+    "production" - pre-fork multiple processes server, each process handles the requests with multiple threads, send a
+                   SIGHUP signal in order to gracefully reload the processes, not available on Windows since it
+                   requires os.fork
+''')
+
+ioc.doc(response_cache, '''
+    !!!Attention, if the production server is selected with more than one process this option will always be "false"
+    since each process has its own cache and the invalidations made in one process do not reach the other processes
+''')
+
+@ioc.before(response_cache, auto=False)
+def response_cache_force():
+    if server_type() == 'production' and processes_pool_size() != 1: support.force(response_cache, False)
+
 # --------------------------------------------------------------------
 
 @ioc.start
 def runServer():
     if server_type() == 'production':
         args = pathAssemblies(), server_version(), server_host(), server_port(), processes_pool_size(), \
-        processes_thread_size()
+        processes_thread_size(), 1, processes_reuse_port(), admissionController()
+        # The signals can only be handled on the main thread.
+        if hasattr(signal, 'SIGHUP'): signal.signal(signal.SIGHUP, lambda *args: server_production.reload())
         Thread(name='HTTP server thread', target=server_production.run, args=args).start()
@@ -0,0 +1,127 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides the unit testing for the pre-fork production server.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.core.http.server.server_production import HTTPProductionServer
+from ally.design.context import Context, requires, defines
+from ally.design.processor import Assembly, HandlerProcessorProceed, \
+    ONLY_AVAILABLE
+from ally.http.server.server_basic import RequestHandler
+from ally.http.spec.server import RequestHTTP, RequestContentHTTP, ResponseHTTP, \
+    ResponseContentHTTP
+from collections import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from threading import Thread
+import os
+import re
+import signal
+import socket
+import time
+import unittest
+
+# --------------------------------------------------------------------
+
+class Request(Context):
+    uri = requires(str)
+
+class Response(Context):
+    code = defines(int)
+    isSuccess = defines(bool)
+
+class ResponseContent(Context):
+    source = defines(Iterable)
+
+class ProcessHandler(HandlerProcessorProceed):
+
+    def process(self, request:Request, response:Response, responseCnt:ResponseContent, **keyargs):
+        if request.uri == 'slow': time.sleep(0.2)
+        response.code, response.isSuccess = 200, True
+        responseCnt.source = (str(os.getpid()).encode(),)
+
+# --------------------------------------------------------------------
+
+@unittest.skipUnless(hasattr(os, 'fork') and hasattr(signal, 'SIGHUP'), 'The production server requires os.fork')
+class TestServerProduction(unittest.TestCase):
+
+    def setUp(self):
+        assembly = Assembly()
+        assembly.add(ProcessHandler())
+        processing = assembly.create(ONLY_AVAILABLE, request=RequestHTTP, requestCnt=RequestContentHTTP,
+                                     response=ResponseHTTP, responseCnt=ResponseContentHTTP)
+
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.port = sock.getsockname()[1]
+        self.server = HTTPProductionServer(('127.0.0.1', self.port), RequestHandler, [(re.compile('^'), processing)],
+                                           counts=2, threads=4, timeout=0.05)
+        self.previous = signal.signal(signal.SIGHUP, lambda *args: self.server.reload())
+        self.monitor = Thread(target=self.server.serve_forever)
+        self.monitor.start()
+        self.waitFor(lambda: len(self.server._workers) == 2)
+
+    def tearDown(self):
+        self.server._stop = True
+        self.monitor.join()
+        self.server.server_close()
+        signal.signal(signal.SIGHUP, self.previous)
+
+    def waitFor(self, condition, timeout=10):
+        end = time.time() + timeout
+        while not condition():
+            if time.time() > end: self.fail('Timed out waiting for the workers')
+            time.sleep(0.01)
+
+    def request(self, path):
+        connection = HTTPConnection('127.0.0.1', self.port, timeout=10)
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            return response.status, int(response.read())
+        finally: connection.close()
+
+    def testServe(self):
+        workers = set(self.server._workers)
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(self.request, ['/slow'] * 16))
+            self.assertEqual({200}, {status for status, _pid in results})
+            self.assertTrue({pid for _status, pid in results} <= workers)
+
+            # Reload while the requests are in progress, the previous workers finalize the requests they accepted.
+            pending = [executor.submit(self.request, '/slow') for _k in range(16)]
+            time.sleep(0.05)
+            os.kill(os.getpid(), signal.SIGHUP)
+            self.waitFor(lambda: len(self.server._workers) == 2 and not workers & set(self.server._workers))
+            results = [future.result() for future in pending]
+            results.extend(executor.map(self.request, ['/'] * 16))
+            self.assertEqual({200}, {status for status, _pid in results})
+            self.assertTrue({pid for _status, pid in results[16:]} <= set(self.server._workers))
+
+    def testRestart(self):
+        killed, alive = list(self.server._workers)
+        os.kill(killed, signal.SIGKILL)
+        self.waitFor(lambda: len(self.server._workers) == 2 and killed not in self.server._workers)
+        self.assertIn(alive, self.server._workers)
+
+        replaced = set(self.server._workers) - {alive}
+        pids = {self.request('/')[1] for _k in range(20)}
+        self.assertTrue(pids <= {alive} | replaced)
+        self.assertNotIn(killed, pids)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -6,22 +6,26 @@ Created on Jul 8, 2011
 @license: http://www.gnu.org/licenses/gpl-3.0.txt
 @author: Gabriel Nistor
 
-Provides the production web server based on the python build in http server that runs on multiple processors.
+Provides the production web server based on the python build in http server that runs on multiple processors. The
+server is a pre-fork server, each worker process accepts the connections by itself. Since the worker processes are
+created with os.fork this server is not available on Windows, use the basic or asyncore server there.
 '''
 
-from ally.core.http.server.server_basic import RequestHandler
-from ally.core.http.spec.server import RequestHTTP, ResponseHTTP, \
-    RequestContentHTTP, ResponseContentHTTP
 from ally.design.processor import Assembly, ONLY_AVAILABLE, CREATE_REPORT
-from collections import deque
+from ally.http.server.server_basic import RequestHandler
+from ally.http.support.admission import AdmissionController
+from ally.http.spec.server import RequestHTTP, ResponseHTTP, RequestContentHTTP, \
+    ResponseContentHTTP
 from concurrent.futures.thread import ThreadPoolExecutor
 from http.server import HTTPServer
-from multiprocessing import cpu_count, Pipe, Process
-from multiprocessing.reduction import reduce_handle, rebuild_handle
-from sched import scheduler
-from threading import Thread
+from multiprocessing import cpu_count
+from threading import BoundedSemaphore, Thread, Event
+import errno
 import logging
+import os
 import re
+import select
+import signal
 import socket
 import time
 
@@ -31,100 +35,312 @@ log = logging.getLogger(__name__)
 
 # --------------------------------------------------------------------
 
-class HTTPProductionServer(HTTPServer):
+class HTTPProductionServer:
     '''
-    @see: HTTPServer
-    Provides multiprocess handling of requests.
+    Provides the pre-fork multiprocess handling of requests. The listening sockets are created by this process and
+    inherited by the worker processes, either a listening socket for each worker slot bound using the SO_REUSEPORT
+    option, in which case the kernel distributes the connections, or one listening socket shared by all the workers.
+    This process only monitors the workers, it restarts the workers that die and on reload it replaces gracefully all
+    the workers. Since this process keeps the listening sockets open the connections waiting in the backlog of a
+    stopped worker are accepted by the worker that replaces it in the same slot, they are not reset.
     '''
-    
-    def __init__(self, serverAddress, RequestHandlerClass, *args, counts, threads, timeout):
-        '''
-        Constructs the multiprocess server.RequestHandlerClass
-        '''
-        assert isinstance(counts, int), 'Invalid processes pool size %s' % counts
-        super().__init__(serverAddress, None)
-        
-        processes, pipes = [], []
-        
-        schedule = scheduler(time.time, time.sleep)
-        def pingProcesses():
-            for pipe in pipes: pipe.send(True)
-            schedule.enter(timeout, 1, pingProcesses, ())
-        schedule.enter(timeout, 1, pingProcesses, ())
-        scheduleRunner = Thread(name='Ping processes thread', target=schedule.run)
-        scheduleRunner.daemon = True
-        scheduleRunner.start()
-        
-        for k in range(0, counts):
-            receiver, sender = Pipe(False)
-            
-            args = RequestHandlerClass, receiver, threads, 2 * timeout
-            process = Process(name='Process %s' % k, target=prepareServer, args=args)
-            processes.append(process)
-            pipes.append(sender)
-            
-            process.start()
-
-        self.processes = processes
-        self.pipes = deque(pipes)
-        
-    def process_request(self, request, address):
-        '''
-        @see: HTTPServer.process_request
-        '''
-        pipe = self.pipes[0]
-        self.pipes.rotate()
-        
-        pipe.send((reduce_handle(request.fileno()), address))
-        
+
+    def __init__(self, serverAddress, RequestHandlerClass, pathProcessing, *args, counts, threads, timeout,
+                 reusePort=True, admission=None):
+        '''
+        Constructs the multiprocess server.
+
+        @param serverAddress: tuple(string, integer)
+            The server address host and port.
+        @param RequestHandlerClass: class
+            The request handler class.
+        @param pathProcessing: list[tuple(regex, Processing)]
+            A list that contains tuples having on the first position a regex for matching a path, and the second value
+            the processing for handling the path.
+        @param counts: integer
+            The number of worker processes.
+        @param threads: integer
+            The number of threads per worker process.
+        @param timeout: integer|float
+            The interval in seconds for checking the worker processes.
+        @param reusePort: boolean
+            If True and the platform supports it each worker slot has its own listening socket bound using the
+            SO_REUSEPORT option.
+        @param admission: AdmissionController|None
+            The admission controller for the requests, each worker process has its own copy so the limits apply per
+            worker process, None for no admission control.
+        '''
+        assert isinstance(serverAddress, tuple), 'Invalid server address %s' % serverAddress
+        assert isinstance(pathProcessing, list), 'Invalid path processing %s' % pathProcessing
+        assert isinstance(counts, int) and counts > 0, 'Invalid processes pool size %s' % counts
+        assert isinstance(threads, int) and threads > 0, 'Invalid threads size %s' % threads
+        assert isinstance(timeout, (int, float)), 'Invalid timeout %s' % timeout
+        assert isinstance(reusePort, bool), 'Invalid reuse port flag %s' % reusePort
+        assert admission is None or isinstance(admission, AdmissionController), 'Invalid admission %s' % admission
+
+        self.serverAddress = serverAddress
+        self.RequestHandlerClass = RequestHandlerClass
+        self.pathProcessing = pathProcessing
+        self.counts = counts
+        self.threads = threads
+        self.timeout = timeout
+        self.reusePort = reusePort and hasattr(socket, 'SO_REUSEPORT')
+        self.admission = admission
+
+        if self.reusePort: self.sockets = [createSocket(serverAddress, True) for _k in range(counts)]
+        else: self.sockets = [createSocket(serverAddress)]
+
+        self._workers = {}
+        self._generation = 0
+        self._reload = self._stop = False
+
+    def serve_forever(self):
+        '''
+        Starts the worker processes and monitors them until the server is closed.
+        '''
+        for slot in range(self.counts): self._spawn(slot)
+        while not self._stop:
+            if self._reload:
+                self._reload = False
+                log.info('Reloading the worker processes')
+                previous = list(self._workers)
+                self._generation += 1
+                for slot in range(self.counts): self._spawn(slot)
+                for pid in previous: self._kill(pid)
+
+            for pid, (generation, slot) in list(self._workers.items()):
+                try: waited, status = os.waitpid(pid, os.WNOHANG)
+                except OSError: waited, status = pid, None
+                if waited == 0: continue
+
+                del self._workers[pid]
+                if generation == self._generation and not self._stop:
+                    log.warning('Worker process %s has stopped with status %s, starting a new one', pid, status)
+                    self._spawn(slot)
+            time.sleep(self.timeout)
+
+    def reload(self):
+        '''
+        Gracefully replaces the worker processes, the current workers finish the requests in progress before stopping.
+        This method can be called from a signal handler.
+        '''
+        self._reload = True
+
+    def server_close(self):
+        '''
+        Stops the worker processes and closes the server.
+        '''
+        self._stop = True
+        for pid in self._workers: self._kill(pid)
+        for pid in self._workers:
+            try: os.waitpid(pid, 0)
+            except OSError: pass
+        self._workers.clear()
+        for sock in self.sockets: sock.close()
+
+    # ----------------------------------------------------------------
+
+    def _spawn(self, slot):
+        '''
+        Forks a new worker process for the slot.
+        '''
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try: self._work(self.sockets[slot % len(self.sockets)])
+            except:
+                log.exception('A problem occurred in the worker process %s', os.getpid())
+                code = 1
+            finally: os._exit(code)
+
+        self._workers[pid] = (self._generation, slot)
+        assert log.debug('Started worker process %s for slot %s', pid, slot) or True
+
+    def _kill(self, pid):
+        '''
+        Signals the worker process to stop.
+        '''
+        try: os.kill(pid, signal.SIGTERM)
+        except OSError: pass
+
+    def _work(self, sock):
+        '''
+        Serves the requests in the worker process.
+        '''
+        server = WorkerServer(sock, self.RequestHandlerClass, self.pathProcessing, self.threads, self.admission)
+
+        # The worker stops accepting new connections on terminate, the requests in progress are finalized.
+        signal.signal(signal.SIGTERM, lambda *args: Thread(target=server.shutdown).start())
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        if hasattr(signal, 'SIGHUP'): signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+        parent = os.getppid()
+        def watchParent():
+            while os.getppid() == parent: time.sleep(self.timeout)
+            log.warning('The parent process has stopped, stopping the worker process %s', os.getpid())
+            server.shutdown()
+        watcher = Thread(name='Parent watch thread', target=watchParent)
+        watcher.daemon = True
+        watcher.start()
+
+        try: server.serve_forever()
+        finally: server.server_close()
+
+class WorkerServer(HTTPServer):
+    '''
+    The server that runs in a worker process, a free thread is reserved before the listening socket is polled so that
+    the connections are accepted only if there is a thread to handle them, a busy worker leaves the connections in the
+    backlog for the other workers or for its free threads.
+    '''
+
+    def __init__(self, sock, RequestHandlerClass, pathProcessing, threads, admission=None):
+        '''
+        Construct the worker server.
+
+        @param sock: socket
+            The listening socket.
+        @see: HTTPProductionServer.__init__
+        '''
+        assert isinstance(sock, socket.socket), 'Invalid socket %s' % sock
+        assert isinstance(pathProcessing, list), 'Invalid path processing %s' % pathProcessing
+        assert isinstance(threads, int), 'Invalid threads size %s' % threads
+        super().__init__(sock.getsockname(), RequestHandlerClass, False)
+        self.socket.close()
+        self.socket = sock
+        self.server_name, self.server_port = sock.getsockname()[:2]
+
+        # The listening socket is shared so another worker might accept the connection after this one has polled it.
+        sock.setblocking(False)
+
+        self.pathProcessing = pathProcessing
+        self.admission = admission
+        self._pool = ThreadPoolExecutor(threads)
+        self._free = BoundedSemaphore(threads)
+        self._serving = True
+        self._stopped = Event()
+        self._stopped.set()
+
+    def serve_forever(self, poll_interval=0.5):
+        '''
+        @see: HTTPServer.serve_forever
+        '''
+        self._stopped.clear()
+        try:
+            while self._serving:
+                if not self._free.acquire(timeout=poll_interval): continue
+                try: accepted = self._accept(poll_interval)
+                except:
+                    self._free.release()
+                    raise
+                if not accepted: self._free.release()
+        finally: self._stopped.set()
+
+    def shutdown(self):
+        '''
+        @see: HTTPServer.shutdown
+        '''
+        self._serving = False
+        self._stopped.wait()
+
     def server_close(self):
         '''
         @see: HTTPServer.server_close
         '''
+        self._pool.shutdown(True)
         super().server_close()
-        for pipe in self.pipes: pipe.send(None)
-        for process in self.processes: process.join()
-    
+
+    def _accept(self, timeout):
+        '''
+        Accepts a connection and submits it to the pool, needs to be called having a reserved free thread.
+
+        @param timeout: integer|float
+            The number of seconds to wait for a connection.
+        @return: boolean
+            True if a connection has been submitted to the pool and the reserved thread is released by the pool.
+        '''
+        try: ready = select.select([self], [], [], timeout)[0]
+        except select.error as e:
+            if e.args[0] != errno.EINTR: raise
+            return False
+        if not ready or not self._serving: return False
+
+        try: request, address = self.get_request()
+        except socket.error: return False  # Another worker has accepted the connection.
+        request.setblocking(True)
+
+        if not self.verify_request(request, address):
+            self.shutdown_request(request)
+            return False
+        self._pool.submit(self._process, request, address)
+        return True
+
+    def _process(self, request, address):
+        '''
+        Process the request on a pool thread.
+        '''
+        try: self.finish_request(request, address)
+        except: self.handle_error(request, address)
+        finally:
+            self.shutdown_request(request)
+            self._free.release()
+
 # --------------------------------------------------------------------
 
-def prepareServer(RequestHandlerClass, pipe, threads, timeout):
+def createSocket(serverAddress, reusePort=False):
     '''
-    Prepare in a process the request handling.
+    Creates the listening socket.
+
+    @param serverAddress: tuple(string, integer)
+        The server address host and port.
+    @param reusePort: boolean
+        Flag indicating that the socket should be bound using the SO_REUSEPORT option.
+    @return: socket
+        The listening socket.
     '''
-    def process(request, address):
-        RequestHandlerClass(request, address, None)
-        try: request.shutdown(socket.SHUT_WR)
-        except socket.error: pass  # some platforms may raise ENOTCONN here
-        request.close()
-    
-    pool = ThreadPoolExecutor(threads)
-    while True:
-        if not pipe.poll(timeout): break
-        else:
-            data = pipe.recv()
-            if data is None: break
-            elif data is True: continue
-            
-            requestfd, address = data
-            request = socket.fromfd(rebuild_handle(requestfd), socket.AF_INET, socket.SOCK_STREAM)
-            
-            pool.submit(process, request, address)
-            
-    pool.shutdown(False)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reusePort: sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(serverAddress)
+    sock.listen(1024)
+    return sock
 
 # --------------------------------------------------------------------
 
-def run(pathAssemblies, server_version, host='0.0.0.0', port=80, processes='auto', threads=20, timeout=1):
+_server = None
+# The running production server.
+
+def reload():
+    '''
+    Gracefully reloads the worker processes of the running production server, this function is intended to be used as
+    a signal handler.
+    '''
+    if _server is not None: _server.reload()
+
+def run(pathAssemblies, server_version, host='0.0.0.0', port=80, processes='auto', threads=20, timeout=1,
+        reusePort=True, admission=None):
     '''
-    Run the basic server.
-    
+    Run the production server.
+
     @param pathAssemblies: list[(regex, Assembly)]
-        A list that contains tuples having on the first position a string pattern for matching a path, and as a value 
+        A list that contains tuples having on the first position a string pattern for matching a path, and as a value
         the assembly to be used for creating the context for handling the request for the path.
+    @param processes: integer|string
+        The number of worker processes, "auto" for the number of available CPUs.
+    @param threads: integer
+        The number of threads per worker process.
+    @param reusePort: boolean
+        If True and the platform supports it each worker process has its own listening socket bound using the
+        SO_REUSEPORT option, otherwise the worker processes accept the connections on a shared listening socket.
+    @raise OSError: If the platform has no os.fork, like Windows.
+    @param admission: AdmissionController|None
+        The admission controller for the requests, the limits apply per worker process.
     '''
+    global _server
     assert isinstance(pathAssemblies, list), 'Invalid path assemblies %s' % pathAssemblies
+    if not hasattr(os, 'fork'):
+        raise OSError('The production server requires os.fork, on this platform use the basic or asyncore server')
     RequestHandler.server_version = server_version
-    RequestHandler.pathProcessing = []
+    pathProcessing = []
     for pattern, assembly in pathAssemblies:
         assert isinstance(pattern, str), 'Invalid pattern %s' % pattern
         assert isinstance(assembly, Assembly), 'Invalid assembly %s' % assembly
@@ -134,18 +350,19 @@ def run(pathAssemblies, server_version, host='0.0.0.0', port=80, processes='auto
                                              response=ResponseHTTP, responseCnt=ResponseContentHTTP)
 
         log.info('Assembly report for pattern \'%s\':\n%s', pattern, report)
-        RequestHandler.pathProcessing.append((re.compile(pattern), processing))
-    
+        pathProcessing.append((re.compile(pattern), processing))
+
     if processes == 'auto': processes = cpu_count()
-    
+
     try:
-        server = HTTPProductionServer((host, port), RequestHandler, counts=processes, threads=threads, timeout=timeout)
+        _server = HTTPProductionServer((host, port), RequestHandler, pathProcessing, counts=processes, threads=threads,
+                                       timeout=timeout, reusePort=reusePort, admission=admission)
         print('=' * 50, 'Started HTTP REST API server...')
-        server.serve_forever()
+        _server.serve_forever()
     except KeyboardInterrupt:
         print('=' * 50, '^C received, shutting down server')
-        server.server_close()
+        _server.server_close()
     except:
         log.exception('=' * 50 + ' The server has stooped')
-        try: server.server_close()
+        try: _server.server_close()
         except: pass
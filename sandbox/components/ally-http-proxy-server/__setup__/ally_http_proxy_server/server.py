@@ -35,6 +35,29 @@ def proxied_ports() -> list:
     '''
     return ['auto']
 
+@ioc.config
+def proxy_health_url() -> str:
+    '''
+    The URL requested on the proxied servers in order to check their health, any response with a status code below 500
+    is considered healthy, the requests are not forwarded to the unhealthy servers. If empty no health checks are made.
+    '''
+    return '/'
+
+@ioc.config
+def proxy_health_interval() -> float:
+    '''The number of seconds between the proxied servers health checks'''
+    return 5
+
+@ioc.config
+def proxy_health_timeout() -> float:
+    '''The number of seconds to wait for a proxied server health check response'''
+    return 2
+
+@ioc.config
+def proxy_pool_size() -> int:
+    '''The maximum number of idle keep alive connections kept for each proxied server'''
+    return 10
+
 # --------------------------------------------------------------------
 
 @ioc.entity
@@ -56,5 +79,6 @@ def runServer():
         if len(proxiedPorts) == 1 and proxiedPorts[0] == 'auto':
             proxiedPorts = [server_port() + k for k in range(1, cpu_count() + 1)]
         
-        args = proxiedServer, proxiedPorts, server_host(), server_port()
+        args = proxiedServer, proxiedPorts, server_host(), server_port(), 1, proxy_health_url(), \
+            proxy_health_interval(), proxy_health_timeout(), proxy_pool_size()
         Thread(name='HTTP server thread', target=server_proxy.run, args=args).start()
@@ -0,0 +1,129 @@
+'''
+Created on Oct 18, 2026
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: agent
+
+Provides the unit testing for the proxy server load balancing.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.core.http.server.server_proxy import ProxyServer, Backend
+from http.client import HTTPConnection
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+from threading import Thread
+import asyncore
+import time
+import unittest
+
+# --------------------------------------------------------------------
+
+class BackendServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), BackendHandler)
+        self.connections = set()
+
+class BackendHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        if self.path == '/slow': time.sleep(0.5)
+        self.respond(str(self.server.server_port).encode())
+
+    def do_POST(self):
+        self.respond(self.rfile.read(int(self.headers['Content-Length'])))
+
+    def respond(self, content):
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args): pass
+
+# --------------------------------------------------------------------
+
+class TestProxyServer(unittest.TestCase):
+
+    def setUp(self):
+        self.backends = [BackendServer() for _k in range(3)]
+        for backend in self.backends:
+            serving = Thread(target=backend.serve_forever)
+            serving.daemon = True
+            serving.start()
+
+        self.server = ProxyServer(('127.0.0.1', 0), [Backend(('127.0.0.1', backend.server_port))
+                                                     for backend in self.backends])
+        self.port = self.server.socket.getsockname()[1]
+        self.serving = True
+        self.loop = Thread(target=self.serve)
+        self.loop.start()
+
+    def tearDown(self):
+        self.serving = False
+        self.loop.join()
+        asyncore.close_all()
+        for backend in self.backends:
+            backend.shutdown()
+            backend.server_close()
+
+    def serve(self):
+        while self.serving: asyncore.loop(0.01, count=1)
+
+    def request(self, method='GET', url='/', body=None):
+        connection = HTTPConnection('127.0.0.1', self.port, timeout=10)
+        try:
+            connection.request(method, url, body)
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally: connection.close()
+
+    def backendOf(self, content):
+        return [backend.server_port for backend in self.backends].index(int(content))
+
+    def testRoundRobin(self):
+        chosen = [self.backendOf(self.request()[1]) for _k in range(6)]
+        self.assertEqual([0, 1, 2, 0, 1, 2], chosen)
+        for statistics in self.server.statistics().values():
+            self.assertEqual(2, statistics['requests'])
+            self.assertEqual(0, statistics['outstanding'])
+
+    def testLeastOutstanding(self):
+        slow = []
+        requesting = Thread(target=lambda: slow.append(self.request(url='/slow')))
+        requesting.start()
+        while self.server.backends[0].outstanding == 0: time.sleep(0.01)
+
+        chosen = [self.backendOf(self.request()[1]) for _k in range(4)]
+        requesting.join()
+        self.assertNotIn(0, chosen)
+        self.assertEqual({1, 2}, set(chosen))
+        self.assertEqual(0, self.backendOf(slow[0][1]))
+
+    def testConnectionReuse(self):
+        for _k in range(9): self.assertEqual(200, self.request()[0])
+        for backend in self.backends: self.assertEqual(1, len(backend.connections))
+        for statistics in self.server.statistics().values(): self.assertEqual(1, statistics['idle'])
+
+    def testLargePost(self):
+        content = bytes(range(256)) * 8192
+        status, response = self.request('POST', '/', content)
+        self.assertEqual(200, status)
+        self.assertEqual(content, response)
+        self.assertEqual(1, sum(statistics['requests'] for statistics in self.server.statistics().values()))
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
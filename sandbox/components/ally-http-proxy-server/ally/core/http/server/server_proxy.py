@@ -9,8 +9,10 @@ Created on Jul 8, 2011
 Provides the production web server based on the python build in http server that runs on multiple processors.
 '''
 
+from ally.http.support.parser import RequestParser, ResponseParser, ContentParser
 from asyncore import dispatcher
 from collections import deque
+from http.client import HTTPConnection, HTTPException
 from multiprocessing import Pipe, Process
 from sched import scheduler
 from threading import Thread
@@ -22,82 +24,497 @@ import time
 # --------------------------------------------------------------------
 
 log = logging.getLogger(__name__)
-    
+
+RESPONSE_BAD_GATEWAY = b'HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n'
+# The response sent to the client when the proxied server fails before responding.
+RESPONSE_BAD_REQUEST = b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n'
+# The response sent to the client when the request head cannot be parsed.
+METHODS_IDEMPOTENT = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'))
+# The methods of the requests that are retried on a new connection if a reused connection is found closed.
+
+# --------------------------------------------------------------------
+
+class Backend:
+    '''
+    The proxied server, keeps the requests in processing count, the health, the idle connections pool and the latency
+    statistics for the server.
+    '''
+    __slots__ = ('address', 'outstanding', 'healthy', 'idle', 'requests', 'errors', 'latencies', 'maximum')
+
+    samples = 1000
+    # The number of latest latencies kept for computing the percentiles.
+
+    def __init__(self, address):
+        '''
+        Construct the backend.
+
+        @param address: tuple(string, integer)
+            The address of the proxied server.
+        '''
+        assert isinstance(address, tuple), 'Invalid address %s' % address
+        self.address = address
+        self.outstanding = 0
+        self.healthy = True
+        self.idle = []
+        self.requests = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=self.samples)
+        self.maximum = 0
+
+    def finished(self, latency):
+        '''
+        Records a request that has been responded by the proxied server.
+
+        @param latency: float
+            The number of seconds from forwarding the request until the response is completed.
+        '''
+        self.requests += 1
+        self.latencies.append(latency)
+        if latency > self.maximum: self.maximum = latency
+
+    def failed(self, isChecked):
+        '''
+        Records a request that failed on the proxied server.
+
+        @param isChecked: boolean
+            Flag indicating that the health of the server is checked, if so the server is considered unhealthy until
+            the next health check succeeds.
+        '''
+        self.errors += 1
+        if isChecked: self.healthy = False
+
+    def statistics(self):
+        '''
+        Provides the backend statistics, the latencies are in milliseconds.
+
+        @return: dictionary{string: object}
+            The statistics.
+        '''
+        latencies = sorted(self.latencies)
+        if latencies:
+            latency = dict(average=1000 * sum(latencies) / len(latencies), maximum=1000 * self.maximum,
+                           p50=1000 * latencies[len(latencies) // 2], p99=1000 * latencies[int(len(latencies) * 0.99)])
+        else: latency = None
+        return dict(healthy=self.healthy, outstanding=self.outstanding, idle=len(self.idle), requests=self.requests,
+                    errors=self.errors, latency=latency)
+
 # --------------------------------------------------------------------
 
 class ProxyServer(dispatcher):
     '''
-    The proxy server that waits for the incoming connections.
+    The proxy server that waits for the incoming connections, each request is forwarded to the healthy proxied server
+    that has the least requests in processing, the connections to the proxied servers are kept alive and reused.
     '''
 
-    def __init__(self, address, proxies):
+    def __init__(self, address, backends, poolSize=10):
         '''
         Construct the proxy sever.
+
+        @param backends: list[Backend]
+            The proxied servers.
+        @param poolSize: integer
+            The maximum number of idle connections kept for each proxied server.
         '''
+        assert isinstance(backends, list) and backends, 'Invalid backends %s' % backends
+        assert isinstance(poolSize, int) and poolSize >= 0, 'Invalid pool size %s' % poolSize
         dispatcher.__init__(self)
         self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
         self.set_reuse_addr()
-        self.proxies = deque(proxies)
+        self.backends = backends
+        self.poolSize = poolSize
         self.address = address
         self.bind(address)
-        self.listen(5)
-    
+        self.listen(1024)
+
+        self.isChecked = False
+        self._next = 0
+
     def handle_accept(self):
-        ProxyReceiver(self, self.proxies[0], *self.accept())
-        self.proxies.rotate()
+        accepted = self.accept()
+        if accepted is not None: ProxyReceiver(self, accepted[0])
+
+    def choose(self):
+        '''
+        Chooses the backend for a request, the healthy backend with the least requests in processing, the ties are
+        resolved in a round robin manner. If no backend is healthy all the backends are considered.
+
+        @return: Backend
+            The backend to forward the request to.
+        '''
+        backends = [backend for backend in self.backends if backend.healthy] or self.backends
+        count = len(backends)
+        start = self._next % count
+        chosen = None
+        for k in range(start, start + count):
+            backend = backends[k % count]
+            if chosen is None or backend.outstanding < chosen.outstanding: chosen, index = backend, k
+        self._next = index + 1
+        return chosen
+
+    def acquire(self, backend):
+        '''
+        Provides a connection to the backend, an idle connection is reused if available.
 
-class ProxyReceiver(dispatcher):
+        @param backend: Backend
+            The backend to connect to.
+        @return: ProxySender
+            The connection to the backend.
+        '''
+        assert isinstance(backend, Backend), 'Invalid backend %s' % backend
+        while backend.idle:
+            sender = backend.idle.pop()
+            if sender.connected:
+                sender.reused = True
+                return sender
+        return ProxySender(self, backend)
+
+    def release(self, sender):
+        '''
+        Releases the connection to the backend, the connection is kept idle for reuse if the pool is not full.
+
+        @param sender: ProxySender
+            The connection to release.
+        '''
+        assert isinstance(sender, ProxySender), 'Invalid sender %s' % sender
+        if len(sender.backend.idle) < self.poolSize: sender.backend.idle.append(sender)
+        else: sender.close()
+
+    def statistics(self):
+        '''
+        Provides the statistics for all the backends.
+
+        @return: dictionary{string: dictionary{string: object}}
+            The backends statistics indexed by the backend address.
+        '''
+        return {'%s:%s' % backend.address: backend.statistics() for backend in self.backends}
+
+class Connection(dispatcher):
+    '''
+    Connection with buffered output.
+    '''
+    bufferSize = 65536
+    # The size used for reading and sending.
+
+    def __init__(self, sock=None):
+        dispatcher.__init__(self, sock)
+        self._out = bytearray()
+        self._closeWhenDone = False
+
+    def write(self, data):
+        '''
+        Writes the data on the connection as soon as possible.
+        '''
+        self._out += data
+
+    def isCongested(self):
+        '''
+        Checks if the connection has to much data waiting to be sent, in this case the peer should stop reading.
+        '''
+        return len(self._out) > 4 * self.bufferSize
+
+    def closeWhenDone(self):
+        '''
+        Closes the connection after all the data is sent.
+        '''
+        if self._out: self._closeWhenDone = True
+        else: self.close()
+
+    def writable(self):
+        return not self.connected or bool(self._out)
+
+    def handle_write(self):
+        sent = self.send(self._out[:self.bufferSize])
+        if sent: del self._out[:sent]
+        if not self._out and self._closeWhenDone: self.close()
+
+    def handle_error(self):
+        log.exception('A problem occurred in the proxy connection')
+        self.handle_close()
+
+class ProxyReceiver(Connection):
     '''
-    Receives data from the proxy.
+    The client connection, the requests are forwarded one at a time to the proxied servers, the pipelined requests
+    wait for the response of the previous request.
     '''
-    bufferSize = 4096
-    
-    def __init__(self, server, address, connection, fromAddress):
+
+    def __init__(self, server, connection):
         '''
+        Construct the receiver.
         '''
-        dispatcher.__init__ (self, connection)
+        assert isinstance(server, ProxyServer), 'Invalid server %s' % server
+        Connection.__init__(self, connection)
         self.server = server
-        self.address = address
-        self.sender = ProxySender(self, address)
-    
+        self.parser = RequestParser()
+        self.sender = None
+        self.content = None
+        self.method = None
+        self.keepAlive = True
+        self.tunnel = False
+
+        self._head = b''
+        self._pending = b''
+
+    def readable(self):
+        if self._closeWhenDone: return False
+        if self.sender is None: return not self._pending
+        if self.sender.isCongested(): return False
+        return self.tunnel or not self.content.isComplete
+
     def handle_read(self):
-        try: data = self.recv(self.bufferSize)
-        except socket.error:
-            self.handle_error()
-            return
-        self.sender.send(data)
-        
-    def handle_close (self):
-        self.sender.close()
+        data = self.recv(self.bufferSize)
+        if data: self._process(data)
+
+    def handle_close(self):
+        if self.sender is not None: self.sender.abort()
         self.close()
 
-class ProxySender(dispatcher):
+    def responded(self, keepAlive):
+        '''
+        Called by the sender when the response is completed.
+
+        @param keepAlive: boolean
+            Flag indicating that the response allows the client connection to be kept alive.
+        '''
+        self.sender = None
+        if not (self.keepAlive and keepAlive): self.closeWhenDone()
+        elif self._pending:
+            data, self._pending = self._pending, b''
+            self._process(data)
+
+    def failed(self, responded):
+        '''
+        Called by the sender when the proxied server failed.
+
+        @param responded: boolean
+            Flag indicating that a part of the response has already been sent to the client.
+        '''
+        self.sender = None
+        if not responded: self.write(RESPONSE_BAD_GATEWAY)
+        self.closeWhenDone()
+
+    def retry(self, backend, request):
+        '''
+        Called by the sender when a reused connection is found closed before the proxied server responded, the request
+        is forwarded again on a new connection.
+
+        @param backend: Backend
+            The backend of the closed connection.
+        @param request: bytes
+            The request data forwarded so far.
+        '''
+        self.sender = ProxySender(self.server, backend)
+        self.sender.forward(self, request)
+
+    # ----------------------------------------------------------------
+
+    def _process(self, data):
+        '''
+        Process the data received from the client.
+        '''
+        if self.sender is None:
+            if self._pending:
+                self._pending += data
+                return
+
+            self._head += data
+            try:
+                rest = self.parser.feed(data)
+                if rest is None: return
+                self.content = ContentParser(self.parser.headers)
+            except ValueError:
+                assert log.debug('Invalid request from %s', self.addr, exc_info=True) or True
+                self.write(RESPONSE_BAD_REQUEST)
+                self.closeWhenDone()
+                return
+
+            head, self._head = self._head[:len(self._head) - len(rest)], b''
+            self.method, self.keepAlive = self.parser.method, self.parser.isKeepAlive()
+
+            self.sender = self.server.acquire(self.server.choose())
+            self.sender.forward(self, head)
+            data = rest
+
+        if self.tunnel:
+            self.sender.write(data)
+            return
+
+        try: count = self.content.feed(data)
+        except ValueError:
+            assert log.debug('Invalid request content from %s', self.addr, exc_info=True) or True
+            self.handle_close()
+            return
+        if count: self.sender.write(data[:count])
+        if count < len(data): self._pending = data[count:]
+
+class ProxySender(Connection):
     '''
-    Sends data to the proxied server.
+    The connection to a proxied server, it forwards the requests from the client connections and the responses back.
     '''
-    bufferSize = 4096
 
-    def __init__(self, receiver, address):
+    def __init__(self, server, backend):
         '''
+        Construct the sender.
         '''
-        dispatcher.__init__(self)
-        self.receiver = receiver
+        assert isinstance(server, ProxyServer), 'Invalid server %s' % server
+        assert isinstance(backend, Backend), 'Invalid backend %s' % backend
+        Connection.__init__(self)
+        self.server = server
+        self.backend = backend
+        self.receiver = None
+        self.parser = ResponseParser()
+        self.content = None
+        self.responded = False
+        self.reused = False
+        self.started = None
+
+        self._head = b''
+        self._request = None
+
         self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.connect(address)
-    
+        self.connect(backend.address)
+
+    def forward(self, receiver, head):
+        '''
+        Starts forwarding a request on this connection.
+
+        @param receiver: ProxyReceiver
+            The client connection of the request.
+        @param head: bytes
+            The request head.
+        '''
+        assert isinstance(receiver, ProxyReceiver), 'Invalid receiver %s' % receiver
+        assert self.receiver is None, 'The connection is already forwarding a request'
+        self.receiver = receiver
+        self.content = None
+        self.responded = False
+        self.started = time.time()
+        self.backend.outstanding += 1
+        # The request is kept in case the reused connection is found closed.
+        if self.reused and receiver.method in METHODS_IDEMPOTENT: self._request = bytearray()
+        else: self._request = None
+        self.write(head)
+
+    def write(self, data):
+        '''
+        @see: Connection.write
+        '''
+        if self._request is not None:
+            if len(self._request) + len(data) > self.bufferSize: self._request = None
+            else: self._request += data
+        Connection.write(self, data)
+
+    def abort(self):
+        '''
+        Aborts the request in processing since the client has closed the connection.
+        '''
+        if self.receiver is not None:
+            self.receiver = None
+            self.backend.outstanding -= 1
+        self.close()
+
+    def readable(self):
+        return self.receiver is None or not self.receiver.isCongested()
+
+    def handle_connect(self): pass
+
     def handle_read(self):
-        try: data = self.recv(self.bufferSize)
-        except socket.error:
-            self.handle_error()
+        data = self.recv(self.bufferSize)
+        if not data: return
+        if self.receiver is None:
+            # Data from the proxied server while no request is in processing, the connection cannot be reused.
+            self.handle_close()
             return
-        self.receiver.send(data)
-        
-    def handle_close (self):
-        self.receiver.close()
+
+        try: self._process(data)
+        except ValueError:
+            assert log.debug('Invalid response from %s:%s', *self.backend.address, exc_info=True) or True
+            self.handle_close()
+
+    def handle_close(self):
+        if self.receiver is not None:
+            if self.content is not None and self.content.isUntilClose(): self._finished(False)
+            else:
+                receiver, self.receiver = self.receiver, None
+                self.backend.outstanding -= 1
+                if self._request is not None and not self.responded:
+                    assert log.debug('Reused connection to %s:%s closed, retrying', *self.backend.address) or True
+                    receiver.retry(self.backend, bytes(self._request))
+                else:
+                    self.backend.failed(self.server.isChecked)
+                    log.warning('Proxied server %s:%s failed to respond', *self.backend.address)
+                    receiver.failed(self.responded)
+        try: self.backend.idle.remove(self)
+        except ValueError: pass
         self.close()
 
+    # ----------------------------------------------------------------
+
+    def _process(self, data):
+        '''
+        Process the data received from the proxied server.
+        '''
+        while self.content is None:
+            self._head += data
+            data = self.parser.feed(data)
+            if data is None: return
+
+            head, self._head = self._head[:len(self._head) - len(data)], b''
+            self.receiver.write(head)
+            self.responded, self._request = True, None
+
+            code = self.parser.code
+            if code == 101: self.receiver.tunnel = True
+            elif code < 200: continue  # Interim response, the final response follows.
+            self.content = ContentParser(self.parser.headers, self.parser.hasContent(self.receiver.method), True)
+
+        count = self.content.feed(data)
+        if count: self.receiver.write(data[:count])
+        if self.content.isComplete: self._finished(count == len(data) and self.parser.isKeepAlive())
+
+    def _finished(self, reusable):
+        '''
+        Finalizes the request in processing.
+
+        @param reusable: boolean
+            Flag indicating that the connection can be reused for other requests.
+        '''
+        receiver, self.receiver = self.receiver, None
+        self.backend.outstanding -= 1
+        self.backend.finished(time.time() - self.started)
+
+        keepAlive = self.parser.isKeepAlive() and not self.content.isUntilClose()
+        if reusable: self.server.release(self)
+        else: self.close()
+        receiver.responded(keepAlive)
+
 # -----------------------------------------------------------------
 
+def checkHealth(server, url, interval, timeout):
+    '''
+    Checks periodically the health of the proxied servers by requesting the provided URL, any response with a status
+    code below 500 is considered healthy.
+    '''
+    assert isinstance(server, ProxyServer), 'Invalid server %s' % server
+    assert isinstance(url, str), 'Invalid URL %s' % url
+    while True:
+        time.sleep(interval)
+        for backend in server.backends:
+            assert isinstance(backend, Backend)
+            connection = HTTPConnection(*backend.address, timeout=timeout)
+            try:
+                connection.request('GET', url)
+                response = connection.getresponse()
+                response.read()
+                healthy = response.status < 500
+            except (OSError, HTTPException): healthy = False
+            finally: connection.close()
+
+            if backend.healthy != healthy:
+                if healthy: log.info('Proxied server %s:%s is healthy', *backend.address)
+                else: log.warning('Proxied server %s:%s failed the health check', *backend.address)
+            backend.healthy = healthy
+        assert log.debug('Proxied servers statistics: %s', server.statistics()) or True
+
 def prepareServer(server, port, pipe, timeout):
     '''
     Prepare the process in a processor.
@@ -111,17 +528,26 @@ def prepareServer(server, port, pipe, timeout):
 
 # --------------------------------------------------------------------
 
-def run(proxiedServer, proxiedPorts, host='0.0.0.0', port=80, timeout=1):
+def run(proxiedServer, proxiedPorts, host='0.0.0.0', port=80, timeout=1, healthURL=None, healthInterval=5,
+        healthTimeout=2, poolSize=10):
     '''
     Run the proxy server.
-    
+
     @param proxiedServer: callable(integer)
         A callable that spawns a server for the provided port.
     @param proxiedPorts: list[integer]
         The list of ports to use for the spawned proxies.
+    @param healthURL: string|None
+        The URL requested on the proxied servers for checking their health, None for no health checks.
+    @param healthInterval: integer|float
+        The number of seconds between the health checks.
+    @param healthTimeout: integer|float
+        The number of seconds to wait for a health check response.
+    @param poolSize: integer
+        The maximum number of idle connections kept for each proxied server.
     '''
     processes, pipes = [], []
-        
+
     schedule = scheduler(time.time, time.sleep)
     def pingProcesses():
         for pipe in pipes: pipe.send(True)
@@ -130,19 +556,25 @@ def run(proxiedServer, proxiedPorts, host='0.0.0.0', port=80, timeout=1):
     scheduleRunner = Thread(name='Ping processes thread', target=schedule.run)
     scheduleRunner.daemon = True
     scheduleRunner.start()
-    
+
     for proxiedPort in proxiedPorts:
         receiver, sender = Pipe(False)
-        
+
         args = proxiedServer, proxiedPort, receiver, 2 * timeout
         process = Process(name='Process server on port %s' % proxiedPort, target=prepareServer, args=args)
         processes.append(process)
         pipes.append(sender)
-        
+
         process.start()
-    
-    ProxyServer((host, port), [(host, proxiedPort) for proxiedPort in proxiedPorts])
-    
+
+    server = ProxyServer((host, port), [Backend((host, proxiedPort)) for proxiedPort in proxiedPorts], poolSize)
+    if healthURL:
+        server.isChecked = True
+        healthRunner = Thread(name='Health check thread', target=checkHealth,
+                              args=(server, healthURL, healthInterval, healthTimeout))
+        healthRunner.daemon = True
+        healthRunner.start()
+
     try:
         print('=' * 50, 'Started HTTP PROXY server...')
         asyncore.loop()